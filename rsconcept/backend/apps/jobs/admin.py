@@ -0,0 +1,14 @@
+''' Admin view: Background jobs. '''
+from django.contrib import admin
+
+from . import models
+
+
+@admin.register(models.Job)
+class JobAdmin(admin.ModelAdmin):
+    ''' Admin model: Job. '''
+    date_hierarchy = 'time_create'
+    list_display = ['id', 'kind', 'status', 'owner', 'estimate', 'progress', 'time_create', 'time_finish']
+    list_filter = ['status', 'kind']
+    search_fields = ['id', 'kind', 'owner__username']
+    readonly_fields = ['params', 'result', 'error']
@@ -0,0 +1,12 @@
+''' Application: Background jobs. '''
+from django.apps import AppConfig
+from django.utils.module_loading import autodiscover_modules
+
+
+class JobsConfig(AppConfig):
+    ''' Application config. '''
+    default_auto_field = 'django.db.models.BigAutoField'
+    name = 'apps.jobs'
+
+    def ready(self) -> None:
+        autodiscover_modules('jobs')
@@ -0,0 +1,98 @@
+''' Command: Process background jobs queue. '''
+import multiprocessing
+import os
+import socket
+import time
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connections
+from django.utils import timezone
+
+from apps.jobs.models import Job, JobStatus
+from apps.jobs.process import init_process
+from apps.jobs.runner import run_job
+
+
+class Command(BaseCommand):
+    ''' Local worker polling jobs table and running jobs in process pool. '''
+    help = 'Process background jobs queue using local process pool'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--workers', type=int, default=settings.JOBS_WORKERS,
+            help='Number of worker processes, 0 runs jobs in current process'
+        )
+        parser.add_argument(
+            '--poll', type=float, default=settings.JOBS_POLL_INTERVAL,
+            help='Seconds between queue checks when idle'
+        )
+        parser.add_argument('--once', action='store_true', help='Exit when queue is empty')
+
+    def handle(self, *args, **options) -> None:
+        host = socket.gethostname()
+        name = f'{host}:{os.getpid()}'
+        stale = Job.fail_stale(timedelta(seconds=settings.JOBS_STALE_TIMEOUT), host)
+        if stale:
+            self.stdout.write(f'Failed stale jobs: {stale}')
+        if options['workers'] <= 0:
+            self._run_serial(name, options['poll'], options['once'])
+        else:
+            self._run_pool(name, options['workers'], options['poll'], options['once'])
+
+    def _run_serial(self, name: str, poll: float, once: bool) -> None:
+        while True:
+            job = Job.claim_next(name)
+            if job is None:
+                if once:
+                    return
+                time.sleep(poll)
+                continue
+            self._report(job.pk, run_job(job.pk))
+
+    def _run_pool(self, name: str, workers: int, poll: float, once: bool) -> None:
+        # Children open own connections, parent connection must not be shared
+        connections.close_all()
+        context = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=workers, mp_context=context, initializer=init_process) as pool:
+            running: dict[Future, int] = {}
+            while True:
+                while len(running) < workers:
+                    job = Job.claim_next(name)
+                    if job is None:
+                        break
+                    running[pool.submit(run_job, job.pk)] = job.pk
+                if not running:
+                    if once:
+                        return
+                    time.sleep(poll)
+                    continue
+                done, _ = wait(running, timeout=poll, return_when=FIRST_COMPLETED)
+                for future in done:
+                    self._collect(running.pop(future), future, running)
+
+    def _collect(self, job_id: int, future: Future, running: dict[Future, int]) -> None:
+        try:
+            self._report(job_id, future.result())
+        except Exception as exception:  # pylint: disable=broad-exception-caught
+            if not isinstance(exception, BrokenProcessPool):
+                self._fail([job_id], exception)
+                return
+            # Jobs of other processes are lost with the pool
+            self._fail([job_id, *running.values()], exception)
+            raise CommandError('Worker process pool is broken') from exception
+
+    def _fail(self, job_ids: list[int], exception: Exception) -> None:
+        Job.objects.filter(pk__in=job_ids, status=JobStatus.RUNNING).update(
+            status=JobStatus.FAILED,
+            error={'detail': f'Worker process failed: {exception}'},
+            time_finish=timezone.now()
+        )
+        for job_id in job_ids:
+            self._report(job_id, JobStatus.FAILED)
+
+    def _report(self, job_id: int, status: str) -> None:
+        self.stdout.write(f'Job {job_id}: {status}')
@@ -0,0 +1,43 @@
+# Generated by Django 6.0.4 on 2026-10-18 14:54
+
+import django.core.serializers.json
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    initial = True
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='Job',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('kind', models.CharField(max_length=100, verbose_name='Тип')),
+                ('status', models.CharField(choices=[('pending', 'Pending'), ('running', 'Running'), ('done', 'Done'), ('failed', 'Failed'), ('cancelled', 'Cancelled')], default='pending', max_length=20, verbose_name='Статус')),
+                ('params', models.JSONField(default=dict, encoder=django.core.serializers.json.DjangoJSONEncoder, verbose_name='Параметры')),
+                ('result', models.JSONField(blank=True, encoder=django.core.serializers.json.DjangoJSONEncoder, null=True, verbose_name='Результат')),
+                ('error', models.JSONField(blank=True, null=True, verbose_name='Ошибка')),
+                ('estimate', models.PositiveIntegerField(default=0, verbose_name='Оценка объема')),
+                ('progress', models.FloatField(default=0, verbose_name='Прогресс')),
+                ('message', models.CharField(blank=True, max_length=255, verbose_name='Этап')),
+                ('cancel_requested', models.BooleanField(default=False, verbose_name='Запрошена отмена')),
+                ('worker', models.CharField(blank=True, max_length=255, verbose_name='Обработчик')),
+                ('time_create', models.DateTimeField(auto_now_add=True, verbose_name='Дата создания')),
+                ('time_start', models.DateTimeField(blank=True, null=True, verbose_name='Дата запуска')),
+                ('time_finish', models.DateTimeField(blank=True, null=True, verbose_name='Дата завершения')),
+                ('owner', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='jobs', to=settings.AUTH_USER_MODEL, verbose_name='Владелец')),
+            ],
+            options={
+                'verbose_name': 'Задача',
+                'verbose_name_plural': 'Фоновые задачи',
+                'indexes': [models.Index(fields=['status', 'time_create'], name='jobs_job_status_b3fb7e_idx')],
+            },
+        ),
+    ]
@@ -0,0 +1,167 @@
+''' Models: Background job. '''
+from datetime import timedelta
+from typing import Optional
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import (
+    SET_NULL,
+    BooleanField,
+    CharField,
+    DateTimeField,
+    FloatField,
+    ForeignKey,
+    Index,
+    JSONField,
+    Model,
+    PositiveIntegerField,
+    TextChoices
+)
+from django.utils import timezone
+
+from apps.users.models import User
+
+
+class JobStatus(TextChoices):
+    ''' Job processing state. '''
+    PENDING = 'pending'
+    RUNNING = 'running'
+    DONE = 'done'
+    FAILED = 'failed'
+    CANCELLED = 'cancelled'
+
+
+FINAL_STATUSES = frozenset({JobStatus.DONE, JobStatus.FAILED, JobStatus.CANCELLED})
+
+
+class Job(Model):
+    ''' Long running operation queued for local worker. '''
+    owner = ForeignKey(
+        verbose_name='Владелец',
+        to=User,
+        related_name='jobs',
+        on_delete=SET_NULL,
+        blank=True,
+        null=True
+    )
+    kind = CharField(
+        verbose_name='Тип',
+        max_length=100
+    )
+    status = CharField(
+        verbose_name='Статус',
+        max_length=20,
+        choices=JobStatus.choices,
+        default=JobStatus.PENDING
+    )
+    params = JSONField(
+        verbose_name='Параметры',
+        default=dict,
+        encoder=DjangoJSONEncoder
+    )
+    result = JSONField(
+        verbose_name='Результат',
+        blank=True,
+        null=True,
+        encoder=DjangoJSONEncoder
+    )
+    error = JSONField(
+        verbose_name='Ошибка',
+        blank=True,
+        null=True
+    )
+    estimate = PositiveIntegerField(
+        verbose_name='Оценка объема',
+        default=0
+    )
+    progress = FloatField(
+        verbose_name='Прогресс',
+        default=0
+    )
+    message = CharField(
+        verbose_name='Этап',
+        max_length=255,
+        blank=True
+    )
+    cancel_requested = BooleanField(
+        verbose_name='Запрошена отмена',
+        default=False
+    )
+    worker = CharField(
+        verbose_name='Обработчик',
+        max_length=255,
+        blank=True
+    )
+    time_create = DateTimeField(
+        verbose_name='Дата создания',
+        auto_now_add=True
+    )
+    time_start = DateTimeField(
+        verbose_name='Дата запуска',
+        blank=True,
+        null=True
+    )
+    time_finish = DateTimeField(
+        verbose_name='Дата завершения',
+        blank=True,
+        null=True
+    )
+
+    class Meta:
+        ''' Model metadata. '''
+        verbose_name = 'Задача'
+        verbose_name_plural = 'Фоновые задачи'
+        indexes = [Index(fields=['status', 'time_create'])]
+
+    def __str__(self) -> str:
+        return f'{self.kind} #{self.pk} [{self.status}]'
+
+    def is_finished(self) -> bool:
+        ''' Check if job reached final state. '''
+        return self.status in FINAL_STATUSES
+
+    @staticmethod
+    def claim_next(worker: str) -> Optional['Job']:
+        ''' Take oldest pending job. Conditional update keeps claim exclusive between workers. '''
+        while True:
+            candidate = Job.objects \
+                .filter(status=JobStatus.PENDING) \
+                .order_by('time_create', 'pk') \
+                .values_list('pk', flat=True) \
+                .first()
+            if candidate is None:
+                return None
+            claimed = Job.objects.filter(pk=candidate, status=JobStatus.PENDING).update(
+                status=JobStatus.RUNNING,
+                worker=worker,
+                time_start=timezone.now()
+            )
+            if claimed:
+                return Job.objects.get(pk=candidate)
+
+    @staticmethod
+    def fail_stale(timeout: timedelta, host: str) -> int:
+        ''' Fail jobs left by crashed workers of *host* after timeout. Return number of failed jobs. '''
+        now = timezone.now()
+        return Job.objects.filter(
+            status=JobStatus.RUNNING,
+            worker__startswith=f'{host}:',
+            time_start__lt=now - timeout
+        ).update(
+            status=JobStatus.FAILED,
+            error={'detail': 'Job timed out'},
+            time_finish=now
+        )
+
+    def request_cancel(self) -> bool:
+        ''' Cancel pending job or ask running job to stop. Return False for finished jobs. '''
+        if Job.objects.filter(pk=self.pk, status=JobStatus.PENDING).update(
+            status=JobStatus.CANCELLED,
+            time_finish=timezone.now()
+        ):
+            self.refresh_from_db()
+            return True
+        if Job.objects.filter(pk=self.pk, status=JobStatus.RUNNING).update(cancel_requested=True):
+            self.refresh_from_db()
+            return True
+        self.refresh_from_db()
+        return False
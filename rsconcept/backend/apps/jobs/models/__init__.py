@@ -0,0 +1,3 @@
+''' Django: Models. '''
+
+from .Job import Job, JobStatus
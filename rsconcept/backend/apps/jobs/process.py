@@ -0,0 +1,7 @@
+''' Jobs: Worker process bootstrap. Imported before Django setup, so no model imports here. '''
+import django
+
+
+def init_process() -> None:
+    ''' Prepare Django in spawned worker process. '''
+    django.setup()
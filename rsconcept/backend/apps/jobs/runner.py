@@ -0,0 +1,93 @@
+''' Jobs: Handler registry and execution. '''
+import logging
+from typing import Callable, Optional
+
+from django.db import close_old_connections
+from django.utils import timezone
+from rest_framework.exceptions import APIException
+
+from .models import Job, JobStatus
+
+logger = logging.getLogger(__name__)
+
+JobHandler = Callable[[dict, 'JobContext'], dict]
+
+_HANDLERS: dict[str, JobHandler] = {}
+
+
+class JobCancelled(Exception):
+    ''' Raised inside handler when cancellation was requested. '''
+
+
+class JobContext:
+    ''' Progress reporting and cancellation checks for job handler.
+
+    Context without job is used when handler runs inline within request.
+    Progress written inside transaction is visible to others only after commit,
+    so handlers report progress between transactions.
+    '''
+
+    def __init__(self, job_id: Optional[int] = None) -> None:
+        self.job_id = job_id
+
+    def progress(self, value: float, message: str = '') -> None:
+        ''' Store completed share of work in [0, 1]. '''
+        if self.job_id is not None:
+            Job.objects.filter(pk=self.job_id).update(progress=min(max(value, 0.0), 1.0), message=message)
+
+    def check_cancelled(self) -> None:
+        ''' Stop handler if cancellation was requested. Raised inside atomic block rolls changes back. '''
+        if self.job_id is not None and Job.objects.filter(pk=self.job_id, cancel_requested=True).exists():
+            raise JobCancelled()
+
+
+def job_handler(kind: str) -> Callable[[JobHandler], JobHandler]:
+    ''' Register function as handler for given job kind. '''
+    def register(function: JobHandler) -> JobHandler:
+        if kind in _HANDLERS:
+            raise ValueError(f'Job handler already registered: {kind}')
+        _HANDLERS[kind] = function
+        return function
+    return register
+
+
+def get_handler(kind: str) -> JobHandler:
+    ''' Get handler for job kind. '''
+    if kind not in _HANDLERS:
+        raise KeyError(f'Unknown job kind: {kind}')
+    return _HANDLERS[kind]
+
+
+def run_inline(kind: str, params: dict) -> dict:
+    ''' Run handler without queue. '''
+    return get_handler(kind)(params, JobContext())
+
+
+def run_job(job_id: int) -> str:
+    ''' Run claimed job and store outcome. Return final status. '''
+    close_old_connections()
+    job = Job.objects.get(pk=job_id)
+    context = JobContext(job.pk)
+    result: Optional[dict] = None
+    error: Optional[dict | list] = None
+    try:
+        context.check_cancelled()
+        result = get_handler(job.kind)(job.params, context)
+        status = JobStatus.DONE
+    except JobCancelled:
+        status = JobStatus.CANCELLED
+    except APIException as exception:
+        status = JobStatus.FAILED
+        detail = exception.detail
+        error = detail if isinstance(detail, (dict, list)) else {'detail': detail}
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.exception('Job %s failed', job_id)
+        status = JobStatus.FAILED
+        error = {'detail': 'Internal error'}
+    outcome: dict = {'status': status, 'result': result, 'error': error, 'time_finish': timezone.now()}
+    if status == JobStatus.DONE:
+        outcome['progress'] = 1.0
+    # Job failed as stale meanwhile keeps its status
+    Job.objects.filter(pk=job_id, status=JobStatus.RUNNING).update(**outcome)
+    close_old_connections()
+    return status
@@ -0,0 +1,2 @@
+''' REST API: Serializers. '''
+from .data_access import JobProgressSerializer, JobSerializer
@@ -0,0 +1,25 @@
+''' Serializers for background jobs. '''
+from rest_framework import serializers
+
+from ..models import Job
+
+
+class JobSerializer(serializers.ModelSerializer):
+    ''' Serializer: Job state including result. '''
+    class Meta:
+        ''' serializer metadata. '''
+        model = Job
+        fields = [
+            'id', 'kind', 'owner', 'status', 'estimate', 'progress', 'message', 'cancel_requested',
+            'result', 'error', 'time_create', 'time_start', 'time_finish'
+        ]
+        read_only_fields = fields
+
+
+class JobProgressSerializer(serializers.ModelSerializer):
+    ''' Serializer: Job state without result payload. '''
+    class Meta:
+        ''' serializer metadata. '''
+        model = Job
+        fields = ['id', 'status', 'progress', 'message', 'cancel_requested']
+        read_only_fields = fields
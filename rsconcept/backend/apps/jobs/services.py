@@ -0,0 +1,36 @@
+''' Jobs: Deferring endpoint work to background queue. '''
+from typing import Any, Optional
+
+from django.conf import settings
+from rest_framework import status as c
+from rest_framework.response import Response
+
+from .models import Job
+from .serializers import JobSerializer
+
+
+def should_defer(estimate: int) -> bool:
+    ''' Check if work estimate exceeds threshold for background processing. '''
+    threshold = settings.JOBS_ASYNC_THRESHOLD
+    return 0 < threshold <= estimate
+
+
+def defer(kind: str, params: dict, user: Any, estimate: int) -> Optional[Job]:
+    ''' Queue job if estimate exceeds threshold. Return None when work should run inline. '''
+    if not should_defer(estimate):
+        return None
+    return Job.objects.create(
+        kind=kind,
+        params=params,
+        owner=None if user.is_anonymous else user,
+        estimate=estimate
+    )
+
+
+def respond_accepted(job: Job) -> Response:
+    ''' Response for deferred request pointing to job status. '''
+    return Response(
+        status=c.HTTP_202_ACCEPTED,
+        data=JobSerializer(job).data,
+        headers={'Location': f'/api/jobs/{job.pk}'}
+    )
@@ -0,0 +1,6 @@
+''' Tests. '''
+from .t_commands import *
+from .t_deferral import *
+from .t_Job import *
+from .t_runner import *
+from .t_views import *
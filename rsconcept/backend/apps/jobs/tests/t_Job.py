@@ -0,0 +1,54 @@
+''' Testing models: Job. '''
+from django.test import TestCase
+
+from apps.jobs.models import Job, JobStatus
+
+
+class TestJob(TestCase):
+    ''' Testing Job queue state transitions. '''
+
+
+    def setUp(self):
+        self.first = Job.objects.create(kind='test.first')
+        self.second = Job.objects.create(kind='test.second')
+
+
+    def test_claim_next(self):
+        claimed = Job.claim_next('worker')
+        assert claimed is not None
+        self.assertEqual(claimed.pk, self.first.pk)
+        self.assertEqual(claimed.status, JobStatus.RUNNING)
+        self.assertEqual(claimed.worker, 'worker')
+        self.assertIsNotNone(claimed.time_start)
+
+        claimed = Job.claim_next('worker')
+        assert claimed is not None
+        self.assertEqual(claimed.pk, self.second.pk)
+        self.assertIsNone(Job.claim_next('worker'))
+
+
+    def test_claim_skips_cancelled(self):
+        self.first.request_cancel()
+        claimed = Job.claim_next('worker')
+        assert claimed is not None
+        self.assertEqual(claimed.pk, self.second.pk)
+
+
+    def test_cancel_pending(self):
+        self.assertTrue(self.first.request_cancel())
+        self.assertEqual(self.first.status, JobStatus.CANCELLED)
+        self.assertTrue(self.first.is_finished())
+        self.assertIsNotNone(self.first.time_finish)
+
+
+    def test_cancel_running(self):
+        Job.claim_next('worker')
+        self.assertTrue(self.first.request_cancel())
+        self.assertEqual(self.first.status, JobStatus.RUNNING)
+        self.assertTrue(self.first.cancel_requested)
+
+
+    def test_cancel_finished(self):
+        Job.objects.filter(pk=self.first.pk).update(status=JobStatus.DONE)
+        self.assertFalse(self.first.request_cancel())
+        self.assertEqual(self.first.status, JobStatus.DONE)
@@ -0,0 +1,87 @@
+''' Testing management command: run_jobs. '''
+from concurrent.futures import Future
+from concurrent.futures.process import BrokenProcessPool
+from datetime import timedelta
+from io import StringIO
+from socket import gethostname
+from unittest.mock import patch
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase, TransactionTestCase
+from django.utils import timezone
+
+from apps.jobs.management.commands.run_jobs import Command
+from apps.jobs.models import Job, JobStatus
+
+
+def _done(job_id: int) -> str:
+    # Spawned processes connect to configured database instead of test database
+    return JobStatus.DONE
+
+
+class TestRunJobsCommand(TestCase):
+    ''' Testing queue processing by worker command. '''
+
+
+    def test_run_once(self):
+        jobs = [Job.objects.create(kind='test.echo', params={'value': index}) for index in range(3)]
+        cancelled = Job.objects.create(kind='test.echo', params={'value': 0})
+        cancelled.request_cancel()
+        output = StringIO()
+        call_command('run_jobs', workers=0, once=True, stdout=output)
+        for job in jobs:
+            job.refresh_from_db()
+            self.assertEqual(job.status, JobStatus.DONE)
+            self.assertIn(f'Job {job.pk}: done', output.getvalue())
+        cancelled.refresh_from_db()
+        self.assertEqual(cancelled.status, JobStatus.CANCELLED)
+        self.assertNotIn(f'Job {cancelled.pk}', output.getvalue())
+
+
+    def test_fail_stale_on_start(self):
+        stale = Job.objects.create(kind='test.echo', status=JobStatus.RUNNING, worker=f'{gethostname()}:1')
+        remote = Job.objects.create(kind='test.echo', status=JobStatus.RUNNING, worker='other-host:1')
+        Job.objects.filter(pk__in=[stale.pk, remote.pk]).update(time_start=timezone.now() - timedelta(days=1))
+        fresh = Job.objects.create(
+            kind='test.echo',
+            status=JobStatus.RUNNING,
+            worker=f'{gethostname()}:2',
+            time_start=timezone.now()
+        )
+        output = StringIO()
+        call_command('run_jobs', workers=0, once=True, stdout=output)
+        self.assertIn('Failed stale jobs: 1', output.getvalue())
+        for job in (stale, remote, fresh):
+            job.refresh_from_db()
+        self.assertEqual(stale.status, JobStatus.FAILED)
+        self.assertEqual(remote.status, JobStatus.RUNNING)
+        self.assertEqual(fresh.status, JobStatus.RUNNING)
+
+
+    def test_broken_pool(self):
+        crashed = Job.objects.create(kind='test.echo', status=JobStatus.RUNNING)
+        other = Job.objects.create(kind='test.echo', status=JobStatus.RUNNING)
+        future: Future = Future()
+        future.set_exception(BrokenProcessPool('terminated abruptly'))
+        command = Command(stdout=StringIO())
+        with self.assertRaises(CommandError):
+            command._collect(crashed.pk, future, {Future(): other.pk})  # pylint: disable=protected-access
+        for job in (crashed, other):
+            job.refresh_from_db()
+            self.assertEqual(job.status, JobStatus.FAILED)
+            self.assertIn('terminated abruptly', job.error['detail'])
+
+
+class TestRunJobsPool(TransactionTestCase):
+    ''' Testing queue processing by spawned worker processes. '''
+
+
+    def test_run_once(self):
+        job = Job.objects.create(kind='test.echo', params={'value': 1})
+        output = StringIO()
+        with patch('apps.jobs.management.commands.run_jobs.run_job', _done):
+            call_command('run_jobs', workers=1, once=True, stdout=output)
+        self.assertIn(f'Job {job.pk}: done', output.getvalue())
+        job.refresh_from_db()
+        self.assertTrue(job.worker.startswith(f'{gethostname()}:'))
@@ -0,0 +1,131 @@
+''' Testing API: Deferring long operations to jobs. '''
+import os
+
+from django.test import override_settings
+
+from apps.jobs.models import Job, JobStatus
+from apps.jobs.runner import run_job
+from apps.library.models import LibraryItem, Version
+from apps.oss.models import OperationSchema, OperationType
+from apps.rsform.models import RSForm
+from apps.rsform.serializers import RSFormSerializer
+from shared.EndpointTester import EndpointTester, decl_endpoint
+
+
+@override_settings(JOBS_ASYNC_THRESHOLD=2)
+class TestDeferral(EndpointTester):
+    ''' Testing 202 responses for work estimate over threshold. '''
+
+
+    def setUp(self):
+        super().setUp()
+        self.schema = RSForm.create(title='Test', alias='T1', owner=self.user, location='/U/src')
+        self.x1 = self.schema.insert_last('X1', term_raw='term')
+        self.x2 = self.schema.insert_last('X2')
+
+
+    def _finish(self, response) -> Job:
+        job = Job.objects.get(pk=response.data['id'])
+        self.assertEqual(response['Location'], f'/api/jobs/{job.pk}')
+        self.assertEqual(job.status, JobStatus.PENDING)
+        self.assertEqual(job.owner, self.user)
+        Job.claim_next('worker')
+        run_job(job.pk)
+        job.refresh_from_db()
+        return job
+
+
+    @decl_endpoint('/api/library/{item}/clone', method='post')
+    def test_clone(self):
+        data = {'items': [], 'item_data': {'title': 'Clone', 'alias': 'C1', 'location': '/U/dst'}}
+        response = self.executeAccepted(data, item=self.schema.model.pk)
+        self.assertEqual(response.data['estimate'], 2)
+        self.assertFalse(LibraryItem.objects.filter(title='Clone').exists())
+        job = self._finish(response)
+        self.assertEqual(job.status, JobStatus.DONE)
+        clone = LibraryItem.objects.get(title='Clone')
+        self.assertEqual(job.result['id'], clone.pk)
+        self.assertEqual(RSForm(clone).constituentsQ().count(), 2)
+
+
+    @decl_endpoint('/api/library/{item}/clone', method='post')
+    @override_settings(JOBS_ASYNC_THRESHOLD=3)
+    def test_below_threshold(self):
+        data = {'items': [], 'item_data': {'title': 'Clone', 'alias': 'C1', 'location': '/U/dst'}}
+        self.executeCreated(data, item=self.schema.model.pk)
+        self.assertFalse(Job.objects.exists())
+
+
+    @decl_endpoint('/api/library/{item}/clone', method='post')
+    @override_settings(JOBS_ASYNC_THRESHOLD=0)
+    def test_disabled(self):
+        data = {'items': [], 'item_data': {'title': 'Clone', 'alias': 'C1', 'location': '/U/dst'}}
+        self.executeCreated(data, item=self.schema.model.pk)
+        self.assertFalse(Job.objects.exists())
+
+
+    @decl_endpoint('/api/versions/{version}/restore', method='patch')
+    def test_restore_version(self):
+        version = Version.objects.create(
+            item=self.schema.model,
+            version='1.0.0',
+            data=RSFormSerializer(self.schema.model).to_versioned_data()
+        )
+        self.schema.insert_last('X3')
+        response = self.executeAccepted(version=version.pk)
+        self.assertEqual(self.schema.constituentsQ().count(), 3)
+        job = self._finish(response)
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(len(job.result['items']), 2)
+        self.assertEqual(self.schema.constituentsQ().count(), 2)
+
+
+    @decl_endpoint('/api/rsforms/{item}/load-trs', method='patch')
+    def test_load_trs(self):
+        self.set_params(item=self.schema.model.pk)
+        work_dir = os.path.join(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))), 'rsform')
+        with open(f'{work_dir}/tests/s_views/data/sample-rsform.trs', 'rb') as file:
+            response = self.client.patch(self.endpoint, {'file': file, 'load_metadata': False}, format='multipart')
+        self.assertEqual(response.status_code, 202)
+        self.assertEqual(response.data['estimate'], 25)
+        job = self._finish(response)
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(self.schema.constituentsQ().count(), 25)
+
+
+    @decl_endpoint('/api/rsforms/inline-synthesis', method='patch')
+    def test_inline_synthesis(self):
+        receiver = RSForm.create(title='Receiver', alias='T2', owner=self.user)
+        receiver_x1 = receiver.insert_last('X1')
+        data = {
+            'receiver': receiver.model.pk,
+            'source': self.schema.model.pk,
+            'items': [],
+            'substitutions': [{'original': receiver_x1.pk, 'substitution': self.x1.pk}]
+        }
+        response = self.executeAccepted(data)
+        job = self._finish(response)
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(len(job.result['items']), 2)
+        self.assertEqual(receiver.constituentsQ().count(), 2)
+
+
+    @decl_endpoint('/api/oss/{item}/execute-operation', method='post')
+    def test_execute_operation(self):
+        oss = OperationSchema.create(title='OSS', alias='O1', owner=self.user)
+        argument = oss.create_operation(alias='1', operation_type=OperationType.INPUT, result=self.schema.model)
+        operation = oss.create_operation(alias='2', operation_type=OperationType.SYNTHESIS)
+        oss.set_arguments(operation.pk, [argument])
+        data = {'layout': [], 'target': operation.pk}
+        response = self.executeAccepted(data, item=oss.model.pk)
+        duplicate = self.executeAccepted(data, item=oss.model.pk)
+        job = self._finish(response)
+        self.assertEqual(job.status, JobStatus.DONE)
+        operation.refresh_from_db()
+        self.assertIsNotNone(operation.result_id)
+        self.assertEqual(RSForm(operation.result).constituentsQ().count(), 2)
+
+        job = self._finish(duplicate)
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertIn('target', job.error)
+        self.executeBadData(data, item=oss.model.pk)
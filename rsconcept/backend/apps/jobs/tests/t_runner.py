@@ -0,0 +1,115 @@
+''' Testing jobs execution. '''
+from django.db import transaction
+from django.test import TestCase
+from rest_framework.exceptions import ValidationError
+
+from apps.jobs.models import Job, JobStatus
+from apps.jobs.runner import JobContext, job_handler, run_inline, run_job
+from apps.library.models import LibraryItem
+
+
+@job_handler('test.echo')
+def _echo(params: dict, context: JobContext) -> dict:
+    context.progress(0.5, 'half')
+    return {'value': params['value']}
+
+
+@job_handler('test.create')
+def _create(params: dict, context: JobContext) -> dict:
+    with transaction.atomic():
+        LibraryItem.objects.create(title=params['title'])
+        if params.get('cancel') and context.job_id is not None:
+            Job.objects.filter(pk=context.job_id).update(cancel_requested=True)
+        context.check_cancelled()
+    return {}
+
+
+@job_handler('test.invalid')
+def _invalid(params: dict, context: JobContext) -> dict:
+    raise ValidationError({'target': 'invalid'})
+
+
+@job_handler('test.crash')
+def _crash(params: dict, context: JobContext) -> dict:
+    raise RuntimeError('secret details')
+
+
+@job_handler('test.stale')
+def _stale(params: dict, context: JobContext) -> dict:
+    Job.objects.filter(pk=context.job_id).update(status=JobStatus.FAILED, error={'detail': 'Job timed out'})
+    return {}
+
+
+class TestRunner(TestCase):
+    ''' Testing run_job outcomes. '''
+
+
+    def _run(self, kind: str, params: dict) -> Job:
+        job = Job.objects.create(kind=kind, params=params)
+        Job.claim_next('worker')
+        run_job(job.pk)
+        job.refresh_from_db()
+        return job
+
+
+    def test_done(self):
+        job = self._run('test.echo', {'value': 42})
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertEqual(job.result, {'value': 42})
+        self.assertEqual(job.progress, 1.0)
+        self.assertEqual(job.message, 'half')
+        self.assertIsNone(job.error)
+        self.assertIsNotNone(job.time_finish)
+
+
+    def test_inline(self):
+        self.assertEqual(run_inline('test.echo', {'value': 1}), {'value': 1})
+        self.assertFalse(Job.objects.exists())
+
+
+    def test_validation_error(self):
+        job = self._run('test.invalid', {})
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.error, {'target': 'invalid'})
+        self.assertIsNone(job.result)
+
+
+    def test_unexpected_error(self):
+        job = self._run('test.crash', {})
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertNotIn('secret', str(job.error))
+
+
+    def test_unknown_kind(self):
+        job = self._run('test.unknown', {})
+        self.assertEqual(job.status, JobStatus.FAILED)
+
+
+    def test_failed_while_running(self):
+        job = self._run('test.stale', {})
+        self.assertEqual(job.status, JobStatus.FAILED)
+        self.assertEqual(job.error, {'detail': 'Job timed out'})
+
+
+    def test_cancel_before_start(self):
+        job = Job.objects.create(kind='test.create', params={'title': 'T'})
+        Job.claim_next('worker')
+        job.request_cancel()
+        run_job(job.pk)
+        job.refresh_from_db()
+        self.assertEqual(job.status, JobStatus.CANCELLED)
+        self.assertFalse(LibraryItem.objects.filter(title='T').exists())
+
+
+    def test_cancel_rollback(self):
+        job = self._run('test.create', {'title': 'T', 'cancel': True})
+        self.assertEqual(job.status, JobStatus.CANCELLED)
+        self.assertFalse(LibraryItem.objects.filter(title='T').exists())
+        job = self._run('test.create', {'title': 'T'})
+        self.assertEqual(job.status, JobStatus.DONE)
+        self.assertTrue(LibraryItem.objects.filter(title='T').exists())
+
+
+    def test_duplicate_handler(self):
+        with self.assertRaises(ValueError):
+            job_handler('test.echo')(_echo)
@@ -0,0 +1,65 @@
+''' Testing API: Jobs. '''
+from apps.jobs.models import Job, JobStatus
+from shared.EndpointTester import EndpointTester, decl_endpoint
+
+
+class TestJobViews(EndpointTester):
+    ''' Testing job status endpoints. '''
+
+
+    def setUp(self):
+        super().setUp()
+        self.owned = Job.objects.create(kind='test.echo', owner=self.user, estimate=10)
+        self.unowned = Job.objects.create(kind='test.echo', owner=self.user2)
+        self.invalid_id = self.unowned.pk + 1337
+
+
+    @decl_endpoint('/api/jobs', method='get')
+    def test_list(self):
+        response = self.executeOK()
+        self.assertEqual([job['id'] for job in response.data], [self.owned.pk])
+
+        self.toggle_admin(True)
+        response = self.executeOK()
+        self.assertEqual(len(response.data), 2)
+
+        self.logout()
+        self.executeForbidden()
+
+
+    @decl_endpoint('/api/jobs/{job}', method='get')
+    def test_retrieve(self):
+        Job.objects.filter(pk=self.owned.pk).update(status=JobStatus.DONE, result={'id': 1})
+        response = self.executeOK(job=self.owned.pk)
+        self.assertEqual(response.data['status'], JobStatus.DONE)
+        self.assertEqual(response.data['result'], {'id': 1})
+        self.assertEqual(response.data['estimate'], 10)
+        self.executeNotFound(job=self.unowned.pk)
+        self.executeNotFound(job=self.invalid_id)
+
+
+    @decl_endpoint('/api/jobs/{job}/progress', method='get')
+    def test_progress(self):
+        Job.objects.filter(pk=self.owned.pk).update(status=JobStatus.RUNNING, progress=0.5, message='step')
+        response = self.executeOK(job=self.owned.pk)
+        self.assertEqual(response.data['status'], JobStatus.RUNNING)
+        self.assertEqual(response.data['progress'], 0.5)
+        self.assertEqual(response.data['message'], 'step')
+        self.assertNotIn('result', response.data)
+        self.executeNotFound(job=self.unowned.pk)
+
+
+    @decl_endpoint('/api/jobs/{job}/cancel', method='post')
+    def test_cancel(self):
+        self.executeNotFound(job=self.unowned.pk)
+        response = self.executeOK(job=self.owned.pk)
+        self.assertEqual(response.data['status'], JobStatus.CANCELLED)
+        self.executeBadData(job=self.owned.pk)
+
+
+    @decl_endpoint('/api/jobs/{job}/cancel', method='post')
+    def test_cancel_running(self):
+        Job.claim_next('worker')
+        response = self.executeOK(job=self.owned.pk)
+        self.assertEqual(response.data['status'], JobStatus.RUNNING)
+        self.assertTrue(response.data['cancel_requested'])
@@ -0,0 +1,12 @@
+''' Routing: Background jobs. '''
+from django.urls import include, path
+from rest_framework import routers
+
+from . import views
+
+jobs_router = routers.SimpleRouter(trailing_slash=False)
+jobs_router.register('jobs', views.JobViewSet, 'Job')
+
+urlpatterns = [
+    path('', include(jobs_router.urls)),
+]
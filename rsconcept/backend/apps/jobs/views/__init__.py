@@ -0,0 +1,2 @@
+''' REST API: Endpoint processors. '''
+from .jobs import JobViewSet
@@ -0,0 +1,76 @@
+''' Endpoints for background jobs. '''
+from typing import cast
+
+from django.http import HttpResponse
+from drf_spectacular.utils import extend_schema, extend_schema_view
+from rest_framework import generics
+from rest_framework import status as c
+from rest_framework import viewsets
+from rest_framework.decorators import action
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from shared import messages as msg
+from shared import permissions
+
+from .. import models as m
+from .. import serializers as s
+
+
+@extend_schema(tags=['Jobs'])
+@extend_schema_view()
+class JobViewSet(viewsets.GenericViewSet, generics.ListAPIView, generics.RetrieveAPIView):
+    ''' Endpoint: Background jobs of current user. '''
+    queryset = m.Job.objects.all()
+    serializer_class = s.JobSerializer
+    permission_classes = [permissions.GlobalUser]
+
+    def get_queryset(self):
+        queryset = m.Job.objects.all().order_by('-time_create')
+        if self.request.user.is_staff:
+            return queryset
+        return queryset.filter(owner_id=self.request.user.pk)
+
+    def _get_job(self) -> m.Job:
+        return cast(m.Job, self.get_object())
+
+    @extend_schema(
+        summary='get job status and progress',
+        tags=['Jobs'],
+        request=None,
+        responses={
+            c.HTTP_200_OK: s.JobProgressSerializer,
+            c.HTTP_404_NOT_FOUND: None
+        }
+    )
+    @action(detail=True, methods=['get'], url_path='progress')
+    def progress(self, request: Request, pk) -> HttpResponse:
+        ''' Endpoint: Lightweight job state for polling. '''
+        return Response(
+            status=c.HTTP_200_OK,
+            data=s.JobProgressSerializer(self._get_job()).data
+        )
+
+    @extend_schema(
+        summary='cancel job',
+        tags=['Jobs'],
+        request=None,
+        responses={
+            c.HTTP_200_OK: s.JobProgressSerializer,
+            c.HTTP_400_BAD_REQUEST: None,
+            c.HTTP_404_NOT_FOUND: None
+        }
+    )
+    @action(detail=True, methods=['post'], url_path='cancel')
+    def cancel(self, request: Request, pk) -> HttpResponse:
+        ''' Endpoint: Cancel pending job or request running job to stop. '''
+        job = self._get_job()
+        if not job.request_cancel():
+            return Response(
+                status=c.HTTP_400_BAD_REQUEST,
+                data={'status': msg.jobAlreadyFinished()}
+            )
+        return Response(
+            status=c.HTTP_200_OK,
+            data=s.JobProgressSerializer(job).data
+        )
@@ -53,3 +53,9 @@ class VersionAdmin(admin.ModelAdmin):
     search_fields = [
         'item__title', 'item__alias'
     ]
+    readonly_fields = ['data', 'base']
+
+    def delete_queryset(self, request, queryset):
+        ''' Delete one by one so that deltas of removed keyframes are rebased. '''
+        for version in queryset.order_by('-pk'):
+            version.delete()
@@ -6,3 +6,6 @@ class RsformConfig(AppConfig):
     ''' Application config. '''
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'apps.library'
+
+    def ready(self):
+        import apps.library.signals  # pylint: disable=unused-import,import-outside-toplevel
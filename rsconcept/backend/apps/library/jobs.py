@@ -0,0 +1,79 @@
+''' Background jobs: Library. '''
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Q
+from rest_framework.exceptions import ValidationError
+
+from apps.jobs.models import Job, JobStatus
+from apps.jobs.runner import JobContext, job_handler
+from apps.oss.models import Inheritance, PropagationFacade
+from apps.rsform.models import Constituenta, RSFormCached
+from apps.rsform.serializers import RSFormParseSerializer, RSFormSerializer
+from apps.users.models import User
+from shared import messages as msg
+
+from .models import LibraryItem, Version
+from .serializers import LibraryItemSerializer
+from .services.clone import clone_library_item
+from .services.search_index import refresh_index
+
+CLONE = 'library.clone'
+RESTORE_VERSION = 'library.restore_version'
+REINDEX = 'library.reindex'
+
+
+def estimate_clone(item: LibraryItem) -> int:
+    ''' Number of constituents copied by clone. '''
+    return Constituenta.objects.filter(Q(schema=item) | Q(schema__producer__oss=item)).count()
+
+
+def estimate_restore(version: Version) -> int:
+    ''' Number of constituents restored from version. '''
+    return version.items_count()
+
+
+def schedule_reindex(items: list[int]) -> None:
+    ''' Update search index for items with committed text changes: in worker when queue is enabled. '''
+    if settings.JOBS_ASYNC_THRESHOLD <= 0:
+        refresh_index(LibraryItem.objects.filter(pk__in=items))
+    elif not Job.objects.filter(kind=REINDEX, status=JobStatus.PENDING).exists():
+        Job.objects.create(kind=REINDEX)
+
+
+@job_handler(CLONE)
+def clone(params: dict, context: JobContext) -> dict:
+    ''' Create deep copy of library item. '''
+    item = LibraryItem.objects.get(pk=params['item'])
+    owner = User.objects.get(pk=params['owner'])
+    result = clone_library_item(item, owner, params['item_data'], items_list=params['items'])
+    context.progress(0.9)
+    return LibraryItemSerializer(result).data
+
+
+@job_handler(RESTORE_VERSION)
+def restore_version(params: dict, context: JobContext) -> dict:
+    ''' Restore version data into current item. '''
+    version = Version.objects.select_related('item').get(pk=params['version'])
+    item = version.item
+    if Inheritance.objects.filter(child__schema_id=item.pk).exists():
+        raise ValidationError({
+            'data': msg.importIntoInherited()
+        })
+    with transaction.atomic(), PropagationFacade().batch() as propagation:
+        propagation.before_delete_schema(item.pk)
+        RSFormSerializer(item).restore_from_version(version.load_data())
+        context.check_cancelled()
+        propagation.after_create_cst(
+            list(RSFormCached(item.pk).constituentsQ().order_by('order'))
+        )
+        item.save(update_fields=['time_update'])
+    context.progress(0.9)
+    return RSFormParseSerializer(item).data
+
+
+@job_handler(REINDEX)
+def reindex(params: dict, context: JobContext) -> dict:
+    ''' Reindex all items with changed texts. '''
+    count = refresh_index(LibraryItem.objects.all())
+    context.progress(0.9)
+    return {'items': count}
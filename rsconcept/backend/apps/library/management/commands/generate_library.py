@@ -0,0 +1,25 @@
+''' Command: Generate synthetic library for benchmarks. '''
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from shared.benchmarks.synthetic import SCALES, clear_library, generate_library
+
+
+class Command(BaseCommand):
+    ''' Fill database with reproducible synthetic library. '''
+    help = 'Generate synthetic users, schemas, OSS, models and versions for benchmarks'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--scale', choices=list(SCALES), default='small', help='Library size preset')
+        parser.add_argument('--seed', type=int, default=42, help='Random seed')
+        parser.add_argument('--clear', action='store_true', help='Delete previously generated library first')
+        parser.add_argument('--force', action='store_true', help='Run with DEBUG disabled')
+
+    def handle(self, *args, **options) -> None:
+        if not settings.DEBUG and not options['force']:
+            raise CommandError('Synthetic library is generated only with DEBUG enabled, use --force to override')
+        if options['clear']:
+            self.stdout.write(f'Deleted items: {clear_library()}')
+        summary = generate_library(SCALES[options['scale']], options['seed'])
+        for key, value in summary.items():
+            self.stdout.write(f'{key}: {value}')
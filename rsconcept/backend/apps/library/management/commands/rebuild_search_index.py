@@ -0,0 +1,28 @@
+''' Command: Rebuild library search index. '''
+from django.core.management.base import BaseCommand
+from django.db import connection
+
+from apps.library.models import LibraryItem, SearchIndexState, SearchTrigram
+from apps.library.services.search_backends import get_search_backend
+from apps.library.services.search_index import DIRTY_ITEMS, reindex_items
+
+
+class Command(BaseCommand):
+    ''' Drop search indexes and build them for all library items. '''
+    help = 'Rebuild indexes used by library context search'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument('--dirty', action='store_true', help='Only reindex items with changed texts')
+
+    def handle(self, *args, **options) -> None:
+        items = LibraryItem.objects.all()
+        if options['dirty']:
+            items = items.filter(DIRTY_ITEMS)
+        else:
+            SearchIndexState.objects.all().delete()
+            SearchTrigram.objects.all().delete()
+            with connection.cursor() as cursor:
+                get_search_backend().rebuild(cursor)
+        ids = list(items.values_list('pk', flat=True))
+        reindex_items(ids)
+        self.stdout.write(f'Reindexed items: {len(ids)}')
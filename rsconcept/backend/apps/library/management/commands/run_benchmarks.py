@@ -0,0 +1,47 @@
+''' Command: Time endpoint scenarios over synthetic library. '''
+import json
+
+from django.core.management.base import BaseCommand, CommandError
+
+from shared.benchmarks.scenarios import DEFAULT_TOLERANCE, SCENARIOS, compare, run_scenarios
+from shared.benchmarks.utils import report
+
+
+class Command(BaseCommand):
+    ''' Run benchmark scenarios, save results as JSON and compare with baseline. '''
+    help = 'Time fixed endpoint scenarios over library created by generate_library'
+
+    def add_arguments(self, parser) -> None:
+        parser.add_argument(
+            '--scenario', action='append', choices=list(SCENARIOS),
+            help='Scenario to run, may be repeated, all scenarios by default'
+        )
+        parser.add_argument('--repeat', type=int, default=5, help='Runs per scenario')
+        parser.add_argument('--output', help='Path to save results JSON')
+        parser.add_argument('--baseline', help='Path to results JSON to compare with')
+        parser.add_argument('--tolerance', type=float, default=DEFAULT_TOLERANCE, help='Allowed relative change')
+        parser.add_argument(
+            '--fail-on-regression', action='store_true',
+            help='Exit with error if any scenario is slower than baseline'
+        )
+
+    def handle(self, *args, **options) -> None:
+        try:
+            results = run_scenarios(options['scenario'] or list(SCENARIOS), options['repeat'])
+        except ValueError as error:
+            raise CommandError(str(error)) from error
+        rows = [[name, str(data['best_ms']), str(data['median_ms']), data['queries']] for name, data in results.items()]
+        report('Scenarios', ['scenario', 'best ms', 'median ms', 'queries'], rows, self.stdout.write)
+        if options['output']:
+            with open(options['output'], 'w', encoding='utf-8') as file:
+                json.dump({'repeat': options['repeat'], 'scenarios': results}, file, indent=2)
+        if not options['baseline']:
+            return
+        with open(options['baseline'], encoding='utf-8') as file:
+            baseline = json.load(file)['scenarios']
+        comparison = compare(results, baseline, options['tolerance'])
+        header = ['scenario', 'baseline ms', 'current ms', 'ratio', 'queries', 'verdict']
+        report('Baseline comparison', header, [[str(value) for value in row] for row in comparison], self.stdout.write)
+        slower = [str(row[0]) for row in comparison if row[-1] == 'slower']
+        if slower and options['fail_on_regression']:
+            raise CommandError(f'Regression in: {", ".join(slower)}')
@@ -0,0 +1,39 @@
+# Generated by Django 6.0.4 on 2026-10-18 15:00
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0010_alter_libraryitem_time_update'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='SearchIndexState',
+            fields=[
+                ('item', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='search_state', serialize=False, to='library.libraryitem', verbose_name='Элемент библиотеки')),
+                ('time_indexed', models.DateTimeField(auto_now=True, verbose_name='Дата индексации')),
+            ],
+            options={
+                'verbose_name': 'Состояние индекса поиска',
+                'verbose_name_plural': 'Состояния индекса поиска',
+            },
+        ),
+        migrations.CreateModel(
+            name='SearchTrigram',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('gram', models.CharField(max_length=3, verbose_name='Триграмма')),
+                ('fields', models.PositiveIntegerField(default=0, verbose_name='Поля поиска')),
+                ('item', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='search_trigrams', to='library.libraryitem', verbose_name='Элемент библиотеки')),
+            ],
+            options={
+                'verbose_name': 'Триграмма поиска',
+                'verbose_name_plural': 'Индекс поиска',
+                'unique_together': {('gram', 'item')},
+            },
+        ),
+    ]
@@ -0,0 +1,101 @@
+# Generated manually for database native context search
+
+from django.db import migrations
+
+# Tables and text columns used by context search, primary key column is 'id'
+SOURCES = [
+    ('library_libraryitem', ('alias', 'title', 'description')),
+    ('rsform_constituenta', (
+        'alias',
+        'term_resolved',
+        'term_raw',
+        'definition_formal',
+        'typification_manual',
+        'definition_resolved',
+        'definition_raw',
+        'convention',
+    )),
+    ('oss_operation', ('alias', 'title', 'description')),
+    ('oss_block', ('title', 'description')),
+    ('rsmodel_constituentdata', ('type',)),
+]
+TRIGGERS = ('insert', 'update', 'delete')
+
+
+def install_search_backend(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            _install_trigram(cursor)
+        elif vendor == 'sqlite':
+            _install_fts(cursor)
+
+
+def uninstall_search_backend(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+    with schema_editor.connection.cursor() as cursor:
+        if vendor == 'postgresql':
+            _uninstall_trigram(cursor)
+        elif vendor == 'sqlite':
+            _uninstall_fts(cursor)
+
+
+def _install_trigram(cursor):
+    cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+    for table, columns in SOURCES:
+        for column in columns:
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm '
+                f'ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+            )
+
+
+def _uninstall_trigram(cursor):
+    for table, columns in SOURCES:
+        for column in columns:
+            cursor.execute(f'DROP INDEX IF EXISTS {table}_{column}_trgm')
+
+
+def _install_fts(cursor):
+    for table, columns in SOURCES:
+        shadow = f'{table}_fts'
+        names = ', '.join(columns)
+        values = ', '.join(f'new.{column}' for column in columns)
+        assignments = ', '.join(f'{column} = new.{column}' for column in columns)
+        cursor.execute(f"CREATE VIRTUAL TABLE IF NOT EXISTS {shadow} USING fts5({names}, tokenize='trigram')")
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {shadow}_insert AFTER INSERT ON {table} BEGIN '
+            f'INSERT INTO {shadow}(rowid, {names}) VALUES (new.id, {values}); END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {shadow}_update AFTER UPDATE OF {names} ON {table} BEGIN '
+            f'UPDATE {shadow} SET {assignments} WHERE rowid = new.id; END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {shadow}_delete AFTER DELETE ON {table} BEGIN '
+            f'DELETE FROM {shadow} WHERE rowid = old.id; END'
+        )
+        cursor.execute(f'DELETE FROM {shadow}')
+        cursor.execute(f'INSERT INTO {shadow}(rowid, {names}) SELECT id, {names} FROM {table}')
+
+
+def _uninstall_fts(cursor):
+    for table, _ in SOURCES:
+        shadow = f'{table}_fts'
+        for suffix in TRIGGERS:
+            cursor.execute(f'DROP TRIGGER IF EXISTS {shadow}_{suffix}')
+        cursor.execute(f'DROP TABLE IF EXISTS {shadow}')
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0011_searchindexstate_searchtrigram'),
+        ('oss', '0016_alter_operation_operation_type_replica_and_more'),
+        ('rsform', '0009_cst_type_statement'),
+        ('rsmodel', '0003_constituentdata_type'),
+    ]
+
+    operations = [
+        migrations.RunPython(install_search_backend, uninstall_search_backend),
+    ]
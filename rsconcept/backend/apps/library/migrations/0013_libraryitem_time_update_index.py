@@ -0,0 +1,19 @@
+# Generated by Django 6.0.4 on 2026-10-18 15:14
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0012_search_backend'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(fields=['time_update', 'id'], name='library_lib_time_up_757664_idx'),
+        ),
+    ]
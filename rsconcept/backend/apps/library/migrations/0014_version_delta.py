@@ -0,0 +1,100 @@
+# Generated by Django 6.0.4 on 2026-10-18 15:18
+
+import json
+from typing import Optional
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Delta encoding of Version model at the time of this migration
+
+# Maximum number of deltas sharing one keyframe
+KEYFRAME_INTERVAL = 10
+
+# Delta is stored only if its size is below this fraction of full data size
+KEYFRAME_RATIO = 0.5
+
+
+def make_delta(keyframe: dict, data: dict) -> dict:
+    ''' Encode *data* as difference from *keyframe*. '''
+    known = {cst['id']: cst for cst in keyframe['items']}
+    items = data['items']
+    return {
+        'head': {key: value for key, value in data.items() if key != 'items'},
+        'order': [cst['id'] for cst in items],
+        'changed': [cst for cst in items if known.get(cst['id']) != cst]
+    }
+
+
+def apply_delta(keyframe: dict, delta: dict) -> dict:
+    ''' Restore full data from *keyframe* and *delta*. '''
+    known = {cst['id']: cst for cst in keyframe['items']}
+    known.update((cst['id'], cst) for cst in delta['changed'])
+    result = dict(delta['head'])
+    result['items'] = [known[cst_id] for cst_id in delta['order']]
+    return result
+
+
+def compress(data: dict, keyframe: Optional[dict], deltas: int) -> Optional[dict]:
+    ''' Delta for *data* if it is worth storing against *keyframe* with *deltas* dependents, None otherwise. '''
+    if keyframe is None or deltas >= KEYFRAME_INTERVAL:
+        return None
+    delta = make_delta(keyframe, data)
+    if len(json.dumps(delta)) >= KEYFRAME_RATIO * len(json.dumps(data)):
+        return None
+    return delta
+
+
+def encode_sequence(contents: list[dict]) -> list[tuple[Optional[int], dict]]:
+    ''' Storage for consecutive versions: (index of keyframe or None for keyframe, payload). '''
+    result: list[tuple[Optional[int], dict]] = []
+    keyframe: Optional[int] = None
+    deltas = 0
+    for index, data in enumerate(contents):
+        delta = compress(data, contents[keyframe] if keyframe is not None else None, deltas)
+        if delta is None:
+            keyframe = index
+            deltas = 0
+            result.append((None, data))
+        else:
+            deltas += 1
+            result.append((keyframe, delta))
+    return result
+
+
+
+def compress_versions(apps, schema_editor):
+    Version = apps.get_model('library', 'Version')
+    item_ids = Version.objects.values_list('item_id', flat=True).distinct()
+    for item_id in list(item_ids):
+        versions = list(Version.objects.filter(item_id=item_id).order_by('pk'))
+        storage = encode_sequence([version.data for version in versions])
+        for version, (keyframe, payload) in zip(versions, storage):
+            version.base = versions[keyframe] if keyframe is not None else None
+            version.data = payload
+        Version.objects.bulk_update(versions, ['base', 'data'])
+
+
+def expand_versions(apps, schema_editor):
+    Version = apps.get_model('library', 'Version')
+    deltas = list(Version.objects.filter(base__isnull=False).select_related('base'))
+    for version in deltas:
+        version.data = apply_delta(version.base.data, version.data)
+        version.base = None
+    Version.objects.bulk_update(deltas, ['base', 'data'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0013_libraryitem_time_update_index'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='version',
+            name='base',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.RESTRICT, related_name='deltas', to='library.version', verbose_name='Опорная версия'),
+        ),
+        migrations.RunPython(compress_versions, expand_versions),
+    ]
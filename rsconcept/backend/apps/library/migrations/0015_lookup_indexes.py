@@ -0,0 +1,23 @@
+# Generated by Django 6.0.4 on 2026-10-18 15:43
+
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0014_version_delta'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='editor',
+            index=models.Index(fields=['editor', 'item'], name='library_edi_editor__48e2c4_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='libraryitem',
+            index=models.Index(fields=['location'], name='library_item_location_idx', opclasses=['text_pattern_ops']),
+        ),
+    ]
@@ -0,0 +1,23 @@
+# Generated by Django 6.0.4 on 2026-10-18 16:33
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0015_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='searchindexstate',
+            name='indexed_version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Проиндексированная версия'),
+        ),
+        migrations.AddField(
+            model_name='searchindexstate',
+            name='version',
+            field=models.PositiveIntegerField(default=0, verbose_name='Версия текстов'),
+        ),
+    ]
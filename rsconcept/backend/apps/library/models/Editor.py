@@ -2,7 +2,7 @@
 from typing import Iterable
 
 from django.db import transaction
-from django.db.models import CASCADE, DateTimeField, ForeignKey, Model
+from django.db.models import CASCADE, DateTimeField, ForeignKey, Index, Model
 
 from apps.users.models import User
 
@@ -29,6 +29,7 @@ class Editor(Model):
         verbose_name = 'Редактор'
         verbose_name_plural = 'Редакторы'
         unique_together = [['item', 'editor']]
+        indexes = [Index(fields=['editor', 'item'])]
 
     def __str__(self) -> str:
         return f'{self.item}: {self.editor}'
@@ -7,6 +7,7 @@ from django.db.models import (
     CharField,
     DateTimeField,
     ForeignKey,
+    Index,
     Model,
     QuerySet,
     TextChoices,
@@ -115,6 +116,11 @@ class LibraryItem(Model):
         ''' Model metadata. '''
         verbose_name = 'Элемент библиотеки'
         verbose_name_plural = 'Элементы библиотеки'
+        indexes = [
+            Index(fields=['time_update', 'id']),
+            # Pattern operator class lets PostgreSQL serve location prefix lookups
+            Index(fields=['location'], name='library_item_location_idx', opclasses=['text_pattern_ops'])
+        ]
 
     # pylint: disable=invalid-str-returned
     def __str__(self) -> str:
@@ -160,7 +166,7 @@ class LibraryItem(Model):
 
     def getQ_versions(self) -> QuerySet[Version]:
         ''' Get all Versions of this item. '''
-        return Version.objects.filter(item=self.pk).order_by('-time_create')
+        return Version.objects.filter(item=self.pk).defer('data').order_by('-time_create')
 
     def is_synced(self, target: 'LibraryItem') -> bool:
         ''' Check if item is synced with target. '''
@@ -0,0 +1,96 @@
+''' Models: Inverted index for library context search. '''
+from functools import partial
+from typing import Iterable
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import (
+    CASCADE,
+    CharField,
+    DateTimeField,
+    F,
+    ForeignKey,
+    Model,
+    OneToOneField,
+    PositiveIntegerField
+)
+from django.dispatch import Signal
+
+from .LibraryItem import LibraryItem
+
+# Sent after commit of transaction changing texts of items, arguments: items
+index_invalidated = Signal()
+
+
+class SearchTrigram(Model):
+    ''' Trigram occurring in texts of library item and its nested objects. '''
+    gram = CharField(
+        verbose_name='Триграмма',
+        max_length=3
+    )
+    item = ForeignKey(
+        verbose_name='Элемент библиотеки',
+        to='library.LibraryItem',
+        on_delete=CASCADE,
+        related_name='search_trigrams'
+    )
+    fields = PositiveIntegerField(
+        verbose_name='Поля поиска',
+        default=0
+    )
+
+    class Meta:
+        ''' Model metadata. '''
+        verbose_name = 'Триграмма поиска'
+        verbose_name_plural = 'Индекс поиска'
+        unique_together = [['gram', 'item']]
+
+    def __str__(self) -> str:
+        return f'{self.gram}: {self.item_id}'
+
+
+class SearchIndexState(Model):
+    ''' Text version of library item and version covered by its trigrams.
+
+    Item needs reindexing when row is missing or indexed version lags behind.
+    '''
+    item = OneToOneField(
+        verbose_name='Элемент библиотеки',
+        to='library.LibraryItem',
+        on_delete=CASCADE,
+        primary_key=True,
+        related_name='search_state'
+    )
+    time_indexed = DateTimeField(
+        verbose_name='Дата индексации',
+        auto_now=True
+    )
+    version = PositiveIntegerField(
+        verbose_name='Версия текстов',
+        default=0
+    )
+    indexed_version = PositiveIntegerField(
+        verbose_name='Проиндексированная версия',
+        default=0
+    )
+
+    class Meta:
+        ''' Model metadata. '''
+        verbose_name = 'Состояние индекса поиска'
+        verbose_name_plural = 'Состояния индекса поиска'
+
+    def __str__(self) -> str:
+        return f'{self.item_id}: {self.indexed_version}/{self.version}'
+
+    @staticmethod
+    def invalidate(items: Iterable[int]) -> None:
+        ''' Mark items for reindexing after texts change and notify index maintenance after commit. '''
+        if not settings.LIBRARY_SEARCH_INDEX:
+            return
+        ids = sorted(set(items))
+        if not ids:
+            return
+        missing = LibraryItem.objects.filter(pk__in=ids, search_state__isnull=True).values_list('pk', flat=True)
+        SearchIndexState.objects.bulk_create([SearchIndexState(item_id=pk) for pk in missing], ignore_conflicts=True)
+        SearchIndexState.objects.filter(item_id__in=ids).update(version=F('version') + 1)
+        transaction.on_commit(partial(index_invalidated.send, sender=SearchIndexState, items=ids))
@@ -1,6 +1,17 @@
-''' Models: Version. '''
+''' Models: Version.
+
+Version content is stored as keyframe (full data) or as delta against latest keyframe of the same item.
+Delta keeps top level fields, order of constituents and only constituents differing from keyframe,
+so reconstruction always reads at most two rows. New keyframe is started after KEYFRAME_INTERVAL deltas
+or when delta is not much smaller than full data.
+'''
+import json
+from typing import Optional, cast
+
+from django.db import transaction
 from django.db.models import (
     CASCADE,
+    RESTRICT,
     CharField,
     DateTimeField,
     ForeignKey,
@@ -9,6 +20,59 @@ from django.db.models import (
     TextField
 )
 
+# Maximum number of deltas sharing one keyframe
+KEYFRAME_INTERVAL = 10
+
+# Delta is stored only if its size is below this fraction of full data size
+KEYFRAME_RATIO = 0.5
+
+
+def make_delta(keyframe: dict, data: dict) -> dict:
+    ''' Encode *data* as difference from *keyframe*. '''
+    known = {cst['id']: cst for cst in keyframe['items']}
+    items = data['items']
+    return {
+        'head': {key: value for key, value in data.items() if key != 'items'},
+        'order': [cst['id'] for cst in items],
+        'changed': [cst for cst in items if known.get(cst['id']) != cst]
+    }
+
+
+def apply_delta(keyframe: dict, delta: dict) -> dict:
+    ''' Restore full data from *keyframe* and *delta*. '''
+    known = {cst['id']: cst for cst in keyframe['items']}
+    known.update((cst['id'], cst) for cst in delta['changed'])
+    result = dict(delta['head'])
+    result['items'] = [known[cst_id] for cst_id in delta['order']]
+    return result
+
+
+def compress(data: dict, keyframe: Optional[dict], deltas: int) -> Optional[dict]:
+    ''' Delta for *data* if it is worth storing against *keyframe* with *deltas* dependents, None otherwise. '''
+    if keyframe is None or deltas >= KEYFRAME_INTERVAL:
+        return None
+    delta = make_delta(keyframe, data)
+    if len(json.dumps(delta)) >= KEYFRAME_RATIO * len(json.dumps(data)):
+        return None
+    return delta
+
+
+def encode_sequence(contents: list[dict]) -> list[tuple[Optional[int], dict]]:
+    ''' Storage for consecutive versions: (index of keyframe or None for keyframe, payload). '''
+    result: list[tuple[Optional[int], dict]] = []
+    keyframe: Optional[int] = None
+    deltas = 0
+    for index, data in enumerate(contents):
+        delta = compress(data, contents[keyframe] if keyframe is not None else None, deltas)
+        if delta is None:
+            keyframe = index
+            deltas = 0
+            result.append((None, data))
+        else:
+            deltas += 1
+            result.append((keyframe, delta))
+    return result
+
 
 class Version(Model):
     ''' Library item version archive. '''
@@ -29,6 +93,14 @@ class Version(Model):
     data = JSONField(
         verbose_name='Содержание'
     )
+    base = ForeignKey(
+        verbose_name='Опорная версия',
+        to='self',
+        related_name='deltas',
+        on_delete=RESTRICT,
+        blank=True,
+        null=True
+    )
     time_create = DateTimeField(
         verbose_name='Дата создания',
         auto_now_add=True
@@ -42,3 +114,53 @@ class Version(Model):
 
     def __str__(self) -> str:
         return f'{self.item} v{self.version}'
+
+    @staticmethod
+    def store(item_id: int, version: str, description: str, data: dict) -> 'Version':
+        ''' Create version for *data* choosing between keyframe and delta storage. '''
+        keyframe = Version.objects \
+            .filter(item_id=item_id, base__isnull=True) \
+            .order_by('-pk') \
+            .first()
+        delta = None
+        if keyframe is not None:
+            delta = compress(data, keyframe.data, keyframe.deltas.count())
+        return Version.objects.create(
+            item_id=item_id,
+            version=version,
+            description=description,
+            data=data if delta is None else delta,
+            base=None if delta is None else keyframe
+        )
+
+    def is_keyframe(self) -> bool:
+        ''' Check if version stores full data. '''
+        return self.base_id is None
+
+    def load_data(self) -> dict:
+        ''' Full version content. '''
+        if self.base_id is None:
+            return cast(dict, self.data)
+        keyframe = Version.objects.filter(pk=self.base_id).values_list('data', flat=True).get()
+        return apply_delta(keyframe, self.data)
+
+    def items_count(self) -> int:
+        ''' Number of constituents in version content. '''
+        key = 'items' if self.base_id is None else 'order'
+        return len(self.data.get(key, []))
+
+    def delete(self, *args, **kwargs):
+        with transaction.atomic():
+            if self.base_id is None:
+                self._rebase_deltas()
+            return super().delete(*args, **kwargs)
+
+    def _rebase_deltas(self) -> None:
+        dependents = list(self.deltas.order_by('pk'))
+        if not dependents:
+            return
+        contents = [apply_delta(self.data, version.data) for version in dependents]
+        for version, (keyframe, payload) in zip(dependents, encode_sequence(contents)):
+            version.base = dependents[keyframe] if keyframe is not None else None
+            version.data = payload
+        Version.objects.bulk_update(dependents, ['base', 'data'])
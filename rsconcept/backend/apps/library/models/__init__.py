@@ -3,4 +3,5 @@
 from .Editor import Editor
 from .LibraryItem import AccessPolicy, LibraryItem, LibraryItemType, LocationHead, validate_location
 from .LibraryTemplate import LibraryTemplate
+from .SearchIndex import SearchIndexState, SearchTrigram, index_invalidated
 from .Version import Version
@@ -5,8 +5,8 @@ from shared import messages as msg
 from shared.serializers import StrictSerializer
 
 from ..models import AccessPolicy, LibraryItemType, validate_location
-from ..services.context_search import ALL_CONTEXT_FIELDS
-from ..utils import MAX_LIBRARY_ITEM_ID, MAX_LIBRARY_ITEMS_BY_IDS
+from ..services.context_search import ALL_CONTEXT_FIELDS, decode_search_cursor
+from ..utils import MAX_CONTEXT_SEARCH_PAGE, MAX_LIBRARY_ITEM_ID, MAX_LIBRARY_ITEMS_BY_IDS
 
 
 class LocationSerializer(StrictSerializer):
@@ -75,10 +75,26 @@ class LibraryContextSearchSerializer(StrictSerializer):
     location = serializers.CharField(required=False, allow_blank=True, default='')
     subfolders = serializers.BooleanField(required=False, default=False)
     item_type = serializers.CharField(required=False, allow_blank=True, default='')
+    limit = serializers.IntegerField(
+        required=False,
+        min_value=1,
+        max_value=MAX_CONTEXT_SEARCH_PAGE,
+        help_text='Page size, enables ranked results'
+    )
+    cursor = serializers.CharField(required=False, allow_blank=True, default='')
 
     def validate_q(self, value: str) -> str:
         return value.strip()
 
+    def validate_cursor(self, value: str) -> tuple[int, int] | None:
+        value = value.strip()
+        if not value:
+            return None
+        try:
+            return decode_search_cursor(value)
+        except ValueError as exc:
+            raise serializers.ValidationError(f'Invalid cursor: {value}') from exc
+
     def validate_location(self, value: str) -> str | None:
         value = value.strip()
         if not value:
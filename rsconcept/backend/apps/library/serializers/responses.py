@@ -3,6 +3,8 @@ from rest_framework import serializers
 
 from shared.serializers import StrictSerializer
 
+from .data_access import LibraryItemSerializer
+
 
 class NewVersionResponse(StrictSerializer):
     ''' Serializer: Create version response. '''
@@ -10,6 +12,26 @@ class NewVersionResponse(StrictSerializer):
     schema = serializers.JSONField()
 
 
+class LibraryContextSearchMatchSerializer(StrictSerializer):
+    ''' Serializer: library context search match. '''
+    kind = serializers.ChoiceField(choices=['item', 'constituenta', 'data', 'operation', 'block'])
+    id = serializers.IntegerField()
+    name = serializers.CharField()
+    field = serializers.CharField()
+    snippet = serializers.CharField()
+    highlight = serializers.ListField(child=serializers.IntegerField(), min_length=2, max_length=2)
+
+
+class LibraryContextSearchResultSerializer(StrictSerializer):
+    ''' Serializer: library context search ranked result. '''
+    item = LibraryItemSerializer()
+    score = serializers.IntegerField()
+    matches = serializers.ListField(child=LibraryContextSearchMatchSerializer())
+
+
 class LibraryContextSearchResponseSerializer(StrictSerializer):
     ''' Serializer: library context search response. '''
     ids = serializers.ListField(child=serializers.IntegerField())
+    results = serializers.ListField(child=LibraryContextSearchResultSerializer(), required=False)
+    count = serializers.IntegerField(required=False)
+    next = serializers.CharField(required=False, allow_null=True)
@@ -4,21 +4,17 @@ from typing import Optional
 
 from django.contrib.auth.models import User
 from django.db import transaction
+from django.db.models import F
+from django.utils import timezone
 
 from apps.library.models import Editor, LibraryItem, LibraryItemType, LocationHead
-from apps.oss.models import (
-    Argument,
-    Block,
-    Inheritance,
-    Layout,
-    Operation,
-    PropagationFacade,
-    Replica,
-    Substitution
-)
-from apps.rsform.models import RSFormCached
+from apps.oss.models import Argument, Block, Inheritance, Layout, Operation, Replica, Substitution
+from apps.rsform.models import Attribution, Constituenta, RSFormCached
 from apps.rsmodel.models import ConstituentData, RSModel
 
+# Constituenta columns copied by OSS clone
+_CST_FIELDS = [field.attname for field in Constituenta._meta.concrete_fields]  # pylint: disable=protected-access
+
 
 def clone_library_item_shell(source: LibraryItem, owner: User, item_data: dict) -> LibraryItem:
     ''' Create a new library item row from clone metadata. '''
@@ -73,7 +69,10 @@ def clone_rsmodel(source: LibraryItem, owner: User, item_data: dict) -> LibraryI
 
 
 def clone_oss(source: LibraryItem, owner: User, item_data: dict) -> LibraryItem:
-    ''' Clone OSS graph, attached schemas, and relations into a new library folder. '''
+    ''' Clone OSS graph, attached schemas, and relations into a new library folder.
+
+    Each table is copied with one bulk insert using id remapping tables, so query count does not depend on OSS size.
+    '''
     if source.item_type != LibraryItemType.OPERATION_SCHEMA:
         raise ValueError('Source is not an operation schema')
 
@@ -82,16 +81,15 @@ def clone_oss(source: LibraryItem, owner: User, item_data: dict) -> LibraryItem:
 
         Layout.objects.create(oss=clone, data=[])
 
+        operations = list(Operation.objects.filter(oss_id=source.pk).order_by('pk'))
         block_map = _clone_oss_blocks(source.pk, clone.pk)
-        operation_map = _clone_oss_operations(source.pk, clone.pk, block_map)
-        schema_map, cst_map = _clone_oss_attached_schemas(source, clone, owner, item_data)
-        _apply_oss_operation_results(operation_map, schema_map)
+        schema_map, cst_map = _clone_oss_attached_schemas(source, clone, owner, item_data, operations)
+        operation_map = _clone_oss_operations(source.pk, clone.pk, operations, block_map, schema_map)
         _clone_oss_arguments(source.pk, operation_map)
-        _clone_oss_replicas(source.pk, operation_map)
         _clone_oss_substitutions(source.pk, operation_map, cst_map)
         _clone_oss_inheritances(source.pk, operation_map, cst_map)
         _clone_oss_layout(source.pk, clone.pk, block_map, operation_map)
-        _copy_oss_editors(source.pk, clone.pk)
+        _copy_oss_editors(source, clone.pk)
 
         return clone
 
@@ -113,20 +111,20 @@ def clone_library_item(
 
 
 def _clone_oss_blocks(source_oss_id: int, clone_oss_id: int) -> dict[int, int]:
-    block_map: dict[int, int] = {}
     blocks = list(Block.objects.filter(oss_id=source_oss_id).order_by('pk'))
-    for block in blocks:
-        new_block = Block.objects.create(
+    new_blocks = Block.objects.bulk_create([
+        Block(
             oss_id=clone_oss_id,
             title=block.title,
             description=block.description,
             parent=None
         )
-        block_map[block.pk] = new_block.pk
+        for block in blocks
+    ])
+    block_map = {block.pk: new_block.pk for block, new_block in zip(blocks, new_blocks)}
     updates: list[Block] = []
-    for block in blocks:
+    for block, new_block in zip(blocks, new_blocks):
         if block.parent_id is not None:
-            new_block = Block.objects.get(pk=block_map[block.pk])
             new_block.parent_id = block_map[block.parent_id]
             updates.append(new_block)
     if updates:
@@ -134,44 +132,21 @@ def _clone_oss_blocks(source_oss_id: int, clone_oss_id: int) -> dict[int, int]:
     return block_map
 
 
-def _clone_oss_operations(
-    source_oss_id: int,
-    clone_oss_id: int,
-    block_map: dict[int, int]
-) -> dict[int, int]:
-    operation_map: dict[int, int] = {}
-    for operation in Operation.objects.filter(oss_id=source_oss_id).order_by('pk'):
-        parent_id = block_map.get(operation.parent_id) if operation.parent_id else None
-        new_operation = Operation.objects.create(
-            oss_id=clone_oss_id,
-            operation_type=operation.operation_type,
-            alias=operation.alias,
-            title=operation.title,
-            description=operation.description,
-            parent_id=parent_id,
-            result=None
-        )
-        operation_map[operation.pk] = new_operation.pk
-    return operation_map
-
-
 def _clone_oss_attached_schemas(
     source: LibraryItem,
     clone: LibraryItem,
     owner: User,
     item_data: dict,
+    operations: list[Operation]
 ) -> tuple[dict[int, int], dict[int, int]]:
-    schema_map: dict[int, int] = {}
-    cst_map: dict[int, int] = {}
-    result_ids = {
-        op.result_id
-        for op in Operation.objects.filter(oss_id=source.pk).only('result_id')
-        if op.result_id is not None
-    }
-    editor_ids = list(source.getQ_editors().values_list('pk', flat=True))
-
-    for old_schema_id in sorted(result_ids):
-        prototype = LibraryItem.objects.get(pk=old_schema_id)
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    result_ids = {op.result_id for op in operations if op.result_id is not None}
+    if not result_ids:
+        return {}, {}
+    prototypes = list(LibraryItem.objects.filter(pk__in=result_ids).order_by('pk'))
+    time_update = timezone.now()
+    schema_clones: list[LibraryItem] = []
+    for prototype in prototypes:
         schema_clone = deepcopy(prototype)
         schema_clone.pk = None
         schema_clone.owner = owner
@@ -179,60 +154,96 @@ def _clone_oss_attached_schemas(
         schema_clone.read_only = False
         schema_clone.access_policy = item_data.get('access_policy', clone.access_policy)
         schema_clone.location = item_data['location']
-        schema_clone.save()
+        schema_clone.time_update = time_update
+        schema_clones.append(schema_clone)
+    LibraryItem.objects.bulk_create(schema_clones)
+    schema_map = {prototype.pk: schema_clone.pk for prototype, schema_clone in zip(prototypes, schema_clones)}
+
+    source_ids: list[int] = []
+    new_cst: list[Constituenta] = []
+    for row in Constituenta.objects \
+            .filter(schema_id__in=result_ids) \
+            .order_by('schema_id', 'order') \
+            .values(*_CST_FIELDS):
+        source_ids.append(row.pop('id'))
+        row['schema_id'] = schema_map[row['schema_id']]
+        new_cst.append(Constituenta(**row))
+    Constituenta.objects.bulk_create(new_cst)
+    cst_map = {old_id: cst.pk for old_id, cst in zip(source_ids, new_cst)}
+
+    Attribution.objects.bulk_create([
+        Attribution(container_id=cst_map[container_id], attribute_id=cst_map[attribute_id])
+        for container_id, attribute_id in Attribution.objects
+        .filter(container__schema_id__in=result_ids, attribute__schema_id=F('container__schema_id'))
+        .values_list('container_id', 'attribute_id')
+    ])
 
-        pairs = PropagationFacade().get_schema(schema_clone.pk).insert_from(old_schema_id)
-        schema_map[old_schema_id] = schema_clone.pk
-        for old_cst, new_cst in pairs:
-            cst_map[old_cst.pk] = new_cst.pk
+    editor_ids = list(source.getQ_editors().values_list('pk', flat=True))
+    Editor.objects.bulk_create([
+        Editor(item_id=schema_id, editor_id=editor_id)
+        for schema_id in schema_map.values()
+        for editor_id in editor_ids
+    ])
+    return schema_map, cst_map
 
-        if editor_ids:
-            Editor.set(schema_clone.pk, editor_ids)
 
-    return schema_map, cst_map
+def _clone_oss_operations(
+    source_oss_id: int,
+    clone_oss_id: int,
+    operations: list[Operation],
+    block_map: dict[int, int],
+    schema_map: dict[int, int]
+) -> dict[int, int]:
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    result_by_id = {operation.pk: operation.result_id for operation in operations}
+    replicas = list(Replica.objects.filter(original__oss_id=source_oss_id).order_by('pk'))
+    for replica in replicas:
+        if replica.replica_id not in result_by_id or replica.original_id not in result_by_id:
+            raise ValueError('Replica references operation outside cloned OSS')
+        result_by_id[replica.replica_id] = result_by_id[replica.original_id]
 
+    new_operations = Operation.objects.bulk_create([
+        Operation(
+            oss_id=clone_oss_id,
+            operation_type=operation.operation_type,
+            alias=operation.alias,
+            title=operation.title,
+            description=operation.description,
+            parent_id=block_map.get(operation.parent_id) if operation.parent_id else None,
+            result_id=_map_result(result_by_id[operation.pk], schema_map)
+        )
+        for operation in operations
+    ])
+    operation_map = {operation.pk: new_operation.pk for operation, new_operation in zip(operations, new_operations)}
+    Replica.objects.bulk_create([
+        Replica(replica_id=operation_map[replica.replica_id], original_id=operation_map[replica.original_id])
+        for replica in replicas
+    ])
+    return operation_map
 
-def _apply_oss_operation_results(operation_map: dict[int, int], schema_map: dict[int, int]) -> None:
-    updates: list[Operation] = []
-    for old_id, new_id in operation_map.items():
-        old_operation = Operation.objects.get(pk=old_id)
-        if old_operation.result_id is None:
-            continue
-        new_schema_id = schema_map.get(old_operation.result_id)
-        if new_schema_id is None:
-            raise ValueError(f'Missing cloned schema for operation result {old_operation.result_id}')
-        new_operation = Operation.objects.get(pk=new_id)
-        new_operation.result_id = new_schema_id
-        updates.append(new_operation)
-    if updates:
-        Operation.objects.bulk_update(updates, ['result'])
+
+def _map_result(result_id: Optional[int], schema_map: dict[int, int]) -> Optional[int]:
+    if result_id is None:
+        return None
+    new_schema_id = schema_map.get(result_id)
+    if new_schema_id is None:
+        raise ValueError(f'Missing cloned schema for operation result {result_id}')
+    return new_schema_id
 
 
 def _clone_oss_arguments(source_oss_id: int, operation_map: dict[int, int]) -> None:
+    new_arguments: list[Argument] = []
     for argument in Argument.objects.filter(operation__oss_id=source_oss_id).order_by('order', 'pk'):
         operation_id = operation_map.get(argument.operation_id)
         argument_id = operation_map.get(argument.argument_id)
         if operation_id is None or argument_id is None:
             raise ValueError('Argument references operation outside cloned OSS')
-        Argument.objects.create(
+        new_arguments.append(Argument(
             operation_id=operation_id,
             argument_id=argument_id,
             order=argument.order
-        )
-
-
-def _clone_oss_replicas(source_oss_id: int, operation_map: dict[int, int]) -> None:
-    for replica in Replica.objects.filter(original__oss_id=source_oss_id).order_by('pk'):
-        replica_id = operation_map.get(replica.replica_id)
-        original_id = operation_map.get(replica.original_id)
-        if replica_id is None or original_id is None:
-            raise ValueError('Replica references operation outside cloned OSS')
-        original = Operation.objects.get(pk=original_id)
-        replica_op = Operation.objects.get(pk=replica_id)
-        if replica_op.result_id != original.result_id:
-            replica_op.result_id = original.result_id
-            replica_op.save(update_fields=['result'])
-        Replica.objects.create(replica_id=replica_id, original_id=original_id)
+        ))
+    Argument.objects.bulk_create(new_arguments)
 
 
 def _clone_oss_substitutions(
@@ -240,6 +251,7 @@ def _clone_oss_substitutions(
     operation_map: dict[int, int],
     cst_map: dict[int, int]
 ) -> None:
+    new_substitutions: list[Substitution] = []
     for substitution in Substitution.objects.filter(operation__oss_id=source_oss_id).order_by('pk'):
         operation_id = operation_map.get(substitution.operation_id)
         if operation_id is None:
@@ -248,11 +260,12 @@ def _clone_oss_substitutions(
         substitution_id = cst_map.get(substitution.substitution_id)
         if original_id is None or substitution_id is None:
             raise ValueError('Substitution references uncloned constituent')
-        Substitution.objects.create(
+        new_substitutions.append(Substitution(
             operation_id=operation_id,
             original_id=original_id,
             substitution_id=substitution_id
-        )
+        ))
+    Substitution.objects.bulk_create(new_substitutions)
 
 
 def _clone_oss_inheritances(
@@ -260,6 +273,7 @@ def _clone_oss_inheritances(
     operation_map: dict[int, int],
     cst_map: dict[int, int]
 ) -> None:
+    new_inheritances: list[Inheritance] = []
     for inheritance in Inheritance.objects.filter(operation__oss_id=source_oss_id).order_by('pk'):
         operation_id = operation_map.get(inheritance.operation_id)
         if operation_id is None:
@@ -268,11 +282,12 @@ def _clone_oss_inheritances(
         child_id = cst_map.get(inheritance.child_id)
         if parent_id is None or child_id is None:
             raise ValueError('Inheritance references uncloned constituent')
-        Inheritance.objects.create(
+        new_inheritances.append(Inheritance(
             operation_id=operation_id,
             parent_id=parent_id,
             child_id=child_id
-        )
+        ))
+    Inheritance.objects.bulk_create(new_inheritances)
 
 
 def _clone_oss_layout(
@@ -302,9 +317,7 @@ def _clone_oss_layout(
     Layout.update_data(clone_oss_id, new_layout)
 
 
-def _copy_oss_editors(source_oss_id: int, clone_oss_id: int) -> None:
-    editor_ids = list(
-        LibraryItem.objects.get(pk=source_oss_id).getQ_editors().values_list('pk', flat=True)
-    )
+def _copy_oss_editors(source: LibraryItem, clone_oss_id: int) -> None:
+    editor_ids = list(source.getQ_editors().values_list('pk', flat=True))
     if editor_ids:
         Editor.set(clone_oss_id, editor_ids)
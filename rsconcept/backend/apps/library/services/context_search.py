@@ -1,32 +1,63 @@
 ''' Library context search across item and nested text fields. '''
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from bisect import bisect_right
 from typing import Iterable, Optional, cast
 
-from django.db import connection
-from django.db.models import Q, QuerySet
+from django.conf import settings
+from django.db.models import Exists, OuterRef, Q, QuerySet
 
-from apps.library.models import AccessPolicy, LibraryItem, LibraryItemType, LocationHead
+from apps.library.models import AccessPolicy, Editor, LibraryItem, LibraryItemType, LocationHead
 from apps.oss.models import Block, Operation
 from apps.rsform.models import Constituenta
 from apps.rsmodel.models import ConstituentData, RSModel
 from apps.users.models import User
 
-ALL_CONTEXT_FIELDS = frozenset({
-    'alias',
-    'title',
-    'description',
-    'term',
-    'definition_formal',
-    'definition_text',
-    'convention',
-    'operation',
-    'block',
-})
+from .search_backends import get_search_backend
+from .search_index import (
+    BLOCK_FIELDS,
+    CONTEXT_FIELDS,
+    CST_FIELDS,
+    DATA_FIELDS,
+    DIRTY_ITEMS,
+    ITEM_FIELDS,
+    OPERATION_FIELDS,
+    find_candidates
+)
+
+ALL_CONTEXT_FIELDS = frozenset(CONTEXT_FIELDS)
+
+# Larger candidate sets are passed to SQL as subquery instead of parameter list.
+# Items not yet reindexed after text changes are always candidates
+_MAX_CANDIDATE_PARAMS = 1000
+
+# Rank weights of matched fields: own texts of item, texts of nested objects
+_ITEM_WEIGHTS = {'alias': 10, 'title': 8, 'description': 3}
+_NESTED_WEIGHTS = {
+    'alias': 5,
+    'term': 5,
+    'operation': 4,
+    'block': 3,
+    'definition_text': 2,
+    'definition_formal': 2,
+    'convention': 1,
+}
+# Text sources: kind of matched object, its label column, indexed columns, field weights
+_ITEM_SOURCE = ('item', 'alias', ITEM_FIELDS, _ITEM_WEIGHTS)
+_CST_SOURCE = ('constituenta', 'alias', CST_FIELDS, _NESTED_WEIGHTS)
+_DATA_SOURCE = ('data', 'constituent__alias', DATA_FIELDS, _NESTED_WEIGHTS)
+_OPERATION_SOURCE = ('operation', 'alias', OPERATION_FIELDS, _NESTED_WEIGHTS)
+_BLOCK_SOURCE = ('block', 'title', BLOCK_FIELDS, _NESTED_WEIGHTS)
+
+_FREQUENCY_LIMIT = 1000
+_MAX_MATCHES = 3
+_SNIPPET_RADIUS = 40
 
 
 def get_accessible_items_queryset(user, *, all_items: bool = False) -> QuerySet[LibraryItem]:
     ''' Items visible to *user* (or all items for staff admin mode).
 
     Editor listings exclude ``PRIVATE`` items — same rule as ``can_read_library_item``.
+    Editor check is a correlated EXISTS, so rows are not multiplied by join and need no DISTINCT.
     '''
     if all_items:
         return LibraryItem.objects.all()
@@ -35,11 +66,12 @@ def get_accessible_items_queryset(user, *, all_items: bool = False) -> QuerySet[
     if user.is_anonymous:
         return LibraryItem.objects.filter(is_public).filter(common_location)
     user = cast(User, user)
+    is_editor = Exists(Editor.objects.filter(item=OuterRef('pk'), editor=user))
     return LibraryItem.objects.filter(
         (is_public & common_location) |
         Q(owner=user) |
-        (Q(editor__editor=user) & ~Q(access_policy=AccessPolicy.PRIVATE))
-    ).distinct()
+        (is_editor & ~Q(access_policy=AccessPolicy.PRIVATE))
+    )
 
 
 # pylint: disable=too-many-arguments
@@ -54,13 +86,162 @@ def search_library_context(
     item_type: Optional[str] = None,
 ) -> list[int]:
     ''' Return library item ids whose nested text matches *query*. '''
+    return sorted(_find_hits(
+        user,
+        query,
+        detailed=False,
+        fields=fields,
+        all_items=all_items,
+        location=location,
+        subfolders=subfolders,
+        item_type=item_type
+    ))
+
+
+# pylint: disable=too-many-arguments
+def rank_library_context(
+    user,
+    query: str,
+    *,
+    fields: Optional[Iterable[str]] = None,
+    all_items: bool = False,
+    location: Optional[str] = None,
+    subfolders: bool = False,
+    item_type: Optional[str] = None,
+) -> list[tuple[int, 'SearchHits']]:
+    ''' Return matching items with their hits ordered by rank key. '''
+    hits = _find_hits(
+        user,
+        query,
+        detailed=True,
+        fields=fields,
+        all_items=all_items,
+        location=location,
+        subfolders=subfolders,
+        item_type=item_type
+    )
+    return sorted(hits.items(), key=lambda entry: entry[1].rank_key(entry[0]))
+
+
+def paginate_ranked(
+    ranked: list[tuple[int, 'SearchHits']],
+    limit: int,
+    after: Optional[tuple[int, int]] = None
+) -> tuple[list[tuple[int, 'SearchHits']], Optional[tuple[int, int]]]:
+    ''' Page of ranked items following *after* key and key of the last item if more items remain. '''
+    start = 0
+    if after is not None:
+        start = bisect_right(ranked, after, key=lambda entry: entry[1].rank_key(entry[0]))
+    page = ranked[start:start + limit]
+    if start + limit >= len(ranked):
+        return page, None
+    return page, page[-1][1].rank_key(page[-1][0])
+
+
+def encode_search_cursor(key: tuple[int, int]) -> str:
+    ''' Opaque cursor for rank key. '''
+    return urlsafe_b64encode(f'{key[0]}:{key[1]}'.encode()).decode()
+
+
+def decode_search_cursor(cursor: str) -> tuple[int, int]:
+    ''' Rank key from cursor. Raise ValueError for malformed cursor. '''
+    score, pk = urlsafe_b64decode(cursor.encode()).decode().split(':')
+    return int(score), int(pk)
+
+
+class SearchHits:
+    ''' Matches of query found for single library item.
+
+    Rank prefers items with best matched field, then items with more matches.
+    Only best matches are kept with their texts for snippets.
+    '''
+
+    def __init__(self) -> None:
+        self.weight = 0
+        self.count = 0
+        self.best: list[dict] = []
+
+    @property
+    def score(self) -> int:
+        ''' Numeric rank, larger is better. '''
+        return self.weight * _FREQUENCY_LIMIT + min(self.count, _FREQUENCY_LIMIT - 1)
+
+    def rank_key(self, pk: int) -> tuple[int, int]:
+        ''' Ascending sort key, ties are ordered by id. '''
+        return -self.score, pk
+
+    def add(self, weight: int, match: dict) -> None:
+        ''' Register matched row. '''
+        self.count += 1
+        self.weight = max(self.weight, weight)
+        if len(self.best) == _MAX_MATCHES and weight <= self.best[-1]['weight']:
+            return
+        self.best.append({**match, 'weight': weight})
+        self.best.sort(key=lambda entry: -entry['weight'])
+        del self.best[_MAX_MATCHES:]
+
+    def matches(self, query: str) -> list[dict]:
+        ''' Best matches with highlighted snippets. '''
+        result = []
+        for match in self.best:
+            snippet, start, end = build_snippet(match['text'], query)
+            result.append({
+                'kind': match['kind'],
+                'id': match['id'],
+                'name': match['name'],
+                'field': match['field'],
+                'snippet': snippet,
+                'highlight': [start, end],
+            })
+        return result
+
+
+def build_snippet(text: str, query: str) -> tuple[str, int, int]:
+    ''' Fragment of *text* around first occurrence of *query* and position of occurrence in fragment. '''
+    position, length = _locate(text, query)
+    start = max(0, position - _SNIPPET_RADIUS)
+    end = min(len(text), position + length + _SNIPPET_RADIUS)
+    prefix = '…' if start > 0 else ''
+    suffix = '…' if end < len(text) else ''
+    offset = len(prefix) + position - start
+    return prefix + text[start:end] + suffix, offset, offset + length
+
+
+def _locate(text: str, query: str) -> tuple[int, int]:
+    ''' Position and length in *text* of first occurrence of *query* with the same case folding as matching. '''
+    folded = []
+    origins = []
+    for index, char in enumerate(text):
+        for folded_char in char.casefold():
+            folded.append(folded_char)
+            origins.append(index)
+    needle = query.casefold()
+    found = ''.join(folded).find(needle)
+    if found < 0 or not needle:
+        return 0, 0
+    start = origins[found]
+    return start, origins[found + len(needle) - 1] + 1 - start
+
+
+# pylint: disable=too-many-arguments,too-many-locals
+def _find_hits(
+    user,
+    query: str,
+    *,
+    detailed: bool,
+    fields: Optional[Iterable[str]],
+    all_items: bool,
+    location: Optional[str],
+    subfolders: bool,
+    item_type: Optional[str],
+) -> dict[int, SearchHits]:
     normalized_query = query.strip()
     if not normalized_query:
-        return []
+        return {}
 
     active_fields = _normalize_fields(fields)
     if not active_fields:
-        return []
+        return {}
 
     accessible = _apply_search_filters(
         get_accessible_items_queryset(user, all_items=all_items),
@@ -68,81 +249,104 @@ def search_library_context(
         subfolders=subfolders,
         item_type=item_type,
     )
-    matching_ids: set[int] = set()
-
-    item_text_fields = _library_item_text_fields(active_fields)
-    if item_text_fields:
-        matching_ids.update(
-            _collect_matching_ids(accessible, item_text_fields, normalized_query, 'pk')
-        )
+    candidates: Optional[set[int] | QuerySet] = None
+    if settings.LIBRARY_SEARCH_INDEX:
+        found = find_candidates(normalized_query, active_fields)
+        if found is not None:
+            dirty = accessible.filter(DIRTY_ITEMS).values_list('pk', flat=True)
+            candidates = set(found) | set(dirty)
+            if not candidates:
+                return {}
+            if len(candidates) > _MAX_CANDIDATE_PARAMS:
+                candidates = LibraryItem.objects.filter(Q(pk__in=found) | DIRTY_ITEMS).values_list('pk', flat=True)
+    hits: dict[int, SearchHits] = {}
+    scan = _SourceScan(hits, normalized_query, active_fields, candidates, detailed=detailed)
+
+    scan.run(accessible, 'pk', _ITEM_SOURCE)
 
     accessible_ids = list(accessible.values_list('pk', flat=True))
     if not accessible_ids:
-        return sorted(matching_ids)
-
-    cst_text_fields = _constituenta_text_fields(active_fields)
-    if cst_text_fields:
-        rsform_ids = accessible.filter(item_type=LibraryItemType.RSFORM).values_list('pk', flat=True)
-        matching_ids.update(
-            _collect_matching_ids(
-                Constituenta.objects.filter(schema_id__in=rsform_ids),
-                cst_text_fields,
-                normalized_query,
-                'schema_id'
-            )
+        return hits
+
+    rsform_ids = accessible.filter(item_type=LibraryItemType.RSFORM).values_list('pk', flat=True)
+    scan.run(Constituenta.objects.filter(schema_id__in=rsform_ids), 'schema_id', _CST_SOURCE)
+
+    models_by_schema: dict[int, list[int]] = {}
+    for schema_id, model_id in RSModel.objects.filter(
+        model_id__in=accessible_ids,
+        schema_id__in=rsform_ids
+    ).values_list('schema_id', 'model_id'):
+        models_by_schema.setdefault(schema_id, []).append(model_id)
+    if models_by_schema:
+        scan.run(
+            Constituenta.objects.filter(schema_id__in=list(models_by_schema)),
+            'schema_id',
+            _CST_SOURCE,
+            owners=models_by_schema
         )
+    scan.run(ConstituentData.objects.filter(model_id__in=accessible_ids), 'model_id', _DATA_SOURCE)
 
-        linked_schema_ids = RSModel.objects.filter(
-            model_id__in=accessible_ids,
-            schema_id__isnull=False
-        ).values_list('schema_id', flat=True)
-        accessible_linked_schema_ids = accessible.filter(
-            item_type=LibraryItemType.RSFORM,
-            pk__in=linked_schema_ids
-        ).values_list('pk', flat=True)
-        matched_schema_ids = _collect_matching_ids(
-            Constituenta.objects.filter(schema_id__in=accessible_linked_schema_ids),
-            cst_text_fields,
-            normalized_query,
-            'schema_id'
-        )
-        matching_ids.update(
-            RSModel.objects
-            .filter(model_id__in=accessible_ids, schema_id__in=matched_schema_ids)
-            .values_list('model_id', flat=True)
-        )
+    oss_ids = accessible.filter(item_type=LibraryItemType.OPERATION_SCHEMA).values_list('pk', flat=True)
+    scan.run(Operation.objects.filter(oss_id__in=oss_ids), 'oss_id', _OPERATION_SOURCE)
+    scan.run(Block.objects.filter(oss_id__in=oss_ids), 'oss_id', _BLOCK_SOURCE)
+    return hits
 
-        if 'definition_text' in active_fields:
-            matching_ids.update(
-                _collect_matching_ids(
-                    ConstituentData.objects.filter(model_id__in=accessible_ids),
-                    ['type'],
-                    normalized_query,
-                    'model_id'
-                )
-            )
 
-    oss_ids = accessible.filter(item_type=LibraryItemType.OPERATION_SCHEMA).values_list('pk', flat=True)
-    if 'operation' in active_fields:
-        matching_ids.update(
-            _collect_matching_ids(
-                Operation.objects.filter(oss_id__in=oss_ids),
-                ['alias', 'title', 'description'],
-                normalized_query,
-                'oss_id'
-            )
-        )
-    if 'block' in active_fields:
-        matching_ids.update(
-            _collect_matching_ids(
-                Block.objects.filter(oss_id__in=oss_ids),
-                ['title', 'description'],
-                normalized_query,
-                'oss_id'
-            )
+class _SourceScan:
+    ''' Single pass over text source registering hits for owning items.
+
+    Without details only matched owners are registered, texts are not loaded when backend match is exact.
+    '''
+
+    def __init__(
+        self,
+        hits: dict[int, SearchHits],
+        query: str,
+        active_fields: set[str],
+        candidates: Optional[set[int] | QuerySet],
+        *,
+        detailed: bool
+    ) -> None:
+        self.hits = hits
+        self.query = query
+        self.active_fields = active_fields
+        self.candidates = candidates
+        self.detailed = detailed
+        self.backend = get_search_backend()
+
+    def run(
+        self,
+        queryset: QuerySet,
+        owner_field: str,
+        source: tuple[str, str, dict[str, str], dict[str, int]],
+        owners: Optional[dict[int, list[int]]] = None
+    ) -> None:
+        ''' Register rows of *queryset* matching query. Hits go to *owners* of row owner when given. '''
+        kind, label_field, columns, weights = source
+        text_fields = [column for column, field in columns.items() if field in self.active_fields]
+        if not text_fields:
+            return
+        queryset = _restrict(queryset, owner_field, self.candidates)
+        if not self.detailed:
+            for owner in self.backend.collect(queryset, text_fields, self.query, owner_field):
+                for target in _targets(owner, owners):
+                    self.hits.setdefault(target, SearchHits())
+            return
+        rows = self.backend.rows(
+            queryset,
+            text_fields,
+            self.query,
+            [owner_field, 'pk', label_field]
         )
+        for (owner, pk, label), matched in rows:
+            weight, column, text = max((weights[columns[column]], column, text) for column, text in matched)
+            match = {'kind': kind, 'id': pk, 'name': label, 'field': columns[column], 'text': text}
+            for target in _targets(owner, owners):
+                self.hits.setdefault(target, SearchHits()).add(weight, match)
+
 
-    return sorted(matching_ids)
+def _targets(owner: int, owners: Optional[dict[int, list[int]]]) -> list[int]:
+    return owners.get(owner, []) if owners is not None else [owner]
 
 
 def get_accessible_library_items_by_ids(user, ids: list[int]) -> list[LibraryItem]:
@@ -173,65 +377,14 @@ def _apply_search_filters(
     return queryset
 
 
+def _restrict(queryset: QuerySet, owner_field: str, candidates: Optional[set[int] | QuerySet]) -> QuerySet:
+    ''' Limit texts to owners found by search index. '''
+    if candidates is None:
+        return queryset
+    return queryset.filter(**{f'{owner_field}__in': candidates})
+
+
 def _normalize_fields(fields: Optional[Iterable[str]]) -> set[str]:
     if not fields:
         return set(ALL_CONTEXT_FIELDS)
     return {field for field in fields if field in ALL_CONTEXT_FIELDS}
-
-
-def _uses_python_casefold() -> bool:
-    ''' SQLite upper()/lower() do not fold non-ASCII text reliably. '''
-    return connection.vendor == 'sqlite'
-
-
-def _collect_ids_casefold(queryset, text_fields: list[str], query: str, id_field: str) -> set[int]:
-    needle = query.casefold()
-    result: set[int] = set()
-    only_fields = [id_field, *text_fields]
-    for row in queryset.only(*only_fields).iterator():
-        for field in text_fields:
-            if needle in (getattr(row, field) or '').casefold():
-                result.add(getattr(row, id_field))
-                break
-    return result
-
-
-def _collect_ids_icontains(queryset, text_fields: list[str], query: str, id_field: str) -> set[int]:
-    condition = Q()
-    for field in text_fields:
-        condition |= Q(**{f'{field}__icontains': query})
-    return set(queryset.filter(condition).values_list(id_field, flat=True))
-
-
-def _collect_matching_ids(queryset, text_fields: list[str], query: str, id_field: str) -> set[int]:
-    if not text_fields:
-        return set()
-    if _uses_python_casefold():
-        return _collect_ids_casefold(queryset, text_fields, query, id_field)
-    return _collect_ids_icontains(queryset, text_fields, query, id_field)
-
-
-def _library_item_text_fields(active_fields: set[str]) -> list[str]:
-    fields: list[str] = []
-    if 'alias' in active_fields:
-        fields.append('alias')
-    if 'title' in active_fields:
-        fields.append('title')
-    if 'description' in active_fields:
-        fields.append('description')
-    return fields
-
-
-def _constituenta_text_fields(active_fields: set[str]) -> list[str]:
-    fields: list[str] = []
-    if 'alias' in active_fields:
-        fields.append('alias')
-    if 'term' in active_fields:
-        fields.extend(['term_resolved', 'term_raw'])
-    if 'definition_formal' in active_fields:
-        fields.extend(['definition_formal', 'typification_manual'])
-    if 'definition_text' in active_fields:
-        fields.extend(['definition_resolved', 'definition_raw'])
-    if 'convention' in active_fields:
-        fields.append('convention')
-    return fields
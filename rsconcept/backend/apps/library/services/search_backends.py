@@ -0,0 +1,244 @@
+''' Database backends for matching context search query against text columns.
+
+Backend is chosen by database vendor. ScanBackend folds texts in Python and serves as reference
+implementation: other backends must return the same owners for any query.
+
+Database case folding maps characters one to one, while Python folds 'ß' to 'ss' and ligatures
+to their letters. Queries touching such characters are not narrowed in database. Databases may
+also lag behind Unicode version of Python, so recently encoded scripts (e.g. Georgian Mtavruli)
+and historic letter variants can be missed by database backends.
+'''
+from typing import Iterator, Optional
+
+from django.db import connection as default_connection
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.models import Model, Q, QuerySet
+from django.db.models.expressions import RawSQL
+
+from apps.library.models import LibraryItem
+from apps.oss.models import Block, Operation
+from apps.rsform.models import Constituenta
+from apps.rsmodel.models import ConstituentData
+
+from .search_index import BLOCK_FIELDS, CST_FIELDS, DATA_FIELDS, ITEM_FIELDS, OPERATION_FIELDS
+
+# Shortest query served by trigram based structures
+MIN_TRIGRAM_QUERY = 3
+
+# Characters taking part in multi-character case folding, all of them are in Basic Multilingual Plane
+_FULL_FOLDING = frozenset(
+    char
+    for code in range(0x10000)
+    if len(folded := chr(code).casefold()) > 1
+    for char in (chr(code), *folded)
+)
+
+
+def searchable_sources() -> list[tuple[type[Model], tuple[str, ...]]]:
+    ''' Models with text columns used by context search. '''
+    return [
+        (LibraryItem, tuple(ITEM_FIELDS)),
+        (Constituenta, tuple(CST_FIELDS)),
+        (Operation, tuple(OPERATION_FIELDS)),
+        (Block, tuple(BLOCK_FIELDS)),
+        (ConstituentData, tuple(DATA_FIELDS)),
+    ]
+
+
+def is_fold_safe(query: str) -> bool:
+    ''' Check if database one to one case folding finds the same texts as Python casefold for *query*. '''
+    return _FULL_FOLDING.isdisjoint(query.casefold())
+
+
+def _table(model: type[Model]) -> str:
+    return model._meta.db_table  # pylint: disable=protected-access
+
+
+def _key(model: type[Model]) -> str:
+    return model._meta.pk.column  # pylint: disable=protected-access
+
+
+class SearchBackend:
+    ''' Substring matching of query against text columns.
+
+    Backends only narrow rows in database, candidates are verified with Python case folding
+    so all backends share semantics of reference scan.
+    '''
+
+    def narrow(self, queryset: QuerySet, text_fields: list[str], query: str) -> QuerySet:
+        ''' Restrict *queryset* to rows that may contain *query* in *text_fields*. '''
+        return queryset
+
+    def rows(
+        self,
+        queryset: QuerySet,
+        text_fields: list[str],
+        query: str,
+        values: list[str]
+    ) -> Iterator[tuple[tuple, list[tuple[str, str]]]]:
+        ''' Tuples of *values* for rows containing *query*, case insensitive, with matched fields and texts. '''
+        needle = query.casefold()
+        count = len(values)
+        rows = self.narrow(queryset, text_fields, query).values_list(*values, *text_fields)
+        for row in rows.iterator():
+            matched = [
+                (field, text)
+                for field, text in zip(text_fields, row[count:])
+                if text and needle in text.casefold()
+            ]
+            if matched:
+                yield row[:count], matched
+
+    def collect(self, queryset: QuerySet, text_fields: list[str], query: str, id_field: str) -> set[int]:
+        ''' Values of *id_field* for rows containing *query* in any of *text_fields*, case insensitive. '''
+        if self.is_exact(query):
+            narrowed = self.narrow(queryset, text_fields, query)
+            return set(narrowed.values_list(id_field, flat=True))
+        return {values[0] for values, _ in self.rows(queryset, text_fields, query, [id_field])}
+
+    def is_exact(self, query: str) -> bool:
+        ''' Check if narrowed rows need no verification. '''
+        return False
+
+    def install(self, cursor) -> None:
+        ''' Create database structures used by backend. '''
+
+    def uninstall(self, cursor) -> None:
+        ''' Drop database structures used by backend. '''
+
+    def repair(self, cursor) -> None:
+        ''' Restore structures lost by table rebuilds during migrations. '''
+
+    def rebuild(self, cursor) -> None:
+        ''' Refill structures from source tables. '''
+
+
+class ScanBackend(SearchBackend):
+    ''' Full scan with Python case folding. SQLite upper()/lower() do not fold non-ASCII text. '''
+
+
+class TrigramBackend(SearchBackend):
+    ''' PostgreSQL icontains lookups served by pg_trgm GIN indexes on UPPER(column). '''
+
+    def narrow(self, queryset: QuerySet, text_fields: list[str], query: str) -> QuerySet:
+        # UPPER keeps 'ß' and ligatures as is
+        if not is_fold_safe(query):
+            return queryset
+        condition = Q()
+        for field in text_fields:
+            condition |= Q(**{f'{field}__icontains': query})
+        return queryset.filter(condition)
+
+    def install(self, cursor) -> None:
+        cursor.execute('CREATE EXTENSION IF NOT EXISTS pg_trgm')
+        for table, column in self._indexed_columns():
+            # Expression matches SQL generated by Django for icontains lookup
+            cursor.execute(
+                f'CREATE INDEX IF NOT EXISTS {table}_{column}_trgm '
+                f'ON {table} USING gin ((UPPER({column}::text)) gin_trgm_ops)'
+            )
+
+    def uninstall(self, cursor) -> None:
+        for table, column in self._indexed_columns():
+            cursor.execute(f'DROP INDEX IF EXISTS {table}_{column}_trgm')
+
+    @staticmethod
+    def _indexed_columns() -> list[tuple[str, str]]:
+        return [
+            (_table(model), column)
+            for model, columns in searchable_sources()
+            for column in columns
+        ]
+
+
+class FtsBackend(SearchBackend):
+    ''' SQLite FTS5 trigram shadow tables kept in sync with source tables by triggers. '''
+
+    def narrow(self, queryset: QuerySet, text_fields: list[str], query: str) -> QuerySet:
+        if not self.is_exact(query):
+            return queryset
+        shadow = self._shadow(queryset.model)
+        # Trigram phrase matches substring with simple Unicode case folding
+        expression = '{' + ' '.join(text_fields) + '} : "' + query.replace('"', '""') + '"'
+        return queryset.filter(pk__in=RawSQL(f'SELECT rowid FROM {shadow} WHERE {shadow} MATCH %s', (expression,)))
+
+    def is_exact(self, query: str) -> bool:
+        return len(query) >= MIN_TRIGRAM_QUERY and is_fold_safe(query)
+
+    def install(self, cursor) -> None:
+        for model, columns in searchable_sources():
+            shadow = self._shadow(model)
+            cursor.execute(
+                f'CREATE VIRTUAL TABLE IF NOT EXISTS {shadow} '
+                f"USING fts5({', '.join(columns)}, tokenize='trigram')"
+            )
+            self._create_triggers(cursor, model, columns)
+            self._fill(cursor, model, columns)
+
+    def uninstall(self, cursor) -> None:
+        for model, _ in searchable_sources():
+            shadow = self._shadow(model)
+            for suffix in ('insert', 'update', 'delete'):
+                cursor.execute(f'DROP TRIGGER IF EXISTS {shadow}_{suffix}')
+            cursor.execute(f'DROP TABLE IF EXISTS {shadow}')
+
+    def repair(self, cursor) -> None:
+        cursor.execute("SELECT name FROM sqlite_master WHERE type IN ('table', 'trigger')")
+        existing = {row[0] for row in cursor.fetchall()}
+        for model, columns in searchable_sources():
+            shadow = self._shadow(model)
+            if shadow not in existing:
+                continue
+            if all(f'{shadow}_{suffix}' in existing for suffix in ('insert', 'update', 'delete')):
+                continue
+            self._create_triggers(cursor, model, columns)
+            self._fill(cursor, model, columns)
+
+    def rebuild(self, cursor) -> None:
+        for model, columns in searchable_sources():
+            self._fill(cursor, model, columns)
+
+    @staticmethod
+    def _shadow(model: type[Model]) -> str:
+        return f'{_table(model)}_fts'
+
+    def _create_triggers(self, cursor, model: type[Model], columns: tuple[str, ...]) -> None:
+        table = _table(model)
+        key = _key(model)
+        shadow = self._shadow(model)
+        names = ', '.join(columns)
+        values = ', '.join(f'new.{column}' for column in columns)
+        assignments = ', '.join(f'{column} = new.{column}' for column in columns)
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {shadow}_insert AFTER INSERT ON {table} BEGIN '
+            f'INSERT INTO {shadow}(rowid, {names}) VALUES (new.{key}, {values}); END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {shadow}_update AFTER UPDATE OF {names} ON {table} BEGIN '
+            f'UPDATE {shadow} SET {assignments} WHERE rowid = new.{key}; END'
+        )
+        cursor.execute(
+            f'CREATE TRIGGER IF NOT EXISTS {shadow}_delete AFTER DELETE ON {table} BEGIN '
+            f'DELETE FROM {shadow} WHERE rowid = old.{key}; END'
+        )
+
+    def _fill(self, cursor, model: type[Model], columns: tuple[str, ...]) -> None:
+        shadow = self._shadow(model)
+        names = ', '.join(columns)
+        cursor.execute(f'DELETE FROM {shadow}')
+        cursor.execute(
+            f'INSERT INTO {shadow}(rowid, {names}) '
+            f'SELECT {_key(model)}, {names} FROM {_table(model)}'
+        )
+
+
+_BACKENDS: dict[str, SearchBackend] = {
+    'postgresql': TrigramBackend(),
+    'sqlite': FtsBackend(),
+}
+_DEFAULT_BACKEND = ScanBackend()
+
+
+def get_search_backend(connection: Optional[BaseDatabaseWrapper] = None) -> SearchBackend:
+    ''' Backend for database vendor of *connection*. '''
+    return _BACKENDS.get((connection or default_connection).vendor, _DEFAULT_BACKEND)
@@ -0,0 +1,149 @@
+''' Trigram inverted index for library context search.
+
+Index is kept as a superset of item texts: stale trigrams of removed text only add candidates,
+which are discarded by verification in search. Text changes bump item text version,
+changed items are reindexed after commit or by background job and remain search candidates until then.
+Reindex records text version it has read, so texts committed during reindex keep item dirty.
+'''
+from typing import Iterable, Optional
+
+from django.db import transaction
+from django.db.models import Count, F, Q, QuerySet
+from django.utils import timezone
+
+from apps.library.models import LibraryItem, SearchIndexState, SearchTrigram
+from apps.oss.models import Block, Operation
+from apps.rsform.models import Constituenta
+from apps.rsmodel.models import ConstituentData
+
+CONTEXT_FIELDS = (
+    'alias',
+    'title',
+    'description',
+    'term',
+    'definition_formal',
+    'definition_text',
+    'convention',
+    'operation',
+    'block',
+)
+FIELD_BITS = {field: 1 << index for index, field in enumerate(CONTEXT_FIELDS)}
+
+# Context field for each indexed text column, grouped by owner of texts
+ITEM_FIELDS = {'alias': 'alias', 'title': 'title', 'description': 'description'}
+CST_FIELDS = {
+    'alias': 'alias',
+    'term_resolved': 'term',
+    'term_raw': 'term',
+    'definition_formal': 'definition_formal',
+    'typification_manual': 'definition_formal',
+    'definition_resolved': 'definition_text',
+    'definition_raw': 'definition_text',
+    'convention': 'convention',
+}
+OPERATION_FIELDS = {'alias': 'operation', 'title': 'operation', 'description': 'operation'}
+BLOCK_FIELDS = {'title': 'block', 'description': 'block'}
+DATA_FIELDS = {'type': 'definition_text'}
+
+# Items without up to date trigrams
+DIRTY_ITEMS = Q(search_state__isnull=True) | Q(search_state__indexed_version__lt=F('search_state__version'))
+
+_REINDEX_CHUNK = 200
+_BATCH_SIZE = 5000
+
+
+def trigrams(text: str) -> set[str]:
+    ''' Case folded trigrams of text. '''
+    folded = text.casefold()
+    return {folded[index:index + 3] for index in range(len(folded) - 2)}
+
+
+def fields_mask(fields: Iterable[str]) -> int:
+    ''' Bit mask for context fields. '''
+    mask = 0
+    for field in fields:
+        mask |= FIELD_BITS[field]
+    return mask
+
+
+def find_candidates(query: str, fields: Iterable[str]) -> Optional[QuerySet]:
+    ''' Ids of items containing every trigram of query in given fields. None if query is too short for index. '''
+    grams = trigrams(query)
+    if not grams:
+        return None
+    return SearchTrigram.objects \
+        .filter(gram__in=grams) \
+        .annotate(masked=F('fields').bitand(fields_mask(fields))) \
+        .filter(masked__gt=0) \
+        .values('item_id') \
+        .annotate(matched=Count('gram')) \
+        .filter(matched=len(grams)) \
+        .values_list('item_id', flat=True)
+
+
+def refresh_index(items: QuerySet[LibraryItem]) -> int:
+    ''' Reindex items without up to date trigrams. Return number of reindexed items. '''
+    dirty = list(items.filter(DIRTY_ITEMS).values_list('pk', flat=True))
+    reindex_items(dirty)
+    return len(dirty)
+
+
+def reindex_items(item_ids: Iterable[int]) -> None:
+    ''' Rebuild trigrams for given items. '''
+    ids = sorted(set(item_ids))
+    for start in range(0, len(ids), _REINDEX_CHUNK):
+        _reindex_chunk(ids[start:start + _REINDEX_CHUNK])
+
+
+def _reindex_chunk(ids: list[int]) -> None:
+    versions = dict(SearchIndexState.objects.filter(item_id__in=ids).values_list('item_id', 'version'))
+    postings: dict[int, dict[str, int]] = {}
+    items = LibraryItem.objects.filter(pk__in=ids)
+    postings.update((pk, {}) for pk in items.values_list('pk', flat=True))
+    _collect(postings, items, 'pk', ITEM_FIELDS)
+    _collect(postings, Constituenta.objects.filter(schema_id__in=ids), 'schema_id', CST_FIELDS)
+    _collect(postings, Operation.objects.filter(oss_id__in=ids), 'oss_id', OPERATION_FIELDS)
+    _collect(postings, Block.objects.filter(oss_id__in=ids), 'oss_id', BLOCK_FIELDS)
+    _collect(postings, ConstituentData.objects.filter(model_id__in=ids), 'model_id', DATA_FIELDS)
+    with transaction.atomic():
+        SearchTrigram.objects.filter(item_id__in=ids).delete()
+        SearchTrigram.objects.bulk_create(
+            [
+                SearchTrigram(gram=gram, item_id=item_id, fields=mask)
+                for item_id, grams in postings.items()
+                for gram, mask in grams.items()
+            ],
+            batch_size=_BATCH_SIZE,
+            ignore_conflicts=True
+        )
+        SearchIndexState.objects.bulk_create(
+            [SearchIndexState(item_id=item_id) for item_id in postings if item_id not in versions],
+            ignore_conflicts=True
+        )
+        _mark_indexed(postings.keys(), versions)
+
+
+def _mark_indexed(item_ids: Iterable[int], versions: dict[int, int]) -> None:
+    ''' Store indexed versions unless texts changed since they were read. '''
+    by_version: dict[int, list[int]] = {}
+    for item_id in item_ids:
+        by_version.setdefault(versions.get(item_id, 0), []).append(item_id)
+    now = timezone.now()
+    for version, group in by_version.items():
+        SearchIndexState.objects \
+            .filter(item_id__in=group, version=version) \
+            .update(indexed_version=version, time_indexed=now)
+
+
+def _collect(postings: dict[int, dict[str, int]], queryset, owner_field: str, columns: dict[str, str]) -> None:
+    names = list(columns)
+    bits = [FIELD_BITS[columns[name]] for name in names]
+    for owner, *texts in queryset.values_list(owner_field, *names).iterator():
+        grams = postings.get(owner)
+        if grams is None:
+            continue
+        for text, bit in zip(texts, bits):
+            if not text:
+                continue
+            for gram in trigrams(text):
+                grams[gram] = grams.get(gram, 0) | bit
@@ -0,0 +1,62 @@
+''' Signals: Keep library search index in sync with saved texts. '''
+from django.db import connections
+from django.db.models.signals import post_migrate, post_save
+from django.dispatch import receiver
+
+from apps.oss.models import Block, Operation
+from apps.rsform.models import Constituenta
+from apps.rsmodel.models import ConstituentData
+
+from .jobs import schedule_reindex
+from .models import LibraryItem, SearchIndexState, index_invalidated
+from .services.search_backends import get_search_backend
+from .services.search_index import BLOCK_FIELDS, CST_FIELDS, DATA_FIELDS, ITEM_FIELDS, OPERATION_FIELDS
+
+
+def _changes_text(update_fields, columns: dict[str, str]) -> bool:
+    return update_fields is None or any(field in columns for field in update_fields)
+
+
+@receiver(post_save, sender=LibraryItem)
+def _item_saved(sender, instance: LibraryItem, update_fields=None, **kwargs) -> None:
+    if not kwargs.get('created') and _changes_text(update_fields, ITEM_FIELDS):
+        SearchIndexState.invalidate([instance.pk])
+
+
+@receiver(post_save, sender=Constituenta)
+def _cst_saved(sender, instance: Constituenta, update_fields=None, **kwargs) -> None:
+    if _changes_text(update_fields, CST_FIELDS):
+        SearchIndexState.invalidate([instance.schema_id])
+
+
+@receiver(post_save, sender=Operation)
+def _operation_saved(sender, instance: Operation, update_fields=None, **kwargs) -> None:
+    if _changes_text(update_fields, OPERATION_FIELDS):
+        SearchIndexState.invalidate([instance.oss_id])
+
+
+@receiver(post_save, sender=Block)
+def _block_saved(sender, instance: Block, update_fields=None, **kwargs) -> None:
+    if _changes_text(update_fields, BLOCK_FIELDS):
+        SearchIndexState.invalidate([instance.oss_id])
+
+
+@receiver(post_save, sender=ConstituentData)
+def _data_saved(sender, instance: ConstituentData, update_fields=None, **kwargs) -> None:
+    if _changes_text(update_fields, DATA_FIELDS):
+        SearchIndexState.invalidate([instance.model_id])
+
+
+@receiver(index_invalidated, sender=SearchIndexState)
+def _index_invalidated(sender, items: list[int], **kwargs) -> None:
+    schedule_reindex(items)
+
+
+@receiver(post_migrate)
+def _repair_search_backend(sender, using: str = 'default', **kwargs) -> None:
+    ''' SQLite migrations recreate altered tables and drop their triggers. '''
+    if sender.name != 'apps.library':
+        return
+    connection = connections[using]
+    with connection.cursor() as cursor:
+        get_search_backend(connection).repair(cursor)
@@ -1,3 +1,5 @@
 ''' Tests. '''
 from .s_models import *
 from .s_views import *
+from .t_query_plans import *
+from .t_benchmark_commands import *
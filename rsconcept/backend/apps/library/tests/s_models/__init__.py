@@ -1,3 +1,6 @@
 ''' Tests for Django Models. '''
 from .t_Editor import *
 from .t_LibraryItem import *
+from .t_SearchBackend import *
+from .t_SearchIndex import *
+from .t_Version import *
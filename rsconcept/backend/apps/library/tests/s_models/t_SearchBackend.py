@@ -0,0 +1,128 @@
+''' Testing models: SearchBackend. '''
+from unittest import skipUnless
+
+from django.db import connection
+from django.test import TestCase
+
+from apps.library.models import LibraryItem, LibraryItemType
+from apps.library.services.search_backends import (
+    FtsBackend,
+    ScanBackend,
+    TrigramBackend,
+    get_search_backend,
+    is_fold_safe
+)
+from apps.oss.models import Block, Operation, OperationType
+from apps.rsform.models import Constituenta
+
+CST_TEXTS = ['term_resolved', 'term_raw', 'definition_resolved', 'convention']
+QUERIES = ['Мно', 'множество', 'МНОЖЕСТВО', 'ёлка', 'Ёлк', 'X1', 'x', 'ℬ(X1)', '"q"', 'absent', 'o t']
+FOLDING_QUERIES = ['strasse', 'STRASSE', 'straße', 'STRAẞE', 'große', 'file', 'ﬁle', 'FILE', 'Ёлка']
+
+
+class TestSearchBackend(TestCase):
+    ''' Testing database backends against reference scan. '''
+
+    def setUp(self):
+        self.schema = LibraryItem.objects.create(
+            item_type=LibraryItemType.RSFORM,
+            title='Множество "q"',
+            alias='X1'
+        )
+        self.oss = LibraryItem.objects.create(
+            item_type=LibraryItemType.OPERATION_SCHEMA,
+            title='Oss title',
+            alias='OSS'
+        )
+        self.csts = [
+            Constituenta.objects.create(schema=self.schema, alias='X1', term_resolved='Ёлка', convention='ℬ(X1)'),
+            Constituenta.objects.create(schema=self.schema, alias='D1', definition_resolved='Подмножество X1'),
+            Constituenta.objects.create(schema=self.oss, alias='D2', term_raw='@{X1|sing}'),
+        ]
+        Operation.objects.create(oss=self.oss, operation_type=OperationType.INPUT, alias='I1', title='Вход')
+        Block.objects.create(oss=self.oss, title='Блок множеств', description='')
+        self.backend = get_search_backend()
+        self.reference = ScanBackend()
+
+
+    def _assert_same(self, queryset, fields: list[str], id_field: str = 'pk') -> None:
+        for query in QUERIES:
+            self.assertEqual(
+                self.backend.collect(queryset, fields, query, id_field),
+                self.reference.collect(queryset, fields, query, id_field),
+                query
+            )
+
+
+    def test_matches_reference(self):
+        self._assert_same(LibraryItem.objects.all(), ['alias', 'title', 'description'])
+        self._assert_same(LibraryItem.objects.all(), ['title'])
+        self._assert_same(Constituenta.objects.all(), CST_TEXTS, 'schema_id')
+        self._assert_same(Constituenta.objects.filter(schema=self.oss), ['alias', *CST_TEXTS], 'schema_id')
+        self._assert_same(Operation.objects.all(), ['alias', 'title', 'description'], 'oss_id')
+        self._assert_same(Block.objects.all(), ['title', 'description'], 'oss_id')
+
+
+    def test_matches_after_changes(self):
+        Constituenta.objects.filter(pk=self.csts[0].pk).update(term_resolved='Новое множество')
+        self.csts[1].convention = 'ёлка'
+        Constituenta.objects.bulk_update([self.csts[1]], ['convention'])
+        self.csts[2].delete()
+        self.schema.title = 'Renamed'
+        self.schema.save()
+        self._assert_same(Constituenta.objects.all(), CST_TEXTS, 'schema_id')
+        self._assert_same(LibraryItem.objects.all(), ['title'])
+        queryset = Constituenta.objects.all()
+        self.assertEqual(self.backend.collect(queryset, CST_TEXTS, 'новое', 'pk'), {self.csts[0].pk})
+        self.assertEqual(self.backend.collect(queryset, CST_TEXTS, 'ёлка', 'pk'), {self.csts[1].pk})
+
+
+    def test_full_case_folding(self):
+        Constituenta.objects.filter(pk=self.csts[0].pk).update(term_resolved='Große Straße')
+        Constituenta.objects.filter(pk=self.csts[1].pk).update(term_resolved='ﬁle Ёлка')
+        queryset = Constituenta.objects.all()
+        backends = [self.backend, FtsBackend()] if connection.vendor == 'sqlite' else [self.backend, TrigramBackend()]
+        for backend in backends:
+            for query in FOLDING_QUERIES:
+                self.assertEqual(
+                    backend.collect(queryset, CST_TEXTS, query, 'pk'),
+                    self.reference.collect(queryset, CST_TEXTS, query, 'pk'),
+                    f'{type(backend).__name__}: {query}'
+                )
+        self.assertEqual(self.backend.collect(queryset, CST_TEXTS, 'strasse', 'pk'), {self.csts[0].pk})
+        self.assertEqual(self.backend.collect(queryset, CST_TEXTS, 'FILE', 'pk'), {self.csts[1].pk})
+
+
+    def test_is_fold_safe(self):
+        self.assertTrue(is_fold_safe('Множество'))
+        self.assertTrue(is_fold_safe('ℬ(X1)'))
+        self.assertFalse(is_fold_safe('straße'))
+        self.assertFalse(is_fold_safe('strasse'))
+        self.assertFalse(is_fold_safe('ﬁ'))
+        self.assertFalse(is_fold_safe('FI'))
+
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite FTS5 backend')
+    def test_fts_repair(self):
+        backend = FtsBackend()
+        with connection.cursor() as cursor:
+            cursor.execute('DROP TRIGGER rsform_constituenta_fts_update')
+        Constituenta.objects.filter(pk=self.csts[0].pk).update(term_resolved='Отношение')
+        queryset = Constituenta.objects.all()
+        self.assertEqual(backend.collect(queryset, ['term_resolved'], 'отношение', 'pk'), set())
+
+        with connection.cursor() as cursor:
+            backend.repair(cursor)
+        self.assertEqual(backend.collect(queryset, ['term_resolved'], 'отношение', 'pk'), {self.csts[0].pk})
+        Constituenta.objects.filter(pk=self.csts[0].pk).update(term_resolved='Функция')
+        self.assertEqual(backend.collect(queryset, ['term_resolved'], 'функция', 'pk'), {self.csts[0].pk})
+
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite FTS5 backend')
+    def test_fts_rebuild(self):
+        backend = FtsBackend()
+        with connection.cursor() as cursor:
+            cursor.execute('DELETE FROM library_libraryitem_fts')
+            self.assertEqual(backend.collect(LibraryItem.objects.all(), ['title'], 'множество', 'pk'), set())
+            backend.rebuild(cursor)
+        self.assertEqual(backend.collect(LibraryItem.objects.all(), ['title'], 'множество', 'pk'), {self.schema.pk})
@@ -0,0 +1,189 @@
+''' Testing models: SearchIndex. '''
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import AnonymousUser
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+
+from apps.jobs.models import Job
+from apps.library.jobs import REINDEX
+from apps.library.models import LibraryItem, LibraryItemType, SearchIndexState, SearchTrigram
+from apps.library.services import search_index
+from apps.library.services.context_search import search_library_context
+from apps.library.services.search_index import (
+    DIRTY_ITEMS,
+    FIELD_BITS,
+    find_candidates,
+    refresh_index,
+    reindex_items,
+    trigrams
+)
+from apps.oss.models import Operation, OperationType
+from apps.rsform.models import Constituenta, RSForm, RSFormCached
+
+
+@override_settings(LIBRARY_SEARCH_INDEX=True)
+class TestSearchIndex(TestCase):
+    ''' Testing trigram index for context search. '''
+
+    def setUp(self):
+        self.schema = LibraryItem.objects.create(
+            item_type=LibraryItemType.RSFORM,
+            title='Schema title',
+            alias='SCH'
+        )
+        self.cst = Constituenta.objects.create(
+            schema=self.schema,
+            alias='X1',
+            term_resolved='Множество'
+        )
+        self.oss = LibraryItem.objects.create(
+            item_type=LibraryItemType.OPERATION_SCHEMA,
+            title='OSS',
+            alias='OSS1'
+        )
+        self.operation = Operation.objects.create(
+            oss=self.oss,
+            operation_type=OperationType.INPUT,
+            alias='OP1',
+            title='Operation title'
+        )
+
+
+    def _candidates(self, query: str, fields=('term', 'title', 'alias', 'operation')) -> set[int]:
+        refresh_index(LibraryItem.objects.all())
+        found = find_candidates(query, fields)
+        assert found is not None
+        return set(found)
+
+
+    def _is_dirty(self, item: LibraryItem) -> bool:
+        return LibraryItem.objects.filter(pk=item.pk).filter(DIRTY_ITEMS).exists()
+
+
+    def test_trigrams(self):
+        self.assertEqual(trigrams('Ab'), set())
+        self.assertEqual(trigrams('AbcD'), {'abc', 'bcd'})
+        self.assertEqual(trigrams('ЁЖЗ'), {'ёжз'})
+
+
+    def test_short_query(self):
+        self.assertIsNone(find_candidates('ab', ['title']))
+
+
+    def test_reindex(self):
+        reindex_items([self.schema.pk])
+        self.assertFalse(self._is_dirty(self.schema))
+        gram = SearchTrigram.objects.get(item=self.schema, gram='мно')
+        self.assertEqual(gram.fields, FIELD_BITS['term'])
+        gram = SearchTrigram.objects.get(item=self.schema, gram='sch')
+        self.assertEqual(gram.fields, FIELD_BITS['alias'] | FIELD_BITS['title'])
+
+
+    def test_candidates(self):
+        self.assertEqual(self._candidates('множ'), {self.schema.pk})
+        self.assertEqual(self._candidates('operation tit'), {self.oss.pk})
+        self.assertEqual(self._candidates('title'), {self.schema.pk, self.oss.pk})
+        self.assertEqual(self._candidates('missing'), set())
+        self.assertEqual(self._candidates('множ', fields=['title']), set())
+
+
+    def test_new_item_is_dirty(self):
+        refresh_index(LibraryItem.objects.all())
+        item = LibraryItem.objects.create(title='Fresh item', alias='NEW')
+        self.assertEqual(refresh_index(LibraryItem.objects.all()), 1)
+        self.assertEqual(self._candidates('fresh'), {item.pk})
+
+
+    def test_invalidate_on_save(self):
+        refresh_index(LibraryItem.objects.all())
+        self.cst.term_resolved = 'Отношение'
+        self.cst.save()
+        self.assertTrue(self._is_dirty(self.schema))
+        self.assertEqual(self._candidates('отнош'), {self.schema.pk})
+
+        self.operation.title = 'Renamed'
+        self.operation.save()
+        self.assertEqual(self._candidates('renamed'), {self.oss.pk})
+
+        self.schema.title = 'Changed'
+        self.schema.save()
+        self.assertEqual(self._candidates('changed'), {self.schema.pk})
+
+
+    def test_skip_unrelated_update(self):
+        refresh_index(LibraryItem.objects.all())
+        self.schema.save(update_fields=['time_update'])
+        self.cst.save(update_fields=['order'])
+        self.assertFalse(self._is_dirty(self.schema))
+
+
+    def test_invalidate_on_bulk_change(self):
+        refresh_index(LibraryItem.objects.all())
+        schema = RSFormCached(self.schema.pk)
+        schema.update_cst(self.cst.pk, {'convention': 'Bulk convention'})
+        self.assertTrue(self._is_dirty(self.schema))
+
+        refresh_index(LibraryItem.objects.all())
+        RSForm(self.schema).reset_aliases()
+        self.assertTrue(self._is_dirty(self.schema))
+
+
+    def test_reindex_after_commit(self):
+        refresh_index(LibraryItem.objects.all())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cst.term_resolved = 'Отношение'
+            self.cst.save()
+        self.assertFalse(self._is_dirty(self.schema))
+        self.assertEqual(set(find_candidates('отнош', ['term'])), {self.schema.pk})
+
+
+    @override_settings(JOBS_ASYNC_THRESHOLD=10)
+    def test_reindex_job(self):
+        refresh_index(LibraryItem.objects.all())
+        with self.captureOnCommitCallbacks(execute=True):
+            self.cst.save()
+            self.operation.save()
+        self.assertEqual(Job.objects.filter(kind=REINDEX).count(), 1)
+        self.assertTrue(self._is_dirty(self.schema))
+        self.assertTrue(self._is_dirty(self.oss))
+
+
+    def test_changed_texts_during_reindex(self):
+        refresh_index(LibraryItem.objects.all())
+        self.cst.term_resolved = 'Отношение'
+        self.cst.save()
+        collect = search_index._collect
+
+        def concurrent_change(*args):
+            collect(*args)
+            SearchIndexState.invalidate([self.schema.pk])
+
+        with mock.patch.object(search_index, '_collect', side_effect=concurrent_change):
+            reindex_items([self.schema.pk])
+        self.assertTrue(self._is_dirty(self.schema))
+        self.assertEqual(refresh_index(LibraryItem.objects.all()), 1)
+        self.assertFalse(self._is_dirty(self.schema))
+
+
+    def test_dirty_items_are_candidates(self):
+        refresh_index(LibraryItem.objects.all())
+        self.schema.title = 'Renamed schema'
+        self.schema.save()
+        self.assertEqual(set(find_candidates('renamed', ['title'])), set())
+        found = search_library_context(AnonymousUser(), 'renamed', fields=['title'], all_items=True)
+        self.assertEqual(found, [self.schema.pk])
+
+
+    def test_rebuild_command(self):
+        SearchTrigram.objects.create(gram='zzz', item=self.schema, fields=1)
+        output = StringIO()
+        call_command('rebuild_search_index', stdout=output)
+        self.assertIn('Reindexed items: 2', output.getvalue())
+        self.assertFalse(SearchTrigram.objects.filter(gram='zzz').exists())
+        self.assertEqual(SearchIndexState.objects.count(), 2)
+
+        output = StringIO()
+        call_command('rebuild_search_index', dirty=True, stdout=output)
+        self.assertIn('Reindexed items: 0', output.getvalue())
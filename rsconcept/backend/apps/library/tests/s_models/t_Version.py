@@ -0,0 +1,116 @@
+''' Testing models: Version. '''
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.library.models import LibraryItem, LibraryItemType, Version
+from apps.library.models.Version import KEYFRAME_INTERVAL, apply_delta, encode_sequence, make_delta
+
+
+def _content(count: int = 20, **changes) -> dict:
+    items = [
+        {'id': index, 'alias': f'X{index}', 'term_raw': f'Термин номер {index} ' * 5}
+        for index in range(1, count + 1)
+    ]
+    for index, term in changes.items():
+        items[int(index[1:]) - 1]['term_raw'] = term
+    return {'title': 'Schema', 'alias': 'SCH', 'description': '', 'items': items}
+
+
+class TestVersion(TestCase):
+    ''' Testing Version model storage. '''
+
+    def setUp(self):
+        self.item = LibraryItem.objects.create(
+            item_type=LibraryItemType.RSFORM,
+            title='Test',
+            alias='KS1'
+        )
+
+
+    def _store(self, name: str, data: dict) -> Version:
+        return Version.store(self.item.pk, name, '', data)
+
+
+    def test_delta_roundtrip(self):
+        keyframe = _content()
+        data = _content(x3='Новый термин')
+        data['items'].reverse()
+        data['items'].pop()
+        data['items'].append({'id': 100, 'alias': 'D1', 'term_raw': ''})
+        data['title'] = 'Renamed'
+        delta = make_delta(keyframe, data)
+        self.assertEqual(delta['order'], [cst['id'] for cst in data['items']])
+        self.assertEqual([cst['id'] for cst in delta['changed']], [3, 100])
+        self.assertNotIn('items', delta['head'])
+        self.assertEqual(apply_delta(keyframe, delta), data)
+
+
+    def test_store_keyframe_and_delta(self):
+        first = self._store('1.0', _content())
+        second = self._store('1.1', _content(x2='Изменение'))
+        self.assertTrue(first.is_keyframe())
+        self.assertFalse(second.is_keyframe())
+        self.assertEqual(second.base, first)
+        self.assertEqual(len(second.data['changed']), 1)
+        self.assertEqual(Version.objects.get(pk=second.pk).load_data(), _content(x2='Изменение'))
+        self.assertEqual(second.items_count(), 20)
+        self.assertEqual(first.items_count(), 20)
+
+
+    def test_store_large_change(self):
+        self._store('1.0', _content())
+        data = _content()
+        for cst in data['items']:
+            cst['term_raw'] = 'Другой текст'
+        version = self._store('2.0', data)
+        self.assertTrue(version.is_keyframe())
+        self.assertEqual(version.load_data(), data)
+
+
+    def test_keyframe_interval(self):
+        versions = [self._store(f'1.{index}', _content(x1=f'Термин {index}')) for index in range(KEYFRAME_INTERVAL + 2)]
+        keyframes = [version.pk for version in versions if version.is_keyframe()]
+        self.assertEqual(keyframes, [versions[0].pk, versions[KEYFRAME_INTERVAL + 1].pk])
+        self.assertEqual(versions[-1].load_data(), _content(x1=f'Термин {KEYFRAME_INTERVAL + 1}'))
+
+
+    def test_encode_sequence(self):
+        contents = [_content(x1=f'Термин {index}') for index in range(3)]
+        storage = encode_sequence(contents)
+        self.assertEqual([keyframe for keyframe, _ in storage], [None, 0, 0])
+        self.assertEqual(apply_delta(contents[0], storage[2][1]), contents[2])
+
+
+    def test_delete_keyframe(self):
+        first = self._store('1.0', _content())
+        versions = [self._store(f'1.{index}', _content(x1=f'Термин {index}')) for index in range(1, 4)]
+        first.delete()
+        loaded = list(Version.objects.filter(item=self.item).order_by('pk'))
+        self.assertTrue(loaded[0].is_keyframe())
+        self.assertEqual(loaded[1].base_id, loaded[0].pk)
+        self.assertEqual(loaded[2].base_id, loaded[0].pk)
+        for version, index in zip(loaded, range(1, 4)):
+            self.assertEqual(version.load_data(), _content(x1=f'Термин {index}'))
+        self.assertEqual([version.pk for version in loaded], [version.pk for version in versions])
+
+
+    def test_delete_delta(self):
+        first = self._store('1.0', _content())
+        second = self._store('1.1', _content(x1='Термин'))
+        second.delete()
+        self.assertEqual(Version.objects.get(pk=first.pk).load_data(), _content())
+
+
+    def test_delete_item(self):
+        self._store('1.0', _content())
+        self._store('1.1', _content(x1='Термин'))
+        self.item.delete()
+        self.assertFalse(Version.objects.exists())
+
+
+    def test_listing_skips_payload(self):
+        self._store('1.0', _content())
+        with CaptureQueriesContext(connection) as context:
+            list(self.item.getQ_versions())
+        self.assertNotIn('"data"', context.captured_queries[0]['sql'])
@@ -1,4 +1,8 @@
 ''' Tests for REST API. '''
 from .t_clone_oss import *
+from .t_context_search import *
 from .t_library import *
+from .t_library_listing import *
 from .t_versions import *
+from .t_export_stream import *
+from .t_instrumentation import *
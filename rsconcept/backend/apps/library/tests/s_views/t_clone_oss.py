@@ -1,11 +1,15 @@
 ''' Testing API: OSS clone via library endpoint. '''
 from django.core.cache import cache
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
 from apps.library.models import AccessPolicy, Editor, LibraryItem
+from apps.library.services import clone_oss
 from apps.oss.models import (
     Argument,
     Block,
+    Inheritance,
     Layout,
     Operation,
     OperationSchema,
@@ -13,7 +17,7 @@ from apps.oss.models import (
     Replica,
     Substitution
 )
-from apps.rsform.models import RSForm
+from apps.rsform.models import Attribution, RSForm
 from shared.EndpointTester import EndpointTester, decl_endpoint
 
 
@@ -173,3 +177,53 @@ class TestLibraryCloneOss(EndpointTester):
         self.executeCreated(data2, item=self.owned.model.pk)
         response = self.execute(data2)
         self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+
+
+    @decl_endpoint('/api/library/{item}/clone', method='post')
+    def test_clone_oss_contents(self):
+        self.populate_graph()
+        Attribution.objects.create(container=self.ks1.insert_last('S1'), attribute=self.ks1_x1)
+        self.owned.execute_operation(self.operation3)
+        self.operation3.refresh_from_db()
+        response = self.executeCreated(self._clone_payload(), item=self.owned.model.pk)
+        clone_id = response.data['id']
+
+        clone_operation = Operation.objects.get(oss_id=clone_id, alias='syn')
+        self.assertNotEqual(clone_operation.result_id, self.operation3.result_id)
+        source_links = sorted(
+            Inheritance.objects
+            .filter(operation=self.operation3)
+            .values_list('parent__alias', 'parent__schema__alias', 'child__alias')
+        )
+        clone_links = Inheritance.objects.filter(operation=clone_operation)
+        self.assertEqual(
+            sorted(clone_links.values_list('parent__alias', 'parent__schema__alias', 'child__alias')),
+            source_links
+        )
+        for link in clone_links.select_related('parent', 'child'):
+            self.assertEqual(link.child.schema_id, clone_operation.result_id)
+            self.assertNotIn(link.parent.schema_id, [self.ks1.model.pk, self.ks2.model.pk])
+        substitution = Substitution.objects.get(operation=clone_operation)
+        self.assertEqual(substitution.original.alias, 'X1')
+        self.assertNotEqual(substitution.original_id, self.ks1_x1.pk)
+        self.assertEqual(
+            Attribution.objects.filter(container__schema__producer__oss_id=clone_id).distinct().count(),
+            Attribution.objects.filter(container__schema__producer__oss=self.owned.model).distinct().count()
+        )
+        for schema_id in Operation.objects.filter(oss_id=clone_id).values_list('result_id', flat=True):
+            if schema_id is not None:
+                self.assertEqual(Editor.objects.filter(item_id=schema_id, editor=self.user2).count(), 1)
+
+
+    def test_clone_oss_query_count(self):
+        self.populate_graph()
+        self.owned.create_block(title='Block B', parent=self.block)
+        with CaptureQueriesContext(connection) as small:
+            clone_oss(self.owned.model, self.user, self._clone_payload()['item_data'])
+        for index in range(2, 10):
+            self.ks1.insert_last(f'X{index}')
+            self.owned.create_block(title=f'Block {index}', parent=self.block)
+            self.owned.create_operation(alias=f'op{index}', operation_type=OperationType.INPUT)
+        with CaptureQueriesContext(connection) as large:
+            clone_oss(self.owned.model, self.user, self._clone_payload(location='/U/clone-2')['item_data'])
+        self.assertEqual(len(small), len(large))
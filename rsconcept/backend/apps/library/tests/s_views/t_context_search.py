@@ -1,5 +1,6 @@
 ''' Testing API: Library context search. '''
 from apps.library.models import AccessPolicy, LibraryItem, LibraryItemType, LocationHead
+from apps.library.services.context_search import build_snippet
 from apps.oss.models import Block, Operation, OperationType
 from apps.rsform.models import Constituenta
 from apps.rsmodel.models import RSModel
@@ -212,3 +213,90 @@ class TestLibraryContextSearch(EndpointTester):
     def test_search_rejects_invalid_item_type(self):
         response = self.client.get(self.endpoint_search, {'q': 'test', 'item_type': 'unknown'})
         self.assertEqual(response.status_code, 400)
+
+    @decl_endpoint('/api/library/context-search', method='get')
+    def test_search_after_text_change(self):
+        response = self._search(q='ReplacedTermToken')
+        self.assertNotIn(self.schema.pk, response.data['ids'])
+
+        cst = Constituenta.objects.get(schema=self.schema, alias='X1')
+        cst.term_resolved = 'ReplacedTermToken'
+        cst.save()
+        response = self._search(q='ReplacedTermToken')
+        self.assertIn(self.schema.pk, response.data['ids'])
+        response = self._search(q='UniqueTermToken')
+        self.assertNotIn(self.schema.pk, response.data['ids'])
+
+    @decl_endpoint('/api/library/context-search', method='get')
+    def test_search_short_query(self):
+        response = self._search(q='X1', search_fields='alias')
+        self.assertIn(self.schema.pk, response.data['ids'])
+
+    @decl_endpoint('/api/library/context-search', method='get')
+    def test_ranked_results(self):
+        titled = LibraryItem.objects.create(
+            title='Schema about UniqueTermToken',
+            alias='TTL',
+            owner=self.user,
+            location=LocationHead.USER
+        )
+        response = self._search(q='uniquetermtoken', limit=10)
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['ids'], [titled.pk, self.schema.pk])
+        self.assertIsNone(response.data['next'])
+
+        first, second = response.data['results']
+        self.assertEqual(first['item']['alias'], 'TTL')
+        self.assertGreater(first['score'], second['score'])
+        self.assertEqual(first['matches'][0]['kind'], 'item')
+        self.assertEqual(first['matches'][0]['field'], 'title')
+        match = second['matches'][0]
+        self.assertEqual(match['kind'], 'constituenta')
+        self.assertEqual(match['name'], 'X1')
+        self.assertEqual(match['field'], 'term')
+        self.assertEqual(match['snippet'], 'UniqueTermToken')
+        self.assertEqual(match['highlight'], [0, 15])
+
+    def test_snippet_case_folding(self):
+        self.assertEqual(build_snippet('İstanbul Straße', 'strasse'), ('İstanbul Straße', 9, 15))
+        self.assertEqual(build_snippet('Große Menge', 'SS'), ('Große Menge', 3, 4))
+        self.assertEqual(build_snippet('Text', 'missing'), ('Text', 0, 0))
+
+    @decl_endpoint('/api/library/context-search', method='get')
+    def test_ranked_frequency(self):
+        for index in range(3):
+            Constituenta.objects.create(schema=self.hidden, alias=f'X{index + 50}', term_resolved='HiddenUniqueTerm')
+        response = self._search(q='UniqueTerm', search_fields='term', limit=10)
+        self.assertEqual(response.data['ids'], [self.hidden.pk, self.schema.pk])
+        self.assertEqual(len(response.data['results'][0]['matches']), 3)
+        self.assertGreater(response.data['results'][0]['score'], response.data['results'][1]['score'])
+
+    @decl_endpoint('/api/library/context-search', method='get')
+    def test_ranked_pagination(self):
+        expected = []
+        for index in range(5):
+            item = LibraryItem.objects.create(
+                title=f'Paged {index}',
+                alias=f'PG{index}',
+                owner=self.user,
+                location=LocationHead.USER
+            )
+            expected.append(item.pk)
+        received = []
+        cursor = ''
+        while True:
+            response = self._search(q='paged', limit=2, cursor=cursor)
+            self.assertEqual(response.data['count'], 5)
+            self.assertLessEqual(len(response.data['ids']), 2)
+            received.extend(response.data['ids'])
+            if response.data['next'] is None:
+                break
+            cursor = response.data['next']
+        self.assertEqual(received, expected)
+
+    @decl_endpoint('/api/library/context-search', method='get')
+    def test_ranked_invalid_params(self):
+        response = self.client.get(self.endpoint_search, {'q': 'test', 'limit': 10, 'cursor': 'bad'})
+        self.assertEqual(response.status_code, 400)
+        response = self.client.get(self.endpoint_search, {'q': 'test', 'limit': 0})
+        self.assertEqual(response.status_code, 400)
@@ -0,0 +1,90 @@
+''' Testing streaming export of zipped JSON. '''
+import io
+import json
+import tracemalloc
+from zipfile import ZIP_DEFLATED, ZIP_STORED, ZipFile, ZipInfo
+
+from django.test import TestCase
+
+from shared.utility import read_zipped_json, stream_zipped_json
+
+
+def _document(size: int) -> dict:
+    return {
+        'alias': 'KS1',
+        'items': [
+            {'entityUID': index, 'alias': f'D{index}', 'term': {'raw': f'Термин номер {index}', 'forms': []}}
+            for index in range(size)
+        ]
+    }
+
+
+def _zipped(document: dict, **options) -> bytes:
+    return b''.join(stream_zipped_json(document, 'document.json', **options))
+
+
+def _peak_allocated(document: dict) -> tuple[int, int]:
+    ''' Peak memory allocated while consuming stream and total output size. '''
+    tracemalloc.start()
+    try:
+        total = 0
+        for chunk in stream_zipped_json(document, 'document.json', compress_level=0):
+            total += len(chunk)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return peak, total
+
+
+class TestExportStream(TestCase):
+    ''' Testing zipped JSON streaming writer. '''
+
+    def test_roundtrip(self):
+        document = _document(100)
+        content = _zipped(document)
+        self.assertEqual(read_zipped_json(io.BytesIO(content), 'document.json'), document)
+        self.assertEqual(read_zipped_json(io.BytesIO(_zipped(document, compress_level=6)), 'document.json'), document)
+
+
+    def test_default_layout(self):
+        document = _document(5000)
+        content = _zipped(document)
+        with ZipFile(io.BytesIO(content)) as archive:
+            info = archive.getinfo('document.json')
+        expected = io.BytesIO()
+        with ZipFile(expected, 'w') as archive:
+            legacy = ZipInfo('document.json', date_time=info.date_time)
+            legacy.external_attr = 0o600 << 16
+            archive.writestr(legacy, json.dumps(document, indent=4, ensure_ascii=False))
+        self.assertEqual(content, expected.getvalue())
+
+
+    def test_chunks(self):
+        chunks = list(stream_zipped_json(_document(20000), 'document.json', compress_level=0))
+        self.assertGreater(len(chunks), 1)
+        with ZipFile(io.BytesIO(b''.join(chunks))) as archive:
+            self.assertIsNone(archive.testzip())
+
+
+    def test_options(self):
+        document = _document(1000)
+        stored = _zipped(document, compact=True)
+        deflated = _zipped(document, compress_level=9, compact=True)
+        indented = _zipped(document)
+        self.assertLess(len(deflated), len(stored))
+        self.assertLess(len(stored), len(indented))
+        with ZipFile(io.BytesIO(stored)) as archive:
+            self.assertEqual(archive.getinfo('document.json').compress_type, ZIP_STORED)
+            self.assertNotIn(b'\n', archive.read('document.json'))
+        with ZipFile(io.BytesIO(deflated)) as archive:
+            self.assertEqual(archive.getinfo('document.json').compress_type, ZIP_DEFLATED)
+        with ZipFile(io.BytesIO(indented)) as archive:
+            self.assertEqual(json.loads(archive.read('document.json')), document)
+
+
+    def test_memory_flat(self):
+        small_peak, small_size = _peak_allocated(_document(2500))
+        large_peak, large_size = _peak_allocated(_document(40000))
+        self.assertGreater(large_size, 10 * small_size)
+        self.assertLess(large_peak, 2 * small_peak)
+        self.assertLess(large_peak, large_size / 5)
@@ -0,0 +1,86 @@
+''' Testing request instrumentation middleware. '''
+import json
+import logging
+
+from django.db import connection
+from django.test import override_settings
+
+from apps.library.models import LibraryItem
+from shared.EndpointTester import EndpointTester, decl_endpoint
+from shared.instrumentation import SERVER_TIMING_HEADER, QueryStats, SlowRequestFilter
+
+
+def _record(level: int, view: str, duration_ms: float) -> logging.LogRecord:
+    record = logging.LogRecord('test', level, __file__, 0, '', None, None)
+    record.view = view
+    record.duration_ms = duration_ms
+    return record
+
+
+class TestInstrumentation(EndpointTester):
+    ''' Testing query counting, Server-Timing header and slow request logging. '''
+
+    def setUp(self):
+        super().setUp()
+        self.item = LibraryItem.objects.create(title='Test', alias='T1', owner=self.user)
+        logging.disable(logging.NOTSET)
+
+
+    def tearDown(self):
+        logging.disable(logging.CRITICAL)
+        super().tearDown()
+
+
+    @decl_endpoint('/api/library/{item}', method='get')
+    def test_disabled(self):
+        response = self.executeOK(item=self.item.pk)
+        self.assertNotIn(SERVER_TIMING_HEADER, response)
+
+
+    @override_settings(REQUEST_INSTRUMENTATION=True)
+    @decl_endpoint('/api/library/{item}', method='get')
+    def test_enabled(self):
+        with self.assertLogs('shared.instrumentation', level='INFO') as logs:
+            response = self.executeOK(item=self.item.pk)
+        self.assertRegex(response[SERVER_TIMING_HEADER], r'^db;dur=[\d.]+;desc="\d+ queries", total;dur=[\d.]+$')
+        self.assertEqual(len(logs.records), 1)
+        self.assertEqual(logs.records[0].levelno, logging.INFO)
+        data = json.loads(logs.records[0].getMessage())
+        self.assertEqual(data['method'], 'GET')
+        self.assertEqual(data['status'], 200)
+        self.assertEqual(data['view'], logs.records[0].view)
+        self.assertGreater(data['queries'], 0)
+        self.assertNotIn('repeated', data)
+
+
+    @override_settings(REQUEST_INSTRUMENTATION=True, REQUEST_INSTRUMENTATION_REPEAT_THRESHOLD=1)
+    @decl_endpoint('/api/library/{item}', method='get')
+    def test_repeated_warning(self):
+        with self.assertLogs('shared.instrumentation', level='INFO') as logs:
+            self.executeOK(item=self.item.pk)
+        self.assertEqual(logs.records[0].levelno, logging.WARNING)
+        self.assertTrue(json.loads(logs.records[0].getMessage())['repeated'])
+
+
+    def test_query_stats(self):
+        stats = QueryStats()
+        with connection.execute_wrapper(stats):
+            for item_id in range(5):
+                list(LibraryItem.objects.filter(pk=item_id))
+            LibraryItem.objects.count()
+        self.assertEqual(stats.count, 6)
+        self.assertGreater(stats.duration, 0)
+        repeated = stats.repeated(5)
+        self.assertEqual(len(repeated), 1)
+        self.assertEqual(repeated[0][1], 5)
+        self.assertEqual(stats.repeated(6), [])
+
+
+    def test_slow_filter(self):
+        slow = SlowRequestFilter(threshold_ms=100, views={'rsform-detail': 10})
+        self.assertFalse(slow.filter(_record(logging.INFO, 'library-item', 50)))
+        self.assertTrue(slow.filter(_record(logging.INFO, 'library-item', 150)))
+        self.assertTrue(slow.filter(_record(logging.INFO, 'rsform-detail', 50)))
+        self.assertFalse(slow.filter(_record(logging.INFO, 'rsform-detail', 5)))
+        self.assertTrue(slow.filter(_record(logging.WARNING, 'library-item', 1)))
+        self.assertTrue(slow.filter(logging.LogRecord('test', logging.INFO, __file__, 0, '', None, None)))
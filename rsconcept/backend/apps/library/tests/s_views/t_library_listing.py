@@ -0,0 +1,135 @@
+''' Testing API: Library listing pagination and projection. '''
+from datetime import timedelta
+from unittest import skipUnless
+
+from django.db import connection
+from django.utils import timezone
+
+from apps.library.models import AccessPolicy, Editor, LibraryItem, LocationHead
+from apps.library.services.context_search import get_accessible_items_queryset
+from apps.users.models import User
+from shared.EndpointTester import EndpointTester, decl_endpoint
+
+
+class TestLibraryListing(EndpointTester):
+    ''' Testing keyset pagination and field projection of library listings. '''
+
+    endpoint_active = '/api/library/active'
+
+    def setUp(self):
+        super().setUp()
+        now = timezone.now()
+        self.items = LibraryItem.objects.bulk_create([
+            LibraryItem(
+                title=f'Item {index}',
+                alias=f'I{index}',
+                owner=self.user if index % 2 == 0 else self.user2,
+                location=LocationHead.USER,
+                time_update=now - timedelta(minutes=index // 2)
+            )
+            for index in range(12)
+        ])
+        Editor.objects.create(item=self.items[1], editor=self.user)
+        self.items[3].access_policy = AccessPolicy.PRIVATE
+        self.items[3].save(update_fields=['access_policy'])
+        Editor.objects.create(item=self.items[3], editor=self.user)
+
+
+    def _list(self, endpoint: str = endpoint_active, **params):
+        response = self.client.get(endpoint, params)
+        self.assertEqual(response.status_code, 200)
+        return response
+
+
+    @decl_endpoint(endpoint_active, method='get')
+    def test_unpaginated(self):
+        response = self._list()
+        expected = {item.pk for index, item in enumerate(self.items) if index % 2 == 0 or index == 1}
+        self.assertEqual({entry['id'] for entry in response.data}, expected)
+
+
+    @decl_endpoint(endpoint_active, method='get')
+    def test_keyset_pages(self):
+        expected = list(
+            get_accessible_items_queryset(self.user)
+            .order_by('-time_update', '-pk')
+            .values_list('pk', flat=True)
+        )
+        received = []
+        cursor = ''
+        while True:
+            response = self._list(limit=2, cursor=cursor)
+            self.assertLessEqual(len(response.data['results']), 2)
+            received.extend(entry['id'] for entry in response.data['results'])
+            cursor = response.data['next']
+            if cursor is None:
+                break
+        self.assertEqual(received, expected)
+        self.assertEqual(len(received), 7)
+
+
+    @decl_endpoint(endpoint_active, method='get')
+    def test_keyset_stable_on_insert(self):
+        response = self._list(limit=3)
+        first_page = [entry['id'] for entry in response.data['results']]
+        LibraryItem.objects.create(title='Fresh', alias='NEW', owner=self.user)
+        response = self._list(limit=3, cursor=response.data['next'])
+        self.assertFalse(set(first_page) & {entry['id'] for entry in response.data['results']})
+        self.assertEqual(len(response.data['results']), 3)
+
+
+    @decl_endpoint(endpoint_active, method='get')
+    def test_projection(self):
+        response = self._list(fields='alias,time_update', limit=5)
+        for entry in response.data['results']:
+            self.assertEqual(set(entry), {'id', 'alias', 'time_update'})
+
+        response = self._list('/api/library', fields='title')
+        self.assertEqual(set(response.data[0]), {'id', 'title'})
+
+
+    @decl_endpoint(endpoint_active, method='get')
+    def test_invalid_params(self):
+        self.assertEqual(self.client.get(self.endpoint_active, {'fields': 'alias,secret'}).status_code, 400)
+        self.assertEqual(self.client.get(self.endpoint_active, {'limit': 0}).status_code, 400)
+        self.assertEqual(self.client.get(self.endpoint_active, {'limit': 'x'}).status_code, 400)
+        self.assertEqual(self.client.get(self.endpoint_active, {'limit': 2, 'cursor': 'bad'}).status_code, 400)
+
+
+    @decl_endpoint('/api/library/all', method='get')
+    def test_admin_pages(self):
+        self.toggle_admin(True)
+        response = self._list('/api/library/all', limit=100, fields='alias')
+        self.assertEqual(len(response.data['results']), LibraryItem.objects.count())
+        self.assertIsNone(response.data['next'])
+
+
+    @skipUnless(connection.vendor == 'sqlite', 'SQLite query plan format')
+    def test_listing_plan_uses_indexes(self):
+        reader = User.objects.create(username='Reader')
+        now = timezone.now()
+        seeded = LibraryItem.objects.bulk_create([
+            LibraryItem(
+                title=f'Seed {index}',
+                alias=f'S{index}',
+                owner=reader if index % 7 == 0 else self.user2,
+                location=LocationHead.COMMON if index % 3 else LocationHead.USER,
+                time_update=now - timedelta(seconds=index)
+            )
+            for index in range(1000)
+        ])
+        Editor.objects.bulk_create([Editor(item=item, editor=reader) for item in seeded[::11]])
+        with connection.cursor() as cursor:
+            cursor.execute('ANALYZE')
+
+        ordered = get_accessible_items_queryset(reader).order_by('-time_update', '-pk')
+        key = seeded[500]
+        after = ordered.filter(time_update__lte=key.time_update).filter(time_update__lt=key.time_update)
+        for queryset in (ordered, after):
+            plan = queryset[:21].explain()
+            self.assertNotIn('TEMP B-TREE', plan)
+            for line in plan.splitlines():
+                if 'library_libraryitem' in line:
+                    self.assertIn('USING INDEX', line)
+                if 'U0' in line:
+                    self.assertIn('SEARCH', line)
@@ -1,14 +1,19 @@
 ''' Testing API: Versions. '''
 import io
+import json
 from sys import version
 from typing import cast
 from zipfile import ZipFile
 
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
 from apps.library.models import AccessPolicy, Version
 from apps.rsform.models import Constituenta, RSForm
+from apps.rsform.serializers import RSFormSerializer
 from shared.EndpointTester import EndpointTester, decl_endpoint
+from shared.testing_utils import cst_position
 
 
 class TestVersionViews(EndpointTester):
@@ -84,7 +89,7 @@ class TestVersionViews(EndpointTester):
             alias='A1',
             cst_type='axiom',
             definition_formal='X1=X1',
-            order=1,
+            order=self.x1.order + 1,
             crucial=True
         )
         version_id = self._create_version({'version': '1.0.0', 'description': 'test'})
@@ -98,6 +103,65 @@ class TestVersionViews(EndpointTester):
         self.assertEqual(loaded_a1['crucial'], True)
 
 
+    @decl_endpoint('/api/library/{schema}/versions/{version}', method='get')
+    def test_retrieve_version_not_modified(self):
+        version_id = self._create_version({'version': '1.0.0', 'description': 'test'})
+        response = self.executeOK(schema=self.owned_id, version=version_id)
+        etag = response.headers['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            self.executeNotModified(schema=self.owned_id, version=version_id, headers={'If-None-Match': etag})
+        table = Constituenta._meta.db_table
+        self.assertFalse([query for query in queries.captured_queries if table in query['sql']])
+
+        other_id = self._create_version({'version': '2.0.0', 'description': 'test'})
+        response = self.executeOK(schema=self.owned_id, version=other_id, headers={'If-None-Match': etag})
+        self.assertEqual(response.data['version'], other_id)
+
+        response = self.executeOK(schema=self.owned_id, version=version_id, headers={'If-None-Match': etag})
+        etag = response.headers['ETag']
+        Version.objects.filter(pk=version_id).update(description='changed')
+        self.executeOK(schema=self.owned_id, version=version_id, headers={'If-None-Match': etag})
+
+
+    @decl_endpoint('/api/library/{schema}/versions/{version}', method='get')
+    def test_retrieve_delta_version(self):
+        for index in range(2, 8):
+            self.owned.insert_last(f'X{index}', term_raw=f'Term {index}')
+        first_id = self._create_version({'version': '1.0.0', 'description': 'test'})
+        self.x1.convention = 'Changed'
+        self.x1.save()
+        second_id = self._create_version({'version': '1.1.0', 'description': 'test'})
+        self.assertEqual(Version.objects.get(pk=second_id).base_id, first_id)
+
+        response = self.executeOK(schema=self.owned_id, version=second_id)
+        self.assertEqual(len(response.data['items']), 7)
+        self.assertEqual(response.data['items'][0]['convention'], 'Changed')
+        self.assertEqual(response.data['items'][6]['term_raw'], 'Term 7')
+
+        self.client.delete(f'/api/versions/{first_id}')
+        self.assertFalse(Version.objects.filter(pk=first_id).exists())
+        response = self.executeOK(schema=self.owned_id, version=second_id)
+        self.assertEqual(response.data['items'][0]['convention'], 'Changed')
+
+
+    @decl_endpoint('/api/versions/{version}/restore', method='patch')
+    def test_restore_delta_version(self):
+        for index in range(2, 8):
+            self.owned.insert_last(f'X{index}')
+        self._create_version({'version': '1.0.0', 'description': 'test'})
+        self.x1.convention = 'Changed'
+        self.x1.save()
+        version_id = self._create_version({'version': '1.1.0', 'description': 'test'})
+        self.x1.convention = 'Later'
+        self.x1.save()
+
+        response = self.executeOK(version=version_id)
+        self.assertEqual(len(response.data['items']), 7)
+        self.x1.refresh_from_db()
+        self.assertEqual(self.x1.convention, 'Changed')
+
+
     @decl_endpoint('/api/versions/{version}', method='get')
     def test_access_version_not_readable(self):
         version_id = self._create_version({'version': '1.0.0', 'description': 'test'})
@@ -174,10 +238,14 @@ class TestVersionViews(EndpointTester):
             response.headers['Content-Disposition'],
             f'attachment; filename="{self.owned.model.alias}.trs"'
         )
-        with io.BytesIO(response.content) as stream:
+        self.assertTrue(response.streaming)
+        with io.BytesIO(b''.join(response.streaming_content)) as stream:
             with ZipFile(stream, 'r') as zipped_file:
                 self.assertIsNone(zipped_file.testzip())
                 self.assertIn('document.json', zipped_file.namelist())
+                document = json.loads(zipped_file.read('document.json'))
+        self.assertEqual(document['alias'], self.owned.model.alias)
+        self.assertEqual(document['items'][0]['alias'], self.x1.alias)
 
 
     @decl_endpoint('/api/versions/{version}/restore', method='patch')
@@ -204,10 +272,10 @@ class TestVersionViews(EndpointTester):
         x1.refresh_from_db()
         x2.refresh_from_db()
         self.assertEqual(len(response.data['items']), 3)
-        self.assertEqual(x1.order, 0)
+        self.assertEqual(cst_position(x1), 0)
         self.assertEqual(x1.convention, 'testStart')
         self.assertEqual(x1.term_raw, '')
-        self.assertEqual(x2.order, 1)
+        self.assertEqual(cst_position(x2), 1)
         self.assertEqual(response.data['items'][2]['alias'], 'D1')
         self.assertEqual(response.data['items'][2]['term_raw'], 'TestTerm')
 
@@ -234,6 +302,24 @@ class TestVersionViews(EndpointTester):
         self.x1.refresh_from_db()
         self.assertEqual(self.x1.typification_manual, '')
 
+
+    def test_restore_version_queries(self):
+        counts = []
+        for size in (5, 50):
+            schema = RSForm.create(title=f'Schema {size}', alias=f'S{size}', owner=self.user)
+            csts = [schema.insert_last('X1', term_raw='база')]
+            csts += [schema.insert_last(f'X{index}', term_raw=f'@{{X{index - 1}|nomn}}') for index in range(2, size + 1)]
+            version = schema.create_version('1.0.0', '', RSFormSerializer(schema.model).to_versioned_data())
+            Constituenta.objects.filter(pk__in=[cst.pk for cst in csts[::2]]).delete()
+            schema.insert_last('D1')
+            with CaptureQueriesContext(connection) as queries:
+                RSFormSerializer(schema.model).restore_from_version(version.load_data())
+            counts.append(len(queries))
+            restored = list(Constituenta.objects.filter(schema=schema.model).order_by('order'))
+            self.assertEqual([cst.alias for cst in restored], [f'X{index}' for index in range(1, size + 1)])
+            self.assertEqual(restored[-1].term_resolved, 'база')
+        self.assertEqual(counts[0], counts[1])
+
     def _create_version(self, data) -> int:
         response = self.client.post(
             f'/api/library/{self.owned_id}/create-version',
@@ -0,0 +1,77 @@
+''' Testing management commands: generate_library, run_benchmarks. '''
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.management import call_command
+from django.core.management.base import CommandError
+from django.test import TestCase
+
+from apps.library.models import LibraryItem, LibraryItemType, Version
+from apps.oss.models import Inheritance, Substitution
+from apps.rsmodel.models import ConstituentData
+from shared.benchmarks.scenarios import SCENARIOS, compare
+from shared.benchmarks.synthetic import LibraryScale, clear_library, generate_library
+
+SCALE = LibraryScale(
+    users=2, schemas=3, constituents=20, density=2.0, oss=1, depth=2,
+    models=1, model_elements=3, versions=2
+)
+
+
+class TestBenchmarkCommands(TestCase):
+    ''' Testing synthetic library generation and scenario timing. '''
+
+
+    def test_generate(self):
+        summary = generate_library(SCALE, seed=7)
+        self.assertEqual(summary['users'], 2)
+        self.assertEqual(summary['versions'], 2)
+        self.assertEqual(LibraryItem.objects.filter(item_type=LibraryItemType.OPERATION_SCHEMA).count(), 1)
+        self.assertEqual(LibraryItem.objects.filter(item_type=LibraryItemType.RSMODEL).count(), 1)
+        self.assertTrue(Substitution.objects.exists())
+        self.assertTrue(Inheritance.objects.exists())
+        self.assertTrue(ConstituentData.objects.exists())
+        aliases = sorted(LibraryItem.objects.values_list('alias', flat=True))
+        self.assertEqual(clear_library(), summary['items'])
+        self.assertFalse(LibraryItem.objects.exists())
+        self.assertFalse(Version.objects.exists())
+
+        generate_library(SCALE, seed=7)
+        self.assertEqual(sorted(LibraryItem.objects.values_list('alias', flat=True)), aliases)
+
+
+    def test_run_scenarios(self):
+        with self.assertRaises(CommandError):
+            call_command('run_benchmarks', repeat=1, stdout=StringIO())
+        with self.settings(DEBUG=False), self.assertRaises(CommandError):
+            call_command('generate_library', scale='small', stdout=StringIO())
+        self.assertFalse(LibraryItem.objects.exists())
+        call_command('generate_library', scale='small', force=True, stdout=StringIO())
+        self.assertTrue(LibraryItem.objects.exists())
+        with tempfile.TemporaryDirectory() as folder:
+            path = os.path.join(folder, 'results.json')
+            call_command('run_benchmarks', repeat=1, output=path, stdout=StringIO())
+            with open(path, encoding='utf-8') as file:
+                results = json.load(file)['scenarios']
+            self.assertEqual(list(results), list(SCENARIOS))
+            self.assertTrue(all(data['queries'] > 0 for data in results.values()))
+            output = StringIO()
+            call_command('run_benchmarks', repeat=1, scenario=['details'], baseline=path, stdout=output)
+            self.assertIn('Baseline comparison', output.getvalue())
+
+
+    def test_compare(self):
+        baseline = {
+            'details': {'median_ms': 10.0, 'queries': 5},
+            'clone': {'median_ms': 10.0, 'queries': 5}
+        }
+        results = {
+            'details': {'median_ms': 15.0, 'queries': 7},
+            'clone': {'median_ms': 10.5, 'queries': 5},
+            'update-cst': {'median_ms': 1.0, 'queries': 1}
+        }
+        rows = compare(results, baseline, tolerance=0.2)
+        self.assertEqual([row[-1] for row in rows], ['slower', 'same', 'new'])
+        self.assertEqual(rows[0][4], '+2')
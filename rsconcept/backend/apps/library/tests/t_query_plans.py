@@ -0,0 +1,106 @@
+''' Testing query plans of hot lookups. '''
+import unittest
+
+from django.db import connection
+from django.db.models import Model, QuerySet
+from django.test import TestCase
+
+from apps.library.models import Editor, LibraryItem, LocationHead
+from apps.oss.models import Argument, Inheritance, OperationSchema, OperationType, Substitution
+from apps.rsform.models import Constituenta, RSForm
+from apps.rsmodel.models import ConstituentData
+from apps.users.models import User
+
+
+def _index_name(model: type[Model], fields: list[str]) -> str:
+    ''' Name of index declared in model metadata. '''
+    meta = model._meta  # pylint: disable=protected-access
+    return str(next(index.name for index in meta.indexes if index.fields == fields))
+
+
+@unittest.skipUnless(connection.vendor == 'sqlite', 'Query plan format is specific to SQLite')
+class TestQueryPlans(TestCase):
+    ''' Hot lookups must be served by indexes instead of table scans. '''
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create(username='UserTest')
+        cls.schema = RSForm.create(title='Test', alias='T1', owner=cls.user, location=LocationHead.USER)
+        cls.csts = [cls.schema.insert_last(f'X{index + 1}') for index in range(20)]
+        Editor.objects.create(item=cls.schema.model, editor=cls.user)
+
+        cls.oss = OperationSchema.create(alias='O1', owner=cls.user)
+        cls.operation1 = cls.oss.create_operation(alias='1', operation_type=OperationType.INPUT, result=cls.schema.model)
+        cls.operation2 = cls.oss.create_operation(alias='2', operation_type=OperationType.SYNTHESIS)
+        Argument.objects.create(operation=cls.operation2, argument=cls.operation1, order=0)
+        cls.inheritance = Inheritance.objects.create(
+            operation=cls.operation2,
+            parent=cls.csts[0],
+            child=cls.csts[1]
+        )
+        Substitution.objects.create(operation=cls.operation2, original=cls.csts[2], substitution=cls.csts[3])
+        ConstituentData.objects.create(model=cls.schema.model, constituent=cls.csts[0], type='basic')
+
+
+    def assertIndexed(self, queryset: QuerySet, index: str, ordered: bool = False):
+        plan = queryset.explain()
+        self.assertIn('USING', plan, msg=plan)
+        self.assertIn(index, plan, msg=plan)
+        self.assertNotIn(f'SCAN {queryset.model._meta.db_table}', plan, msg=plan)
+        if ordered:
+            self.assertNotIn('TEMP B-TREE', plan, msg=plan)
+
+
+    def test_constituents_ordered(self):
+        self.assertIndexed(
+            Constituenta.objects.filter(schema_id=self.schema.model.pk).order_by('order'),
+            _index_name(Constituenta, ['schema', 'order']),
+            ordered=True
+        )
+
+
+    def test_constituenta_alias(self):
+        self.assertIndexed(
+            Constituenta.objects.filter(schema_id=self.schema.model.pk, alias='X1'),
+            _index_name(Constituenta, ['schema', 'alias'])
+        )
+
+
+    def test_inheritance_by_parent(self):
+        self.assertIndexed(
+            Inheritance.objects.filter(operation_id=self.operation2.pk, parent_id__in=[self.csts[0].pk]),
+            _index_name(Inheritance, ['operation', 'parent'])
+        )
+
+
+    def test_inheritance_by_child(self):
+        self.assertIndexed(Inheritance.objects.filter(child_id=self.csts[1].pk), 'child_id')
+
+
+    def test_substitution_by_operation(self):
+        self.assertIndexed(Substitution.objects.filter(operation_id=self.operation2.pk), 'operation_id')
+
+
+    def test_argument_by_argument(self):
+        self.assertIndexed(Argument.objects.filter(argument_id=self.operation1.pk), 'argument_id')
+
+
+    def test_editor_items(self):
+        self.assertIndexed(
+            Editor.objects.filter(editor_id=self.user.pk).values('item_id'),
+            _index_name(Editor, ['editor', 'item'])
+        )
+
+
+    def test_library_location(self):
+        self.assertIndexed(
+            LibraryItem.objects.filter(location=LocationHead.USER),
+            _index_name(LibraryItem, ['location'])
+        )
+
+
+    def test_constituent_data(self):
+        self.assertIndexed(
+            ConstituentData.objects.filter(model_id=self.schema.model.pk, constituent_id__in=[self.csts[0].pk]),
+            _index_name(ConstituentData, ['model', 'constituent'])
+        )
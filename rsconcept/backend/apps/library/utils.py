@@ -1,4 +1,5 @@
 ''' Library utilities and constants. '''
 
 MAX_LIBRARY_ITEMS_BY_IDS = 100
+MAX_CONTEXT_SEARCH_PAGE = 100
 MAX_LIBRARY_ITEM_ID = 2**63 - 1
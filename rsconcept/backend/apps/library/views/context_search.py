@@ -9,15 +9,22 @@ from shared import permissions
 
 from .. import models as m
 from .. import serializers as s
-from ..services.context_search import search_library_context
+from ..services.context_search import (
+    encode_search_cursor,
+    paginate_ranked,
+    rank_library_context,
+    search_library_context
+)
 
-_CONTEXT_SEARCH_PARAMS = ('q', 'search_fields', 'admin', 'location', 'subfolders', 'item_type')
+_CONTEXT_SEARCH_PARAMS = (
+    'q', 'search_fields', 'admin', 'location', 'subfolders', 'item_type', 'limit', 'cursor'
+)
 
 
 @extend_schema(tags=['Library'])
 @extend_schema_view(
     get=extend_schema(
-        summary='search library items by nested text',
+        summary='search library items by nested text, ranked page of results when limit is given',
         parameters=[s.LibraryContextSearchSerializer],
         responses={c.HTTP_200_OK: s.LibraryContextSearchResponseSerializer},
     )
@@ -41,13 +48,27 @@ class LibraryContextSearchView(generics.GenericAPIView):
         if admin and not (request.user.is_authenticated and request.user.is_staff):
             admin = False
 
-        ids = search_library_context(
-            request.user,
-            validated.get('q', ''),
-            fields=validated.get('search_fields'),
-            all_items=admin,
-            location=validated.get('location'),
-            subfolders=validated.get('subfolders', False),
-            item_type=validated.get('item_type'),
-        )
-        return Response(s.LibraryContextSearchResponseSerializer({'ids': ids}).data)
+        params = {
+            'fields': validated.get('search_fields'),
+            'all_items': admin,
+            'location': validated.get('location'),
+            'subfolders': validated.get('subfolders', False),
+            'item_type': validated.get('item_type'),
+        }
+        query = validated.get('q', '')
+        if 'limit' not in validated:
+            ids = search_library_context(request.user, query, **params)
+            return Response(s.LibraryContextSearchResponseSerializer({'ids': ids}).data)
+
+        ranked = rank_library_context(request.user, query, **params)
+        page, last = paginate_ranked(ranked, validated['limit'], validated.get('cursor'))
+        items = m.LibraryItem.objects.in_bulk([pk for pk, _ in page])
+        return Response(s.LibraryContextSearchResponseSerializer({
+            'ids': [pk for pk, _ in page],
+            'results': [
+                {'item': items[pk], 'score': hits.score, 'matches': hits.matches(query)}
+                for pk, hits in page
+            ],
+            'count': len(ranked),
+            'next': encode_search_cursor(last) if last is not None else None,
+        }).data)
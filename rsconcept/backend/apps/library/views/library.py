@@ -1,28 +1,34 @@
 ''' Endpoints for library. '''
-from typing import cast
+from typing import Optional, cast
 
 from django.db import transaction
 from django.db.models import Q
 from django.http import HttpResponse
-from drf_spectacular.utils import extend_schema, extend_schema_view
+from drf_spectacular.utils import OpenApiParameter, extend_schema, extend_schema_view
 from rest_framework import generics
 from rest_framework import status as c
 from rest_framework import viewsets
 from rest_framework.decorators import action
-from rest_framework.exceptions import PermissionDenied
+from rest_framework.exceptions import PermissionDenied, ValidationError
+from rest_framework.pagination import BasePagination
 from rest_framework.request import Request
 from rest_framework.response import Response
+from rest_framework.serializers import ListSerializer
 
+from apps.jobs.runner import run_inline
+from apps.jobs.serializers import JobSerializer
+from apps.jobs.services import defer, respond_accepted
 from apps.oss.models import Layout, Operation, OperationSchema, PropagationFacade
 from apps.rsmodel.models import RSModel
 from apps.users.models import User
 from shared import permissions
 from shared.concurrency import ConcurrencyMixin, assert_expected_time_update_locked
+from shared.pagination import KeysetPagination
 from shared.throttling import OssCloneRateThrottle
 
+from .. import jobs
 from .. import models as m
 from .. import serializers as s
-from ..services.clone import clone_library_item
 from ..services.context_search import (
     get_accessible_items_queryset,
     get_accessible_library_items_by_ids
@@ -30,9 +36,51 @@ from ..services.context_search import (
 from ..services.location_access import assert_can_write_location
 
 
+_FIELDS_PARAMETER = OpenApiParameter(
+    name='fields',
+    type=str,
+    description='Comma-separated item fields to return, all fields by default'
+)
+
+
+def _requested_fields(request: Request) -> list[str] | None:
+    value = request.query_params.get('fields', '').strip()
+    if not value:
+        return None
+    fields = [part.strip() for part in value.split(',') if part.strip()]
+    allowed = s.LibraryItemSerializer().fields
+    unknown = [field for field in fields if field not in allowed]
+    if unknown:
+        raise ValidationError({'fields': f'Unknown fields: {", ".join(unknown)}'})
+    return ['id', *[field for field in fields if field != 'id']]
+
+
+class LibraryListMixin:
+    ''' Listing of library items with keyset pagination and field projection. '''
+    pagination_class: Optional[type[BasePagination]] = KeysetPagination
+
+    def list(self, request: Request, *args, **kwargs) -> Response:
+        ''' List items, loading only requested fields. '''
+        view = cast(generics.GenericAPIView, self)
+        fields = _requested_fields(request)
+        queryset = view.filter_queryset(view.get_queryset())
+        if fields is not None:
+            queryset = queryset.only(*fields)
+        page = view.paginate_queryset(queryset)
+        serializer = view.get_serializer(page if page is not None else queryset, many=True)
+        if fields is not None:
+            projected = cast(s.LibraryItemSerializer, cast(ListSerializer, serializer).child).fields
+            for name in list(projected):
+                if name not in fields:
+                    projected.pop(name)
+        if page is not None:
+            return view.get_paginated_response(serializer.data)
+        return Response(serializer.data)
+
+
 @extend_schema(tags=['Library'])
-@extend_schema_view()
-class LibraryViewSet(ConcurrencyMixin, viewsets.ModelViewSet):
+@extend_schema_view(list=extend_schema(parameters=[_FIELDS_PARAMETER]))
+class LibraryViewSet(LibraryListMixin, ConcurrencyMixin, viewsets.ModelViewSet):
     ''' Endpoint: Library operations. '''
     queryset = m.LibraryItem.objects.all()
     ordering = '-time_update'
@@ -86,6 +134,7 @@ class LibraryViewSet(ConcurrencyMixin, viewsets.ModelViewSet):
                 update_list.append(operation)
         if update_list:
             Operation.objects.bulk_update(update_list, ['alias', 'title', 'description'])
+            m.SearchIndexState.invalidate({operation.oss_id for operation in update_list})
 
     def perform_destroy(self, instance: m.LibraryItem) -> None:
         if instance.item_type == m.LibraryItemType.RSFORM:
@@ -184,6 +233,7 @@ class LibraryViewSet(ConcurrencyMixin, viewsets.ModelViewSet):
         request=s.LibraryItemCloneSerializer,
         responses={
             c.HTTP_201_CREATED: None,
+            c.HTTP_202_ACCEPTED: JobSerializer,
             c.HTTP_400_BAD_REQUEST: None,
             c.HTTP_403_FORBIDDEN: None,
             c.HTTP_404_NOT_FOUND: None
@@ -210,16 +260,17 @@ class LibraryViewSet(ConcurrencyMixin, viewsets.ModelViewSet):
         items_list = None
         if 'items' in serializer.validated_data:
             items_list = [item.pk for item in serializer.validated_data['items']]
-        clone = clone_library_item(
-            item,
-            cast(User, self.request.user),
-            serializer.validated_data['item_data'],
-            items_list=items_list
-        )
+        params = {
+            'item': item.pk,
+            'owner': cast(User, self.request.user).pk,
+            'item_data': serializer.validated_data['item_data'],
+            'items': items_list
+        }
+        job = defer(jobs.CLONE, params, request.user, jobs.estimate_clone(item))
+        if job is not None:
+            return respond_accepted(job)
 
-        return Response(status=c.HTTP_201_CREATED, data=(
-            s.LibraryItemSerializer(clone).data
-        ))
+        return Response(status=c.HTTP_201_CREATED, data=run_inline(jobs.CLONE, params))
 
     @extend_schema(
         summary='set owner for item',
@@ -423,8 +474,8 @@ class LibraryViewSet(ConcurrencyMixin, viewsets.ModelViewSet):
 
 
 @extend_schema(tags=['Library'])
-@extend_schema_view()
-class LibraryActiveView(generics.ListAPIView):
+@extend_schema_view(get=extend_schema(parameters=[_FIELDS_PARAMETER]))
+class LibraryActiveView(LibraryListMixin, generics.ListAPIView):
     ''' Endpoint: Get list of library items available for active user. '''
     permission_classes = (permissions.Anyone,)
     serializer_class = s.LibraryItemSerializer
@@ -434,8 +485,8 @@ class LibraryActiveView(generics.ListAPIView):
 
 
 @extend_schema(tags=['Library'])
-@extend_schema_view()
-class LibraryAdminView(generics.ListAPIView):
+@extend_schema_view(get=extend_schema(parameters=[_FIELDS_PARAMETER]))
+class LibraryAdminView(LibraryListMixin, generics.ListAPIView):
     ''' Endpoint: Get list of all library items. Admin only '''
     permission_classes = (permissions.GlobalAdmin,)
     serializer_class = s.LibraryItemSerializer
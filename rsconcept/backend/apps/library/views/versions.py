@@ -1,8 +1,8 @@
 ''' Endpoints for versions. '''
 from typing import cast
 
-from django.db import transaction
-from django.http import HttpResponse
+from django.conf import settings
+from django.http import HttpResponse, HttpResponseBase, StreamingHttpResponse
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import generics
 from rest_framework import status as c
@@ -13,14 +13,19 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.views import APIView
 
-from apps.oss.models import Inheritance, PropagationFacade
+from apps.jobs.runner import run_inline
+from apps.jobs.serializers import JobSerializer
+from apps.jobs.services import defer, respond_accepted
+from apps.oss.models import Inheritance
 from apps.rsform import utils
-from apps.rsform.models import RSForm, RSFormCached
+from apps.rsform.models import RSForm
 from apps.rsform.serializers import RSFormParseSerializer, RSFormSerializer, RSFormTRSSerializer
 from shared import messages as msg
 from shared import permissions, utility
 from shared.concurrency import ConcurrencyMixin, assert_expected_time_update
+from shared.conditional import ItemValidator
 
+from .. import jobs
 from .. import models as m
 from .. import serializers as s
 
@@ -44,7 +49,7 @@ class VersionViewset(
     permissions.EditorMixin
 ):
     ''' Endpoint: Get / Update Constituenta. '''
-    queryset = m.Version.objects.all()
+    queryset = m.Version.objects.defer('data')
     serializer_class = s.VersionSerializer
 
     @extend_schema(
@@ -52,6 +57,7 @@ class VersionViewset(
         request=None,
         responses={
             c.HTTP_200_OK: RSFormParseSerializer,
+            c.HTTP_202_ACCEPTED: JobSerializer,
             c.HTTP_403_FORBIDDEN: None,
             c.HTTP_404_NOT_FOUND: None
         }
@@ -60,21 +66,17 @@ class VersionViewset(
     def restore(self, request: Request, pk) -> HttpResponse:
         ''' Restore version data into current item. '''
         version = cast(m.Version, self.get_object())
-        item = version.item
-        if Inheritance.objects.filter(child__schema_id=item.pk).exists():
+        if Inheritance.objects.filter(child__schema_id=version.item_id).exists():
             raise ValidationError({
                 'data': msg.importIntoInherited()
             })
-        with transaction.atomic():
-            PropagationFacade().before_delete_schema(item.pk)
-            RSFormSerializer(item).restore_from_version(version.data)
-            PropagationFacade().after_create_cst(
-                list(RSFormCached(item.pk).constituentsQ().order_by('order'))
-            )
-            item.save(update_fields=['time_update'])
+        params = {'version': version.pk}
+        job = defer(jobs.RESTORE_VERSION, params, request.user, jobs.estimate_restore(version))
+        if job is not None:
+            return respond_accepted(job)
         return Response(
             status=c.HTTP_200_OK,
-            data=RSFormParseSerializer(item).data
+            data=run_inline(jobs.RESTORE_VERSION, params)
         )
 
 
@@ -89,7 +91,7 @@ class VersionViewset(
 )
 @api_view(['GET'])
 @permission_classes([permissions.Anyone])
-def export_file(request: Request, pk: int) -> HttpResponse:
+def export_file(request: Request, pk: int) -> HttpResponseBase:
     ''' Endpoint: Download Exteor compatible file for versioned data. '''
     try:
         version = m.Version.objects.get(pk=pk)
@@ -98,10 +100,17 @@ def export_file(request: Request, pk: int) -> HttpResponse:
     denied = _forbid_unless_version_item_readable(request, version)
     if denied:
         return denied
-    data = RSFormTRSSerializer.load_versioned_data(version.data)
-    file = utility.write_zipped_json(data, utils.EXTEOR_INNER_FILENAME)
+    data = RSFormTRSSerializer.load_versioned_data(version.load_data())
     filename = utils.filename_for_schema(data['alias'])
-    response = HttpResponse(file, content_type='application/zip')
+    response = StreamingHttpResponse(
+        utility.stream_zipped_json(
+            data,
+            utils.EXTEOR_INNER_FILENAME,
+            compress_level=settings.EXPORT_ZIP_LEVEL,
+            compact=settings.EXPORT_JSON_COMPACT
+        ),
+        content_type='application/zip'
+    )
     response['Content-Disposition'] = f'attachment; filename="{filename}"'
     return response
 
@@ -169,18 +178,15 @@ def retrieve_version(request: Request, pk_item: int, pk_version: int) -> HttpRes
     except m.LibraryItem.DoesNotExist:
         return Response(status=c.HTTP_404_NOT_FOUND)
     try:
-        version = m.Version.objects.get(pk=pk_version)
+        version = m.Version.objects.defer('data').get(pk=pk_version)
     except m.Version.DoesNotExist:
         return Response(status=c.HTTP_404_NOT_FOUND)
-    if version.item != item:
+    if version.item_id != item.pk:
         return Response(status=c.HTTP_404_NOT_FOUND)
 
     denied = _forbid_unless_version_item_readable(request, version)
     if denied:
         return denied
 
-    data = RSFormParseSerializer(item).from_versioned_data(version.pk, version.data)
-    return Response(
-        status=c.HTTP_200_OK,
-        data=data
-    )
+    validator = ItemValidator(request, item, RSFormSerializer.conditional_rows(item), variant=f'version:{version.pk}')
+    return validator.respond(lambda: RSFormParseSerializer(item).from_versioned_data(version.pk, version.load_data()))
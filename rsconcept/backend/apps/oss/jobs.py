@@ -0,0 +1,47 @@
+''' Background jobs: Operation Schema. '''
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from apps.jobs.runner import JobContext, job_handler
+from apps.library.models import LibraryItem
+from apps.rsform.models import Constituenta
+from shared import messages as msg
+
+from . import models as m
+from . import serializers as s
+
+EXECUTE_OPERATION = 'oss.execute_operation'
+
+
+def estimate_execute(operation: m.Operation) -> int:
+    ''' Number of constituents in operation arguments. '''
+    return Constituenta.objects.filter(schema__producer__descendants__operation=operation).count()
+
+
+def validate_execute(operation: m.Operation) -> None:
+    ''' Check that operation can be executed. '''
+    if operation.operation_type != m.OperationType.SYNTHESIS:
+        raise ValidationError({
+            'target': msg.operationNotSynthesis(operation.alias)
+        })
+    if operation.result_id is not None:
+        raise ValidationError({
+            'target': msg.operationResultNotEmpty(operation.alias)
+        })
+
+
+@job_handler(EXECUTE_OPERATION)
+def execute_operation(params: dict, context: JobContext) -> dict:
+    ''' Execute synthesis operation and update layout. '''
+    item = LibraryItem.objects.get(pk=params['oss'])
+    operation = m.Operation.objects.get(pk=params['operation'], oss=item)
+    validate_execute(operation)
+    with transaction.atomic():
+        propagation = m.PropagationFacade()
+        oss = propagation.get_oss(item.pk)
+        oss.execute_operation(operation)
+        context.check_cancelled()
+        m.Layout.update_data(item.pk, params['layout'])
+        item.save(update_fields=['time_update'])
+    context.progress(0.9)
+    return s.OperationSchemaSerializer(item).data
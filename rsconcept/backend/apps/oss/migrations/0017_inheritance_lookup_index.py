@@ -0,0 +1,18 @@
+# Generated by Django 6.0.4 on 2026-10-18 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('oss', '0016_alter_operation_operation_type_replica_and_more'),
+        ('rsform', '0011_constituenta_lookup_indexes'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='inheritance',
+            index=models.Index(fields=['operation', 'parent'], name='oss_inherit_operati_3910c0_idx'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 ''' Models: Synthesis Inheritance. '''
-from django.db.models import CASCADE, ForeignKey, Model
+from django.db.models import CASCADE, ForeignKey, Index, Model
 
 from .Substitution import Substitution
 
@@ -30,6 +30,7 @@ class Inheritance(Model):
         verbose_name = 'Наследование синтеза'
         verbose_name_plural = 'Отношение наследования конституент'
         unique_together = [['parent', 'child']]
+        indexes = [Index(fields=['operation', 'parent'])]
 
 
     def __str__(self) -> str:
@@ -4,15 +4,15 @@
 from django.db.models import QuerySet
 
 from apps.library.models import Editor, LibraryItem, LibraryItemType
-from apps.rsform.models import Constituenta, OrderManager, RSFormCached
+from apps.rsform.models import RSFormCached
 
 from .Argument import Argument
 from .Block import Block
-from .Inheritance import Inheritance
 from .Layout import Layout
 from .Operation import Operation, OperationType
 from .Replica import Replica
 from .Substitution import Substitution
+from .SynthesisBuilder import SynthesisBuilder
 
 
 class OperationSchema:
@@ -133,30 +133,8 @@ class OperationSchema:
         substitutions = operation.getQ_substitutions()
         receiver = RSFormCached(OperationSchema.create_input(self.model.pk, operation).pk)
 
-        parents: dict = {}
-        children: dict = {}
-        for operand in schemas:
-            new_items = receiver.insert_from(operand)
-            for (old_cst, new_cst) in new_items:
-                parents[new_cst.pk] = old_cst
-                children[old_cst.pk] = new_cst
-
-        translated_substitutions: list[tuple[Constituenta, Constituenta]] = []
-        for sub in substitutions:
-            original = children[sub.original.pk]
-            replacement = children[sub.substitution.pk]
-            translated_substitutions.append((original, replacement))
-        receiver.substitute(translated_substitutions)
-
-        for cst in Constituenta.objects.filter(schema_id=receiver.pk).order_by('order'):
-            parent = parents.get(cst.pk)
-            assert parent is not None
-            Inheritance.objects.create(
-                operation_id=operation.pk,
-                child=cst,
-                parent=parent
-            )
-
-        OrderManager(receiver).restore_order()
-        receiver.reset_aliases()
-        receiver.resolve_all_text()
+        builder = SynthesisBuilder(receiver)
+        builder.insert_operands(schemas)
+        builder.substitute([(sub.original_id, sub.substitution_id) for sub in substitutions])
+        builder.arrange()
+        builder.save(operation.pk)
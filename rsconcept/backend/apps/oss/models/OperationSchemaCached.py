@@ -14,7 +14,8 @@ from .OssCache import OssCache
 from .PropagationContext import PropagationContext
 from .PropagationEngine import PropagationEngine
 from .Substitution import Substitution
-from .utils import CstMapping, CstSubstitution, create_dependant_mapping, extract_data_references
+from .SynthesisBuilder import SynthesisBuilder
+from .utils import CstSubstitution, CstUpdate, create_dependant_mapping, create_update_mapping
 
 
 class OperationSchemaCached:
@@ -59,9 +60,7 @@ class OperationSchemaCached:
                     if child_schema is None:
                         continue
                     self.engine.undo_substitutions_cst(ids, child_operation, child_schema)
-                    for item in self.cache.inheritance[child_id]:
-                        if item.parent_id in ids:
-                            inheritance_to_delete.append(item)
+                    inheritance_to_delete.extend(self.cache.get_inheritance_list(ids, child_id))
                 for item in inheritance_to_delete:
                     self.cache.remove_inheritance(item)
                 Inheritance.objects.filter(pk__in=[item.pk for item in inheritance_to_delete]).delete()
@@ -177,37 +176,14 @@ class OperationSchemaCached:
         new_schema = OperationSchema.create_input(self.pk, self.cache.operation_by_id[operation.pk])
         receiver = self.context.get_schema(new_schema.pk)
 
-        parents: dict = {}
-        children: dict = {}
-        for operand in schemas:
-            new_items = receiver.insert_from(operand)
-            for (old_cst, new_cst) in new_items:
-                parents[new_cst.pk] = old_cst
-                children[old_cst.pk] = new_cst
-
-        translated_substitutions: list[tuple[Constituenta, Constituenta]] = []
-        for sub in substitutions:
-            original = children[sub.original.pk]
-            replacement = children[sub.substitution.pk]
-            translated_substitutions.append((original, replacement))
-        receiver.substitute(translated_substitutions)
-
-        for cst in Constituenta.objects.filter(schema_id=receiver.pk).order_by('order'):
-            parent = parents.get(cst.pk)
-            assert parent is not None
-            Inheritance.objects.create(
-                operation_id=operation.pk,
-                child=cst,
-                parent=parent
-            )
-
-        OrderManager(receiver).restore_order()
-        receiver.reset_aliases()
-        receiver.resolve_all_text()
+        builder = SynthesisBuilder(receiver)
+        builder.insert_operands(schemas)
+        builder.substitute([(sub.original_id, sub.substitution_id) for sub in substitutions])
+        builder.arrange()
+        new_items = builder.save(operation.pk)
 
         if self.cache.extend_graph.outputs[operation.pk]:
-            receiver_items = list(Constituenta.objects.filter(schema_id=receiver.pk).order_by('order'))
-            self.after_create_cst(receiver.pk, receiver_items)
+            self.after_create_cst(receiver.pk, new_items)
         return True
 
     def relocate_down(self, destinationID: int, items: list[int]):
@@ -217,7 +193,7 @@ class OperationSchemaCached:
         operation = self.cache.get_operation(destinationID)
         destination = self.context.get_schema(destinationID)
         self.engine.undo_substitutions_cst(items, operation, destination)
-        inheritance_to_delete = [item for item in self.cache.inheritance[operation.pk] if item.parent_id in items]
+        inheritance_to_delete = self.cache.get_inheritance_list(items, operation.pk)
         for item in inheritance_to_delete:
             self.cache.remove_inheritance(item)
         Inheritance.objects.filter(operation_id=operation.pk, parent_id__in=items).delete()
@@ -232,7 +208,7 @@ class OperationSchemaCached:
 
         operation = self.cache.get_operation(sourceID)
         alias_mapping: dict[str, str] = {}
-        for item in self.cache.inheritance[operation.pk]:
+        for item in self.cache.inheritance[operation.pk].values():
             if item.parent_id in destination.cache.by_id:
                 source_cst = source.cache.by_id[item.child_id]
                 destination_cst = destination.cache.by_id[item.parent_id]
@@ -263,26 +239,23 @@ class OperationSchemaCached:
 
     def after_change_cst_type(self, schemaID: int, target: int, new_type: CstType) -> None:
         ''' Trigger cascade resolutions when Constituenta type is changed. '''
+        self.after_change_cst_type_multi(schemaID, {target: new_type})
+
+    def after_change_cst_type_multi(self, schemaID: int, changes: dict[int, CstType]) -> None:
+        ''' Trigger cascade resolutions when types of multiple Constituents are changed. '''
         operation = self.cache.get_operation(schemaID)
-        self.engine.on_change_cst_type(operation.pk, target, new_type)
+        self.engine.on_change_cst_type_multi(operation.pk, changes)
 
     def after_update_cst(self, sourceID: int, target: int, data: dict, old_data: dict) -> None:
         ''' Trigger cascade resolutions when Constituenta data is changed. '''
-        operation = self.cache.get_operation(sourceID)
         source = self.context.get_schema(sourceID)
-        depend_aliases = extract_data_references(data, old_data)
-        alias_mapping: CstMapping = {}
-        for alias in depend_aliases:
-            cst = source.cache.by_alias.get(alias)
-            if cst is not None:
-                alias_mapping[alias] = cst
-        self.engine.on_update_cst(
-            operation=operation.pk,
-            cst_id=target,
-            data=data,
-            old_data=old_data,
-            mapping=alias_mapping
-        )
+        mapping = create_update_mapping(source, data, old_data)
+        self.after_update_cst_multi(sourceID, [(target, data, old_data, mapping)])
+
+    def after_update_cst_multi(self, sourceID: int, changes: list[CstUpdate]) -> None:
+        ''' Trigger cascade resolutions when data of multiple Constituents is changed. '''
+        operation = self.cache.get_operation(sourceID)
+        self.engine.on_update_cst_multi(operation.pk, changes)
 
     def before_delete_cst(self, operationID: int, target: list[int]) -> None:
         ''' Trigger cascade resolutions before Constituents are deleted. '''
@@ -350,5 +323,6 @@ class OperationSchemaCached:
             cst_mapping.append((original_cst, substitution_cst))
         self.before_substitute(schema.pk, cst_mapping)
         schema.substitute(cst_mapping)
+        OrderManager(schema).place(substitution.pk for _, substitution in cst_mapping)
         for sub in added:
             self.cache.insert_substitution(sub)
@@ -14,7 +14,11 @@ from .Substitution import Substitution
 
 
 class OssCache:
-    ''' Cache for OSS data. '''
+    ''' Cache for OSS data.
+
+    Inheritance and substitutions are indexed per operation by both sides of the link,
+    so lookups and removals do not scan operation contents.
+    '''
 
     def __init__(self, item_id: int, context: PropagationContext) -> None:
         self._item_id = item_id
@@ -41,9 +45,16 @@ class OssCache:
             if original is not None:
                 self.extend_graph.add_edge(original, argument.operation_id)
 
+        self._operation_by_result: dict[int, Operation] = {}
+        self._index_results()
+
         self.is_loaded_subs = False
-        self.substitutions: dict[int, list[Substitution]] = {}
-        self.inheritance: dict[int, list[Inheritance]] = {}
+        # Substitutions per operation keyed by original constituent
+        self.substitutions: dict[int, dict[int, Substitution]] = {}
+        # Inheritance per operation keyed by child constituent
+        self.inheritance: dict[int, dict[int, Inheritance]] = {}
+        self._by_substitute: dict[int, dict[int, dict[int, Substitution]]] = {}
+        self._by_parent: dict[int, dict[int, Inheritance]] = {}
 
     def ensure_loaded_subs(self) -> None:
         ''' Ensure cache is fully loaded. '''
@@ -51,14 +62,13 @@ class OssCache:
             return
         self.is_loaded_subs = True
         for operation in self.operations:
-            self.inheritance[operation.pk] = []
-            self.substitutions[operation.pk] = []
+            self._add_operation_index(operation.pk)
         for sub in Substitution.objects.filter(operation__oss_id=self._item_id).only(
                 'operation_id', 'original_id', 'substitution_id', 'original__schema_id'):
-            self.substitutions[sub.operation_id].append(sub)
+            self.insert_substitution(sub)
         for item in Inheritance.objects.filter(operation__oss_id=self._item_id).only(
                 'operation_id', 'parent_id', 'child_id'):
-            self.inheritance[item.operation_id].append(item)
+            self.insert_inheritance(item)
 
     def get_result(self, operation: Operation) -> Optional[RSFormCached]:
         ''' Get schema by Operation. '''
@@ -68,41 +78,46 @@ class OssCache:
 
     def get_operation(self, schemaID: int) -> Operation:
         ''' Get operation by schema. '''
-        for operation in self.operations:
-            if operation.result_id == schemaID and operation.operation_type != OperationType.REPLICA:
-                return operation
-        raise ValueError(f'Operation for schema {schemaID} not found')
+        operation = self._operation_by_result.get(schemaID)
+        if operation is None or operation.result_id != schemaID:
+            self._index_results()
+            operation = self._operation_by_result.get(schemaID)
+        if operation is None:
+            raise ValueError(f'Operation for schema {schemaID} not found')
+        return operation
 
     def get_inheritor(self, parent_cst: int, operation: int) -> Optional[int]:
         ''' Get child for parent inside target RSFrom. '''
-        for item in self.inheritance[operation]:
-            if item.parent_id == parent_cst:
-                return item.child_id
-        return None
+        item = self._by_parent[operation].get(parent_cst)
+        return item.child_id if item is not None else None
 
     def get_inheritors_list(self, target: list[int], operation: int) -> list[int]:
         ''' Get child for parent inside target RSFrom. '''
-        result = []
-        for item in self.inheritance[operation]:
-            if item.parent_id in target:
-                result.append(item.child_id)
-        return result
+        return [item.child_id for item in self.get_inheritance_list(target, operation)]
+
+    def get_inheritance_list(self, target: list[int], operation: int) -> list[Inheritance]:
+        ''' Get inheritance links for parents inside target RSForm. '''
+        by_parent = self._by_parent[operation]
+        return [by_parent[parent] for parent in dict.fromkeys(target) if parent in by_parent]
 
     def get_successor(self, parent_cst: int, operation: int) -> Optional[int]:
         ''' Get child for parent inside target RSFrom including substitutions. '''
-        for sub in self.substitutions[operation]:
-            if sub.original_id == parent_cst:
-                return self.get_inheritor(sub.substitution_id, operation)
+        sub = self.substitutions[operation].get(parent_cst)
+        if sub is not None:
+            return self.get_inheritor(sub.substitution_id, operation)
         return self.get_inheritor(parent_cst, operation)
 
+    def get_substituted(self, cst: int, operation: int) -> list[Substitution]:
+        ''' Get substitutions where target constituent replaces originals in target operation. '''
+        return list(self._by_substitute[operation].get(cst, {}).values())
+
     def get_substitution_partners(self, cst: int, operation: int) -> list[int]:
         ''' Get originals or substitutes for target constituent in target operation. '''
         result = []
-        for sub in self.substitutions[operation]:
-            if sub.original_id == cst:
-                result.append(sub.substitution_id)
-            elif sub.substitution_id == cst:
-                result.append(sub.original_id)
+        sub = self.substitutions[operation].get(cst)
+        if sub is not None:
+            result.append(sub.substitution_id)
+        result.extend(self._by_substitute[operation].get(cst, ()))
         return result
 
     def insert_argument(self, argument: Argument) -> None:
@@ -115,23 +130,38 @@ class OssCache:
 
     def insert_inheritance(self, inheritance: Inheritance) -> None:
         ''' Insert new inheritance. '''
-        self.inheritance[inheritance.operation_id].append(inheritance)
+        self.inheritance[inheritance.operation_id][inheritance.child_id] = inheritance
+        self._by_parent[inheritance.operation_id].setdefault(inheritance.parent_id, inheritance)
 
     def insert_substitution(self, sub: Substitution) -> None:
         ''' Insert new substitution. '''
-        self.substitutions[sub.operation_id].append(sub)
+        self.substitutions[sub.operation_id][sub.original_id] = sub
+        self._by_substitute[sub.operation_id].setdefault(sub.substitution_id, {})[sub.original_id] = sub
+
+    def reassign_substitution(
+        self, sub: Substitution,
+        original: Optional[int] = None,
+        substitution: Optional[int] = None
+    ) -> None:
+        ''' Change constituents of cached substitution. '''
+        self.remove_substitution(sub)
+        if original is not None:
+            sub.original_id = original
+        if substitution is not None:
+            sub.substitution_id = substitution
+        self.insert_substitution(sub)
 
     def remove_cst(self, operation: int, target: list[int]) -> None:
         ''' Remove constituents from operation. '''
-        subs_to_delete = [
-            sub for sub in self.substitutions[operation]
-            if sub.original_id in target or sub.substitution_id in target
-        ]
-        for sub in subs_to_delete:
-            self.substitutions[operation].remove(sub)
-        inherit_to_delete = [item for item in self.inheritance[operation] if item.child_id in target]
-        for item in inherit_to_delete:
-            self.inheritance[operation].remove(item)
+        for cst in target:
+            sub = self.substitutions[operation].get(cst)
+            if sub is not None:
+                self.remove_substitution(sub)
+            for sub in self.get_substituted(cst, operation):
+                self.remove_substitution(sub)
+            item = self.inheritance[operation].get(cst)
+            if item is not None:
+                self.remove_inheritance(item)
 
     def remove_operation(self, operation: int) -> None:
         ''' Remove operation from cache. '''
@@ -141,11 +171,15 @@ class OssCache:
         self._context.invalidate(target.result_id)
         self.operations.remove(self.operation_by_id[operation])
         del self.operation_by_id[operation]
+        if target.result_id is not None and self._operation_by_result.get(target.result_id) is target:
+            del self._operation_by_result[target.result_id]
         if operation in self.replica_original:
             del self.replica_original[operation]
         if self.is_loaded_subs:
             del self.substitutions[operation]
             del self.inheritance[operation]
+            del self._by_substitute[operation]
+            del self._by_parent[operation]
 
     def remove_argument(self, argument: Argument) -> None:
         ''' Remove argument from cache. '''
@@ -158,8 +192,32 @@ class OssCache:
 
     def remove_substitution(self, target: Substitution) -> None:
         ''' Remove substitution from cache. '''
-        self.substitutions[target.operation_id].remove(target)
+        operation = target.operation_id
+        sub = self.substitutions[operation].get(target.original_id)
+        if sub is None or sub.pk != target.pk:
+            return
+        del self.substitutions[operation][sub.original_id]
+        partners = self._by_substitute[operation][sub.substitution_id]
+        del partners[sub.original_id]
+        if not partners:
+            del self._by_substitute[operation][sub.substitution_id]
 
     def remove_inheritance(self, target: Inheritance) -> None:
         ''' Remove inheritance from cache. '''
-        self.inheritance[target.operation_id].remove(target)
+        item = self.inheritance[target.operation_id].pop(target.child_id)
+        by_parent = self._by_parent[target.operation_id]
+        if by_parent.get(item.parent_id) is item:
+            del by_parent[item.parent_id]
+
+    def _add_operation_index(self, operation: int) -> None:
+        self.substitutions[operation] = {}
+        self.inheritance[operation] = {}
+        self._by_substitute[operation] = {}
+        self._by_parent[operation] = {}
+
+    def _index_results(self) -> None:
+        self._operation_by_result = {
+            operation.result_id: operation
+            for operation in reversed(self.operations)
+            if operation.result_id is not None and operation.operation_type != OperationType.REPLICA
+        }
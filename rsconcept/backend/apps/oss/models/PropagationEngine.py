@@ -1,10 +1,10 @@
 ''' Models: Change propagation engine. '''
-from typing import Optional
+from typing import Callable, Optional
 
 from django.db.models import Q
 from rest_framework.serializers import ValidationError
 
-from apps.rsform.models import Attribution, Constituenta, CstType, RSFormCached
+from apps.rsform.models import Attribution, Constituenta, CstType, OrderManager, RSFormCached
 
 from .Inheritance import Inheritance
 from .Operation import Operation
@@ -14,11 +14,17 @@ from .Substitution import Substitution
 from .utils import (
     CstMapping,
     CstSubstitution,
+    CstUpdate,
     create_dependant_mapping,
     cst_mapping_to_alias,
     map_cst_update_data
 )
 
+# Inherited constituents group: source schema, constituents and dependencies mapping
+_InheritGroup = tuple[RSFormCached, list[Constituenta], CstMapping]
+# Changes scheduled for operations, keyed by operation id
+_Pending = dict[int, list]
+
 
 class PropagationEngine:
     ''' OSS changes propagation engine. '''
@@ -29,20 +35,13 @@ class PropagationEngine:
 
     def on_change_cst_type(self, operation_id: int, cst_id: int, ctype: CstType) -> None:
         ''' Trigger cascade resolutions when Constituenta type is changed. '''
-        children = self.cache.extend_graph.outputs[operation_id]
-        if not children:
-            return
-        self.cache.ensure_loaded_subs()
-        for child_id in children:
-            child_operation = self.cache.operation_by_id[child_id]
-            successor_id = self.cache.get_inheritor(cst_id, child_id)
-            if successor_id is None:
-                continue
-            child_schema = self.cache.get_result(child_operation)
-            if child_schema is None:
-                continue
-            if child_schema.change_cst_type(successor_id, ctype):
-                self.on_change_cst_type(child_id, successor_id, ctype)
+        self.on_change_cst_type_multi(operation_id, {cst_id: ctype})
+
+    def on_change_cst_type_multi(self, operation_id: int, changes: dict[int, CstType]) -> None:
+        ''' Trigger cascade resolutions when types of multiple Constituents are changed. '''
+        pending: _Pending = {}
+        self._push_type_changes(pending, operation_id, changes)
+        self._walk(pending, self._apply_type_changes)
 
     # pylint: disable=too-many-arguments, too-many-positional-arguments
     def on_inherit_cst(
@@ -54,12 +53,11 @@ class PropagationEngine:
         exclude: Optional[list[int]] = None
     ) -> None:
         ''' Trigger cascade resolutions when Constituenta is inherited. '''
-        children = self.cache.extend_graph.outputs[target_operation]
-        if not children:
-            return
-        for child_id in children:
+        pending: _Pending = {}
+        for child_id in self.cache.extend_graph.outputs[target_operation]:
             if not exclude or child_id not in exclude:
-                self.inherit_cst(child_id, source, items, mapping)
+                pending.setdefault(child_id, []).append((source, items, mapping))
+        self._walk(pending, self._apply_inherit)
 
     def inherit_cst(
         self,
@@ -69,25 +67,7 @@ class PropagationEngine:
         mapping: CstMapping
     ) -> None:
         ''' Execute inheritance of Constituenta. '''
-        operation = self.cache.operation_by_id[target_operation]
-        destination = self.cache.get_result(operation)
-        if destination is None:
-            return
-
-        self.cache.ensure_loaded_subs()
-        new_mapping = self._transform_mapping(mapping, operation, destination)
-        alias_mapping = cst_mapping_to_alias(new_mapping)
-        insert_where = self._determine_insert_position(items[0].pk, operation, source, destination)
-        new_cst_list = destination.insert_copy(items, insert_where, alias_mapping)
-        for (cst, new_cst) in zip(items, new_cst_list):
-            new_inheritance = Inheritance.objects.create(
-                operation=operation,
-                child=new_cst,
-                parent=cst
-            )
-            self.cache.insert_inheritance(new_inheritance)
-        new_mapping = {alias_mapping[alias]: cst for alias, cst in new_mapping.items()}
-        self.on_inherit_cst(operation.pk, destination, new_cst_list, new_mapping)
+        self._walk({target_operation: [(source, items, mapping)]}, self._apply_inherit)
 
     # pylint: disable=too-many-arguments, too-many-positional-arguments
     def on_update_cst(
@@ -96,36 +76,13 @@ class PropagationEngine:
         mapping: CstMapping
     ) -> None:
         ''' Trigger cascade resolutions when Constituenta data is changed. '''
-        children = self.cache.extend_graph.outputs[operation]
-        if not children:
-            return
-        self.cache.ensure_loaded_subs()
-        for child_id in children:
-            child_operation = self.cache.operation_by_id[child_id]
-            successor_id = self.cache.get_inheritor(cst_id, child_id)
-            if successor_id is None:
-                continue
-            child_schema = self.cache.get_result(child_operation)
-            assert child_schema is not None
-            new_mapping = self._transform_mapping(mapping, child_operation, child_schema)
-            alias_mapping = cst_mapping_to_alias(new_mapping)
-            successor = child_schema.cache.by_id.get(successor_id)
-            if successor is None:
-                continue
-            new_data = map_cst_update_data(successor, data, old_data, alias_mapping)
-            if not new_data:
-                continue
-            new_old_data = child_schema.update_cst(successor.pk, new_data)
-            if not new_old_data:
-                continue
-            new_mapping = {alias_mapping[alias]: cst for alias, cst in new_mapping.items()}
-            self.on_update_cst(
-                operation=child_id,
-                cst_id=successor_id,
-                data=new_data,
-                old_data=new_old_data,
-                mapping=new_mapping
-            )
+        self.on_update_cst_multi(operation, [(cst_id, data, old_data, mapping)])
+
+    def on_update_cst_multi(self, operation: int, changes: list[CstUpdate]) -> None:
+        ''' Trigger cascade resolutions when data of multiple Constituents is changed. '''
+        pending: _Pending = {}
+        self._push_updates(pending, operation, changes)
+        self._walk(pending, self._apply_updates)
 
     def on_inherit_attribution(
         self, operationID: int,
@@ -187,6 +144,7 @@ class PropagationEngine:
                 continue
             self.on_before_substitute(child_operation.pk, new_substitutions)
             child_schema.substitute(new_substitutions)
+            OrderManager(child_schema).place(replacement.pk for _, replacement in new_substitutions)
 
     def on_delete_attribution(self, operationID: int, attributions: list[Attribution]) -> None:
         ''' Trigger cascade resolutions when Attribution is deleted. '''
@@ -258,11 +216,14 @@ class PropagationEngine:
             operation: Operation, schema: RSFormCached
     ) -> None:
         ''' Undo substitutions for Constituents. '''
-        to_process = []
-        for sub in self.cache.substitutions[operation.pk]:
-            if sub.original_id in target_ids or sub.substitution_id in target_ids:
-                to_process.append(sub)
-        for sub in to_process:
+        to_process: dict[int, Substitution] = {}
+        for cst_id in target_ids:
+            sub = self.cache.substitutions[operation.pk].get(cst_id)
+            if sub is not None:
+                to_process[sub.pk] = sub
+            for sub in self.cache.get_substituted(cst_id, operation.pk):
+                to_process[sub.pk] = sub
+        for sub in to_process.values():
             self.undo_substitution(schema, sub, target_ids)
 
     def undo_substitution(
@@ -289,7 +250,7 @@ class PropagationEngine:
                 if inheritor_id is not None:
                     dependant.append(inheritor_id)
 
-        self.cache.substitutions[operation_id].remove(target)
+        self.cache.remove_substitution(target)
         target.delete()
 
         new_original: Optional[Constituenta] = None
@@ -358,31 +319,28 @@ class PropagationEngine:
             sub_replaced = False
             new_substitution_id = self.cache.get_inheritor(current_sub[1].pk, operation)
             if new_substitution_id is None:
-                for sub in self.cache.substitutions[operation]:
-                    if sub.original_id == current_sub[1].pk:
-                        sub_replaced = True
-                        new_substitution_id = self.cache.get_inheritor(sub.original_id, operation)
-                        break
+                sub = self.cache.substitutions[operation].get(current_sub[1].pk)
+                if sub is not None:
+                    sub_replaced = True
+                    new_substitution_id = self.cache.get_inheritor(sub.original_id, operation)
 
             new_original_id = self.cache.get_inheritor(current_sub[0].pk, operation)
             original_replaced = False
             if new_original_id is None:
-                for sub in self.cache.substitutions[operation]:
-                    if sub.original_id == current_sub[0].pk:
-                        original_replaced = True
-                        sub.original_id = current_sub[1].pk
-                        sub.save()
-                        new_original_id = new_substitution_id
-                        new_substitution_id = self.cache.get_inheritor(sub.substitution_id, operation)
-                        break
+                sub = self.cache.substitutions[operation].get(current_sub[0].pk)
+                if sub is not None:
+                    original_replaced = True
+                    self.cache.reassign_substitution(sub, original=current_sub[1].pk)
+                    sub.save()
+                    new_original_id = new_substitution_id
+                    new_substitution_id = self.cache.get_inheritor(sub.substitution_id, operation)
 
             if sub_replaced and original_replaced:
                 raise ValidationError({'propagation': 'Substitution breaks OSS substitutions.'})
 
-            for sub in self.cache.substitutions[operation]:
-                if sub.substitution_id == current_sub[0].pk:
-                    sub.substitution_id = current_sub[1].pk
-                    sub.save()
+            for sub in self.cache.get_substituted(current_sub[0].pk, operation):
+                self.cache.reassign_substitution(sub, substitution=current_sub[1].pk)
+                sub.save()
 
             if new_original_id is not None and new_substitution_id is not None:
                 result.append((schema.cache.by_id[new_original_id], schema.cache.by_id[new_substitution_id]))
@@ -413,3 +371,100 @@ class PropagationEngine:
             if not new_target:
                 continue
             self._on_partial_mapping(new_mapping, new_target, child_id, child_schema)
+
+    def _walk(self, pending: _Pending, apply: Callable[[_Pending, int, list], None]) -> None:
+        ''' Apply pending changes visiting each affected operation once in topological order.
+
+        Applying changes to an operation may schedule changes for its children.
+        '''
+        if not pending:
+            return
+        self.cache.ensure_loaded_subs()
+        graph = self.cache.extend_graph
+        affected = list(pending) + graph.expand_outputs(pending)
+        for operation_id in graph.topological_order(affected):
+            entries = pending.pop(operation_id, None)
+            if entries:
+                apply(pending, operation_id, entries)
+
+    def _apply_inherit(self, pending: _Pending, operation_id: int, groups: list[_InheritGroup]) -> None:
+        operation = self.cache.operation_by_id[operation_id]
+        destination = self.cache.get_result(operation)
+        if destination is None:
+            return
+        children = self.cache.extend_graph.outputs[operation_id]
+        inheritance: list[Inheritance] = []
+        for source, items, mapping in groups:
+            if not items:
+                continue
+            new_mapping = self._transform_mapping(mapping, operation, destination)
+            alias_mapping = cst_mapping_to_alias(new_mapping)
+            insert_where = self._determine_insert_position(items[0].pk, operation, source, destination)
+            new_cst_list = destination.insert_copy(items, insert_where, alias_mapping)
+            OrderManager(destination).place(cst.pk for cst in new_cst_list)
+            for (cst, new_cst) in zip(items, new_cst_list):
+                new_inheritance = Inheritance(operation=operation, child=new_cst, parent=cst)
+                self.cache.insert_inheritance(new_inheritance)
+                inheritance.append(new_inheritance)
+            new_mapping = {alias_mapping[alias]: cst for alias, cst in new_mapping.items()}
+            for child_id in children:
+                pending.setdefault(child_id, []).append((destination, new_cst_list, new_mapping))
+        Inheritance.objects.bulk_create(inheritance)
+
+    def _push_updates(self, pending: _Pending, operation_id: int, changes: list[CstUpdate]) -> None:
+        for child_id in self.cache.extend_graph.outputs[operation_id]:
+            child_operation = self.cache.operation_by_id[child_id]
+            child_schema = self.cache.get_result(child_operation)
+            if child_schema is None:
+                continue
+            self.cache.ensure_loaded_subs()
+            for cst_id, data, old_data, mapping in changes:
+                successor_id = self.cache.get_inheritor(cst_id, child_id)
+                if successor_id is None:
+                    continue
+                successor = child_schema.cache.by_id.get(successor_id)
+                if successor is None:
+                    continue
+                new_mapping = self._transform_mapping(mapping, child_operation, child_schema)
+                alias_mapping = cst_mapping_to_alias(new_mapping)
+                new_data = map_cst_update_data(successor, data, old_data, alias_mapping)
+                if not new_data:
+                    continue
+                new_mapping = {alias_mapping[alias]: cst for alias, cst in new_mapping.items()}
+                pending.setdefault(child_id, []).append((successor_id, new_data, new_mapping))
+
+    def _apply_updates(
+        self, pending: _Pending, operation_id: int,
+        updates: list[tuple[int, dict, CstMapping]]
+    ) -> None:
+        schema = self.cache.get_result(self.cache.operation_by_id[operation_id])
+        assert schema is not None
+        old_values = schema.update_cst_multi([(cst_id, data) for cst_id, data, _ in updates])
+        changes = [
+            (cst_id, data, old_data, mapping)
+            for (cst_id, data, mapping), old_data in zip(updates, old_values)
+            if old_data
+        ]
+        if changes:
+            self._push_updates(pending, operation_id, changes)
+
+    def _push_type_changes(self, pending: _Pending, operation_id: int, changes: dict[int, CstType]) -> None:
+        for child_id in self.cache.extend_graph.outputs[operation_id]:
+            if self.cache.operation_by_id[child_id].result_id is None:
+                continue
+            self.cache.ensure_loaded_subs()
+            for cst_id, ctype in changes.items():
+                successor_id = self.cache.get_inheritor(cst_id, child_id)
+                if successor_id is not None:
+                    pending.setdefault(child_id, []).append((successor_id, ctype))
+
+    def _apply_type_changes(
+        self, pending: _Pending, operation_id: int,
+        changes: list[tuple[int, CstType]]
+    ) -> None:
+        schema = self.cache.get_result(self.cache.operation_by_id[operation_id])
+        assert schema is not None
+        requested = dict(changes)
+        changed = schema.change_cst_type_multi(requested)
+        if changed:
+            self._push_type_changes(pending, operation_id, {cst_id: requested[cst_id] for cst_id in changed})
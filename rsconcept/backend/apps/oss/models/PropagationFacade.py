@@ -1,11 +1,17 @@
 ''' Models: Change propagation facade - managing all changes in OSS. '''
-from typing import Optional
+from contextlib import contextmanager
+from typing import Any, Iterator, Optional
 
 from apps.library.models import LibraryItem
 from apps.rsform.models import Attribution, Constituenta, CstType, RSFormCached
 
 from .OperationSchemaCached import CstSubstitution, OperationSchemaCached
 from .PropagationContext import PropagationContext
+from .utils import create_update_mapping
+
+_CREATE = 'create'
+_CHANGE_TYPE = 'change_type'
+_UPDATE = 'update'
 
 
 def _get_oss_hosts(schemaID: int) -> list[int]:
@@ -14,11 +20,67 @@ def _get_oss_hosts(schemaID: int) -> list[int]:
 
 
 class PropagationFacade:
-    ''' Change propagation API. '''
+    ''' Change propagation API.
+
+    Inside batch() triggers for created, updated and retyped constituents are collected
+    and executed when the block exits. Consecutive triggers of the same kind and source
+    are coalesced, so each OSS is traversed once and each schema receives one write set.
+    Any other trigger executes collected ones first to preserve ordering.
+    '''
 
     def __init__(self) -> None:
         self._context = PropagationContext()
         self._oss: dict[int, OperationSchemaCached] = {}
+        self._batch: Optional[list[tuple[str, int, tuple[int, ...], Any]]] = None
+
+    @contextmanager
+    def batch(self) -> Iterator['PropagationFacade']:
+        ''' Collect cascade triggers and execute them together when leaving the block. '''
+        if self._batch is not None:
+            yield self
+            return
+        self._batch = []
+        try:
+            yield self
+            self.flush()
+        finally:
+            self._batch = None
+
+    def flush(self) -> None:
+        ''' Execute collected cascade triggers. '''
+        if not self._batch:
+            return
+        triggers = self._batch
+        self._batch = None
+        try:
+            groups: list[tuple[str, int, tuple[int, ...], list]] = []
+            for kind, sourceID, exclude, payload in triggers:
+                if groups and groups[-1][:3] == (kind, sourceID, exclude):
+                    groups[-1][3].append(payload)
+                else:
+                    groups.append((kind, sourceID, exclude, [payload]))
+            for kind, sourceID, exclude, payloads in groups:
+                self._execute(kind, sourceID, list(exclude), payloads)
+        finally:
+            self._batch = []
+
+    def _defer(self, kind: str, sourceID: int, exclude: Optional[list[int]], payload: Any) -> bool:
+        if self._batch is None:
+            return False
+        self._batch.append((kind, sourceID, tuple(exclude or ()), payload))
+        return True
+
+    def _execute(self, kind: str, sourceID: int, exclude: list[int], payloads: list) -> None:
+        for host in _get_oss_hosts(sourceID):
+            if host in exclude:
+                continue
+            oss = self.get_oss(host)
+            if kind == _CREATE:
+                oss.after_create_cst(sourceID, [cst for cst_list in payloads for cst in cst_list])
+            elif kind == _CHANGE_TYPE:
+                oss.after_change_cst_type_multi(sourceID, dict(payloads))
+            else:
+                oss.after_update_cst_multi(sourceID, payloads)
 
     def get_oss(self, schemaID: int) -> OperationSchemaCached:
         ''' Get OperationSchemaCached for schemaID. '''
@@ -36,18 +98,14 @@ class PropagationFacade:
         if not new_cst:
             return
         source = new_cst[0].schema_id
-        hosts = _get_oss_hosts(source)
-        for host in hosts:
-            if exclude is None or host not in exclude:
-                self.get_oss(host).after_create_cst(source, new_cst)
+        if not self._defer(_CREATE, source, exclude, new_cst):
+            self._execute(_CREATE, source, exclude or [], [new_cst])
 
     def after_change_cst_type(self, sourceID: int, target: int, new_type: CstType,
                               exclude: Optional[list[int]] = None) -> None:
         ''' Trigger cascade resolutions when constituenta type is changed. '''
-        hosts = _get_oss_hosts(sourceID)
-        for host in hosts:
-            if exclude is None or host not in exclude:
-                self.get_oss(host).after_change_cst_type(sourceID, target, new_type)
+        if not self._defer(_CHANGE_TYPE, sourceID, exclude, (target, new_type)):
+            self._execute(_CHANGE_TYPE, sourceID, exclude or [], [(target, new_type)])
 
     # pylint: disable=too-many-arguments, too-many-positional-arguments
     def after_update_cst(
@@ -56,14 +114,14 @@ class PropagationFacade:
         exclude: Optional[list[int]] = None
     ) -> None:
         ''' Trigger cascade resolutions when constituenta data is changed. '''
-        hosts = _get_oss_hosts(sourceID)
-        for host in hosts:
-            if exclude is None or host not in exclude:
-                self.get_oss(host).after_update_cst(sourceID, target, data, old_data)
+        mapping = create_update_mapping(self.get_schema(sourceID), data, old_data)
+        if not self._defer(_UPDATE, sourceID, exclude, (target, data, old_data, mapping)):
+            self._execute(_UPDATE, sourceID, exclude or [], [(target, data, old_data, mapping)])
 
     def before_delete_cst(self, sourceID: int, target: list[int],
                           exclude: Optional[list[int]] = None) -> None:
         ''' Trigger cascade resolutions before constituents are deleted. '''
+        self.flush()
         hosts = _get_oss_hosts(sourceID)
         for host in hosts:
             if exclude is None or host not in exclude:
@@ -72,6 +130,7 @@ class PropagationFacade:
     def before_substitute(self, sourceID: int, substitutions: CstSubstitution,
                           exclude: Optional[list[int]] = None) -> None:
         ''' Trigger cascade resolutions before constituents are substituted. '''
+        self.flush()
         if not substitutions:
             return
         hosts = _get_oss_hosts(sourceID)
@@ -81,6 +140,7 @@ class PropagationFacade:
 
     def before_delete_schema(self, target: int, exclude: Optional[list[int]] = None) -> None:
         ''' Trigger cascade resolutions before schema is deleted. '''
+        self.flush()
         hosts = _get_oss_hosts(target)
         if not hosts:
             return
@@ -95,6 +155,7 @@ class PropagationFacade:
                                  attributions: list[Attribution],
                                  exclude: Optional[list[int]] = None) -> None:
         ''' Trigger cascade resolutions when Attribution is created. '''
+        self.flush()
         hosts = _get_oss_hosts(sourceID)
         for host in hosts:
             if exclude is None or host not in exclude:
@@ -104,6 +165,7 @@ class PropagationFacade:
                                   attributions: list[Attribution],
                                   exclude: Optional[list[int]] = None) -> None:
         ''' Trigger cascade resolutions before Attribution is deleted. '''
+        self.flush()
         hosts = _get_oss_hosts(sourceID)
         for host in hosts:
             if exclude is None or host not in exclude:
@@ -0,0 +1,135 @@
+''' Models: Staged build of synthesis result. '''
+from copy import deepcopy
+
+from apps.rsform.models import ORDER_GAP, Attribution, Constituenta, CstType, OrderManager, RSFormCached
+from apps.rsform.models.api_RSLanguage import get_type_prefix
+
+from .Inheritance import Inheritance
+
+
+class SynthesisBuilder:
+    ''' Synthesis result built in memory and saved with one bulk insert per table.
+
+    Staged constituents are keyed by temporary negative ids until saved.
+    Order keys are spread by ORDER_GAP on save, so later inserts do not renumber the result.
+    Steps reproduce insert_from, substitute, restore_order, reset_aliases and resolve_all_text
+    applied to receiver one after another.
+    '''
+
+    def __init__(self, receiver: RSFormCached) -> None:
+        self.receiver = receiver
+        self.items: list[Constituenta] = []
+        self.parents: dict[int, Constituenta] = {}
+        self._children: dict[int, Constituenta] = {}
+        self._attributions: list[Attribution] = []
+
+    def insert_operands(self, schemas: list[int]) -> None:
+        ''' Stage copies of operands constituents in given order. '''
+        operands: dict[int, list[Constituenta]] = {schema: [] for schema in schemas}
+        for cst in Constituenta.objects.filter(schema_id__in=schemas).order_by('order'):
+            operands[cst.schema_id].append(cst)
+        attributions: dict[int, list[tuple[int, int]]] = {schema: [] for schema in schemas}
+        for schema, container_id, attribute_id in Attribution.objects \
+                .filter(container__schema_id__in=schemas) \
+                .values_list('container__schema_id', 'container_id', 'attribute_id'):
+            attributions[schema].append((container_id, attribute_id))
+        for schema in schemas:
+            self._insert(operands[schema], attributions[schema])
+
+    def substitute(self, substitutions: list[tuple[int, int]]) -> None:
+        ''' Replace staged copies of originals with copies of substitutes given by parent ids. '''
+        if not substitutions:
+            return
+        mapping: dict[str, str] = {}
+        orig_to_sub: dict[int, int] = {}
+        for original_id, substitution_id in substitutions:
+            original = self._children[original_id]
+            substitution = self._children[substitution_id]
+            mapping[original.alias] = substitution.alias
+            orig_to_sub[original.pk] = substitution.pk
+
+        links = {(attr.container_id, attr.attribute_id) for attr in self._attributions}
+        for attr in self._attributions:
+            if attr.container_id not in orig_to_sub and attr.attribute_id not in orig_to_sub:
+                continue
+            container_id = orig_to_sub.get(attr.container_id, attr.container_id)
+            attribute_id = orig_to_sub.get(attr.attribute_id, attr.attribute_id)
+            if attribute_id != container_id and (container_id, attribute_id) not in links:
+                links.discard((attr.container_id, attr.attribute_id))
+                links.add((container_id, attribute_id))
+                attr.container_id = container_id
+                attr.attribute_id = attribute_id
+        self._attributions = [
+            attr for attr in self._attributions
+            if attr.container_id not in orig_to_sub and attr.attribute_id not in orig_to_sub
+        ]
+
+        self.items = [cst for cst in self.items if cst.pk not in orig_to_sub]
+        for index, cst in enumerate(self.items):
+            cst.order = ORDER_GAP * (index + 1)
+            cst.apply_mapping(mapping)
+
+    def arrange(self) -> None:
+        ''' Restore order, reset aliases and resolve texts of staged constituents. '''
+        self.receiver.stage(self.items)
+        OrderManager(self.receiver).restore_order(save=False)
+        self.receiver.reset_aliases(save=False)
+        self.receiver.resolve_all_text(save=False)
+        self.items.sort(key=lambda cst: cst.order)
+
+    def save(self, operation_id: int) -> list[Constituenta]:
+        ''' Insert staged constituents, attributions and inheritance links. Return created constituents. '''
+        self.receiver.mark_modified()
+        keys = [cst.pk for cst in self.items]
+        for index, cst in enumerate(self.items):
+            cst.pk = None
+            cst.order = ORDER_GAP * (index + 1)
+        Constituenta.objects.bulk_create(self.items)
+        new_ids = {key: cst.pk for key, cst in zip(keys, self.items)}
+
+        for attr in self._attributions:
+            attr.container_id = new_ids[attr.container_id]
+            attr.attribute_id = new_ids[attr.attribute_id]
+        Attribution.objects.bulk_create(self._attributions)
+        Inheritance.objects.bulk_create([
+            Inheritance(operation_id=operation_id, child=cst, parent=self.parents[key])
+            for key, cst in zip(keys, self.items)
+        ])
+        self.parents = {new_ids[key]: parent for key, parent in self.parents.items() if key in new_ids}
+        self._children = {}
+        self.receiver.stage(self.items)
+        return self.items
+
+    def _insert(self, items: list[Constituenta], attributions: list[tuple[int, int]]) -> None:
+        if not items:
+            return
+        mapping: dict[str, str] = {}
+        if self.items:
+            indices = self._get_max_indices()
+            for cst in items:
+                indices[cst.cst_type] += 1
+                mapping[cst.alias] = f'{get_type_prefix(cst.cst_type)}{indices[cst.cst_type]}'
+
+        keys: dict[int, int] = {}
+        for parent in items:
+            cst = deepcopy(parent)
+            cst.pk = -len(self.parents) - 1
+            cst.schema_id = self.receiver.pk
+            cst.order = ORDER_GAP * (len(self.items) + 1)
+            if mapping:
+                cst.alias = mapping[cst.alias]
+                cst.apply_mapping(mapping)
+            keys[parent.pk] = cst.pk
+            self.items.append(cst)
+            self.parents[cst.pk] = parent
+            self._children[parent.pk] = cst
+
+        for container_id, attribute_id in attributions:
+            if container_id in keys and attribute_id in keys:
+                self._attributions.append(Attribution(container_id=keys[container_id], attribute_id=keys[attribute_id]))
+
+    def _get_max_indices(self) -> dict[str, int]:
+        result = dict.fromkeys(CstType.values, 0)
+        for cst in self.items:
+            result[cst.cst_type] = max(result[cst.cst_type], int(cst.alias[1:]))
+        return result
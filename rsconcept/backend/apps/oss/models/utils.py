@@ -7,6 +7,8 @@ from apps.rsform.utils import extract_entities, extract_globals, replace_entitie
 
 CstMapping = dict[str, Optional[Constituenta]]
 CstSubstitution = list[tuple[Constituenta, Constituenta]]
+# Constituenta update: constituenta id, new data, old data and dependencies mapping
+CstUpdate = tuple[int, dict, dict, CstMapping]
 
 
 def cst_mapping_to_alias(mapping: CstMapping) -> dict[str, str]:
@@ -54,6 +56,16 @@ def extract_data_references(data: dict, old_data: dict) -> set[str]:
     return result
 
 
+def create_update_mapping(source: RSFormCached, data: dict, old_data: dict) -> CstMapping:
+    ''' Create mapping for Constituents referenced by update data. '''
+    result: CstMapping = {}
+    for alias in extract_data_references(data, old_data):
+        cst = source.cache.by_alias.get(alias)
+        if cst is not None:
+            result[alias] = cst
+    return result
+
+
 def create_dependant_mapping(source: RSFormCached, cst_list: list[Constituenta]) -> CstMapping:
     ''' Create mapping for dependant Constituents. '''
     if len(cst_list) == len(source.cache.constituents):
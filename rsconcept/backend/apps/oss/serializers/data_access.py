@@ -3,7 +3,7 @@ from collections import deque
 from typing import cast
 
 from django.core.exceptions import PermissionDenied
-from django.db.models import F, Q
+from django.db.models import Exists, F, OuterRef, Q, QuerySet
 from rest_framework import serializers
 from rest_framework.request import Request
 from rest_framework.serializers import PrimaryKeyRelatedField as PKField
@@ -14,6 +14,7 @@ from apps.rsform.models import Constituenta
 from apps.rsform.serializers import SubstitutionSerializerBase
 from shared import messages as msg
 from shared import permissions
+from shared.conditional import validator_rows
 from shared.serializers import StrictModelSerializer, StrictSerializer
 
 from ..models import (
@@ -591,35 +592,60 @@ class OperationSchemaSerializer(StrictModelSerializer):
         model = LibraryItem
         fields = '__all__'
 
+    @staticmethod
+    def conditional_rows(instance: LibraryItem) -> list[QuerySet]:
+        ''' Validator rows for operation results which contents are shown in details. '''
+        return [validator_rows(
+            LibraryItem.objects.filter(producer__oss=instance), 'result',
+            label='location', detail='owner_id', stamp='time_update'
+        )]
+
     def to_representation(self, instance: LibraryItem):
         result = LibraryItemDetailsSerializer(instance, context=self.context).data
         del result['versions']
         result['layout'] = Layout.objects.get(oss=instance).data
         result['operations'] = []
-        result['blocks'] = []
-        result['arguments'] = []
-        result['substitutions'] = []
-        result['replicas'] = []
-        for operation in Operation.objects.filter(oss=instance).order_by('pk'):
-            operation_data = OperationSerializer(operation).data
-            operation_result = operation.result
-            operation_data['is_import'] = \
-                operation_result is not None and \
-                (operation_result.owner_id != instance.owner_id or
-                 operation_result.location != instance.location)
-            operation_data['has_additions'] = (
-                operation_result is not None
-                and Constituenta.objects
-                .filter(schema=operation_result)
+        operations = Operation.objects.filter(oss=instance).order_by('pk').values(
+            'id',
+            'operation_type',
+            'alias',
+            'title',
+            'description',
+            'oss',
+            'result',
+            'parent',
+            result_owner=F('result__owner_id'),
+            result_location=F('result__location'),
+            result_has_additions=Exists(
+                Constituenta.objects
+                .filter(schema_id=OuterRef('result_id'))
                 .exclude(as_child__isnull=False)
-                .exists()
             )
-            result['operations'].append(operation_data)
-        for block in Block.objects.filter(oss=instance).order_by('pk'):
-            result['blocks'].append(BlockSerializer(block).data)
-        for argument in Argument.objects.filter(operation__oss=instance).order_by('order'):
-            result['arguments'].append(ArgumentSerializer(argument).data)
-        for substitution in Substitution.objects.filter(operation__oss=instance).values(
+        )
+        for operation in operations:
+            has_result = operation['result'] is not None
+            result['operations'].append({
+                'id': operation['id'],
+                'is_import': has_result and (
+                    operation['result_owner'] != instance.owner_id or
+                    operation['result_location'] != instance.location
+                ),
+                'operation_type': operation['operation_type'],
+                'alias': operation['alias'],
+                'title': operation['title'],
+                'description': operation['description'],
+                'oss': operation['oss'],
+                'result': operation['result'],
+                'parent': operation['parent'],
+                'has_additions': has_result and operation['result_has_additions']
+            })
+        result['blocks'] = list(
+            Block.objects.filter(oss=instance).order_by('pk').values('id', 'title', 'description', 'oss', 'parent')
+        )
+        result['arguments'] = list(
+            Argument.objects.filter(operation__oss=instance).order_by('order').values('operation', 'argument')
+        )
+        result['substitutions'] = list(Substitution.objects.filter(operation__oss=instance).values(
             'operation',
             'original',
             'substitution',
@@ -629,11 +655,10 @@ class OperationSchemaSerializer(StrictModelSerializer):
             substitution_schema=F('substitution__schema_id'),
             substitution_alias=F('substitution__alias'),
             substitution_term=F('substitution__term_resolved'),
-        ).order_by('pk'):
-            result['substitutions'].append(substitution)
-        for replication in Replica.objects.filter(original__oss=instance).order_by('pk'):
-            result['replicas'].append(ReplicaSerializer(replication).data)
-
+        ).order_by('pk'))
+        result['replicas'] = list(
+            Replica.objects.filter(original__oss=instance).order_by('pk').values('replica', 'original')
+        )
         return result
 
 
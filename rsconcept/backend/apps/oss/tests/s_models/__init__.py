@@ -3,5 +3,7 @@ from .t_Argument import *
 from .t_Inheritance import *
 from .t_Layout import *
 from .t_Operation import *
+from .t_OssCache import *
 from .t_Replica import *
 from .t_Substitution import *
+from .t_SynthesisBuilder import *
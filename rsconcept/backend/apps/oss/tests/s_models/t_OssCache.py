@@ -0,0 +1,113 @@
+''' Testing models: OSS cache indexes. '''
+from django.test import TestCase
+
+from apps.oss.models import (
+    Inheritance,
+    Operation,
+    OperationSchema,
+    OperationType,
+    PropagationContext,
+    Substitution
+)
+from apps.oss.models.OssCache import OssCache
+from apps.rsform.models import RSForm
+
+
+class TestOssCache(TestCase):
+    ''' Testing OssCache lookups. '''
+
+
+    def setUp(self):
+        self.oss = OperationSchema.create(alias='T1')
+        self.ks1 = RSForm.create(alias='KS1', title='Test1')
+        self.ks1X1 = self.ks1.insert_last('X1')
+        self.ks1X2 = self.ks1.insert_last('X2')
+        self.ks2 = RSForm.create(alias='KS2', title='Test2')
+        self.ks2X1 = self.ks2.insert_last('X1')
+        self.ks3 = RSForm.create(alias='KS3', title='Test3')
+        self.ks3X1 = self.ks3.insert_last('X1')
+        self.ks3X2 = self.ks3.insert_last('X2')
+
+        self.operation1 = Operation.objects.create(
+            oss=self.oss.model,
+            alias='KS1',
+            operation_type=OperationType.INPUT,
+            result=self.ks1.model
+        )
+        self.operation2 = Operation.objects.create(
+            oss=self.oss.model,
+            alias='KS2',
+            operation_type=OperationType.INPUT,
+            result=self.ks2.model
+        )
+        self.operation3 = Operation.objects.create(
+            oss=self.oss.model,
+            alias='KS3',
+            operation_type=OperationType.SYNTHESIS,
+            result=self.ks3.model
+        )
+        self.inheritance1 = Inheritance.objects.create(
+            operation=self.operation3,
+            parent=self.ks1X1,
+            child=self.ks3X1
+        )
+        self.inheritance2 = Inheritance.objects.create(
+            operation=self.operation3,
+            parent=self.ks1X2,
+            child=self.ks3X2
+        )
+        self.substitution = Substitution.objects.create(
+            operation=self.operation3,
+            original=self.ks2X1,
+            substitution=self.ks1X1
+        )
+        self.cache = OssCache(self.oss.model.pk, PropagationContext())
+        self.cache.ensure_loaded_subs()
+
+
+    def test_get_operation(self):
+        self.assertEqual(self.cache.get_operation(self.ks3.model.pk), self.operation3)
+        with self.assertRaises(ValueError):
+            self.cache.get_operation(-1)
+
+
+    def test_get_operation_result_changed(self):
+        schema = RSForm.create(alias='KS4', title='Test4')
+        cached = self.cache.operation_by_id[self.operation1.pk]
+        cached.result_id = schema.model.pk
+        self.assertEqual(self.cache.get_operation(schema.model.pk), self.operation1)
+        with self.assertRaises(ValueError):
+            self.cache.get_operation(self.ks1.model.pk)
+
+
+    def test_inheritance_lookups(self):
+        operation = self.operation3.pk
+        self.assertEqual(self.cache.get_inheritor(self.ks1X1.pk, operation), self.ks3X1.pk)
+        self.assertEqual(self.cache.get_inheritor(self.ks3X1.pk, operation), None)
+        self.assertEqual(self.cache.get_inheritors_list([self.ks1X2.pk, self.ks2X1.pk], operation), [self.ks3X2.pk])
+        self.assertEqual(self.cache.get_successor(self.ks2X1.pk, operation), self.ks3X1.pk)
+
+        self.cache.remove_inheritance(self.inheritance1)
+        self.assertEqual(self.cache.get_inheritor(self.ks1X1.pk, operation), None)
+        self.assertEqual(list(self.cache.inheritance[operation].values()), [self.inheritance2])
+
+
+    def test_substitution_lookups(self):
+        operation = self.operation3.pk
+        self.assertEqual(self.cache.get_substitution_partners(self.ks1X1.pk, operation), [self.ks2X1.pk])
+        self.assertEqual(self.cache.get_substitution_partners(self.ks2X1.pk, operation), [self.ks1X1.pk])
+
+        sub = self.cache.substitutions[operation][self.ks2X1.pk]
+        self.cache.reassign_substitution(sub, substitution=self.ks1X2.pk)
+        self.assertEqual(self.cache.get_substitution_partners(self.ks1X1.pk, operation), [])
+        self.assertEqual(self.cache.get_substituted(self.ks1X2.pk, operation), [sub])
+        self.assertEqual(self.cache.get_successor(self.ks2X1.pk, operation), self.ks3X2.pk)
+
+
+    def test_remove_cst(self):
+        operation = self.operation3.pk
+        self.cache.remove_cst(operation, [self.ks1X1.pk, self.ks3X1.pk])
+        self.assertEqual(self.cache.substitutions[operation], {})
+        self.assertEqual(self.cache.get_substitution_partners(self.ks2X1.pk, operation), [])
+        self.assertEqual(self.cache.get_inheritor(self.ks1X1.pk, operation), None)
+        self.assertEqual(self.cache.get_inheritor(self.ks1X2.pk, operation), self.ks3X2.pk)
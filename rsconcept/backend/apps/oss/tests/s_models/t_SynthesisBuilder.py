@@ -0,0 +1,103 @@
+''' Testing models: Staged synthesis build. '''
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.oss.models import Inheritance, Operation, OperationSchema, OperationType
+from apps.oss.models.SynthesisBuilder import SynthesisBuilder
+from apps.rsform.models import ORDER_GAP, Attribution, Constituenta, CstType, OrderManager, RSForm, RSFormCached
+
+
+class TestSynthesisBuilder(TestCase):
+    ''' Testing SynthesisBuilder against step by step synthesis. '''
+
+
+    def setUp(self):
+        self.oss = OperationSchema.create(alias='T1')
+        self.ks1 = RSForm.create(alias='KS1', title='Test1')
+        self.ks1X1 = self.ks1.insert_last('X1', term_raw='объект')
+        self.ks1S1 = self.ks1.insert_last('S1', definition_formal='ℬ(X1)', term_raw='@{X1|plur}')
+        self.ks1D1 = self.ks1.insert_last('D1', definition_formal='Pr1(S1)', definition_raw='@{S1|sing}')
+        Attribution.objects.create(container=self.ks1S1, attribute=self.ks1X1)
+        self.ks2 = RSForm.create(alias='KS2', title='Test2')
+        self.ks2D1 = self.ks2.insert_last('D1', definition_formal='ℬ(X1)', term_raw='@{X1|sing}')
+        self.ks2X1 = self.ks2.insert_last('X1', term_raw='другой')
+        self.ks2S1 = self.ks2.insert_last('S1', definition_formal='X1×X1')
+        Attribution.objects.create(container=self.ks2S1, attribute=self.ks2X1)
+        self.operation = Operation.objects.create(
+            oss=self.oss.model,
+            alias='KS3',
+            operation_type=OperationType.SYNTHESIS
+        )
+        self.schemas = [self.ks1.model.pk, self.ks2.model.pk]
+        self.substitutions = [(self.ks2X1.pk, self.ks1X1.pk)]
+
+
+    def _stepwise(self) -> RSFormCached:
+        receiver = RSFormCached(OperationSchema.create_input(self.oss.model.pk, self.operation).pk)
+        children: dict[int, Constituenta] = {}
+        for operand in self.schemas:
+            for (old_cst, new_cst) in receiver.insert_from(operand):
+                children[old_cst.pk] = new_cst
+        receiver.substitute([(children[original], children[substitution]) for original, substitution in self.substitutions])
+        OrderManager(receiver).restore_order()
+        receiver.reset_aliases()
+        receiver.resolve_all_text()
+        return receiver
+
+
+    def _staged(self) -> RSFormCached:
+        receiver = RSFormCached(OperationSchema.create_input(self.oss.model.pk, self.operation).pk)
+        builder = SynthesisBuilder(receiver)
+        builder.insert_operands(self.schemas)
+        builder.substitute(self.substitutions)
+        builder.arrange()
+        builder.save(self.operation.pk)
+        return receiver
+
+
+    def _contents(self, schema: RSFormCached) -> tuple[list, list]:
+        fields = [
+            'alias', 'cst_type', 'definition_formal',
+            'term_raw', 'term_resolved', 'definition_raw', 'definition_resolved'
+        ]
+        items = list(schema.constituentsQ().order_by('order').values_list(*fields))
+        attributions = sorted(
+            Attribution.objects
+            .filter(container__schema_id=schema.pk)
+            .values_list('container__alias', 'attribute__alias')
+        )
+        return items, attributions
+
+
+    def test_matches_stepwise(self):
+        expected = self._contents(self._stepwise())
+        actual = self._staged()
+        self.assertEqual(self._contents(actual), expected)
+        self.assertEqual(len(actual.cache.constituents), len(expected[0]))
+
+
+    def test_inheritance(self):
+        receiver = self._staged()
+        links = Inheritance.objects.filter(operation=self.operation).values_list('child__alias', 'parent_id')
+        self.assertEqual(len(links), receiver.constituentsQ().count())
+        parents = {parent for _, parent in links}
+        self.assertNotIn(self.ks2X1.pk, parents)
+        self.assertIn(self.ks1X1.pk, parents)
+
+
+    def test_sparse_order(self):
+        receiver = self._staged()
+        orders = list(receiver.constituentsQ().order_by('order').values_list('order', flat=True))
+        self.assertEqual(orders, [ORDER_GAP * (index + 1) for index in range(len(orders))])
+        self.assertEqual([cst.order for cst in receiver.cache.constituents], orders)
+
+
+    def test_query_count(self):
+        with CaptureQueriesContext(connection) as small:
+            self._staged()
+        for index in range(2, 20):
+            self.ks2.insert_last(f'D{index}', definition_formal=f'D{index - 1}', term_raw=f'@{{D{index - 1}|sing}}')
+        with CaptureQueriesContext(connection) as large:
+            self._staged()
+        self.assertEqual(len(small), len(large))
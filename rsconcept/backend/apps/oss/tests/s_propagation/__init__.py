@@ -1,5 +1,6 @@
 ''' Tests for REST API OSS propagation. '''
 from .t_attributes import *
+from .t_batch import *
 from .t_constituents import *
 from .t_operations import *
 from .t_references import *
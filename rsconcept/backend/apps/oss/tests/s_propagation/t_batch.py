@@ -0,0 +1,145 @@
+''' Testing API: Batched change propagation in OSS. '''
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
+from apps.oss.models import Inheritance, OperationSchema, OperationType, PropagationFacade
+from apps.rsform.models import Constituenta, CstType, RSForm
+from shared.EndpointTester import EndpointTester, decl_endpoint
+
+
+class TestPropagationBatch(EndpointTester):
+    ''' Testing batched propagation of Constituents changes through OSS chain. '''
+
+    def setUp(self):
+        super().setUp()
+        self.owned = OperationSchema.create(title='Test', alias='T1', owner=self.user)
+        self.ks1 = RSForm.create(alias='KS1', title='Test1', owner=self.user)
+        self.ks1_items = [self.ks1.insert_last(f'X{index}') for index in range(1, 6)]
+        self.ks2 = RSForm.create(alias='KS2', title='Test2', owner=self.user)
+        self.ks2.insert_last('X1')
+
+        self.operation1 = self.owned.create_operation(
+            alias='1',
+            operation_type=OperationType.INPUT,
+            result=self.ks1.model
+        )
+        self.operation2 = self.owned.create_operation(
+            alias='2',
+            operation_type=OperationType.INPUT,
+            result=self.ks2.model
+        )
+        self.operation3 = self.owned.create_operation(alias='3', operation_type=OperationType.SYNTHESIS)
+        self.owned.set_arguments(self.operation3.pk, [self.operation1, self.operation2])
+        self.owned.execute_operation(self.operation3)
+        self.operation3.refresh_from_db()
+        self.operation4 = self.owned.create_operation(alias='4', operation_type=OperationType.SYNTHESIS)
+        self.owned.set_arguments(self.operation4.pk, [self.operation3])
+        self.owned.execute_operation(self.operation4)
+        self.operation4.refresh_from_db()
+
+
+    def _successors(self, cst: Constituenta) -> list[Constituenta]:
+        child = Constituenta.objects.get(as_child__parent_id=cst.pk)
+        return [child, Constituenta.objects.get(as_child__parent_id=child.pk)]
+
+
+    def _update_terms(self, count: int) -> int:
+        facade = PropagationFacade()
+        schema = facade.get_schema(self.ks1.model.pk)
+        with facade.batch():
+            for index, cst in enumerate(self.ks1_items[:count]):
+                data = {'term_raw': f'Term {count} {index}'}
+                old_data = schema.update_cst(cst.pk, data)
+                facade.after_update_cst(self.ks1.model.pk, cst.pk, data, old_data)
+            with CaptureQueriesContext(connection) as queries:
+                facade.flush()
+        table = Constituenta._meta.db_table
+        return len([query for query in queries.captured_queries if query['sql'].startswith(f'UPDATE "{table}"')])
+
+
+    def test_update_batch(self):
+        facade = PropagationFacade()
+        schema = facade.get_schema(self.ks1.model.pk)
+        with facade.batch():
+            for cst in self.ks1_items:
+                data = {'term_raw': f'Term {cst.alias}', 'convention': 'batch'}
+                old_data = schema.update_cst(cst.pk, data)
+                facade.after_update_cst(self.ks1.model.pk, cst.pk, data, old_data)
+            self.assertEqual(self._successors(self.ks1_items[0])[0].term_raw, '')
+
+        for cst in self.ks1_items:
+            for successor in self._successors(cst):
+                self.assertEqual(successor.term_raw, f'Term {cst.alias}')
+                self.assertEqual(successor.term_resolved, f'Term {cst.alias}')
+                self.assertEqual(successor.convention, 'batch')
+
+
+    def test_update_batch_writes(self):
+        single = self._update_terms(1)
+        self.assertEqual(self._update_terms(5), single)
+
+
+    def test_change_type_batch(self):
+        facade = PropagationFacade()
+        schema = facade.get_schema(self.ks1.model.pk)
+        targets = self.ks1_items[:3]
+        with facade.batch():
+            for cst in targets:
+                schema.change_cst_type(cst.pk, CstType.STRUCTURED)
+                facade.after_change_cst_type(self.ks1.model.pk, cst.pk, CstType.STRUCTURED)
+
+        for cst in targets:
+            for successor in self._successors(cst):
+                self.assertEqual(successor.cst_type, CstType.STRUCTURED)
+                self.assertEqual(successor.alias[0], 'S')
+        for successor in self._successors(self.ks1_items[3]):
+            self.assertEqual(successor.cst_type, CstType.BASE)
+        aliases = list(RSForm(self.operation4.result).constituentsQ().values_list('alias', flat=True))
+        self.assertEqual(len(aliases), len(set(aliases)))
+
+
+    def test_inherit_batch(self):
+        facade = PropagationFacade()
+        schema = facade.get_schema(self.ks1.model.pk)
+        inheritance_count = Inheritance.objects.count()
+        with facade.batch():
+            first = schema.create_cst({'alias': 'X10', 'cst_type': CstType.BASE})
+            facade.after_create_cst([first])
+            second = schema.create_cst({'alias': 'X11', 'cst_type': CstType.BASE, 'definition_formal': 'X10'})
+            facade.after_create_cst([second])
+            self.assertEqual(Inheritance.objects.count(), inheritance_count)
+
+        self.assertEqual(Inheritance.objects.count(), inheritance_count + 4)
+        first_child, first_grandchild = self._successors(first)
+        second_child, second_grandchild = self._successors(second)
+        self.assertEqual(second_child.definition_formal, first_child.alias)
+        self.assertEqual(second_grandchild.definition_formal, first_grandchild.alias)
+
+
+    def test_batch_flush_before_delete(self):
+        facade = PropagationFacade()
+        schema = facade.get_schema(self.ks1.model.pk)
+        with facade.batch():
+            new_cst = schema.create_cst({'alias': 'X10', 'cst_type': CstType.BASE})
+            facade.after_create_cst([new_cst])
+            facade.before_delete_cst(self.ks1.model.pk, [new_cst.pk])
+            self.assertFalse(Constituenta.objects.filter(as_child__parent_id=new_cst.pk).exists())
+            schema.delete_cst([new_cst.pk])
+        self.assertEqual(RSForm(self.operation4.result).constituentsQ().count(), 6)
+
+
+    @decl_endpoint('/api/rsforms/{schema}/update-cst', method='patch')
+    def test_update_cst_view_batch(self):
+        target = self.ks1_items[0]
+        data = {
+            'target': target.pk,
+            'item_data': {
+                'term_raw': 'Batch term',
+                'alias': 'S10',
+                'cst_type': CstType.STRUCTURED
+            }
+        }
+        self.executeOK(data, schema=self.ks1.model.pk)
+        for successor in self._successors(target):
+            self.assertEqual(successor.term_raw, 'Batch term')
+            self.assertEqual(successor.cst_type, CstType.STRUCTURED)
@@ -3,6 +3,7 @@
 from apps.oss.models import OperationSchema, OperationType, PropagationFacade
 from apps.rsform.models import Attribution, Constituenta, CstType, RSForm
 from shared.EndpointTester import EndpointTester, decl_endpoint
+from shared.testing_utils import cst_position
 
 
 class TestChangeConstituents(EndpointTester):
@@ -109,7 +110,7 @@ class TestChangeConstituents(EndpointTester):
         self.assertEqual(self.ks1.constituentsQ().count(), 3)
         self.assertEqual(self.ks3.constituentsQ().count(), 5)
         self.assertEqual(inherited_cst.alias, 'X4')
-        self.assertEqual(inherited_cst.order, 2)
+        self.assertEqual(cst_position(inherited_cst), 2)
         self.assertEqual(inherited_cst.definition_formal, 'X1 = X2')
 
 
@@ -190,7 +191,7 @@ class TestChangeConstituents(EndpointTester):
         d2.refresh_from_db()
         self.assertEqual(self.ks1.constituentsQ().count(), 1)
         self.assertEqual(self.ks3.constituentsQ().count(), 4)
-        self.assertEqual(self.ks1X2.order, 0)
+        self.assertEqual(cst_position(self.ks1X2), 0)
         self.assertEqual(d2.definition_formal, r'X2\X2\X3')
 
 
@@ -273,6 +273,25 @@ class TestChangeOperations(EndpointTester):
         self.assertEqual(self.ks5D4.definition_formal, r'X1 X2 X3 S1 D1 D2 D3')
 
 
+    @decl_endpoint('/api/oss/{item}/delete-operation', method='patch')
+    def test_delete_operation_keep_constituents_details(self):
+        details = f'/api/rsforms/{self.ks4.model.pk}/details'
+        response = self.client.get(details)
+        etag = response.headers['ETag']
+        inheritance = len(response.data['inheritance'])
+        data = {
+            'layout': self.layout_data,
+            'target': self.operation1.pk,
+            'keep_constituents': True,
+            'delete_schema': True
+        }
+
+        self.executeOK(data, item=self.owned_id)
+        response = self.client.get(details, headers={'If-None-Match': etag})
+        self.assertEqual(response.status_code, 200)
+        self.assertLess(len(response.data['inheritance']), inheritance)
+
+
     @decl_endpoint('/api/oss/{item}/delete-operation', method='patch')
     def test_delete_operation_keep_schema(self):
         data = {
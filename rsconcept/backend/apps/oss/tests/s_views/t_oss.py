@@ -1,4 +1,7 @@
 ''' Testing API: Operation Schema. '''
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from apps.library.models import AccessPolicy, LibraryItemType
 from apps.oss.models import Inheritance, OperationSchema, OperationType
 from apps.rsform.models import Constituenta, RSForm
@@ -124,6 +127,56 @@ class TestOssViewset(EndpointTester):
         self.executeForbidden(item=self.private_id)
 
 
+    @decl_endpoint('/api/oss/{item}/details', method='get')
+    def test_details_not_modified(self):
+        self.populateData()
+        response = self.executeOK(item=self.owned_id)
+        etag = response.headers['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            self.executeNotModified(item=self.owned_id, headers={'If-None-Match': etag})
+        table = Constituenta._meta.db_table
+        self.assertFalse([query for query in queries.captured_queries if table in query['sql']])
+
+        self.ks1.model.save(update_fields=['time_update'])
+        response = self.executeOK(item=self.owned_id, headers={'If-None-Match': etag})
+        self.assertNotEqual(response.headers['ETag'], etag)
+
+
+    @decl_endpoint('/api/oss/{item}/details', method='get')
+    def test_details_query_count(self):
+        self.populateData()
+        with CaptureQueriesContext(connection) as initial:
+            self.executeOK(item=self.owned_id)
+
+        block = self.owned.create_block(title='Block')
+        for index in range(20):
+            schema = RSForm.create(alias=f'KS{index + 10}', title='Imported')
+            schema.insert_last('X1')
+            operation = self.owned.create_operation(
+                alias=f'{index + 10}',
+                operation_type=OperationType.INPUT,
+                result=schema.model,
+                parent=block
+            )
+            self.owned.create_replica(operation)
+            self.owned.create_block(title=f'Block {index}', parent=block)
+        with self.assertNumQueries(len(initial)):
+            response = self.executeOK(item=self.owned_id)
+
+        self.assertEqual(len(response.data['operations']), 3 + 2 * 20)
+        self.assertEqual(len(response.data['blocks']), 21)
+        self.assertEqual(len(response.data['replicas']), 20)
+        imported = response.data['operations'][3]
+        self.assertIs(imported['is_import'], True)
+        self.assertIs(imported['has_additions'], True)
+        self.assertEqual(imported['parent'], block.pk)
+        self.assertIs(response.data['operations'][0]['is_import'], False)
+        self.assertIs(response.data['operations'][2]['is_import'], False)
+        self.assertIs(response.data['operations'][2]['has_additions'], False)
+        self.assertEqual(response.data['replicas'][0]['original'], imported['id'])
+
+
     @decl_endpoint('/api/oss/{item}/update-layout', method='patch')
     def test_update_layout(self):
         self.populateData()
@@ -13,6 +13,9 @@ from rest_framework.decorators import action
 from rest_framework.request import Request
 from rest_framework.response import Response
 
+from apps.jobs.runner import run_inline
+from apps.jobs.serializers import JobSerializer
+from apps.jobs.services import defer, respond_accepted
 from apps.library.models import LibraryItem, LibraryItemType
 from apps.library.serializers import LibraryItemSerializer
 from apps.library.services.context_search import get_accessible_items_queryset
@@ -21,7 +24,9 @@ from apps.rsform.serializers import CstTargetSerializer
 from shared import messages as msg
 from shared import permissions
 from shared.concurrency import ConcurrencyMixin
+from shared.conditional import ItemValidator
 
+from .. import jobs
 from .. import models as m
 from .. import serializers as s
 
@@ -85,10 +90,9 @@ class OssViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPIView
     @action(detail=True, methods=['get'], url_path='details')
     def details(self, request: Request, pk) -> HttpResponse:
         ''' Endpoint: Detailed OSS data. '''
-        serializer = s.OperationSchemaSerializer(self._get_item(), context={'request': request})
-        return Response(
-            status=c.HTTP_200_OK,
-            data=serializer.data
+        item = self._get_item()
+        return ItemValidator(request, item, s.OperationSchemaSerializer.conditional_rows(item)).respond(
+            lambda: s.OperationSchemaSerializer(item, context={'request': request}).data
         )
 
     @extend_schema(
@@ -761,6 +765,7 @@ class OssViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPIView
         request=s.TargetOperationSerializer(),
         responses={
             c.HTTP_200_OK: s.OperationSchemaSerializer,
+            c.HTTP_202_ACCEPTED: JobSerializer,
             c.HTTP_400_BAD_REQUEST: None,
             c.HTTP_403_FORBIDDEN: None,
             c.HTTP_404_NOT_FOUND: None
@@ -773,26 +778,19 @@ class OssViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPIView
         serializer = s.TargetOperationSerializer(data=request.data, context={'oss': item})
         serializer.is_valid(raise_exception=True)
         operation: m.Operation = cast(m.Operation, serializer.validated_data['target'])
-        if operation.operation_type != m.OperationType.SYNTHESIS:
-            raise serializers.ValidationError({
-                'target': msg.operationNotSynthesis(operation.alias)
-            })
-        if operation.result is not None:
-            raise serializers.ValidationError({
-                'target': msg.operationResultNotEmpty(operation.alias)
-            })
-        layout = serializer.validated_data['layout']
-
-        with transaction.atomic():
-            propagation = m.PropagationFacade()
-            oss = propagation.get_oss(item.pk)
-            oss.execute_operation(operation)
-            m.Layout.update_data(pk, layout)
-            item.save(update_fields=['time_update'])
+        jobs.validate_execute(operation)
+        params = {
+            'oss': item.pk,
+            'operation': operation.pk,
+            'layout': serializer.validated_data['layout']
+        }
+        job = defer(jobs.EXECUTE_OPERATION, params, request.user, jobs.estimate_execute(operation))
+        if job is not None:
+            return respond_accepted(job)
 
         return Response(
             status=c.HTTP_200_OK,
-            data=s.OperationSchemaSerializer(item).data
+            data=run_inline(jobs.EXECUTE_OPERATION, params)
         )
 
     @extend_schema(
@@ -1,164 +1,306 @@
 ''' Utility: Graph implementation. '''
-import copy
-from typing import Generic, Iterable, Optional, TypeVar
+from typing import Generic, Iterable, Iterator, Mapping, Optional, TypeVar
 
 ItemType = TypeVar("ItemType")
 
 
 class Graph(Generic[ItemType]):
-    ''' Directed graph. '''
+    ''' Directed graph.
+
+    Nodes are mapped to dense integer indices. Adjacency is stored per index as
+    insertion-ordered sets (dict keys), so edge lookup and removal are O(1) while
+    traversal order stays deterministic. Freed indices are reused on insertion.
+    Reachability index is cached until the next mutation.
+    '''
 
     def __init__(self, graph: Optional[dict[ItemType, list[ItemType]]] = None) -> None:
-        if graph is None:
-            self.outputs: dict[ItemType, list[ItemType]] = {}
-            self.inputs: dict[ItemType, list[ItemType]] = {}
-        else:
-            self.outputs = graph
-            self.inputs: dict[ItemType, list[ItemType]] = {id: [] for id in graph.keys()}  # type: ignore[no-redef]
-            for parent in graph.keys():
-                for child in graph[parent]:
-                    self.inputs[child].append(parent)
+        self._index: dict[ItemType, int] = {}
+        self._nodes: list[Optional[ItemType]] = []
+        self._out: list[dict[int, None]] = []
+        self._in: list[dict[int, None]] = []
+        self._free: list[int] = []
+        self._reachability: Optional[ReachabilityIndex[ItemType]] = None
+        self.outputs: Mapping[ItemType, list[ItemType]] = _AdjacencyView(self, self._out)
+        self.inputs: Mapping[ItemType, list[ItemType]] = _AdjacencyView(self, self._in)
+        if graph is not None:
+            for node_id in graph.keys():
+                self.add_node(node_id)
+            for parent, children in graph.items():
+                for child in children:
+                    self.add_edge(parent, child)
+
+    def __len__(self) -> int:
+        return len(self._index)
 
     def contains(self, node_id: ItemType) -> bool:
         ''' Check if node is in graph. '''
-        return node_id in self.outputs
+        return node_id in self._index
 
     def has_edge(self, src: ItemType, dest: ItemType) -> bool:
         ''' Check if edge is in graph. '''
-        return self.contains(src) and dest in self.outputs[src]
+        src_index = self._index.get(src)
+        dest_index = self._index.get(dest)
+        if src_index is None or dest_index is None:
+            return False
+        return dest_index in self._out[src_index]
 
     def add_node(self, node_id: ItemType):
         ''' Add node to graph. '''
-        if not self.contains(node_id):
-            self.outputs[node_id] = []
-            self.inputs[node_id] = []
+        if node_id in self._index:
+            return
+        self._reachability = None
+        if self._free:
+            index = self._free.pop()
+            self._nodes[index] = node_id
+        else:
+            index = len(self._nodes)
+            self._nodes.append(node_id)
+            self._out.append({})
+            self._in.append({})
+        self._index[node_id] = index
 
     def add_edge(self, src: ItemType, dest: ItemType):
         ''' Add edge to graph. '''
         self.add_node(src)
         self.add_node(dest)
-        if dest not in self.outputs[src]:
-            self.outputs[src].append(dest)
-        if src not in self.inputs[dest]:
-            self.inputs[dest].append(src)
+        src_index = self._index[src]
+        dest_index = self._index[dest]
+        if dest_index in self._out[src_index]:
+            return
+        self._reachability = None
+        self._out[src_index][dest_index] = None
+        self._in[dest_index][src_index] = None
 
     def remove_edge(self, src: ItemType, dest: ItemType):
         ''' Remove edge from graph. '''
-        if not self.contains(src) or not self.contains(dest):
+        src_index = self._index.get(src)
+        dest_index = self._index.get(dest)
+        if src_index is None or dest_index is None or dest_index not in self._out[src_index]:
             return
-        if dest in self.outputs[src]:
-            self.outputs[src].remove(dest)
-        if src in self.inputs[dest]:
-            self.inputs[dest].remove(src)
+        self._reachability = None
+        del self._out[src_index][dest_index]
+        del self._in[dest_index][src_index]
 
     def remove_node(self, target: ItemType):
         ''' Remove node from graph. '''
-        if not self.contains(target):
+        index = self._index.pop(target, None)
+        if index is None:
             return
-        del self.outputs[target]
-        del self.inputs[target]
-        for list_out in self.outputs.values():
-            if target in list_out:
-                list_out.remove(target)
-        for list_in in self.inputs.values():
-            if target in list_in:
-                list_in.remove(target)
+        self._reachability = None
+        for child in self._out[index]:
+            del self._in[child][index]
+        for parent in self._in[index]:
+            del self._out[parent][index]
+        self._out[index] = {}
+        self._in[index] = {}
+        self._nodes[index] = None
+        self._free.append(index)
 
-    def expand_inputs(self, origin: Iterable[ItemType]) -> list[ItemType]:
-        ''' Expand origin nodes forward through graph edges. '''
-        result: list[ItemType] = []
-        marked: set[ItemType] = set(origin)
-        for node_id in origin:
-            if self.contains(node_id):
-                for child_id in self.inputs[node_id]:
-                    if child_id not in marked and child_id not in result:
-                        result.append(child_id)
-        position: int = 0
-        while position < len(result):
-            node_id = result[position]
-            position += 1
-            if node_id not in marked:
-                marked.add(node_id)
-                for child_id in self.inputs[node_id]:
-                    if child_id not in marked and child_id not in result:
-                        result.append(child_id)
+    def copy(self) -> 'Graph[ItemType]':
+        ''' Independent copy of graph structure. '''
+        # pylint: disable=protected-access
+        result: Graph[ItemType] = Graph()
+        result._index = dict(self._index)
+        result._nodes = list(self._nodes)
+        result._out = [dict(adjacent) for adjacent in self._out]
+        result._in = [dict(adjacent) for adjacent in self._in]
+        result._free = list(self._free)
+        result.outputs = _AdjacencyView(result, result._out)
+        result.inputs = _AdjacencyView(result, result._in)
         return result
 
+    def expand_inputs(self, origin: Iterable[ItemType]) -> list[ItemType]:
+        ''' Expand origin nodes backward through graph edges. '''
+        return self._expand(origin, self._in)
+
     def expand_outputs(self, origin: Iterable[ItemType]) -> list[ItemType]:
         ''' Expand origin nodes forward through graph edges. '''
-        result: list[ItemType] = []
-        marked: set[ItemType] = set(origin)
-        for node_id in origin:
-            if self.contains(node_id):
-                for child_id in self.outputs[node_id]:
-                    if child_id not in marked and child_id not in result:
-                        result.append(child_id)
-        position: int = 0
-        while position < len(result):
-            node_id = result[position]
-            position += 1
-            if node_id not in marked:
-                marked.add(node_id)
-                for child_id in self.outputs[node_id]:
-                    if child_id not in marked and child_id not in result:
-                        result.append(child_id)
-        return result
+        return self._expand(origin, self._out)
 
     def transitive_closure(self) -> dict[ItemType, list[ItemType]]:
         ''' Generate transitive closure - list of reachable nodes for each node. '''
-        result = copy.deepcopy(self.outputs)
-        order = self.topological_order()
-        order.reverse()
-        for node_id in order:
-            if not self.inputs[node_id]:
-                continue
-            for parent in self.inputs[node_id]:
-                result[parent] = result[parent] + [id for id in result[node_id] if id not in result[parent]]
-        return result
+        closure: list[list[int]] = [list(adjacent) for adjacent in self._out]
+        members: list[set[int]] = [set(adjacent) for adjacent in self._out]
+        for node in reversed(self._topological_indices()):
+            reachable = closure[node]
+            for parent in self._in[node]:
+                parent_members = members[parent]
+                parent_closure = closure[parent]
+                for item in reachable:
+                    if item not in parent_members:
+                        parent_members.add(item)
+                        parent_closure.append(item)
+        nodes = self._nodes
+        return {
+            node_id: [nodes[item] for item in closure[index]]  # type: ignore[misc]
+            for node_id, index in self._index.items()
+        }
 
-    def topological_order(self) -> list[ItemType]:
-        ''' Return nodes in SOME topological order. '''
-        result: list[ItemType] = []
-        marked: set[ItemType] = set()
-        for node_id in self.outputs.keys():
-            if node_id in marked:
-                continue
-            to_visit: list[ItemType] = [node_id]
-            while to_visit:
-                node = to_visit[-1]
-                if node in marked:
-                    if node not in result:
-                        result.append(node)
-                    to_visit.remove(node)
-                else:
-                    marked.add(node)
-                    if not self.outputs[node]:
-                        continue
-                    for child_id in self.outputs[node]:
-                        if child_id not in marked:
-                            to_visit.append(child_id)
-        result.reverse()
-        return result
+    def topological_order(self, target: Optional[Iterable[ItemType]] = None) -> list[ItemType]:
+        ''' Return nodes in SOME topological order. If target is given, order only target nodes. '''
+        nodes = self._nodes
+        if target is None:
+            indices = self._topological_indices()
+        else:
+            indices = self._topological_indices([self._index[node_id] for node_id in target])
+        return [nodes[index] for index in indices]  # type: ignore[misc]
+
+    def reachability(self) -> 'ReachabilityIndex[ItemType]':
+        ''' Return reachability index for current graph state. '''
+        if self._reachability is None:
+            self._reachability = ReachabilityIndex(self)
+        return self._reachability
 
     def sort_stable(self, target: list[ItemType]) -> list[ItemType]:
         ''' Returns target stable sorted in topological order based on minimal modifications. '''
         if len(target) <= 1:
             return target
-        reachable = self.transitive_closure()
-        test_set: set[ItemType] = set()
+        reachable = self.reachability()
+        test_set: int = 0
         result: list[ItemType] = []
         for node_id in reversed(target):
-            need_move = node_id in test_set
-            test_set = test_set.union(reachable[node_id])
+            need_move = reachable.in_set(node_id, test_set)
+            test_set |= reachable.descendants_bits(node_id)
             if not need_move:
                 result.append(node_id)
                 continue
             for (index, parent) in enumerate(result):
-                if node_id in reachable[parent]:
-                    if parent in reachable[node_id]:
+                if reachable.reaches(parent, node_id):
+                    if reachable.reaches(node_id, parent):
                         result.append(node_id)
                     else:
                         result.insert(index, node_id)
                     break
         result.reverse()
         return result
+
+    def _expand(self, origin: Iterable[ItemType], adjacency: list[dict[int, None]]) -> list[ItemType]:
+        marked = bytearray(len(self._nodes))
+        start: list[int] = []
+        for node_id in origin:
+            index = self._index.get(node_id)
+            if index is not None and not marked[index]:
+                marked[index] = 1
+                start.append(index)
+        queue: list[int] = []
+        for index in start:
+            for child in adjacency[index]:
+                if not marked[child]:
+                    marked[child] = 1
+                    queue.append(child)
+        position: int = 0
+        while position < len(queue):
+            for child in adjacency[queue[position]]:
+                if not marked[child]:
+                    marked[child] = 1
+                    queue.append(child)
+            position += 1
+        nodes = self._nodes
+        return [nodes[index] for index in queue]  # type: ignore[misc]
+
+    def _topological_indices(self, target: Optional[list[int]] = None) -> list[int]:
+        ''' Iterative DFS post-order over indices, reversed. Cycles are broken at back edges. '''
+        result: list[int] = []
+        state: bytearray | dict[int, int]  # 0 - new, 1 - visiting, 2 - done
+        allowed: Optional[dict[int, int]] = None
+        if target is None:
+            roots: Iterable[int] = self._index.values()
+            state = bytearray(len(self._nodes))
+        else:
+            roots = target
+            state = allowed = dict.fromkeys(target, 0)
+        outputs = self._out
+        for root in roots:
+            if state[root]:
+                continue
+            to_visit: list[int] = [root]
+            while to_visit:
+                node = to_visit[-1]
+                if state[node]:
+                    to_visit.pop()
+                    if state[node] == 1:
+                        state[node] = 2
+                        result.append(node)
+                    continue
+                state[node] = 1
+                for child in outputs[node]:
+                    if (allowed is None or child in allowed) and not state[child]:
+                        to_visit.append(child)
+        result.reverse()
+        return result
+
+
+class ReachabilityIndex(Generic[ItemType]):
+    ''' Transitive closure of a graph stored as integer bitsets over node indices. '''
+
+    def __init__(self, graph: Graph[ItemType]) -> None:
+        # pylint: disable=protected-access
+        self._index = dict(graph._index)
+        self._nodes = list(graph._nodes)
+        self._closure: list[int] = [0] * len(self._nodes)
+        order = graph._topological_indices()
+        rank = [0] * len(self._nodes)
+        for position, node in enumerate(order):
+            rank[node] = position
+        outputs = graph._out
+        closure = self._closure
+        has_cycles = False
+        for node in reversed(order):
+            bits = 0
+            for child in outputs[node]:
+                bits |= closure[child] | (1 << child)
+                has_cycles = has_cycles or rank[child] <= rank[node]
+            closure[node] = bits
+        while has_cycles:
+            has_cycles = False
+            for node in reversed(order):
+                bits = closure[node]
+                for child in outputs[node]:
+                    bits |= closure[child]
+                if bits != closure[node]:
+                    closure[node] = bits
+                    has_cycles = True
+
+    def reaches(self, src: ItemType, dest: ItemType) -> bool:
+        ''' Check if dest is reachable from src by a non-empty path. '''
+        return bool(self._closure[self._index[src]] >> self._index[dest] & 1)
+
+    def descendants(self, node_id: ItemType) -> set[ItemType]:
+        ''' All nodes reachable from node_id by a non-empty path. '''
+        nodes = self._nodes
+        bits = bin(self._closure[self._index[node_id]])[:1:-1]
+        result: set[ItemType] = set()
+        position = bits.find('1')
+        while position != -1:
+            result.add(nodes[position])  # type: ignore[arg-type]
+            position = bits.find('1', position + 1)
+        return result
+
+    def descendants_bits(self, node_id: ItemType) -> int:
+        ''' Bitset of nodes reachable from node_id. '''
+        return self._closure[self._index[node_id]]
+
+    def in_set(self, node_id: ItemType, bits: int) -> bool:
+        ''' Check if node_id is a member of bitset produced by this index. '''
+        return bool(bits >> self._index[node_id] & 1)
+
+
+class _AdjacencyView(Mapping[ItemType, list[ItemType]]):
+    ''' Read-only mapping of node to its adjacent nodes. '''
+
+    def __init__(self, graph: Graph[ItemType], adjacency: list[dict[int, None]]) -> None:
+        self._graph = graph
+        self._adjacency = adjacency
+
+    def __getitem__(self, node_id: ItemType) -> list[ItemType]:
+        # pylint: disable=protected-access
+        nodes = self._graph._nodes
+        return [nodes[index] for index in self._adjacency[self._graph._index[node_id]]]  # type: ignore[misc]
+
+    def __iter__(self) -> Iterator[ItemType]:
+        # pylint: disable=protected-access
+        return iter(self._graph._index)
+
+    def __len__(self) -> int:
+        # pylint: disable=protected-access
+        return len(self._graph._index)
@@ -0,0 +1,88 @@
+''' Background jobs: RSForm. '''
+from typing import Optional
+
+from django.db import transaction
+from rest_framework.exceptions import ValidationError
+
+from apps.jobs.runner import JobContext, job_handler
+from apps.library.models import LibraryItem
+from apps.oss.models import Inheritance, PropagationFacade
+from shared import messages as msg
+
+from . import models as m
+from . import serializers as s
+
+LOAD_TRS = 'rsform.load_trs'
+INLINE_SYNTHESIS = 'rsform.inline_synthesis'
+
+
+def estimate_load(data: dict) -> int:
+    ''' Number of constituents in imported data. '''
+    return len(data.get('items', []))
+
+
+def estimate_inline(source: LibraryItem, items: Optional[list[int]]) -> int:
+    ''' Number of constituents inserted by inline synthesis. '''
+    if items:
+        return len(items)
+    return m.Constituenta.objects.filter(schema=source).count()
+
+
+def validate_load(item: LibraryItem) -> None:
+    ''' Check that schema contents may be replaced. '''
+    if Inheritance.objects.filter(child__schema_id=item.pk).exists():
+        raise ValidationError({
+            'data': msg.importIntoInherited()
+        })
+
+
+@job_handler(LOAD_TRS)
+def load_trs(params: dict, context: JobContext) -> dict:
+    ''' Replace schema contents with data loaded from file. '''
+    item = LibraryItem.objects.get(pk=params['data']['id'])
+    validate_load(item)
+    serializer = s.RSFormTRSSerializer(data=params['data'], context={'load_meta': params['load_metadata']})
+    serializer.is_valid(raise_exception=True)
+    context.progress(0.1)
+
+    with transaction.atomic(), PropagationFacade().batch() as propagation:
+        propagation.before_delete_schema(item.pk)
+        result: m.RSFormCached = serializer.save()
+        context.check_cancelled()
+        propagation.after_create_cst(list(result.constituentsQ().order_by('order')))
+    context.progress(0.9)
+    return s.RSFormParseSerializer(LibraryItem.objects.get(pk=result.pk)).data
+
+
+@job_handler(INLINE_SYNTHESIS)
+def inline_synthesis(params: dict, context: JobContext) -> dict:
+    ''' Insert source constituents into receiver and apply substitutions. '''
+    item = LibraryItem.objects.get(pk=params['receiver'])
+    pairs: list[list[int]] = params['substitutions']
+    substituted = m.Constituenta.objects.in_bulk([cst_id for pair in pairs for cst_id in pair])
+
+    with transaction.atomic(), PropagationFacade().batch() as propagation:
+        receiver = propagation.get_schema(item.pk)
+        new_items = receiver.insert_from(params['source'], params['items'])
+        context.check_cancelled()
+        target_ids = [item[0].pk for item in new_items]
+        mapping_ids = {cst.pk: new_cst for (cst, new_cst) in new_items}
+        propagation.after_create_cst([item[1] for item in new_items])
+
+        substitutions: list[tuple[m.Constituenta, m.Constituenta]] = []
+        for original_id, replacement_id in pairs:
+            original = substituted[original_id]
+            replacement = substituted[replacement_id]
+            if original.pk in target_ids:
+                original = mapping_ids[original.pk]
+            else:
+                replacement = mapping_ids[replacement.pk]
+            substitutions.append((original, replacement))
+
+        propagation.before_substitute(receiver.pk, substitutions)
+        receiver.substitute(substitutions)
+        context.check_cancelled()
+        receiver.resolve_all_text()
+        item.save(update_fields=['time_update'])
+    context.progress(0.9)
+    return s.RSFormParseSerializer(item).data
@@ -0,0 +1,35 @@
+# Generated manually for sparse constituenta order
+
+from django.db import migrations
+
+# Value of ORDER_GAP at the time of this migration
+ORDER_GAP = 1024
+
+
+def _renumber(apps, gap: int, start: int) -> None:
+    Constituenta = apps.get_model('rsform', 'Constituenta')
+    schema_ids = Constituenta.objects.values_list('schema_id', flat=True).distinct()
+    for schema_id in list(schema_ids):
+        items = list(Constituenta.objects.filter(schema_id=schema_id).order_by('order', 'pk').only('order'))
+        for index, cst in enumerate(items):
+            cst.order = start + gap * index
+        Constituenta.objects.bulk_update(items, ['order'], batch_size=200)
+
+
+def spread_order(apps, schema_editor):
+    _renumber(apps, ORDER_GAP, ORDER_GAP)
+
+
+def compact_order(apps, schema_editor):
+    _renumber(apps, 1, 0)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('rsform', '0009_cst_type_statement'),
+    ]
+
+    operations = [
+        migrations.RunPython(spread_order, compact_order),
+    ]
@@ -0,0 +1,22 @@
+# Generated by Django 6.0.4 on 2026-10-18 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0015_lookup_indexes'),
+        ('rsform', '0010_constituenta_sparse_order'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='constituenta',
+            index=models.Index(fields=['schema', 'order'], name='rsform_cons_schema__3d0b43_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='constituenta',
+            index=models.Index(fields=['schema', 'alias'], name='rsform_cons_schema__2a7b1b_idx'),
+        ),
+    ]
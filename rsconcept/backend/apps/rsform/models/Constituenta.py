@@ -4,6 +4,7 @@ from django.db.models import (
     BooleanField,
     CharField,
     ForeignKey,
+    Index,
     JSONField,
     Model,
     PositiveIntegerField,
@@ -11,7 +12,7 @@ from django.db.models import (
     TextField
 )
 
-from ..utils import extract_entities, extract_globals, replace_entities, replace_globals
+from ..utils import extract_references, replace_entities, replace_globals
 
 
 class CstType(TextChoices):
@@ -101,6 +102,10 @@ class Constituenta(Model):
         ''' Model metadata. '''
         verbose_name = 'Конституента'
         verbose_name_plural = 'Конституенты'
+        indexes = [
+            Index(fields=['schema', 'order']),
+            Index(fields=['schema', 'alias'])
+        ]
 
     def __str__(self) -> str:
         return f'{self.alias}'
@@ -135,8 +140,4 @@ class Constituenta(Model):
 
     def extract_references(self) -> set[str]:
         ''' Extract all references from term and definition. '''
-        result: set[str] = extract_globals(self.definition_formal)
-        result.update(extract_globals(self.typification_manual))
-        result.update(extract_entities(self.term_raw))
-        result.update(extract_entities(self.definition_raw))
-        return result
+        return extract_references(self.definition_formal, self.typification_manual, self.term_raw, self.definition_raw)
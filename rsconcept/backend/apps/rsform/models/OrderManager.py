@@ -1,8 +1,11 @@
 ''' Models: RSForm order manager. '''
 
+import heapq
 from collections import deque
+from typing import Iterable, Optional
 
 from .Constituenta import Constituenta, CstType
+from .RSForm import UPDATE_BATCH, RSForm
 from .RSFormCached import RSFormCached
 from .SemanticInfo import SemanticInfo
 
@@ -14,33 +17,102 @@ class OrderManager:
     graph. Tie-breaking uses a preferred baseline (type/kernel priority);
     when a node is placed, newly unlocked semantic children are emitted next.
     Formal edges always win over clustering.
+
+    Place is incremental: only target constituents are moved, each to the nearest
+    position between its formal inputs and dependents, while the rest keep their order.
     '''
 
     def __init__(self, schema: RSFormCached) -> None:
-        self._semantic = SemanticInfo(schema)
+        schema.cache.ensure_loaded()
+        self._schema = schema
+        self._semantic: Optional[SemanticInfo] = None
         self._items = schema.cache.constituents
         self._cst_by_ID = schema.cache.by_id
 
-    def restore_order(self) -> None:
+    def restore_order(self, save: bool = True) -> None:
         ''' Restore constituent order with one stable topological pass. '''
         if len(self._items) <= 1:
             return
+        self._semantic = SemanticInfo(self._schema)
         self._items = self._sort_topological_stable()
-        self._override_order()
+        self._override_order(save)
+
+    def place(self, target: Iterable[int], save: bool = True) -> None:
+        ''' Move target constituents to satisfy formal dependencies keeping order of other constituents.
+
+        Falls back to full restore if target cannot be placed without moving other constituents.
+        '''
+        touched = {cst_id for cst_id in target if cst_id in self._cst_by_ID}
+        if not touched:
+            return
+        graph = self._schema.cache.graph_formal
+        others = [cst for cst in self._items if cst.pk not in touched]
+        position = {cst.pk: index for index, cst in enumerate(others)}
+
+        anchors: dict[int, int] = {}
+        groups: dict[int, list[Constituenta]] = {}
+        current = -1
+        for cst in self._items:
+            if cst.pk in touched:
+                anchors[cst.pk] = current
+            else:
+                current += 1
+        for cst_id in self._sort_touched(touched):
+            lower = max(
+                (position[src] if src in position else anchors[src] for src in graph.inputs[cst_id]),
+                default=-1
+            )
+            upper = min((position[dest] for dest in graph.outputs[cst_id] if dest in position), default=len(others))
+            if lower >= upper:
+                self.restore_order(save)
+                return
+            anchors[cst_id] = min(max(anchors[cst_id], lower), upper - 1)
+            groups.setdefault(anchors[cst_id], []).append(self._cst_by_ID[cst_id])
+
+        result = groups.get(-1, [])
+        for index, cst in enumerate(others):
+            result.append(cst)
+            result.extend(groups.get(index, []))
+        self._items = result
+        self._override_order(save)
+
+    def _sort_touched(self, touched: set[int]) -> list[int]:
+        ''' Touched constituents in dependency order, ties broken by current position. '''
+        graph = self._schema.cache.graph_formal
+        rank = {cst.pk: index for index, cst in enumerate(self._items) if cst.pk in touched}
+        remaining = {cst_id: sum(1 for src in graph.inputs[cst_id] if src in touched) for cst_id in touched}
+        ready = [(rank[cst_id], cst_id) for cst_id, count in remaining.items() if count == 0]
+        heapq.heapify(ready)
+        result: list[int] = []
+        while ready:
+            _, cst_id = heapq.heappop(ready)
+            result.append(cst_id)
+            for dependent_id in graph.outputs[cst_id]:
+                if dependent_id in remaining:
+                    remaining[dependent_id] -= 1
+                    if remaining[dependent_id] == 0:
+                        heapq.heappush(ready, (rank[dependent_id], dependent_id))
+        if len(result) < len(touched):
+            return sorted(touched, key=lambda cst_id: rank[cst_id])
+        return result
 
     def _sort_topological_stable(self) -> list[Constituenta]:
         ''' Kahn sort: formal deps hard, semantic children sticky, else stable. '''
+        assert self._semantic is not None
+        semantic = self._semantic
         preferred = self._kernel_priority()
         rank = {cst.pk: index for index, cst in enumerate(preferred)}
-        graph = self._semantic.graph
+        graph = semantic.graph
 
         remaining_inputs = {
             cst.pk: sum(1 for src in graph.inputs[cst.pk] if src in rank)
             for cst in preferred
         }
         ready = {cst.pk for cst in preferred if remaining_inputs[cst.pk] == 0}
+        ready_queue = [(rank[node_id], node_id) for node_id in ready]
+        heapq.heapify(ready_queue)
         children = {
-            cst.pk: [child for child in self._semantic[cst.pk]['children'] if child in rank]
+            cst.pk: [child for child in semantic[cst.pk]['children'] if child in rank]
             for cst in preferred
         }
 
@@ -64,7 +136,9 @@ class OrderManager:
                 pending_queued.discard(child_id)
                 if child_id in ready:
                     return child_id
-            return min(ready, key=lambda node_id: rank[node_id])
+            while ready_queue[0][1] not in ready:
+                heapq.heappop(ready_queue)
+            return heapq.heappop(ready_queue)[1]
 
         while ready or pending_children:
             if not ready and pending_children:
@@ -81,6 +155,7 @@ class OrderManager:
                 remaining_inputs[dependent_id] -= 1
                 if remaining_inputs[dependent_id] == 0:
                     ready.add(dependent_id)
+                    heapq.heappush(ready_queue, (rank[dependent_id], dependent_id))
 
             # Semantic children that are now ready follow this node immediately.
             enqueue_sticky(children[node_id])
@@ -93,23 +168,28 @@ class OrderManager:
 
     def _kernel_priority(self) -> list[Constituenta]:
         ''' Type/kernel priority used as the stable baseline. '''
+        assert self._semantic is not None
+        semantic = self._semantic
         result = [cst for cst in self._items if cst.cst_type == CstType.BASE]
-        result = result + [cst for cst in self._items if cst.cst_type == CstType.CONSTANT]
-        result = result + \
-            [cst for cst in self._items if result.count(cst) == 0 and len(self._semantic.graph.inputs[cst.pk]) == 0]
+        result.extend(cst for cst in self._items if cst.cst_type == CstType.CONSTANT)
+        placed = {cst.pk for cst in result}
+        result.extend(cst for cst in self._items if cst.pk not in placed and len(semantic.graph.inputs[cst.pk]) == 0)
+        placed.update(cst.pk for cst in result)
         kernel = [
             cst.pk for cst in self._items if
             cst.cst_type in [CstType.STRUCTURED, CstType.AXIOM] or
-            self._cst_by_ID[self._semantic.parent(cst.pk)].cst_type == CstType.STRUCTURED
+            self._cst_by_ID[semantic.parent(cst.pk)].cst_type == CstType.STRUCTURED
         ]
-        kernel = kernel + self._semantic.graph.expand_inputs(kernel)
-        result = result + [cst for cst in self._items if result.count(cst) == 0 and cst.pk in kernel]
-        result = result + [cst for cst in self._items if result.count(cst) == 0]
+        kernel_ids = set(kernel)
+        kernel_ids.update(semantic.graph.expand_inputs(kernel))
+        result.extend(cst for cst in self._items if cst.pk not in placed and cst.pk in kernel_ids)
+        placed.update(kernel_ids)
+        result.extend(cst for cst in self._items if cst.pk not in placed)
         return result
 
-    def _override_order(self) -> None:
-        order = 0
-        for cst in self._items:
-            cst.order = order
-            order += 1
-        Constituenta.objects.bulk_update(self._items, ['order'])
+    def _override_order(self, save: bool) -> None:
+        self._schema.cache.constituents[:] = self._items
+        changed = RSForm.arrange_order(self._items)
+        if save and changed:
+            self._schema.mark_modified()
+            Constituenta.objects.bulk_update(changed, ['order'], batch_size=UPDATE_BATCH)
@@ -1,22 +1,117 @@
 ''' Models: RSForm API. '''
 # pylint: disable=duplicate-code
 
+from bisect import bisect_left
 from typing import Iterable, Optional, cast
 
 from cctext import Entity, Resolver, TermForm, split_grams
 from django.core.exceptions import ValidationError
-from django.db.models import QuerySet
+from django.db.models import Max, QuerySet
+from django.utils import timezone
 
-from apps.library.models import LibraryItem, LibraryItemType, Version
+from apps.library.models import LibraryItem, LibraryItemType, SearchIndexState, Version
 
 from ..graph import Graph
-from ..utils import extract_entities, extract_globals
+from ..snapshots import snapshots
+from ..utils import scan_entities, scan_globals
 from .api_RSLanguage import get_type_prefix, guess_type, validate_new_cst_alias
 from .Attribution import Attribution
 from .Constituenta import Constituenta, CstType
 
 DELETED_ALIAS = 'DEL'
 
+# Rows per bulk update: SQL for CASE based updates grows slower per row with batch size
+UPDATE_BATCH = 200
+
+# Distance between order keys of neighbouring constituents after renumbering
+ORDER_GAP = 1024
+
+# Minimal distance between order keys when keys are spread after running out of room
+ORDER_SPACING = ORDER_GAP // 4
+
+# Upper bound for order keys (PositiveIntegerField)
+ORDER_MAX = 2147483647
+
+
+def _stable_keys(keys: list[Optional[int]]) -> set[int]:
+    ''' Indices of longest strictly increasing subsequence of existing keys. '''
+    tails: list[int] = []
+    tail_index: list[int] = []
+    previous: dict[int, Optional[int]] = {}
+    for index, key in enumerate(keys):
+        if key is None:
+            continue
+        length = bisect_left(tails, key)
+        previous[index] = tail_index[length - 1] if length > 0 else None
+        if length == len(tails):
+            tails.append(key)
+            tail_index.append(index)
+        else:
+            tails[length] = key
+            tail_index[length] = index
+    result: set[int] = set()
+    current = tail_index[-1] if tail_index else None
+    while current is not None:
+        result.add(current)
+        current = previous[current]
+    return result
+
+
+def _fill_gap(low: int, high: Optional[int], count: int) -> Optional[list[int]]:
+    ''' Keys for *count* slots strictly between *low* and *high*, None if there is no room. '''
+    if high is None:
+        if low + ORDER_GAP * count > ORDER_MAX:
+            return None
+        return [low + ORDER_GAP * (index + 1) for index in range(count)]
+    if low < 0:
+        low = max(low, high - ORDER_GAP * (count + 1))
+    span = high - low
+    if span <= count:
+        return None
+    return [low + span * (index + 1) // (count + 1) for index in range(count)]
+
+
+def _fill_window(result: list[int], keys: list[Optional[int]], bounds: list[int], gap: int) -> Optional[int]:
+    ''' Fill slots of *gap* between neighbouring bounds, widening window over neighbours if there is no room.
+
+    Return index of bound closing filled window or None if whole list has to be renumbered.
+    '''
+    width = 0
+    while True:
+        left = max(0, gap - width)
+        right = min(len(bounds) - 1, gap + 1 + width)
+        low = result[bounds[left]] if bounds[left] >= 0 else -1
+        high = keys[bounds[right]] if bounds[right] < len(keys) else None
+        count = bounds[right] - bounds[left] - 1
+        filled = _fill_gap(low if low >= 0 or high is not None else 0, high, count)
+        if filled is not None and (width == 0 or high is None or high - low >= ORDER_SPACING * (count + 1)):
+            result[bounds[left] + 1:bounds[right]] = filled
+            return right
+        if left == 0 and right == len(bounds) - 1:
+            return None
+        width = max(1, 2 * width)
+
+
+def assign_order(keys: list[Optional[int]]) -> list[int]:
+    ''' Order keys following list order while keeping as many of existing *keys* as possible.
+
+    Missing keys are marked with None. When there is no room between neighbours the window
+    is widened until keys can be spread with ORDER_SPACING, renumbering whole list as last resort.
+    '''
+    stable = _stable_keys(keys)
+    bounds = [-1, *sorted(stable), len(keys)]
+    result = [cast(int, key) if index in stable else 0 for index, key in enumerate(keys)]
+    gap = 0
+    while gap < len(bounds) - 1:
+        if bounds[gap + 1] - bounds[gap] == 1:
+            gap += 1
+            continue
+        closing = _fill_window(result, keys, bounds, gap)
+        if closing is None:
+            return [ORDER_GAP * (index + 1) for index in range(len(keys))]
+        gap = closing
+    return result
+
 
 class RSForm:
     ''' RSForm wrapper. No caching, each mutation requires querying. '''
@@ -31,6 +126,14 @@ class RSForm:
         model = LibraryItem.objects.create(item_type=LibraryItemType.RSFORM, **kwargs)
         return RSForm(model)
 
+    @staticmethod
+    def bump_version(schemaID: int) -> None:
+        ''' Drop shared snapshot and update schema version before constituents are modified. '''
+        snapshots.touch(schemaID)
+        snapshots.evict(schemaID)
+        LibraryItem.objects.filter(pk=schemaID).update(time_update=timezone.now())
+        SearchIndexState.invalidate([schemaID])
+
     @staticmethod
     def resolver_from_schema(schemaID: int) -> Resolver:
         ''' Create resolver for text references based on schema terms. '''
@@ -74,7 +177,7 @@ class RSForm:
         for cst in cst_list:
             result.add_node(cst.pk)
         for cst in cst_list:
-            for alias in extract_globals(cst.definition_formal):
+            for alias in scan_globals(cst.definition_formal):
                 child = cst_by_alias.get(alias)
                 if child is not None:
                     result.add_edge(src=child.pk, dest=cst.pk)
@@ -90,7 +193,7 @@ class RSForm:
         for cst in cst_list:
             result.add_node(cst.pk)
         for cst in cst_list:
-            for alias in extract_entities(cst.term_raw):
+            for alias in scan_entities(cst.term_raw):
                 child = cst_by_alias.get(alias)
                 if child is not None:
                     result.add_edge(src=child.pk, dest=cst.pk)
@@ -106,33 +209,51 @@ class RSForm:
         for cst in cst_list:
             result.add_node(cst.pk)
         for cst in cst_list:
-            for alias in extract_entities(cst.definition_raw):
+            for alias in scan_entities(cst.definition_raw):
                 child = cst_by_alias.get(alias)
                 if child is not None:
                     result.add_edge(src=child.pk, dest=cst.pk)
         return result
 
+    @staticmethod
+    def arrange_order(cst_list: Iterable[Constituenta]) -> list[Constituenta]:
+        ''' Set order keys following list order. Return constituents with changed keys. '''
+        cst_list = list(cst_list)
+        changed: list[Constituenta] = []
+        for cst, order in zip(cst_list, assign_order([cst.order for cst in cst_list])):
+            if cst.order != order:
+                cst.order = order
+                changed.append(cst)
+        return changed
+
     @staticmethod
     def save_order(cst_list: Iterable[Constituenta]) -> None:
-        ''' Save order for constituents list. '''
-        order = 0
+        ''' Save order for constituents list updating only constituents with changed keys. '''
+        changed = RSForm.arrange_order(cst_list)
+        Constituenta.objects.bulk_update(changed, ['order'], batch_size=UPDATE_BATCH)
+
+    @staticmethod
+    def allocate_order(cst_list: list[Constituenta], position: int, count: int) -> list[int]:
+        ''' Reserve order keys for *count* constituents inserted at *position* of ordered *cst_list*. '''
+        keys = assign_order([
+            *(cst.order for cst in cst_list[:position]),
+            *([None] * count),
+            *(cst.order for cst in cst_list[position:])
+        ])
+        existing = keys[:position] + keys[position + count:]
         changed: list[Constituenta] = []
-        for cst in cst_list:
+        for cst, order in zip(cst_list, existing):
             if cst.order != order:
                 cst.order = order
                 changed.append(cst)
-            order += 1
-        Constituenta.objects.bulk_update(changed, ['order'])
+        Constituenta.objects.bulk_update(changed, ['order'], batch_size=UPDATE_BATCH)
+        return keys[position:position + count]
 
     @staticmethod
-    def shift_positions(start: int, shift: int, cst_list: list[Constituenta]) -> None:
-        ''' Shift positions of constituents. '''
-        if shift == 0:
-            return
-        update_list = cst_list[start:]
-        for cst in update_list:
-            cst.order += shift
-        Constituenta.objects.bulk_update(update_list, ['order'])
+    def next_order(schemaID: int) -> int:
+        ''' Order key for constituenta appended to schema. '''
+        last = Constituenta.objects.filter(schema_id=schemaID).aggregate(last=Max('order'))['last']
+        return ORDER_GAP if last is None else last + ORDER_GAP
 
     @staticmethod
     def apply_mapping(mapping: dict[str, str], cst_list: Iterable[Constituenta],
@@ -144,18 +265,22 @@ class RSForm:
                 update_list.append(cst)
         Constituenta.objects.bulk_update(update_list, ['alias', 'definition_formal', 'term_raw', 'definition_raw'])
 
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
     @staticmethod
     def resolve_term_change(cst_list: Iterable[Constituenta], changed: list[int],
                             cst_by_alias: Optional[Optional[dict[str, Constituenta]]] = None,
                             cst_by_id: Optional[Optional[dict[int, Constituenta]]] = None,
-                            resolver: Optional[Resolver] = None) -> None:
+                            resolver: Optional[Resolver] = None,
+                            graph_terms: Optional[Graph[int]] = None,
+                            graph_defs: Optional[Graph[int]] = None) -> None:
         ''' Trigger cascade resolutions when term changes. '''
         if cst_by_alias is None:
             cst_by_alias = {cst.alias: cst for cst in cst_list}
         if cst_by_id is None:
             cst_by_id = {cst.pk: cst for cst in cst_list}
 
-        graph_terms = RSForm.graph_term(cst_list, cst_by_alias)
+        if graph_terms is None:
+            graph_terms = RSForm.graph_term(cst_list, cst_by_alias)
         expansion = graph_terms.expand_outputs(changed)
         expanded_change = changed + expansion
 
@@ -164,9 +289,7 @@ class RSForm:
 
         if expansion:
             resolved_terms: list[Constituenta] = []
-            for cst_id in graph_terms.topological_order():
-                if cst_id not in expansion:
-                    continue
+            for cst_id in graph_terms.topological_order(expansion):
                 cst = cst_by_id[cst_id]
                 resolved = resolver.resolve(cst.term_raw)
                 if resolved == resolver.context[cst.alias].get_nominal():
@@ -176,7 +299,8 @@ class RSForm:
                 resolver.context[cst.alias] = Entity(cst.alias, resolved)
             Constituenta.objects.bulk_update(resolved_terms, ['term_resolved'])
 
-        graph_defs = RSForm.graph_text(cst_list, cst_by_alias)
+        if graph_defs is None:
+            graph_defs = RSForm.graph_text(cst_list, cst_by_alias)
         update_defs = set(expansion + graph_defs.expand_outputs(expanded_change)).union(changed)
         if update_defs:
             resolved_defs: list[Constituenta] = []
@@ -191,6 +315,10 @@ class RSForm:
         ''' Get QuerySet containing all constituents of current RSForm. '''
         return Constituenta.objects.filter(schema=self.model)
 
+    def mark_modified(self) -> None:
+        ''' Drop shared snapshot and bump schema version before constituents are modified. '''
+        RSForm.bump_version(self.model.pk)
+
     def insert_last(
         self,
         alias: str,
@@ -203,10 +331,10 @@ class RSForm:
             raise ValidationError({'alias': alias_error})
         if cst_type is None:
             cst_type = guess_type(alias)
-        position = Constituenta.objects.filter(schema=self.model).count()
+        self.mark_modified()
         result = Constituenta.objects.create(
             schema=self.model,
-            order=position,
+            order=RSForm.next_order(self.model.pk),
             alias=alias,
             cst_type=cst_type,
             **kwargs
@@ -215,34 +343,23 @@ class RSForm:
 
     def move_cst(self, target: list[Constituenta], destination: int) -> None:
         ''' Move list of constituents to specific position. '''
-        count_moved = 0
-        count_top = 0
-        count_bot = 0
-        size = len(target)
-
-        cst_list = Constituenta.objects.filter(schema=self.model).only('order').order_by('order')
-        for cst in cst_list:
-            if cst in target:
-                cst.order = destination + count_moved
-                count_moved += 1
-            elif count_top < destination:
-                cst.order = count_top
-                count_top += 1
-            else:
-                cst.order = destination + size + count_bot
-                count_bot += 1
-        Constituenta.objects.bulk_update(cst_list, ['order'])
+        moved_ids = {cst.pk for cst in target}
+        self.mark_modified()
+        cst_list = list(Constituenta.objects.filter(schema=self.model).only('order').order_by('order'))
+        moved = [cst for cst in cst_list if cst.pk in moved_ids]
+        others = [cst for cst in cst_list if cst.pk not in moved_ids]
+        RSForm.save_order(others[:destination] + moved + others[destination:])
 
     def delete_cst(self, target: list[Constituenta]) -> None:
         ''' Delete multiple constituents. '''
         ids = [cst.pk for cst in target]
         mapping = {cst.alias: DELETED_ALIAS for cst in target}
+        self.mark_modified()
         Constituenta.objects.filter(pk__in=ids).delete()
         all_cst = Constituenta.objects.filter(schema=self.model).only(
             'alias', 'definition_formal', 'term_raw', 'definition_raw', 'order'
         ).order_by('order')
         RSForm.apply_mapping(mapping, all_cst, change_aliases=False)
-        RSForm.save_order(all_cst)
 
     def reset_aliases(self) -> None:
         ''' Recreate all aliases based on constituents order. '''
@@ -259,6 +376,7 @@ class RSForm:
             bases[cst.cst_type] += 1
             if cst.alias != alias:
                 mapping[cst.alias] = alias
+        self.mark_modified()
         RSForm.apply_mapping(mapping, cst_list, change_aliases=True)
 
     def substitute(self, substitutions: list[tuple[Constituenta, Constituenta]]) -> None:
@@ -272,6 +390,7 @@ class RSForm:
             mapping[original.alias] = substitution.alias
             deleted.append(original.pk)
             replacements.append(substitution.pk)
+        self.mark_modified()
 
         attributions = list(Attribution.objects.filter(container__schema=self.model))
         if attributions:
@@ -296,15 +415,9 @@ class RSForm:
             'alias', 'cst_type', 'definition_formal',
             'term_raw', 'definition_raw', 'order', 'term_forms', 'term_resolved'
         ).order_by('order')
-        RSForm.save_order(cst_list)
         RSForm.apply_mapping(mapping, cst_list, change_aliases=False)
         RSForm.resolve_term_change(cst_list, replacements)
 
     def create_version(self, version: str, description: str, data) -> Version:
         ''' Creates version for current state. '''
-        return Version.objects.create(
-            item=self.model,
-            version=version,
-            description=description,
-            data=data
-        )
+        return Version.store(self.model.pk, version, description, data)
@@ -1,20 +1,44 @@
 ''' Models: RSForm API. '''
 # pylint: disable=duplicate-code
 
+from bisect import insort
 from copy import deepcopy
-from typing import Any, Iterable, Optional, cast
+from functools import partial
+from typing import Any, Callable, Iterable, Optional, cast
 
 from cctext import Entity, Resolver
 from django.core.exceptions import ValidationError
+from django.db import DEFAULT_DB_ALIAS, transaction
 from django.db.models import QuerySet
 
 from apps.library.models import LibraryItem, LibraryItemType
 from shared import messages as msg
 
+from ..graph import Graph
+from ..snapshots import SchemaSnapshot, snapshots
+from ..utils import scan_entities, scan_globals
 from .api_RSLanguage import get_type_prefix, guess_type, validate_new_cst_alias
 from .Attribution import Attribution
 from .Constituenta import Constituenta, CstType
-from .RSForm import DELETED_ALIAS, RSForm
+from .RSForm import DELETED_ALIAS, UPDATE_BATCH, RSForm
+
+# Constituenta fields stored in shared snapshots, in model order as required by Model.from_db
+_SNAPSHOT_FIELDS = tuple(
+    field.attname for field in Constituenta._meta.concrete_fields  # pylint: disable=protected-access
+    if field.attname in {
+        'id',
+        'schema_id',
+        'order',
+        'alias',
+        'cst_type',
+        'definition_formal',
+        'typification_manual',
+        'term_raw',
+        'definition_raw',
+        'term_forms',
+        'term_resolved'
+    }
+)
 
 
 class RSFormCached:
@@ -23,6 +47,7 @@ class RSFormCached:
     def __init__(self, item_id: int) -> None:
         self.pk = item_id
         self.cache: _RSFormCache = _RSFormCache(self)
+        self._is_modified = False
 
     @staticmethod
     def create(**kwargs) -> 'RSFormCached':
@@ -34,15 +59,35 @@ class RSFormCached:
         ''' Get list of constituents depending on target (only 1st degree). '''
         self.cache.ensure_loaded()
         result: set[int] = set()
-        terms = RSForm.graph_term(self.cache.constituents, self.cache.by_alias)
-        formal = RSForm.graph_formal(self.cache.constituents, self.cache.by_alias)
-        definitions = RSForm.graph_text(self.cache.constituents, self.cache.by_alias)
+        terms = self.cache.graph_term
+        formal = self.cache.graph_formal
+        definitions = self.cache.graph_text
         for cst_id in target:
             result.update(formal.outputs[cst_id])
             result.update(terms.outputs[cst_id])
             result.update(definitions.outputs[cst_id])
         return result
 
+    def stage(self, items: list[Constituenta]) -> None:
+        ''' Replace cached constituents with given items, which may be unsaved and keyed by temporary ids. '''
+        self.cache.stage(items)
+
+    def mark_modified(self) -> None:
+        ''' Drop shared snapshot and bump schema version before constituents are modified.
+
+        Version is bumped once per transaction, repeated calls only detach cache from shared snapshot.
+        '''
+        self.cache.release_snapshot()
+        if self._is_modified:
+            snapshots.touch(self.pk)
+            return
+        self._is_modified = True
+        transaction.on_commit(self._reset_modified)
+        RSForm.bump_version(self.pk)
+
+    def _reset_modified(self) -> None:
+        self._is_modified = False
+
     def constituentsQ(self) -> QuerySet[Constituenta]:
         ''' Get QuerySet containing all constituents of current RSForm. '''
         return Constituenta.objects.filter(schema_id=self.pk)
@@ -56,15 +101,15 @@ class RSFormCached:
         ''' Insert new constituenta at last position. '''
         if cst_type is None:
             cst_type = guess_type(alias)
-        position = Constituenta.objects.filter(schema_id=self.pk).count()
+        self.mark_modified()
         result = Constituenta.objects.create(
             schema_id=self.pk,
-            order=position,
+            order=RSForm.next_order(self.pk),
             alias=alias,
             cst_type=cst_type,
             **kwargs
         )
-        self.cache.is_loaded = False
+        self.cache.clear()
         return result
 
     def create_cst(self, data: dict, insert_after: Optional[Constituenta] = None) -> Constituenta:
@@ -73,15 +118,16 @@ class RSFormCached:
         if alias_error:
             raise ValidationError({'alias': alias_error})
         self.cache.ensure_loaded_terms()
+        self.mark_modified()
         if insert_after:
-            position = self.cache.by_id[insert_after.pk].order + 1
+            position = self.cache.constituents.index(self.cache.by_id[insert_after.pk]) + 1
         else:
             position = len(self.cache.constituents)
-        RSForm.shift_positions(position, 1, self.cache.constituents)
+        order = RSForm.allocate_order(self.cache.constituents, position, 1)[0]
 
         result = Constituenta.objects.create(
             schema_id=self.pk,
-            order=position,
+            order=order,
             alias=data['alias'],
             cst_type=data['cst_type'],
             crucial=data.get('crucial', False),
@@ -105,7 +151,7 @@ class RSFormCached:
 
         result.save()
         self.cache.insert(result)
-        RSForm.resolve_term_change(self.cache.constituents, [result.pk], self.cache.by_alias, self.cache.by_id)
+        self._resolve_term_change([result.pk])
         return result
 
     def insert_from(
@@ -134,6 +180,7 @@ class RSFormCached:
             return []
 
         self.cache.ensure_loaded()
+        self.mark_modified()
         last_position = len(self.cache.constituents)
         if not position:
             position = last_position
@@ -141,8 +188,7 @@ class RSFormCached:
             position = max(0, min(position, last_position))
 
         was_empty = last_position == 0
-        if not was_empty and position != last_position:
-            RSForm.shift_positions(position, len(items), self.cache.constituents)
+        orders = RSForm.allocate_order(self.cache.constituents, position, len(items))
 
         mapping_alias: dict[str, str] = initial_mapping.copy() if initial_mapping else {}
         if not was_empty:
@@ -157,14 +203,13 @@ class RSFormCached:
 
         source_ids = [cst.id for cst in items]
         new_constituents = deepcopy(items)
-        for cst in new_constituents:
+        for cst, order in zip(new_constituents, orders):
             cst.pk = None
             cst.schema_id = self.pk
-            cst.order = position
+            cst.order = order
             if mapping_alias:
                 cst.alias = mapping_alias[cst.alias]
                 cst.apply_mapping(mapping_alias)
-            position = position + 1
 
         new_constituents = Constituenta.objects.bulk_create(new_constituents)
 
@@ -180,92 +225,117 @@ class RSFormCached:
         self.cache.insert_multi(new_constituents)
         return new_constituents
 
-    # pylint: disable=too-many-branches,too-many-statements
     def update_cst(self, target: int, data: dict) -> dict:
         ''' Update persistent attributes of a given constituenta. Return old values. '''
+        return self.update_cst_multi([(target, data)])[0]
+
+    # pylint: disable=too-many-branches,too-many-statements
+    def update_cst_multi(self, updates: list[tuple[int, dict]]) -> list[dict]:
+        ''' Update persistent attributes of multiple constituents in a single write. Return old values. '''
         self.cache.ensure_loaded_terms()
-        cst = self.cache.by_id.get(target)
-        if cst is None:
-            raise ValidationError(msg.constituentaNotInRSform(str(target)))
-
-        old_data: dict[str, Any] = {}
-        term_changed = False
-        if 'convention' in data:
-            if cst.convention == data['convention']:
-                del data['convention']
-            else:
-                old_data['convention'] = cst.convention
-                cst.convention = data['convention']
-        if 'crucial' in data:
-            cst.crucial = data['crucial']
-            del data['crucial']
-        if 'definition_formal' in data:
-            if cst.definition_formal == data['definition_formal']:
-                del data['definition_formal']
-            else:
-                old_data['definition_formal'] = cst.definition_formal
-                cst.definition_formal = data['definition_formal']
-        if 'typification_manual' in data:
-            if cst.typification_manual == data['typification_manual']:
-                del data['typification_manual']
-            else:
-                old_data['typification_manual'] = cst.typification_manual
-                cst.typification_manual = data['typification_manual']
-        if 'value_is_property' in data:
-            if cst.value_is_property == data['value_is_property']:
-                del data['value_is_property']
-            else:
-                old_data['value_is_property'] = cst.value_is_property
-                cst.value_is_property = data['value_is_property']
-        if 'term_forms' in data:
-            term_changed = True
-            old_data['term_forms'] = cst.term_forms
-            cst.term_forms = data['term_forms']
+        targets: list[Constituenta] = []
+        for target, _ in updates:
+            cst = self.cache.by_id.get(target)
+            if cst is None:
+                raise ValidationError(msg.constituentaNotInRSform(str(target)))
+            targets.append(cst)
+        if not targets:
+            return []
+        self.mark_modified()
 
+        result: list[dict] = []
+        fields: set[str] = set()
+        term_changed: list[int] = []
         resolver: Optional[Resolver] = None
-        if 'definition_raw' in data or 'term_raw' in data:
-            resolver = RSForm.resolver_from_list(self.cache.constituents)
-            if 'term_raw' in data:
-                if cst.term_raw == data['term_raw']:
-                    del data['term_raw']
+        for cst, (_, data) in zip(targets, updates):
+            old_data: dict[str, Any] = {}
+            if 'convention' in data:
+                if cst.convention == data['convention']:
+                    del data['convention']
+                else:
+                    old_data['convention'] = cst.convention
+                    cst.convention = data['convention']
+                    fields.add('convention')
+            if 'crucial' in data:
+                cst.crucial = data['crucial']
+                fields.add('crucial')
+                del data['crucial']
+            if 'definition_formal' in data:
+                if cst.definition_formal == data['definition_formal']:
+                    del data['definition_formal']
+                else:
+                    old_data['definition_formal'] = cst.definition_formal
+                    cst.definition_formal = data['definition_formal']
+                    fields.add('definition_formal')
+            if 'typification_manual' in data:
+                if cst.typification_manual == data['typification_manual']:
+                    del data['typification_manual']
                 else:
-                    term_changed = True
-                    old_data['term_raw'] = cst.term_raw
-                    cst.term_raw = data['term_raw']
-                    cst.term_resolved = resolver.resolve(cst.term_raw)
-                    if 'term_forms' not in data:
-                        cst.term_forms = []
-                    resolver.context[cst.alias] = Entity(cst.alias, cst.term_resolved, manual_forms=cst.term_forms)
-            if 'definition_raw' in data:
-                if cst.definition_raw == data['definition_raw']:
-                    del data['definition_raw']
+                    old_data['typification_manual'] = cst.typification_manual
+                    cst.typification_manual = data['typification_manual']
+                    fields.add('typification_manual')
+            if 'value_is_property' in data:
+                if cst.value_is_property == data['value_is_property']:
+                    del data['value_is_property']
                 else:
-                    old_data['definition_raw'] = cst.definition_raw
-                    cst.definition_raw = data['definition_raw']
-                    cst.definition_resolved = resolver.resolve(cst.definition_raw)
-        cst.save()
+                    old_data['value_is_property'] = cst.value_is_property
+                    cst.value_is_property = data['value_is_property']
+                    fields.add('value_is_property')
+            if 'term_forms' in data:
+                term_changed.append(cst.pk)
+                old_data['term_forms'] = cst.term_forms
+                cst.term_forms = data['term_forms']
+                fields.add('term_forms')
+
+            if 'definition_raw' in data or 'term_raw' in data:
+                if resolver is None:
+                    resolver = RSForm.resolver_from_list(self.cache.constituents)
+                if 'term_raw' in data:
+                    if cst.term_raw == data['term_raw']:
+                        del data['term_raw']
+                    else:
+                        term_changed.append(cst.pk)
+                        old_data['term_raw'] = cst.term_raw
+                        cst.term_raw = data['term_raw']
+                        cst.term_resolved = resolver.resolve(cst.term_raw)
+                        if 'term_forms' not in data:
+                            cst.term_forms = []
+                        fields.update(['term_raw', 'term_resolved', 'term_forms'])
+                        resolver.context[cst.alias] = Entity(cst.alias, cst.term_resolved, manual_forms=cst.term_forms)
+                if 'definition_raw' in data:
+                    if cst.definition_raw == data['definition_raw']:
+                        del data['definition_raw']
+                    else:
+                        old_data['definition_raw'] = cst.definition_raw
+                        cst.definition_raw = data['definition_raw']
+                        cst.definition_resolved = resolver.resolve(cst.definition_raw)
+                        fields.update(['definition_raw', 'definition_resolved'])
+            result.append(old_data)
+
+        changed = list({cst.pk: cst for cst in targets}.values())
+        if fields:
+            Constituenta.objects.bulk_update(changed, sorted(fields))
+        self.cache.update_references(changed)
         if term_changed:
-            RSForm.resolve_term_change(
-                self.cache.constituents, [cst.pk],
-                self.cache.by_alias, self.cache.by_id, resolver
-            )
-        return old_data
+            self._resolve_term_change(term_changed, resolver)
+        return result
 
     def delete_cst(self, target: list[int]) -> None:
         ''' Delete multiple constituents. '''
         self.cache.ensure_loaded()
+        self.mark_modified()
         cst_list = [self.cache.by_id[cst_id] for cst_id in target]
         mapping = {cst.alias: DELETED_ALIAS for cst in cst_list}
         self.cache.remove_multi(cst_list)
         self.apply_mapping(mapping)
         Constituenta.objects.filter(pk__in=target).delete()
-        RSForm.save_order(self.cache.constituents)
 
     def substitute(self, substitutions: list[tuple[Constituenta, Constituenta]]) -> None:
         ''' Execute constituenta substitution. '''
         if not substitutions:
             return
         self.cache.ensure_loaded_terms()
+        self.mark_modified()
         mapping = {}
         deleted: list[Constituenta] = []
         replacements: list[int] = []
@@ -295,11 +365,10 @@ class RSFormCached:
 
         self.cache.remove_multi(deleted)
         Constituenta.objects.filter(pk__in=[cst.pk for cst in deleted]).delete()
-        RSForm.save_order(self.cache.constituents)
         self.apply_mapping(mapping)
-        RSForm.resolve_term_change(self.cache.constituents, replacements, self.cache.by_alias, self.cache.by_id)
+        self._resolve_term_change(replacements)
 
-    def reset_aliases(self) -> None:
+    def reset_aliases(self, save: bool = True) -> None:
         ''' Recreate all aliases based on constituents order. '''
         self.cache.ensure_loaded()
         bases = cast(dict[str, int], {})
@@ -311,32 +380,50 @@ class RSFormCached:
             bases[cst.cst_type] += 1
             if cst.alias != alias:
                 mapping[cst.alias] = alias
-        self.apply_mapping(mapping, change_aliases=True)
+        if save:
+            self.apply_mapping(mapping, change_aliases=True)
+            return
+        for cst in self.cache.constituents:
+            cst.apply_mapping(mapping, change_aliases=True)
+        self.cache.stage(self.cache.constituents)
 
     def change_cst_type(self, target: int, new_type: CstType) -> bool:
         ''' Change type of constituenta generating alias automatically. '''
+        return bool(self.change_cst_type_multi({target: new_type}))
+
+    def change_cst_type_multi(self, changes: dict[int, CstType]) -> list[int]:
+        ''' Change types of multiple constituents generating aliases automatically. Return changed ids. '''
         self.cache.ensure_loaded()
-        cst = self.cache.by_id.get(target)
-        if cst is None:
-            return False
-        newAlias = f'{get_type_prefix(new_type)}{self._get_max_index(new_type) + 1}'
-        mapping = {cst.alias: newAlias}
-        cst.cst_type = new_type
-        cst.alias = newAlias
-        cst.save(update_fields=['cst_type', 'alias'])
-        self.apply_mapping(mapping)
-        return True
+        targets = [cst for cst in map(self.cache.by_id.get, changes) if cst is not None]
+        if not targets:
+            return []
+        indices = {new_type: self._get_max_index(new_type) for new_type in set(changes.values())}
+        mapping: dict[str, str] = {}
+        self.mark_modified()
+        for cst in targets:
+            new_type = changes[cst.pk]
+            indices[new_type] += 1
+            mapping[cst.alias] = f'{get_type_prefix(new_type)}{indices[new_type]}'
+            cst.cst_type = new_type
+        Constituenta.objects.bulk_update(targets, ['cst_type'])
+        self.apply_mapping(mapping, change_aliases=True)
+        return [cst.pk for cst in targets]
 
     def apply_mapping(self, mapping: dict[str, str], change_aliases: bool = False) -> None:
         ''' Apply rename mapping. '''
         self.cache.ensure_loaded()
+        self.mark_modified()
+        affected = self.cache.get_referrers(mapping.keys()) if self.cache.is_loaded_graphs else set()
+        renamed = [cst for cst in self.cache.constituents if cst.alias in mapping] if change_aliases else []
         RSForm.apply_mapping(mapping, self.cache.constituents, change_aliases)
         if change_aliases:
             self.cache.reload_aliases()
+        self.cache.update_references([self.cache.by_id[cst_id] for cst_id in affected], renamed)
 
     def apply_partial_mapping(self, mapping: dict[str, str], target: list[int]) -> None:
         ''' Apply rename mapping to target constituents. '''
         self.cache.ensure_loaded()
+        self.mark_modified()
         update_list: list[Constituenta] = []
         for cst in self.cache.constituents:
             if cst.pk in target:
@@ -349,11 +436,14 @@ class RSFormCached:
                 'term_raw',
                 'definition_raw'
             ])
+        self.cache.update_references(update_list)
 
-    def resolve_all_text(self) -> None:
+    def resolve_all_text(self, save: bool = True) -> None:
         ''' Trigger reference resolution for all texts. '''
         self.cache.ensure_loaded()
-        graph_terms = RSForm.graph_term(self.cache.constituents, self.cache.by_alias)
+        if save:
+            self.mark_modified()
+        graph_terms = self.cache.graph_term
         resolver = Resolver({})
         update_list: list[Constituenta] = []
         for cst_id in graph_terms.topological_order():
@@ -362,14 +452,23 @@ class RSFormCached:
             resolver.context[cst.alias] = Entity(cst.alias, resolved)
             cst.term_resolved = resolved
             update_list.append(cst)
-        Constituenta.objects.bulk_update(update_list, ['term_resolved'])
 
         for cst in self.cache.constituents:
             resolved = resolver.resolve(cst.definition_raw)
             cst.definition_resolved = resolved
-        Constituenta.objects.bulk_update(self.cache.constituents, ['definition_resolved'])
+        if save:
+            Constituenta.objects.bulk_update(update_list, ['term_resolved'], batch_size=UPDATE_BATCH)
+            Constituenta.objects.bulk_update(self.cache.constituents, ['definition_resolved'], batch_size=UPDATE_BATCH)
 
 
+    def _resolve_term_change(self, changed: list[int], resolver: Optional[Resolver] = None) -> None:
+        RSForm.resolve_term_change(
+            self.cache.constituents, changed,
+            self.cache.by_alias, self.cache.by_id, resolver,
+            graph_terms=self.cache.graph_term,
+            graph_defs=self.cache.graph_text
+        )
+
     def _get_max_index(self, cst_type: str) -> int:
         ''' Get maximum alias index for specific CstType. '''
         cst_list: Iterable[Constituenta] = []
@@ -387,7 +486,7 @@ class RSFormCached:
 
 
 class _RSFormCache:
-    ''' Cache for RSForm constituents. '''
+    ''' Cache for RSForm constituents. Dependency graphs are built lazily and maintained incrementally. '''
 
     def __init__(self, schema: 'RSFormCached') -> None:
         self._schema = schema
@@ -396,46 +495,44 @@ class _RSFormCache:
         self.by_alias: dict[str, Constituenta] = {}
         self.is_loaded = False
         self.is_loaded_terms = False
+        self._graphs: Optional[dict[str, _ReferenceGraph]] = None
+        self._snapshot: Optional[SchemaSnapshot] = None
+        self._generation = 0
+
+    @property
+    def is_loaded_graphs(self) -> bool:
+        ''' Check if dependency graphs are built. '''
+        return self._graphs is not None
+
+    @property
+    def graph_formal(self) -> Graph[int]:
+        ''' Graph based on formal definitions. '''
+        return self._get_graphs()['definition_formal'].graph
+
+    @property
+    def graph_term(self) -> Graph[int]:
+        ''' Graph based on term texts. '''
+        return self._get_graphs()['term_raw'].graph
+
+    @property
+    def graph_text(self) -> Graph[int]:
+        ''' Graph based on definition texts. '''
+        return self._get_graphs()['definition_raw'].graph
 
     def ensure_loaded(self) -> None:
         if not self.is_loaded:
-            self.constituents = list(
-                self._schema.constituentsQ().only(
-                    'order',
-                    'alias',
-                    'cst_type',
-                    'definition_formal',
-                    'typification_manual',
-                    'term_raw',
-                    'definition_raw'
-                ).order_by('order')
-            )
-            self.by_id = {cst.pk: cst for cst in self.constituents}
-            self.by_alias = {cst.alias: cst for cst in self.constituents}
-            self.is_loaded = True
-            self.is_loaded_terms = False
+            self._load()
 
     def ensure_loaded_terms(self) -> None:
         if not self.is_loaded_terms:
-            self.constituents = list(
-                self._schema.constituentsQ().only(
-                    'order',
-                    'alias',
-                    'cst_type',
-                    'definition_formal',
-                    'typification_manual',
-                    'term_raw',
-                    'definition_raw',
-                    'term_forms',
-                    'term_resolved'
-                ).order_by('order')
-            )
-            self.by_id = {cst.pk: cst for cst in self.constituents}
-            self.by_alias = {cst.alias: cst for cst in self.constituents}
-            self.is_loaded = True
-            self.is_loaded_terms = True
+            self._load()
+
+    def release_snapshot(self) -> None:
+        ''' Detach from shared snapshot before cached data diverges from it. '''
+        self._snapshot = None
 
     def reload_aliases(self) -> None:
+        self._snapshot = None
         self.by_alias = {cst.alias: cst for cst in self.constituents}
 
     def clear(self) -> None:
@@ -444,29 +541,243 @@ class _RSFormCache:
         self.by_alias = {}
         self.is_loaded = False
         self.is_loaded_terms = False
+        self._graphs = None
+        self._snapshot = None
+
+    def stage(self, items: list[Constituenta]) -> None:
+        self.clear()
+        self.constituents = list(items)
+        self.by_id = {cst.pk: cst for cst in self.constituents}
+        self.by_alias = {cst.alias: cst for cst in self.constituents}
+        self.is_loaded = True
+        self.is_loaded_terms = True
 
     def insert(self, cst: Constituenta) -> None:
+        self._snapshot = None
         if self.is_loaded:
-            self.constituents.insert(cst.order, cst)
+            insort(self.constituents, cst, key=lambda item: item.order)
             self.by_id[cst.pk] = cst
             self.by_alias[cst.alias] = cst
+            if self._graphs is not None:
+                for graph in self._graphs.values():
+                    graph.insert([cst])
 
     def insert_multi(self, items: Iterable[Constituenta]) -> None:
+        self._snapshot = None
         if self.is_loaded:
+            items = list(items)
             for cst in items:
-                self.constituents.insert(cst.order, cst)
+                insort(self.constituents, cst, key=lambda item: item.order)
                 self.by_id[cst.pk] = cst
                 self.by_alias[cst.alias] = cst
+            if self._graphs is not None:
+                for graph in self._graphs.values():
+                    graph.insert(items)
 
     def remove(self, target: Constituenta) -> None:
+        self._snapshot = None
         if self.is_loaded:
             self.constituents.remove(self.by_id[target.pk])
             del self.by_id[target.pk]
             del self.by_alias[target.alias]
+            if self._graphs is not None:
+                for graph in self._graphs.values():
+                    graph.remove([target])
 
     def remove_multi(self, target: Iterable[Constituenta]) -> None:
+        self._snapshot = None
         if self.is_loaded:
+            target = list(target)
             for cst in target:
                 self.constituents.remove(self.by_id[cst.pk])
                 del self.by_id[cst.pk]
                 del self.by_alias[cst.alias]
+            if self._graphs is not None:
+                for graph in self._graphs.values():
+                    graph.remove(target)
+
+    def get_referrers(self, aliases: Iterable[str]) -> set[int]:
+        ''' Constituents referencing any of aliases in graph texts. '''
+        aliases = list(aliases)
+        result: set[int] = set()
+        for graph in self._get_graphs().values():
+            result.update(graph.get_referrers(aliases))
+        return result
+
+    def update_references(self, changed: Iterable[Constituenta], renamed: Iterable[Constituenta] = ()) -> None:
+        ''' Update graphs after texts of changed constituents were modified or aliases were renamed. '''
+        self._snapshot = None
+        if self._graphs is not None:
+            changed = list(changed)
+            renamed = list(renamed)
+            for graph in self._graphs.values():
+                graph.update(changed)
+                graph.bind(renamed)
+
+    def _get_graphs(self) -> dict[str, '_ReferenceGraph']:
+        if self._graphs is None:
+            self.ensure_loaded()
+            self._graphs = {
+                field: _ReferenceGraph(self, field, extract)
+                for field, extract in _GRAPH_SOURCES.items()
+            }
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.graphs is None:
+                snapshot.attach_graphs(
+                    {field: graph.freeze() for field, graph in self._graphs.items()},
+                    sum(graph.count_references() for graph in self._graphs.values())
+                )
+                transaction.on_commit(partial(snapshots.put, snapshot, self._generation))
+        return self._graphs
+
+    def _load(self) -> None:
+        ''' Load constituents from shared snapshot of current schema version or from database. '''
+        schema_id = self._schema.pk
+        time_update = None
+        self._generation = snapshots.generation(schema_id)
+        if snapshots.is_enabled:
+            time_update = LibraryItem.objects.filter(pk=schema_id).values_list('time_update', flat=True).first()
+        snapshot = snapshots.get(schema_id, time_update) if time_update is not None else None
+        if snapshot is None:
+            snapshot = SchemaSnapshot(
+                schema_id=schema_id,
+                time_update=time_update,  # type: ignore[arg-type]
+                fields=_SNAPSHOT_FIELDS,
+                rows=tuple(
+                    Constituenta.objects.filter(schema_id=schema_id).order_by('order').values_list(*_SNAPSHOT_FIELDS)
+                )
+            )
+            if time_update is not None:
+                transaction.on_commit(partial(snapshots.put, snapshot, self._generation))
+        self.constituents = [Constituenta.from_db(DEFAULT_DB_ALIAS, snapshot.fields, row) for row in snapshot.rows]
+        self.by_id = {cst.pk: cst for cst in self.constituents}
+        self.by_alias = {cst.alias: cst for cst in self.constituents}
+        self.is_loaded = True
+        self.is_loaded_terms = True
+        self._snapshot = snapshot if time_update is not None else None
+        if snapshot.graphs is None:
+            self._graphs = None
+        else:
+            self._graphs = {
+                field: _ReferenceGraph.restore(self, field, _GRAPH_SOURCES[field], state)
+                for field, state in snapshot.graphs.items()
+            }
+
+
+# Text fields with references and their scanners
+_GRAPH_SOURCES: dict[str, Callable[[str], Iterable[str]]] = {
+    'definition_formal': scan_globals,
+    'term_raw': scan_entities,
+    'definition_raw': scan_entities
+}
+
+
+class _ReferenceGraph:
+    ''' Dependency graph for references in one text field of constituents.
+
+    For each constituenta stores referenced aliases with resolved source IDs,
+    and for each alias - constituents referencing it, including dangling references.
+    This allows updating edges by diffing reference sets instead of rebuilding.
+    '''
+
+    def __init__(
+        self, cache: _RSFormCache, field: str,
+        extract: Callable[[str], Iterable[str]],
+        build: bool = True
+    ) -> None:
+        self._cache = cache
+        self._field = field
+        self._extract = extract
+        self.graph: Graph[int] = Graph()
+        self._refs: dict[int, dict[str, Optional[int]]] = {}
+        self._referrers: dict[str, set[int]] = {}
+        if build:
+            for cst in cache.constituents:
+                self.graph.add_node(cst.pk)
+            for cst in cache.constituents:
+                self._set_references(cst)
+
+    @staticmethod
+    def restore(
+        cache: _RSFormCache, field: str,
+        extract: Callable[[str], Iterable[str]],
+        state: tuple
+    ) -> '_ReferenceGraph':
+        ''' Create graph from frozen state without rescanning texts. '''
+        # pylint: disable=protected-access
+        graph, refs, referrers = state
+        result = _ReferenceGraph(cache, field, extract, build=False)
+        result.graph = graph.copy()
+        result._refs = {cst_id: dict(items) for cst_id, items in refs.items()}
+        result._referrers = {alias: set(items) for alias, items in referrers.items()}
+        return result
+
+    def freeze(self) -> tuple:
+        ''' Independent copy of graph state for shared snapshots. '''
+        return (
+            self.graph.copy(),
+            {cst_id: dict(items) for cst_id, items in self._refs.items()},
+            {alias: set(items) for alias, items in self._referrers.items()}
+        )
+
+    def count_references(self) -> int:
+        ''' Total number of references in texts. '''
+        return sum(len(items) for items in self._refs.values())
+
+    def get_referrers(self, aliases: Iterable[str]) -> set[int]:
+        ''' Constituents referencing any of aliases. '''
+        result: set[int] = set()
+        for alias in aliases:
+            result.update(self._referrers.get(alias, ()))
+        return result
+
+    def insert(self, items: list[Constituenta]) -> None:
+        ''' Add new constituents with their references. '''
+        for cst in items:
+            self.graph.add_node(cst.pk)
+        for cst in items:
+            self._set_references(cst)
+        self.bind(items)
+
+    def remove(self, items: list[Constituenta]) -> None:
+        ''' Remove constituents. References to removed constituents become dangling. '''
+        for cst in items:
+            for alias in self._refs.pop(cst.pk, {}):
+                self._referrers[alias].discard(cst.pk)
+        for cst in items:
+            for referrer in self._referrers.get(cst.alias, ()):
+                if self._refs[referrer][cst.alias] == cst.pk:
+                    self._refs[referrer][cst.alias] = None
+            self.graph.remove_node(cst.pk)
+
+    def update(self, items: list[Constituenta]) -> None:
+        ''' Diff references of modified constituents. '''
+        for cst in items:
+            self._set_references(cst)
+
+    def bind(self, items: list[Constituenta]) -> None:
+        ''' Resolve dangling references to aliases of target constituents. '''
+        for cst in items:
+            for referrer in self._referrers.get(cst.alias, ()):
+                refs = self._refs[referrer]
+                if refs[cst.alias] is None:
+                    refs[cst.alias] = cst.pk
+                    self.graph.add_edge(cst.pk, referrer)
+
+    def _set_references(self, cst: Constituenta) -> None:
+        old_refs = self._refs.get(cst.pk, {})
+        new_refs: dict[str, Optional[int]] = {}
+        for alias in self._extract(getattr(cst, self._field)):
+            source_cst = self._cache.by_alias.get(alias)
+            new_refs[alias] = source_cst.pk if source_cst is not None else None
+        for alias in old_refs.keys() - new_refs.keys():
+            self._referrers[alias].discard(cst.pk)
+        for alias in new_refs.keys() - old_refs.keys():
+            self._referrers.setdefault(alias, set()).add(cst.pk)
+        old_sources = {source for source in old_refs.values() if source is not None}
+        new_sources = {source for source in new_refs.values() if source is not None}
+        for source in old_sources - new_sources:
+            self.graph.remove_edge(source, cst.pk)
+        for source in new_sources - old_sources:
+            self.graph.add_edge(source, cst.pk)
+        self._refs[cst.pk] = new_refs
@@ -1,7 +1,7 @@
 ''' Models: RSForm semantic information. '''
 from typing import cast
 
-from ..utils import extract_globals
+from ..utils import scan_globals
 from .api_RSLanguage import (
     infer_template,
     is_base_set,
@@ -10,7 +10,6 @@ from .api_RSLanguage import (
     split_template
 )
 from .Constituenta import Constituenta, CstType
-from .RSForm import RSForm
 from .RSFormCached import RSFormCached
 
 
@@ -22,7 +21,7 @@ class SemanticInfo:
         self._items = schema.cache.constituents
         self._cst_by_ID = schema.cache.by_id
         self._cst_by_alias = schema.cache.by_alias
-        self.graph = RSForm.graph_formal(schema.cache.constituents, schema.cache.by_alias)
+        self.graph = schema.cache.graph_formal
         self.info = {
             cst.pk: {
                 'is_simple': False,
@@ -103,7 +102,7 @@ class SemanticInfo:
             return sources
 
         expression = split_template(target.definition_formal)
-        body_dependencies = extract_globals(expression['body'])
+        body_dependencies = scan_globals(expression['body'])
         for alias in body_dependencies:
             parent = self._cst_by_alias.get(alias)
             if not parent:
@@ -114,7 +113,7 @@ class SemanticInfo:
                 sources.add(parent_info['parent'])
 
         if self._need_check_head(sources, expression['head']):
-            head_dependencies = extract_globals(expression['head'])
+            head_dependencies = scan_globals(expression['head'])
             for alias in head_dependencies:
                 parent = self._cst_by_alias.get(alias)
                 if not parent:
@@ -3,5 +3,5 @@
 from .Attribution import Attribution
 from .Constituenta import Constituenta, CstType
 from .OrderManager import OrderManager
-from .RSForm import DELETED_ALIAS, RSForm
+from .RSForm import DELETED_ALIAS, ORDER_GAP, RSForm
 from .RSFormCached import RSFormCached
@@ -3,7 +3,7 @@ from typing import cast
 
 from django.contrib.auth.models import User
 from django.core.exceptions import PermissionDenied
-from django.db.models import Q
+from django.db.models import BigIntegerField, CharField, F, Func, Q, QuerySet, Subquery, Value
 from rest_framework import serializers
 from rest_framework.serializers import PrimaryKeyRelatedField as PKField
 
@@ -13,16 +13,18 @@ from apps.library.serializers import (
     LibraryItemDetailsSerializer,
     LibraryItemReferenceSerializer
 )
-from apps.oss.models import Inheritance, Operation, OperationType
+from apps.oss.models import Argument, Inheritance, OperationType
 from shared import messages as msg
 from shared import permissions
+from shared.conditional import validator_rows
 from shared.serializers import (
     PortalImportJsonMetadataSerializer,
     StrictModelSerializer,
     StrictSerializer
 )
 
-from ..models import Attribution, Constituenta, CstType, RSForm, RSFormCached
+from ..models import Attribution, Constituenta, CstType, RSFormCached
+from ..models.RSForm import UPDATE_BATCH, assign_order
 from ..models.api_RSLanguage import find_import_alias_error, validate_new_cst_alias
 from .basics import CstParseSerializer, InheritanceDataSerializer
 
@@ -221,6 +223,71 @@ class CstCreateSerializer(StrictModelSerializer):
         return attrs
 
 
+# Constituenta fields in CstInfoSerializer representation order
+_CST_INFO_FIELDS = tuple(
+    field.attname for field in Constituenta._meta.concrete_fields  # pylint: disable=protected-access
+    if field.name not in CstInfoSerializer.Meta.exclude
+)
+
+# Constituenta columns restored from version payload
+_RESTORED_FIELDS = tuple(
+    field for field in _CST_INFO_FIELDS if field != 'id'
+)
+
+
+def _restored_order(items: list[dict], current: dict[int, dict]) -> list[int]:
+    ''' Order keys for restored items keeping keys of existing constituents where possible. '''
+    return assign_order([
+        current[cst_data['id']]['order'] if cst_data['id'] in current else None
+        for cst_data in items
+    ])
+
+
+_KIND_OSS = 0
+_KIND_MODEL = 1
+_KIND_ATTRIBUTION = 0
+_KIND_INHERITANCE = 1
+
+
+def _query_hosts(schema: LibraryItem) -> QuerySet:
+    ''' OSS producing schema and models based on schema in one query. '''
+    operations = LibraryItem.objects.filter(operations__result=schema).annotate(
+        kind=Value(_KIND_OSS),
+        item_id=F('pk'),
+        item_alias=F('alias'),
+        host_operation=F('operations__operation_type')
+    ).values_list('kind', 'item_id', 'item_alias', 'host_operation')
+    models = LibraryItem.objects.filter(rsmodels__schema=schema).annotate(
+        kind=Value(_KIND_MODEL),
+        item_id=F('pk'),
+        item_alias=F('alias'),
+        host_operation=Value('', output_field=CharField())
+    ).values_list('kind', 'item_id', 'item_alias', 'host_operation')
+    return operations.union(models, all=True)
+
+
+def _query_links(schema: LibraryItem, with_inheritance: bool) -> QuerySet:
+    ''' Attributions and optionally inheritance links of schema constituents in one query. '''
+    empty = Value(None, output_field=BigIntegerField())
+    attributions = Attribution.objects.filter(container__schema=schema).annotate(
+        kind=Value(_KIND_ATTRIBUTION),
+        first=F('container_id'),
+        second=F('attribute_id'),
+        third=empty,
+        fourth=empty
+    ).values_list('kind', 'first', 'second', 'third', 'fourth')
+    if not with_inheritance:
+        return attributions
+    inheritances = Inheritance.objects.filter(Q(child__schema=schema) | Q(parent__schema=schema)).annotate(
+        kind=Value(_KIND_INHERITANCE),
+        first=F('child_id'),
+        second=F('child__schema_id'),
+        third=F('parent_id'),
+        fourth=F('parent__schema_id')
+    ).values_list('kind', 'first', 'second', 'third', 'fourth')
+    return attributions.union(inheritances, all=True)
+
+
 class RSFormSerializer(StrictModelSerializer):
     ''' Serializer: Detailed data for RSForm. '''
     editors = serializers.ListField(
@@ -248,50 +315,63 @@ class RSFormSerializer(StrictModelSerializer):
         model = LibraryItem
         fields = '__all__'
 
+    @staticmethod
+    def conditional_rows(instance: LibraryItem) -> list[QuerySet]:
+        ''' Validator rows for hosting items and inheritance links which are shown in details. '''
+        links = Inheritance.objects.filter(
+            Q(operation__result=instance) |
+            Q(operation__in=Argument.objects.filter(argument__result=instance).values('operation'))
+        ).order_by()
+        return [
+            validator_rows(
+                LibraryItem.objects.filter(operations__result=instance), 'oss',
+                label='alias', detail='operations__operation_type'
+            ),
+            validator_rows(LibraryItem.objects.filter(rsmodels__schema=instance), 'model', label='alias'),
+            validator_rows(
+                LibraryItem.objects.filter(pk=instance.pk).annotate(
+                    inheritance_count=Subquery(links.annotate(value=Func('pk', function='COUNT')).values('value')),
+                    inheritance_last=Subquery(links.annotate(value=Func('pk', function='MAX')).values('value'))
+                ), 'inheritance',
+                label='inheritance_count', detail='inheritance_last'
+            )
+        ]
+
     def to_representation(self, instance: LibraryItem) -> dict:
-        result = self.to_base_data(instance)
-        inheritances = Inheritance.objects \
-            .filter(Q(child__schema=instance) | Q(parent__schema=instance)) \
-            .select_related('parent__schema', 'child__schema') \
-            .only('parent__id', 'parent__schema__id', 'child__id', 'child__schema__id')
-        for link in inheritances:
-            result['inheritance'].append({
-                'child': link.child_id,
-                'child_source': link.child.schema_id,
-                'parent': link.parent_id,
-                'parent_source': link.parent.schema_id
-            })
-        return result
+        return self._serialize(instance, with_inheritance=True)
 
     def to_base_data(self, instance: LibraryItem) -> dict:
         ''' Create serializable base representation without redundant data. '''
+        return self._serialize(instance, with_inheritance=False)
+
+    def _serialize(self, instance: LibraryItem, with_inheritance: bool) -> dict:
+        ''' Build representation from plain values, equivalent to nested serializers output. '''
         result = LibraryItemDetailsSerializer(instance, context=self.context).data
-        result['items'] = []
+        result['items'] = list(
+            Constituenta.objects.filter(schema=instance).order_by('order').values(*_CST_INFO_FIELDS)
+        )
         result['oss'] = []
         result['models'] = []
         result['inheritance'] = []
         result['attribution'] = []
-        for cst in Constituenta.objects.filter(schema=instance).defer('order').order_by('order'):
-            result['items'].append(CstInfoSerializer(cst).data)
-        for oss in LibraryItem.objects.filter(operations__result=instance).only('alias'):
-            result['oss'].append({
-                'id': oss.pk,
-                'alias': oss.alias
-            })
-        result['is_produced'] = Operation.objects \
-            .filter(result=instance) \
-            .exclude(operation_type=OperationType.INPUT) \
-            .exists()
-        for model in LibraryItem.objects.filter(rsmodels__schema=instance).only('alias'):
-            result['models'].append({
-                'id': model.pk,
-                'alias': model.alias
-            })
-        for attrib in Attribution.objects.filter(container__schema=instance).only('container_id', 'attribute_id'):
-            result['attribution'].append({
-                'container': attrib.container_id,
-                'attribute': attrib.attribute_id
-            })
+        result['is_produced'] = False
+        for kind, item_id, alias, operation_type in _query_hosts(instance):
+            if kind == _KIND_MODEL:
+                result['models'].append({'id': item_id, 'alias': alias})
+            else:
+                result['oss'].append({'id': item_id, 'alias': alias})
+                if operation_type != OperationType.INPUT:
+                    result['is_produced'] = True
+        for kind, first, second, third, fourth in _query_links(instance, with_inheritance):
+            if kind == _KIND_ATTRIBUTION:
+                result['attribution'].append({'container': first, 'attribute': second})
+            else:
+                result['inheritance'].append({
+                    'child': first,
+                    'child_source': second,
+                    'parent': third,
+                    'parent_source': fourth
+                })
         return result
 
     def to_versioned_data(self) -> dict:
@@ -322,45 +402,49 @@ class RSFormSerializer(StrictModelSerializer):
         if alias_error:
             raise serializers.ValidationError({'items': alias_error})
         instance = cast(LibraryItem, self.instance)
-        schema = RSForm(instance)
         items: list[dict] = data['items']
         for cst_data in items:
+            cst_data.pop('schema', None)
             if 'typification_manual' not in cst_data:
                 cst_data['typification_manual'] = ''
             if 'value_is_property' not in cst_data:
                 cst_data['value_is_property'] = False
-        stored_ids: list[int] = [item['id'] for item in items]
-        id_map: dict[int, int] = {}
+        cst_input = CstInfoSerializer(data=items, many=True)
+        cst_input.is_valid(raise_exception=True)
+        schema = RSFormCached(instance.pk)
+        schema.mark_modified()
+
+        columns = (*_RESTORED_FIELDS, 'order')
+        current = {
+            row[0]: dict(zip(columns, row[1:]))
+            for row in Constituenta.objects.filter(schema=instance).values_list('pk', *columns)
+        }
+        stored = {cst_data['id'] for cst_data in items}
+        Constituenta.objects.filter(pk__in=current.keys() - stored).delete()
 
-        for existing_cst in schema.constituentsQ():
-            if not existing_cst.pk in stored_ids:
-                existing_cst.delete()
-            else:
-                cst_data = next(x for x in items if x['id'] == existing_cst.pk)
-                cst_data['schema'] = instance.pk
-                cst_serializer = CstBaseSerializer(data=cst_data)
-                cst_serializer.is_valid(raise_exception=True)
-                cst_serializer.validated_data['order'] = stored_ids.index(existing_cst.pk)
-                cst_serializer.update(
-                    instance=existing_cst,
-                    validated_data=cst_serializer.validated_data
-                )
-                id_map[cst_data['id']] = existing_cst.pk
-
-        for cst_data in items:
-            if cst_data['id'] not in id_map:
-                old_id = cst_data['id']
-                inserted_cst = schema.insert_last(cst_data['alias'])
-                cst_data['id'] = inserted_cst.pk
-                cst_data['schema'] = instance.pk
-                cst_serializer = CstBaseSerializer(data=cst_data)
-                cst_serializer.is_valid(raise_exception=True)
-                cst_serializer.validated_data['order'] = stored_ids.index(old_id)
-                cst_serializer.update(
-                    instance=inserted_cst,
-                    validated_data=cst_serializer.validated_data
-                )
-                id_map[old_id] = inserted_cst.pk
+        id_map: dict[int, int] = {}
+        changed: list[Constituenta] = []
+        created: list[tuple[int, Constituenta]] = []
+        for order, cst_data, validated in zip(
+            _restored_order(items, current),
+            items,
+            cast(list[dict], cst_input.validated_data)
+        ):
+            old_values = current.get(cst_data['id'])
+            if old_values is None:
+                created.append((cst_data['id'], Constituenta(schema=instance, order=order, **validated)))
+                continue
+            id_map[cst_data['id']] = cst_data['id']
+            values = old_values | validated | {'order': order}
+            if values != old_values:
+                changed.append(Constituenta(pk=cst_data['id'], schema=instance, **values))
+        Constituenta.objects.bulk_update(changed, columns, batch_size=UPDATE_BATCH)
+        Constituenta.objects.bulk_create([cst for _, cst in created])
+        if any(cst.pk is None for _, cst in created):
+            inserted = dict(Constituenta.objects.filter(schema=instance).values_list('alias', 'pk'))
+            for _, cst in created:
+                cst.pk = inserted[cst.alias]
+        id_map.update((old_id, cst.pk) for old_id, cst in created)
 
         loaded_item = LibraryItemBaseNonStrictSerializer(data=data)
         loaded_item.is_valid(raise_exception=True)
@@ -388,7 +472,7 @@ class RSFormSerializer(StrictModelSerializer):
 
         # Never trust term_resolved / definition_resolved from version or JSON payloads:
         # recompute from raw texts against the restored schema.
-        RSFormCached(instance.pk).resolve_all_text()
+        schema.resolve_all_text()
 
 
 class RSFormParseSerializer(StrictModelSerializer):
@@ -8,7 +8,7 @@ from apps.library.services.location_access import assert_writable_item_data_loca
 from shared import messages as msg
 from shared.serializers import StrictSerializer
 
-from ..models import Attribution, Constituenta, CstType, RSFormCached
+from ..models import ORDER_GAP, Attribution, Constituenta, CstType, RSFormCached
 from ..models.api_RSLanguage import find_import_alias_error
 from ..utils import fix_old_references
 
@@ -179,7 +179,7 @@ class RSFormTRSSerializer(serializers.Serializer):
             access_policy=validated_data['access_policy'],
             location=validated_data['location']
         )
-        order = 0
+        order = ORDER_GAP
         for cst_data in validated_data['items']:
             cst = Constituenta(
                 alias=cst_data['alias'],
@@ -189,7 +189,7 @@ class RSFormTRSSerializer(serializers.Serializer):
             )
             self._load_cst_texts(cst, cst_data)
             cst.save()
-            order += 1
+            order += ORDER_GAP
         self.instance.resolve_all_text()
         return self.instance
 
@@ -203,7 +203,8 @@ class RSFormTRSSerializer(serializers.Serializer):
         if 'description' in validated_data:
             model.description = validated_data['description']
 
-        order = 0
+        instance.mark_modified()
+        order = ORDER_GAP
         prev_constituents = instance.constituentsQ()
         loaded_ids = set()
         for cst_data in validated_data['items']:
@@ -226,11 +227,12 @@ class RSFormTRSSerializer(serializers.Serializer):
                 cst.save()
                 uid = cst.pk
             loaded_ids.add(uid)
-            order += 1
+            order += ORDER_GAP
         for prev_cst in prev_constituents:
             if prev_cst.pk not in loaded_ids:
                 prev_cst.delete()
 
+        instance.cache.clear()
         instance.resolve_all_text()
         model.save()
         return instance
@@ -368,7 +370,7 @@ def create_rsform_from_sandbox_data(
     for order, item in enumerate(schema_data['items']):
         cst = Constituenta.objects.create(
             schema_id=instance.pk,
-            order=order,
+            order=ORDER_GAP * (order + 1),
             alias=item['alias'],
             cst_type=_cst_type_from_trs(item['cst_type']),
             convention=item.get('convention', ''),
@@ -0,0 +1,141 @@
+''' Shared snapshots of RSForm contents reused across requests. '''
+import sys
+import threading
+from collections import OrderedDict
+from datetime import datetime
+from typing import Any, Optional, cast
+
+from django.conf import settings
+from django.core.cache import caches
+
+# Approximate memory used by one dependency edge in frozen graphs
+_EDGE_SIZE = 200
+
+
+class SchemaSnapshot:
+    ''' Constituents rows and derived graphs of a schema version identified by LibraryItem.time_update.
+
+    Rows are shared between requests and must not be modified.
+    Graphs are attached at most once, after they were first built for this version.
+    '''
+
+    def __init__(self, schema_id: int, time_update: datetime, fields: tuple[str, ...], rows: tuple[tuple, ...]) -> None:
+        self.schema_id = schema_id
+        self.time_update = time_update
+        self.fields = fields
+        self.rows = rows
+        self.graphs: Optional[dict[str, Any]] = None
+        self.size = sys.getsizeof(rows) + sum(
+            sys.getsizeof(row) + sum(sys.getsizeof(value) for value in row)
+            for row in rows
+        )
+
+    def attach_graphs(self, graphs: dict[str, Any], edges: int) -> None:
+        ''' Attach frozen dependency graphs. '''
+        if self.graphs is None:
+            self.graphs = graphs
+            self.size += edges * _EDGE_SIZE
+
+
+class SnapshotCache:
+    ''' Process-level LRU of schema snapshots limited by approximate memory budget.
+
+    If backend is given, snapshots are also shared between processes through Django cache framework.
+    Entries are validated against current time_update on read, so stale versions are never returned.
+    Schema generations count modifications made in this process: snapshot loaded before a modification
+    is not stored, because it may hold uncommitted contents of a version that was already bumped.
+    '''
+
+    def __init__(self, max_memory: int, backend: str = '', timeout: Optional[int] = None) -> None:
+        self.max_memory = max_memory
+        self.memory_used = 0
+        self._backend = backend
+        self._timeout = timeout
+        self._items: OrderedDict[int, tuple[SchemaSnapshot, int]] = OrderedDict()
+        self._generations: dict[int, int] = {}
+        self._lock = threading.Lock()
+
+    @property
+    def is_enabled(self) -> bool:
+        ''' Check if cache accepts snapshots. '''
+        return self.max_memory > 0
+
+    def __len__(self) -> int:
+        return len(self._items)
+
+    def get(self, schema_id: int, time_update: datetime) -> Optional[SchemaSnapshot]:
+        ''' Get snapshot for exact schema version. '''
+        with self._lock:
+            entry = self._items.get(schema_id)
+            if entry is not None:
+                if entry[0].time_update == time_update:
+                    self._items.move_to_end(schema_id)
+                    return entry[0]
+                self._remove(schema_id)
+        if not self._backend:
+            return None
+        snapshot = cast(Optional[SchemaSnapshot], caches[self._backend].get(_backend_key(schema_id)))
+        if snapshot is None or snapshot.time_update != time_update:
+            return None
+        self._store(snapshot)
+        return snapshot
+
+    def generation(self, schema_id: int) -> int:
+        ''' Get number of modifications of schema registered in this process. '''
+        return self._generations.get(schema_id, 0)
+
+    def touch(self, schema_id: int) -> None:
+        ''' Register modification of schema, discarding pending snapshots loaded before it. '''
+        with self._lock:
+            self._generations[schema_id] = self._generations.get(schema_id, 0) + 1
+
+    def put(self, snapshot: SchemaSnapshot, generation: Optional[int] = None) -> None:
+        ''' Store snapshot replacing older version of the same schema.
+
+        If generation is given, snapshot is stored only if schema was not modified since it was loaded.
+        '''
+        if not self.is_enabled or snapshot.size > self.max_memory:
+            return
+        if generation is not None and generation != self.generation(snapshot.schema_id):
+            return
+        self._store(snapshot)
+        if self._backend:
+            caches[self._backend].set(_backend_key(snapshot.schema_id), snapshot, self._timeout)
+
+    def evict(self, schema_id: int) -> None:
+        ''' Remove snapshot of schema. '''
+        with self._lock:
+            self._remove(schema_id)
+        if self._backend:
+            caches[self._backend].delete(_backend_key(schema_id))
+
+    def clear(self) -> None:
+        ''' Remove all local snapshots. '''
+        with self._lock:
+            self._items.clear()
+            self.memory_used = 0
+
+    def _store(self, snapshot: SchemaSnapshot) -> None:
+        with self._lock:
+            self._remove(snapshot.schema_id)
+            self._items[snapshot.schema_id] = (snapshot, snapshot.size)
+            self.memory_used += snapshot.size
+            while self.memory_used > self.max_memory:
+                _, (_, size) = self._items.popitem(last=False)
+                self.memory_used -= size
+
+    def _remove(self, schema_id: int) -> None:
+        entry = self._items.pop(schema_id, None)
+        if entry is not None:
+            self.memory_used -= entry[1]
+
+
+def _backend_key(schema_id: int) -> str:
+    return f'rsform-snapshot:{schema_id}'
+
+
+snapshots = SnapshotCache(
+    max_memory=settings.RSFORM_SNAPSHOT_MAX_MEMORY,
+    backend=settings.RSFORM_SNAPSHOT_BACKEND,
+    timeout=settings.RSFORM_SNAPSHOT_TIMEOUT
+)
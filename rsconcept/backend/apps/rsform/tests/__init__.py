@@ -3,4 +3,5 @@ from .s_models import *
 from .s_views import *
 from .t_graph import *
 from .t_serializers import *
+from .t_snapshots import *
 from .t_utils import *
@@ -1,9 +1,12 @@
 ''' Testing models: RSForm. '''
 from django.forms import ValidationError
 
-from apps.rsform.models import Constituenta, CstType, RSForm
+from apps.rsform.models import ORDER_GAP, Constituenta, CstType, RSForm, RSFormCached
+from apps.rsform.models.RSForm import assign_order
+from apps.rsform.snapshots import snapshots
 from apps.users.models import User
 from shared.DBTester import DBTester
+from shared.testing_utils import cst_position
 
 
 class TestRSForm(DBTester):
@@ -38,13 +41,13 @@ class TestRSForm(DBTester):
 
     def test_insert_last(self):
         x1 = self.schema.insert_last('X1')
-        self.assertEqual(x1.order, 0)
+        self.assertEqual(cst_position(x1), 0)
         self.assertEqual(x1.schema, self.schema.model)
 
         x2 = self.schema.insert_last('X2')
-        self.assertEqual(x2.order, 1)
+        self.assertEqual(cst_position(x2), 1)
         self.assertEqual(x2.schema, self.schema.model)
-        self.assertEqual(x1.order, 0)
+        self.assertEqual(cst_position(x1), 0)
 
     def test_reset_aliases(self):
         x1 = self.schema.insert_last(
@@ -83,10 +86,24 @@ class TestRSForm(DBTester):
         x2.refresh_from_db()
         d1.refresh_from_db()
         d2.refresh_from_db()
-        self.assertEqual(x1.order, 2)
-        self.assertEqual(x2.order, 0)
-        self.assertEqual(d1.order, 3)
-        self.assertEqual(d2.order, 1)
+        self.assertEqual(cst_position(x1), 2)
+        self.assertEqual(cst_position(x2), 0)
+        self.assertEqual(cst_position(d1), 3)
+        self.assertEqual(cst_position(d2), 1)
+
+
+    def test_move_cst_drops_snapshot(self):
+        self.addCleanup(snapshots.clear)
+        x1 = self.schema.insert_last('X1')
+        x2 = self.schema.insert_last('X2')
+        with self.captureOnCommitCallbacks(execute=True):
+            RSFormCached(self.schema.model.pk).cache.ensure_loaded()
+        self.assertEqual(len(snapshots), 1)
+        self.schema.move_cst([x2], 0)
+        self.assertEqual(len(snapshots), 0)
+        cached = RSFormCached(self.schema.model.pk)
+        cached.cache.ensure_loaded()
+        self.assertEqual([cst.pk for cst in cached.cache.constituents], [x2.pk, x1.pk])
 
 
     def test_move_cst_down(self):
@@ -95,8 +112,51 @@ class TestRSForm(DBTester):
         self.schema.move_cst([x1], 1)
         x1.refresh_from_db()
         x2.refresh_from_db()
-        self.assertEqual(x1.order, 1)
-        self.assertEqual(x2.order, 0)
+        self.assertEqual(cst_position(x1), 1)
+        self.assertEqual(cst_position(x2), 0)
+
+
+    def test_move_cst_keeps_others(self):
+        items = [self.schema.insert_last(f'X{index + 1}') for index in range(20)]
+        before = dict(self.schema.constituentsQ().values_list('pk', 'order'))
+        self.schema.move_cst([items[15], items[16]], 3)
+        after = dict(self.schema.constituentsQ().values_list('pk', 'order'))
+        self.assertEqual({pk for pk in before if before[pk] != after[pk]}, {items[15].pk, items[16].pk})
+        self.assertEqual(cst_position(items[15]), 3)
+        self.assertEqual(cst_position(items[16]), 4)
+        self.assertEqual(cst_position(items[3]), 5)
+
+
+    def test_delete_cst_keeps_others(self):
+        x1 = self.schema.insert_last('X1')
+        x2 = self.schema.insert_last('X2')
+        x3 = self.schema.insert_last('X3')
+        before = dict(self.schema.constituentsQ().values_list('pk', 'order'))
+        self.schema.delete_cst([x2])
+        after = dict(self.schema.constituentsQ().values_list('pk', 'order'))
+        self.assertEqual(after, {x1.pk: before[x1.pk], x3.pk: before[x3.pk]})
+        self.assertEqual(cst_position(x3), 1)
+
+
+    def test_assign_order(self):
+        self.assertEqual(assign_order([]), [])
+        self.assertEqual(assign_order([None, None]), [ORDER_GAP, 2 * ORDER_GAP])
+        self.assertEqual(assign_order([10, 20, 30]), [10, 20, 30])
+        self.assertEqual(assign_order([10, None, 20]), [10, 15, 20])
+        self.assertEqual(assign_order([10, 20, None]), [10, 20, 20 + ORDER_GAP])
+        self.assertEqual(assign_order([None, 10, 20]), [4, 10, 20])
+        self.assertEqual(assign_order([None, 5000]), [5000 - ORDER_GAP, 5000])
+        self.assertEqual(assign_order([30, 10, 20]), [4, 10, 20])
+        self.assertEqual(assign_order([1, None, 2]), [ORDER_GAP, 2 * ORDER_GAP, 3 * ORDER_GAP])
+        self.assertEqual(assign_order([1, None, 2, 3000, 4000]), [749, 1499, 2249, 3000, 4000])
+        self.assertEqual(assign_order([1, None, 2, 3, 4]), [ORDER_GAP * (index + 1) for index in range(5)])
+
+
+    def test_assign_order_increasing(self):
+        keys = assign_order([50, 3, None, 7, None, None, 8, 2, 100, None])
+        self.assertEqual(keys, sorted(set(keys)))
+        self.assertTrue(all(key >= 0 for key in keys))
+
 
     def test_delete_cst(self):
         x1 = self.schema.insert_last('X1')
@@ -112,8 +172,8 @@ class TestRSForm(DBTester):
         x2.refresh_from_db()
         d1.refresh_from_db()
         self.assertEqual(self.schema.constituentsQ().count(), 2)
-        self.assertEqual(x2.order, 0)
-        self.assertEqual(d1.order, 1)
+        self.assertEqual(cst_position(x2), 0)
+        self.assertEqual(cst_position(d1), 1)
         self.assertEqual(d1.definition_formal, 'DEL = X2')
         self.assertEqual(d1.definition_raw, '@{DEL|sing}')
         self.assertEqual(d1.term_raw, '@{X2|plur}')
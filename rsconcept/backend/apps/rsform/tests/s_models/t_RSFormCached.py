@@ -1,9 +1,12 @@
 ''' Testing models: RSFormCached. '''
 from django.core.exceptions import ValidationError
 
-from apps.rsform.models import Attribution, Constituenta, CstType, OrderManager, RSFormCached
+from apps.library.models import LibraryItem
+from apps.rsform.models import Attribution, Constituenta, CstType, OrderManager, RSForm, RSFormCached
+from apps.rsform.snapshots import snapshots
 from apps.users.models import User
 from shared.DBTester import DBTester
+from shared.testing_utils import cst_position
 
 
 class TestRSFormCached(DBTester):
@@ -33,7 +36,7 @@ class TestRSFormCached(DBTester):
 
     def test_insert_last(self):
         x1 = self.schema.insert_last('X1')
-        self.assertEqual(x1.order, 0)
+        self.assertEqual(cst_position(x1), 0)
         self.assertEqual(x1.schema_id, self.schema.pk)
 
 
@@ -54,8 +57,27 @@ class TestRSFormCached(DBTester):
         self.assertEqual(x3.alias, data['alias'])
         self.assertEqual(x3.term_raw, data['term_raw'])
         self.assertEqual(x3.definition_raw, data['definition_raw'])
-        self.assertEqual(x2.order, 2)
-        self.assertEqual(x3.order, 1)
+        self.assertEqual(cst_position(x2), 2)
+        self.assertEqual(cst_position(x3), 1)
+
+
+    def test_create_cst_keeps_others(self):
+        items = [self.schema.insert_last(f'X{index + 1}') for index in range(10)]
+        before = dict(self.schema.constituentsQ().values_list('pk', 'order'))
+        for index in range(5):
+            self.schema.create_cst({'alias': f'D{index + 1}', 'cst_type': CstType.TERM}, insert_after=items[4])
+        after = dict(self.schema.constituentsQ().values_list('pk', 'order'))
+        self.assertEqual({pk: after[pk] for pk in before}, before)
+
+        for index in range(5, 40):
+            self.schema.create_cst({'alias': f'D{index + 1}', 'cst_type': CstType.TERM}, insert_after=items[4])
+        self.assertEqual(cst_position(items[5]), 45)
+        aliases = list(self.schema.constituentsQ().order_by('order').values_list('alias', flat=True))
+        self.assertEqual(aliases[5:45], [f'D{40 - index}' for index in range(40)])
+        self.assertEqual(
+            [cst.alias for cst in self.schema.cache.constituents],
+            aliases
+        )
 
 
     def test_create_cst_rejects_duplicate_alias(self):
@@ -98,16 +120,16 @@ class TestRSFormCached(DBTester):
         self.assertEqual(len(result), 2)
 
         s1.refresh_from_db()
-        self.assertEqual(s1.order, 3)
+        self.assertEqual(cst_position(s1), 3)
 
         x2 = result[1]
-        self.assertEqual(x2.order, 2)
+        self.assertEqual(cst_position(x2), 2)
         self.assertEqual(x2.alias, 'X11')
         self.assertEqual(x2.cst_type, CstType.BASE)
         self.assertEqual(x2.convention, x1.convention)
 
         s2 = result[0]
-        self.assertEqual(s2.order, 1)
+        self.assertEqual(cst_position(s2), 1)
         self.assertEqual(s2.alias, 'S12')
         self.assertEqual(s2.cst_type, CstType.STRUCTURED)
         self.assertEqual(s2.definition_formal, x2.alias)
@@ -147,8 +169,8 @@ class TestRSFormCached(DBTester):
         x2.refresh_from_db()
         d1.refresh_from_db()
         self.assertEqual(self.schema.constituentsQ().count(), 2)
-        self.assertEqual(x2.order, 0)
-        self.assertEqual(d1.order, 1)
+        self.assertEqual(cst_position(x2), 0)
+        self.assertEqual(cst_position(d1), 1)
         self.assertEqual(d1.definition_formal, 'DEL = X2')
         self.assertEqual(d1.definition_raw, '@{DEL|sing}')
         self.assertEqual(d1.term_raw, '@{X2|plur}')
@@ -278,20 +300,61 @@ class TestRSFormCached(DBTester):
         a2.refresh_from_db()
         p1.refresh_from_db()
 
-        self.assertEqual(x1.order, 0)
-        self.assertEqual(x2.order, 1)
-        self.assertEqual(c1.order, 2)
-        self.assertEqual(p1.order, 3)
-        self.assertEqual(s1.order, 4)
-        self.assertEqual(a2.order, 5)
-        self.assertEqual(d1.order, 6)
-        self.assertEqual(s2.order, 7)
-        self.assertEqual(d3.order, 8)
-        self.assertEqual(a1.order, 9)
-        self.assertEqual(d4.order, 10)
-        self.assertEqual(d2.order, 11)
-        self.assertEqual(f1.order, 12)
-        self.assertEqual(f2.order, 13)
+        self.assertEqual(cst_position(x1), 0)
+        self.assertEqual(cst_position(x2), 1)
+        self.assertEqual(cst_position(c1), 2)
+        self.assertEqual(cst_position(p1), 3)
+        self.assertEqual(cst_position(s1), 4)
+        self.assertEqual(cst_position(a2), 5)
+        self.assertEqual(cst_position(d1), 6)
+        self.assertEqual(cst_position(s2), 7)
+        self.assertEqual(cst_position(d3), 8)
+        self.assertEqual(cst_position(a1), 9)
+        self.assertEqual(cst_position(d4), 10)
+        self.assertEqual(cst_position(d2), 11)
+        self.assertEqual(cst_position(f1), 12)
+        self.assertEqual(cst_position(f2), 13)
+
+
+    def test_place(self):
+        x1 = self.schema.insert_last('X1')
+        d1 = self.schema.insert_last('D1', definition_formal='X2')
+        d2 = self.schema.insert_last('D2', definition_formal='X1')
+        x2 = self.schema.insert_last('X2')
+        before = dict(self.schema.constituentsQ().values_list('pk', 'order'))
+
+        OrderManager(self.schema).place([x2.pk])
+        after = dict(self.schema.constituentsQ().values_list('pk', 'order'))
+        self.assertEqual({pk for pk in before if before[pk] != after[pk]}, {x2.pk})
+        self.assertEqual(cst_position(x1), 0)
+        self.assertEqual(cst_position(x2), 1)
+        self.assertEqual(cst_position(d1), 2)
+        self.assertEqual(cst_position(d2), 3)
+        self.assertEqual([cst.pk for cst in self.schema.cache.constituents], [x1.pk, x2.pk, d1.pk, d2.pk])
+
+
+    def test_place_keeps_valid_position(self):
+        x1 = self.schema.insert_last('X1')
+        d1 = self.schema.insert_last('D1', definition_formal='X1')
+        d2 = self.schema.insert_last('D2', definition_formal='X1')
+        before = dict(self.schema.constituentsQ().values_list('pk', 'order'))
+
+        OrderManager(self.schema).place([d1.pk, d2.pk])
+        self.assertEqual(dict(self.schema.constituentsQ().values_list('pk', 'order')), before)
+        self.assertEqual(cst_position(x1), 0)
+
+
+    def test_place_fallback(self):
+        d1 = self.schema.insert_last('D1', definition_formal='D2')
+        x1 = self.schema.insert_last('X1')
+        d3 = self.schema.insert_last('D3', definition_formal='X1')
+        d2 = self.schema.insert_last('D2', definition_formal='D3')
+
+        OrderManager(self.schema).place([d2.pk])
+        self.assertEqual(cst_position(x1), 0)
+        self.assertEqual(cst_position(d3), 1)
+        self.assertEqual(cst_position(d2), 2)
+        self.assertEqual(cst_position(d1), 3)
 
 
     def test_restore_order_keeps_supplier_before_semantic_child(self):
@@ -373,3 +436,97 @@ class TestRSFormCached(DBTester):
         self.assertEqual(d1.term_raw, '@{X2|sing}')
         self.assertEqual(d1.definition_raw, '@{X1|datv}')
         self.assertEqual(d1.definition_resolved, 'test')
+
+
+    def test_dependency_graphs_incremental(self):
+        x1 = self.schema.insert_last('X1', term_raw='@{D1|sing}')
+        x2 = self.schema.insert_last('X2')
+        d1 = self.schema.insert_last(
+            alias='D1',
+            definition_formal='X1 = X2 = X3',
+            term_raw='@{X1|plur}',
+            definition_raw='@{X3|sing}'
+        )
+        self.assertEqual(self.schema.get_dependant([x1.pk]), {d1.pk})
+        self._assert_graphs_consistent()
+
+        x3 = self.schema.create_cst({'alias': 'X3', 'cst_type': CstType.BASE})
+        self._assert_graphs_consistent()
+        self.assertTrue(self.schema.cache.graph_formal.has_edge(x3.pk, d1.pk))
+        self.assertTrue(self.schema.cache.graph_text.has_edge(x3.pk, d1.pk))
+
+        self.schema.update_cst(d1.pk, {'definition_formal': 'X2', 'definition_raw': '@{X1|sing}'})
+        self._assert_graphs_consistent()
+        self.assertFalse(self.schema.cache.graph_formal.has_edge(x1.pk, d1.pk))
+
+        self.schema.insert_copy([d1, x1])
+        self._assert_graphs_consistent()
+
+        self.schema.change_cst_type(x2.pk, CstType.TERM)
+        self._assert_graphs_consistent()
+
+        self.schema.substitute([(x1, x3)])
+        self._assert_graphs_consistent()
+
+        self.schema.reset_aliases()
+        self._assert_graphs_consistent()
+
+        self.schema.delete_cst([x3.pk])
+        self._assert_graphs_consistent()
+
+
+    def test_shared_snapshot(self):
+        self.addCleanup(snapshots.clear)
+        x1 = self.schema.insert_last('X1', term_raw='слон')
+        d1 = self.schema.insert_last('D1', definition_formal='X1', term_raw='@{X1|nomn,sing}')
+        with self.captureOnCommitCallbacks(execute=True):
+            first = RSFormCached(self.schema.pk)
+            first.cache.ensure_loaded()
+            self.assertTrue(first.cache.graph_formal.has_edge(x1.pk, d1.pk))
+
+        with self.assertNumQueries(1):
+            second = RSFormCached(self.schema.pk)
+            second.cache.ensure_loaded_terms()
+            self.assertEqual([cst.alias for cst in second.cache.constituents], ['X1', 'D1'])
+            self.assertEqual(second.cache.by_id[x1.pk].term_raw, 'слон')
+            self.assertIsNot(second.cache.by_id[x1.pk], first.cache.by_id[x1.pk])
+            self.assertTrue(second.cache.graph_term.has_edge(x1.pk, d1.pk))
+        second.cache.graph_formal.remove_edge(x1.pk, d1.pk)
+
+        third = RSFormCached(self.schema.pk)
+        self.assertTrue(third.cache.graph_formal.has_edge(x1.pk, d1.pk))
+
+        time_update = LibraryItem.objects.get(pk=self.schema.pk).time_update
+        third.update_cst(d1.pk, {'definition_formal': 'X1\\X1'})
+        self.assertNotEqual(LibraryItem.objects.get(pk=self.schema.pk).time_update, time_update)
+        self.assertEqual(len(snapshots), 0)
+
+        fourth = RSFormCached(self.schema.pk)
+        fourth.cache.ensure_loaded()
+        self.assertEqual(fourth.cache.by_id[d1.pk].definition_formal, 'X1\\X1')
+
+
+    def test_mark_modified_once(self):
+        self.schema.insert_last('X1')
+        schema = RSFormCached(self.schema.pk)
+        with self.assertNumQueries(1):
+            schema.mark_modified()
+        with self.assertNumQueries(0):
+            schema.mark_modified()
+        with self.captureOnCommitCallbacks(execute=True):
+            schema.cache.ensure_loaded()
+            schema.mark_modified()
+        self.assertEqual(len(snapshots), 0)
+
+
+    def _assert_graphs_consistent(self):
+        cache = self.schema.cache
+        for cached, built in [
+            (cache.graph_formal, RSForm.graph_formal(cache.constituents)),
+            (cache.graph_term, RSForm.graph_term(cache.constituents)),
+            (cache.graph_text, RSForm.graph_text(cache.constituents))
+        ]:
+            self.assertEqual(
+                {node: set(children) for node, children in cached.outputs.items()},
+                {node: set(children) for node, children in built.outputs.items()}
+            )
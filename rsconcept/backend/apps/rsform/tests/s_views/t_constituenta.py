@@ -6,6 +6,7 @@ from django.utils import timezone
 from apps.rsform.models import Constituenta, CstType, RSForm
 from shared.concurrency import EXPECTED_TIME_UPDATE_HEADER
 from shared.EndpointTester import EndpointTester, decl_endpoint
+from shared.testing_utils import cst_position
 
 
 class TestConstituentaAPI(EndpointTester):
@@ -74,7 +75,7 @@ class TestConstituentaAPI(EndpointTester):
             term_raw='@{X1|plur}',
             definition_formal='X1'
         )
-        self.assertEqual(self.x1.order, 0)
+        self.assertEqual(cst_position(self.x1), 0)
         self.assertEqual(self.x1.alias, 'X1')
         self.assertEqual(self.x1.cst_type, CstType.BASE)
 
@@ -84,7 +85,7 @@ class TestConstituentaAPI(EndpointTester):
         self.x1.refresh_from_db()
         self.assertEqual(d1.term_resolved, '')
         self.assertEqual(d1.term_raw, '@{D2|plur}')
-        self.assertEqual(self.x1.order, 0)
+        self.assertEqual(cst_position(self.x1), 0)
         self.assertEqual(self.x1.alias, 'D2')
         self.assertEqual(self.x1.cst_type, CstType.TERM)
 
@@ -172,7 +173,7 @@ class TestConstituentaAPI(EndpointTester):
         response = self.executeCreated(data)
         self.assertEqual(response.data['new_cst']['alias'], data['alias'])
         x4 = Constituenta.objects.get(alias=response.data['new_cst']['alias'])
-        self.assertEqual(x4.order, 3)
+        self.assertEqual(cst_position(x4), 3)
         self.assertEqual(x4.term_raw, data['term_raw'])
         self.assertEqual(x4.term_forms, data['term_forms'])
         self.assertEqual(x4.definition_formal, data['definition_formal'])
@@ -219,8 +220,8 @@ class TestConstituentaAPI(EndpointTester):
         self.assertEqual(cloned_aliases, ['X4', 'X5'])
         x4 = Constituenta.objects.get(alias='X4')
         x5 = Constituenta.objects.get(alias='X5')
-        self.assertEqual(x4.order, 2)
-        self.assertEqual(x5.order, 3)
+        self.assertEqual(cst_position(x4), 2)
+        self.assertEqual(cst_position(x5), 3)
         self.assertEqual(x4.term_raw, self.x1.term_raw)
         self.assertEqual(x5.term_raw, self.x3.term_raw)
 
@@ -333,8 +334,8 @@ class TestConstituentaAPI(EndpointTester):
         self.assertEqual(response.data['new_cst']['alias'], data['alias'])
         x4 = Constituenta.objects.get(alias=response.data['new_cst']['alias'])
         self.x3.refresh_from_db()
-        self.assertEqual(x4.order, 2)
-        self.assertEqual(self.x3.order, 3)
+        self.assertEqual(cst_position(x4), 2)
+        self.assertEqual(cst_position(self.x3), 3)
 
 
     @decl_endpoint('/api/rsforms/{item}/create-cst', method='post')
@@ -2,14 +2,17 @@
 import os
 
 from cctext import ReferenceType
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
 from rest_framework import status
 
-from apps.library.models import AccessPolicy, LibraryItem, LibraryItemType, LocationHead
+from apps.library.models import AccessPolicy, Editor, LibraryItem, LibraryItemType, LocationHead
 from apps.oss.models import Operation, OperationType
-from apps.rsform.models import Constituenta, CstType, RSForm
+from apps.rsform.models import Constituenta, CstType, RSForm, RSFormCached
+from apps.rsform.snapshots import snapshots
 from shared.EndpointTester import EndpointTester, decl_endpoint
 from shared.portal_json import PORTAL_JSON_CONTRACT_VERSION
-from shared.testing_utils import response_contains
+from shared.testing_utils import cst_position, response_contains
 
 
 class TestRSFormViewset(EndpointTester):
@@ -263,6 +266,37 @@ class TestRSFormViewset(EndpointTester):
         self.executeForbidden(item=self.private_id)
 
 
+    @decl_endpoint('/api/rsforms/{item}/details', method='get')
+    def test_details_not_modified(self):
+        self.owned.insert_last(alias='X1')
+        response = self.executeOK(item=self.owned_id)
+        etag = response.headers['ETag']
+        self.assertIn('Last-Modified', response.headers)
+
+        with CaptureQueriesContext(connection) as queries:
+            cached = self.executeNotModified(item=self.owned_id, headers={'If-None-Match': etag})
+        self.assertEqual(cached.headers['ETag'], etag)
+        table = Constituenta._meta.db_table
+        self.assertFalse([query for query in queries.captured_queries if table in query['sql']])
+        self.executeNotModified(item=self.owned_id, headers={'If-Modified-Since': response.headers['Last-Modified']})
+        self.executeOK(item=self.owned_id, headers={'If-None-Match': '"outdated"'})
+
+        Editor.add(self.owned_id, self.user2.pk)
+        response = self.executeOK(item=self.owned_id, headers={'If-None-Match': etag})
+        self.assertNotEqual(response.headers['ETag'], etag)
+        etag = response.headers['ETag']
+
+        self.owned.model.alias = 'T11'
+        self.owned.model.save()
+        response = self.executeOK(item=self.owned_id, headers={'If-None-Match': etag})
+        self.assertEqual(response.data['alias'], 'T11')
+        etag = response.headers['ETag']
+
+        self.logout()
+        response = self.executeOK(item=self.owned_id, headers={'If-None-Match': etag})
+        self.assertEqual(response.data['editors'], [])
+
+
     @decl_endpoint('/api/rsforms/{item}', method='get')
     def test_retrieve_private_forbidden(self):
         self.executeForbidden(item=self.private_id)
@@ -480,6 +514,20 @@ class TestRSFormViewset(EndpointTester):
         self.assertEqual(d3.definition_formal, r'D1 \ D2')
 
 
+    @decl_endpoint('/api/rsforms/{item}/substitute', method='patch')
+    def test_substitute_places_replacement(self):
+        x1 = self.owned.insert_last('X1')
+        d1 = self.owned.insert_last('D1', definition_formal='X1')
+        d2 = self.owned.insert_last('D2')
+        x2 = self.owned.insert_last('X2')
+
+        data = {'substitutions': [{'original': x1.pk, 'substitution': x2.pk}]}
+        self.executeOK(data, item=self.owned_id)
+        self.assertEqual(cst_position(x2), 0)
+        self.assertEqual(cst_position(d1), 1)
+        self.assertEqual(cst_position(d2), 2)
+
+
     @decl_endpoint('/api/rsforms/{item}/substitute', method='patch')
     def test_substitute_with_attributions(self):
         self.set_params(item=self.owned_id)
@@ -562,7 +610,7 @@ class TestRSFormViewset(EndpointTester):
         self.assertEqual(len(response.data['items']), 1)
         self.assertEqual(self.owned.constituentsQ().count(), 1)
         self.assertEqual(x2.alias, 'X2')
-        self.assertEqual(x2.order, 0)
+        self.assertEqual(cst_position(x2), 0)
 
         x3 = self.unowned.insert_last('X1')
         data = {'items': [x3.pk]}
@@ -584,8 +632,8 @@ class TestRSFormViewset(EndpointTester):
         x1.refresh_from_db()
         x2.refresh_from_db()
         self.assertEqual(response.data['id'], self.owned_id)
-        self.assertEqual(x1.order, 1)
-        self.assertEqual(x2.order, 0)
+        self.assertEqual(cst_position(x1), 1)
+        self.assertEqual(cst_position(x2), 0)
 
         x3 = self.unowned.insert_last('X1')
         data = {'items': [x3.pk], 'move_to': 0}
@@ -607,11 +655,11 @@ class TestRSFormViewset(EndpointTester):
         x1.refresh_from_db()
         x2.refresh_from_db()
         d11.refresh_from_db()
-        self.assertEqual(x2.order, 0)
+        self.assertEqual(cst_position(x2), 0)
         self.assertEqual(x2.alias, 'X1')
-        self.assertEqual(x1.order, 1)
+        self.assertEqual(cst_position(x1), 1)
         self.assertEqual(x1.alias, 'X2')
-        self.assertEqual(d11.order, 2)
+        self.assertEqual(cst_position(d11), 2)
         self.assertEqual(d11.alias, 'D1')
 
         self.executeOK()
@@ -635,6 +683,25 @@ class TestRSFormViewset(EndpointTester):
         self.assertFalse(Constituenta.objects.filter(pk=x1.pk).exists())
 
 
+    @decl_endpoint('/api/rsforms/{item}/load-trs', method='patch')
+    def test_load_trs_warm_snapshot(self):
+        self.addCleanup(snapshots.clear)
+        self.set_params(item=self.owned_id)
+        self.owned.insert_last('X1', term_raw='слон')
+        with self.captureOnCommitCallbacks(execute=True):
+            RSFormCached(self.owned_id).cache.ensure_loaded()
+        self.assertEqual(len(snapshots), 1)
+
+        work_dir = os.path.dirname(os.path.abspath(__file__))
+        with open(f'{work_dir}/data/sample-rsform.trs', 'rb') as file:
+            data = {'file': file, 'load_metadata': False}
+            response = self.client.patch(self.endpoint, data, format='multipart')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        terms = self.owned.constituentsQ().exclude(term_raw='')
+        self.assertTrue(terms.exists())
+        self.assertFalse(terms.filter(term_resolved='').exists())
+
+
 class TestInlineSynthesis(EndpointTester):
     ''' Testing Inline synthesis. '''
 
@@ -42,6 +42,38 @@ class TestGraph(unittest.TestCase):
         self.assertEqual(len(graph.outputs), 3)
 
 
+    def test_reuse_removed_node(self):
+        graph = Graph({
+            1: [2],
+            2: [3],
+            3: []
+        })
+        graph.remove_node(2)
+        graph.add_edge(4, 1)
+        self.assertEqual(list(graph.outputs), [1, 3, 4])
+        self.assertEqual(graph.inputs[1], [4])
+        self.assertFalse(graph.has_edge(1, 2))
+        self.assertFalse(graph.has_edge(4, 3))
+        graph.add_edge(2, 3)
+        self.assertEqual(graph.topological_order(), [2, 4, 3, 1])
+
+
+    def test_copy(self):
+        graph = Graph({
+            1: [2],
+            2: [3],
+            3: []
+        })
+        copy = graph.copy()
+        copy.remove_node(2)
+        copy.add_edge(3, 1)
+        self.assertEqual(graph.outputs[1], [2])
+        self.assertEqual(graph.inputs[3], [2])
+        self.assertFalse(graph.has_edge(3, 1))
+        self.assertEqual(copy.outputs[3], [1])
+        self.assertEqual(list(copy.outputs), [1, 3])
+
+
     def test_remove_edge(self):
         graph = Graph({
             1: [2],
@@ -107,6 +139,33 @@ class TestGraph(unittest.TestCase):
         })
 
 
+    def test_reachability(self):
+        graph = Graph({
+            1: [2],
+            2: [3, 5],
+            3: [],
+            5: [6],
+            6: [],
+            7: [6]
+        })
+        reachable = graph.reachability()
+        self.assertIs(graph.reachability(), reachable)
+        self.assertTrue(reachable.reaches(1, 6))
+        self.assertTrue(reachable.reaches(7, 6))
+        self.assertFalse(reachable.reaches(6, 1))
+        self.assertFalse(reachable.reaches(1, 1))
+        self.assertFalse(reachable.reaches(1, 7))
+        self.assertEqual(reachable.descendants(1), {2, 3, 5, 6})
+        self.assertEqual(reachable.descendants(3), set())
+
+        graph.add_edge(6, 1)
+        self.assertIsNot(graph.reachability(), reachable)
+        reachable = graph.reachability()
+        self.assertTrue(reachable.reaches(1, 1))
+        self.assertTrue(reachable.reaches(6, 3))
+        self.assertEqual(reachable.descendants(7), {1, 2, 3, 5, 6})
+
+
     def test_topological_order(self):
         self.assertEqual(Graph().topological_order(), [])
         graph = Graph({
@@ -129,6 +188,20 @@ class TestGraph(unittest.TestCase):
         self.assertEqual(graph.topological_order(), [5, 3, 2, 4, 1])
 
 
+    def test_topological_order_subset(self):
+        graph = Graph({
+            1: [],
+            2: [1],
+            3: [],
+            4: [3],
+            5: [6],
+            6: [1, 2]
+        })
+        self.assertEqual(graph.topological_order([]), [])
+        self.assertEqual(graph.topological_order([1, 2, 6]), [6, 2, 1])
+        self.assertEqual(graph.topological_order([1, 5]), [5, 1])
+
+
     def test_sort_stable(self):
         graph = Graph({
             1: [2],
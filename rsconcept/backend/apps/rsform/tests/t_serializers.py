@@ -1,7 +1,14 @@
 ''' Testing serializers '''
+from django.db.models import Q
 from django.test import TestCase
+from rest_framework.renderers import JSONRenderer
 
-from apps.rsform.serializers import ExpressionSerializer
+from apps.library.models import LibraryItem, LibraryItemType
+from apps.library.serializers import LibraryItemDetailsSerializer
+from apps.oss.models import Inheritance, Operation, OperationSchema, OperationType
+from apps.rsform.models import Attribution, Constituenta, RSForm
+from apps.rsform.serializers import CstInfoSerializer, ExpressionSerializer, RSFormSerializer
+from apps.rsmodel.models import RSModel
 
 
 class TestExpressionSerializer(TestCase):
@@ -20,3 +27,96 @@ class TestExpressionSerializer(TestCase):
         self.assertFalse(serializer.is_valid(raise_exception=False))
         serializer = ExpressionSerializer(data={'schema': 1})
         self.assertFalse(serializer.is_valid(raise_exception=False))
+
+
+class TestRSFormSerializer(TestCase):
+    ''' Testing RSForm bulk serialization against field-by-field serializers. '''
+
+    def setUp(self):
+        self.schema = RSForm.create(title='Test', alias='KS1')
+        self.x1 = self.schema.insert_last(
+            'X1',
+            term_raw='слон',
+            term_resolved='слон',
+            term_forms=[{'text': 'слоны', 'tags': 'nomn,plur'}],
+            crucial=True
+        )
+        self.d1 = self.schema.insert_last(
+            'D1',
+            definition_formal='ℬ(X1)',
+            typification_manual='ℬ(X1)',
+            value_is_property=True,
+            convention='"конвенция"'
+        )
+        Attribution.objects.create(container=self.d1, attribute=self.x1)
+        source = RSForm.create(title='Source')
+        source_x1 = source.insert_last('X1')
+        oss = OperationSchema.create(title='OSS', alias='OSS1')
+        operation = oss.create_operation(alias='1', operation_type=OperationType.INPUT, result=self.schema.model)
+        Inheritance.objects.create(operation=operation, parent=source_x1, child=self.x1)
+        model = LibraryItem.objects.create(item_type=LibraryItemType.RSMODEL, title='Model', alias='M1')
+        RSModel.objects.create(model=model, schema=self.schema.model)
+
+
+    def test_representation_matches(self):
+        self._assert_matches()
+        producer = OperationSchema.create(title='OSS2', alias='OSS2')
+        producer.create_operation(alias='2', operation_type=OperationType.SYNTHESIS, result=self.schema.model)
+        self._assert_matches()
+
+
+    def test_empty_schema(self):
+        empty = RSForm.create(title='Empty')
+        self.assertEqual(
+            JSONRenderer().render(RSFormSerializer(empty.model).data),
+            JSONRenderer().render(_reference_representation(empty.model))
+        )
+
+
+    def test_base_data(self):
+        data = RSFormSerializer(self.schema.model).to_base_data(self.schema.model)
+        self.assertEqual(data['inheritance'], [])
+        self.assertEqual(data['attribution'], [{'container': self.d1.pk, 'attribute': self.x1.pk}])
+        self.assertEqual(data['oss'][0]['alias'], 'OSS1')
+        self.assertFalse(data['is_produced'])
+
+
+    def _assert_matches(self):
+        self.assertEqual(
+            JSONRenderer().render(RSFormSerializer(self.schema.model).data),
+            JSONRenderer().render(_reference_representation(self.schema.model))
+        )
+
+
+def _reference_representation(item: LibraryItem) -> dict:
+    ''' Field-by-field serialization used before bulk path. '''
+    result = LibraryItemDetailsSerializer(item).data
+    result['items'] = [
+        CstInfoSerializer(cst).data
+        for cst in Constituenta.objects.filter(schema=item).defer('order').order_by('order')
+    ]
+    result['oss'] = [
+        {'id': oss.pk, 'alias': oss.alias}
+        for oss in LibraryItem.objects.filter(operations__result=item).only('alias')
+    ]
+    result['models'] = [
+        {'id': model.pk, 'alias': model.alias}
+        for model in LibraryItem.objects.filter(rsmodels__schema=item).only('alias')
+    ]
+    result['inheritance'] = []
+    result['attribution'] = [
+        {'container': attrib.container_id, 'attribute': attrib.attribute_id}
+        for attrib in Attribution.objects.filter(container__schema=item)
+    ]
+    result['is_produced'] = Operation.objects \
+        .filter(result=item) \
+        .exclude(operation_type=OperationType.INPUT) \
+        .exists()
+    for link in Inheritance.objects.filter(Q(child__schema=item) | Q(parent__schema=item)):
+        result['inheritance'].append({
+            'child': link.child_id,
+            'child_source': link.child.schema_id,
+            'parent': link.parent_id,
+            'parent_source': link.parent.schema_id
+        })
+    return result
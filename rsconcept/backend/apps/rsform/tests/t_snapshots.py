@@ -0,0 +1,87 @@
+''' Unit tests: snapshots cache. '''
+import unittest
+from datetime import UTC, datetime, timedelta
+
+from apps.rsform.snapshots import SchemaSnapshot, SnapshotCache
+
+_STAMP = datetime(2024, 1, 1, tzinfo=UTC)
+
+
+def _snapshot(schema_id: int, time_update: datetime = _STAMP, size: int = 10) -> SchemaSnapshot:
+    return SchemaSnapshot(schema_id, time_update, ('id', 'alias'), tuple((index, 'X1') for index in range(size)))
+
+
+class TestSnapshotCache(unittest.TestCase):
+    ''' Test shared snapshot cache. '''
+
+
+    def test_get_version(self):
+        cache = SnapshotCache(max_memory=1024 * 1024)
+        snapshot = _snapshot(1)
+        cache.put(snapshot)
+        self.assertIs(cache.get(1, _STAMP), snapshot)
+        self.assertIsNone(cache.get(2, _STAMP))
+        self.assertIsNone(cache.get(1, _STAMP + timedelta(seconds=1)))
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.memory_used, 0)
+
+
+    def test_evict(self):
+        cache = SnapshotCache(max_memory=1024 * 1024)
+        cache.put(_snapshot(1))
+        cache.put(_snapshot(2))
+        cache.evict(1)
+        self.assertIsNone(cache.get(1, _STAMP))
+        self.assertIsNotNone(cache.get(2, _STAMP))
+        cache.clear()
+        self.assertEqual(len(cache), 0)
+        self.assertEqual(cache.memory_used, 0)
+
+
+    def test_memory_budget(self):
+        size = _snapshot(1).size
+        cache = SnapshotCache(max_memory=size * 2)
+        cache.put(_snapshot(1))
+        cache.put(_snapshot(2))
+        self.assertIsNotNone(cache.get(1, _STAMP))
+        cache.put(_snapshot(3))
+        self.assertEqual(len(cache), 2)
+        self.assertIsNotNone(cache.get(1, _STAMP))
+        self.assertIsNone(cache.get(2, _STAMP))
+        self.assertIsNotNone(cache.get(3, _STAMP))
+        self.assertLessEqual(cache.memory_used, cache.max_memory)
+
+        cache.put(_snapshot(4, size=1000))
+        self.assertIsNone(cache.get(4, _STAMP))
+
+
+    def test_attach_graphs(self):
+        cache = SnapshotCache(max_memory=1024 * 1024)
+        snapshot = _snapshot(1)
+        cache.put(snapshot)
+        used = cache.memory_used
+        snapshot.attach_graphs({'term_raw': None}, 10)
+        self.assertEqual(snapshot.graphs, {'term_raw': None})
+        snapshot.attach_graphs({}, 10)
+        self.assertEqual(snapshot.graphs, {'term_raw': None})
+        cache.put(snapshot)
+        self.assertEqual(cache.memory_used, snapshot.size)
+        self.assertGreater(cache.memory_used, used)
+
+
+    def test_generation(self):
+        cache = SnapshotCache(max_memory=1024 * 1024)
+        generation = cache.generation(1)
+        cache.touch(1)
+        cache.put(_snapshot(1), generation)
+        self.assertIsNone(cache.get(1, _STAMP))
+        cache.put(_snapshot(1), cache.generation(1))
+        self.assertIsNotNone(cache.get(1, _STAMP))
+        self.assertEqual(cache.generation(2), 0)
+
+
+    def test_disabled(self):
+        cache = SnapshotCache(max_memory=0)
+        self.assertFalse(cache.is_enabled)
+        cache.put(_snapshot(1))
+        self.assertIsNone(cache.get(1, _STAMP))
@@ -2,7 +2,16 @@
 import re
 import unittest
 
-from apps.rsform.utils import apply_pattern, filename_for_schema, fix_old_references
+from apps.rsform.utils import (
+    apply_pattern,
+    extract_entities,
+    extract_globals,
+    extract_references,
+    filename_for_schema,
+    fix_old_references,
+    replace_entities,
+    replace_globals
+)
 
 
 class TestUtils(unittest.TestCase):
@@ -16,6 +25,41 @@ class TestUtils(unittest.TestCase):
         self.assertEqual(apply_pattern('X20', mapping, pattern), 'X20')
         self.assertEqual(apply_pattern('X101', mapping, pattern), 'X20')
         self.assertEqual(apply_pattern('asdf X101 asdf', mapping, pattern), 'asdf X20 asdf')
+        self.assertEqual(apply_pattern('X101 X1 X101', mapping, pattern), 'X20 X1 X20')
+        self.assertEqual(apply_pattern('X101', {}, pattern), 'X101')
+
+
+    def test_extract_globals(self):
+        self.assertEqual(extract_globals(''), set())
+        self.assertEqual(extract_globals('X1∪X2∪X1'), {'X1', 'X2'})
+        result = extract_globals('D1≔X1')
+        result.add('X2')
+        self.assertEqual(extract_globals('D1≔X1'), {'D1', 'X1'})
+
+
+    def test_extract_entities(self):
+        self.assertEqual(extract_entities(''), [])
+        self.assertEqual(extract_entities('@{X2|nomn,sing} @{X1|datv,sing} @{X2|nomn,plur}'), ['X2', 'X1'])
+        self.assertEqual(extract_entities('@{-1|сказать} @{1|думать}'), [])
+        result = extract_entities('@{X1|nomn,sing}')
+        result.append('X2')
+        self.assertEqual(extract_entities('@{X1|nomn,sing}'), ['X1'])
+
+
+    def test_extract_references(self):
+        self.assertEqual(extract_references('', '', '', ''), set())
+        self.assertEqual(
+            extract_references('X1\\S1', 'ℬ(X2)', '@{D1|nomn,sing}', '@{X1|nomn,sing} X3'),
+            {'X1', 'S1', 'X2', 'D1'}
+        )
+
+
+    def test_replace_references(self):
+        mapping = {'X1': 'X3', 'S1': 'S2'}
+        self.assertEqual(replace_globals('X1∪X11∪S1', mapping), 'X3∪X11∪S2')
+        self.assertEqual(replace_globals('X2∪X11', mapping), 'X2∪X11')
+        self.assertEqual(replace_entities('@{X1|nomn,sing} X1 @{X11|nomn,sing}', mapping), '@{X3|nomn,sing} X1 @{X11|nomn,sing}')
+        self.assertEqual(replace_entities('@{X2|nomn,sing}', mapping), '@{X2|nomn,sing}')
 
 
     def test_fix_old_references(self):
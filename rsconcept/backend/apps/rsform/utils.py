@@ -1,45 +1,38 @@
 ''' Utility functions '''
 import re
+from functools import lru_cache
 
 # Name for JSON inside Exteor files archive
 EXTEOR_INNER_FILENAME = 'document.json'
 
 # Old style reference pattern
 _REF_OLD_PATTERN = re.compile(r'@{([^0-9\-][^\}\|\{]*?)\|([^\}\|\{]*?)\|([^\}\|\{]*?)}')
-_RE_GLOBALS = r'[XCSADFPTN]\d+'  # cspell:disable-line
 _REF_ENTITY_PATTERN = re.compile(r'@{([^0-9\-].*?)\|.*?}')
 _GLOBAL_ID_PATTERN = re.compile(r'([XCSADFPTN][0-9]+)')  # cspell:disable-line
 
+# Number of distinct texts with memoized scan results
+_SCAN_CACHE_SIZE = 16384
+
 
 def apply_pattern(text: str, mapping: dict[str, str], pattern: re.Pattern[str]) -> str:
     ''' Apply mapping to matching in regular expression pattern subgroup 1 '''
-    if text == '' or pattern == '':
+    if text == '' or not mapping:
         return text
-    pos_input: int = 0
-    output: str = ''
-    for segment in re.finditer(pattern, text):
+
+    def _replace(segment: re.Match[str]) -> str:
         entity = segment.group(1)
-        if entity in mapping:
-            output += text[pos_input: segment.start(1)]
-            output += mapping[entity]
-            output += text[segment.end(1): segment.end(0)]
-            pos_input = segment.end(0)
-    output += text[pos_input: len(text)]
-    return output
+        if entity not in mapping:
+            return segment.group(0)
+        return text[segment.start(0): segment.start(1)] + mapping[entity] + text[segment.end(1): segment.end(0)]
+
+    return pattern.sub(_replace, text)
 
 
 def fix_old_references(text: str) -> str:
     ''' Fix reference format: @{X1|nomn|sing} -> {X1|nomn,sing} '''
     if text == '':
         return text
-    pos_input: int = 0
-    output: str = ''
-    for segment in re.finditer(_REF_OLD_PATTERN, text):
-        output += text[pos_input: segment.start(0)]
-        output += f'@{{{segment.group(1)}|{segment.group(2)},{segment.group(3)}}}'
-        pos_input = segment.end(0)
-    output += text[pos_input: len(text)]
-    return output
+    return _REF_OLD_PATTERN.sub(lambda segment: f'@{{{segment.group(1)}|{segment.group(2)},{segment.group(3)}}}', text)
 
 
 def filename_for_schema(alias: str) -> str:
@@ -54,26 +47,46 @@ def filename_for_schema(alias: str) -> str:
     return safe + '.trs'
 
 
+@lru_cache(maxsize=_SCAN_CACHE_SIZE)
+def scan_globals(expression: str) -> frozenset[str]:
+    ''' Memoized set of global aliases in expression. Result is shared and must not be modified. '''
+    return frozenset(_GLOBAL_ID_PATTERN.findall(expression))
+
+
+@lru_cache(maxsize=_SCAN_CACHE_SIZE)
+def scan_entities(text: str) -> tuple[str, ...]:
+    ''' Memoized ordered unique entities referenced in text. Result is shared and must not be modified. '''
+    return tuple(dict.fromkeys(_REF_ENTITY_PATTERN.findall(text)))
+
+
 def extract_globals(expression: str) -> set[str]:
     ''' Extract all global aliases from expression. '''
-    return set(re.findall(_RE_GLOBALS, expression))
+    return set(scan_globals(expression))
 
 
 def extract_entities(text: str) -> list[str]:
     ''' Extract list of entities that are referenced. '''
-    result: list[str] = []
-    for segment in re.finditer(_REF_ENTITY_PATTERN, text):
-        entity = segment.group(1)
-        if entity not in result:
-            result.append(entity)
+    return list(scan_entities(text))
+
+
+def extract_references(expression: str, typification: str, term: str, definition: str) -> set[str]:
+    ''' Extract all aliases referenced by constituenta text fields. '''
+    result = set(scan_globals(expression))
+    result.update(scan_globals(typification))
+    result.update(scan_entities(term))
+    result.update(scan_entities(definition))
     return result
 
 
 def replace_globals(expression: str, mapping: dict[str, str]) -> str:
     ''' Replace all global aliases in expression. '''
+    if not mapping or scan_globals(expression).isdisjoint(mapping):
+        return expression
     return apply_pattern(expression, mapping, _GLOBAL_ID_PATTERN)
 
 
 def replace_entities(expression: str, mapping: dict[str, str]) -> str:
     ''' Replace all entity references in expression. '''
+    if not mapping or mapping.keys().isdisjoint(scan_entities(expression)):
+        return expression
     return apply_pattern(expression, mapping, _REF_ENTITY_PATTERN)
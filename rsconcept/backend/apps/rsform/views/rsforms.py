@@ -13,6 +13,9 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
 
+from apps.jobs.runner import run_inline
+from apps.jobs.serializers import JobSerializer
+from apps.jobs.services import defer, respond_accepted
 from apps.library.models import LibraryItem, LibraryItemType
 from apps.library.serializers import LibraryItemSerializer
 from apps.library.services.context_search import get_accessible_items_queryset
@@ -21,8 +24,10 @@ from apps.users.models import User
 from shared import messages as msg
 from shared import permissions, utility
 from shared.concurrency import ConcurrencyMixin
+from shared.conditional import ItemValidator
 from shared.utility import ZipMemberTooLarge
 
+from .. import jobs
 from .. import models as m
 from .. import serializers as s
 from .. import utils
@@ -98,7 +103,7 @@ class RSFormViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPIV
         serializer = s.RSFormImportJsonSerializer(data=request.data)
         serializer.is_valid(raise_exception=True)
 
-        with transaction.atomic():
+        with transaction.atomic(), PropagationFacade().batch() as propagation:
             validated = serializer.validated_data
             version_data = {
                 'title': validated['title'],
@@ -108,9 +113,9 @@ class RSFormViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPIV
                 'attribution': validated.get('attribution', []),
             }
             data = s.RSFormSerializer(item).to_versioned_data() | version_data
-            PropagationFacade().before_delete_schema(item.pk)
+            propagation.before_delete_schema(item.pk)
             s.RSFormSerializer(item).restore_from_version(data)
-            PropagationFacade().after_create_cst(
+            propagation.after_create_cst(
                 list(m.RSFormCached(item.pk).constituentsQ().order_by('order'))
             )
             item.save(update_fields=['time_update'])
@@ -218,8 +223,7 @@ class RSFormViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPIV
         cst = cast(m.Constituenta, serializer.validated_data['target'])
         data = serializer.validated_data['item_data']
 
-        with transaction.atomic():
-            propagation = PropagationFacade()
+        with transaction.atomic(), PropagationFacade().batch() as propagation:
             schema = propagation.get_schema(item.pk)
             old_data = schema.update_cst(cst.pk, data)
             propagation.after_update_cst(item.pk, cst.pk, data, old_data)
@@ -231,7 +235,7 @@ class RSFormViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPIV
                 if changed_type:
                     cst.cst_type = data['cst_type']
                 cst.save()
-                schema.apply_mapping(mapping=mapping, change_aliases=False)
+                schema.apply_mapping(mapping=mapping, change_aliases=True)
                 if changed_type:
                     propagation.after_change_cst_type(item.pk, cst.pk, cast(m.CstType, cst.cst_type))
             item.save(update_fields=['time_update'])
@@ -298,6 +302,7 @@ class RSFormViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPIV
                 substitutions.append((original, replacement))
             PropagationFacade().before_substitute(item.pk, substitutions)
             schema.substitute(substitutions)
+            m.OrderManager(m.RSFormCached(item.pk)).place(replacement.pk for _, replacement in substitutions)
             item.save(update_fields=['time_update'])
 
         return Response(
@@ -535,6 +540,7 @@ class RSFormViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPIV
         request=s.RSFormUploadSerializer,
         responses={
             c.HTTP_200_OK: s.RSFormParseSerializer,
+            c.HTTP_202_ACCEPTED: JobSerializer,
             c.HTTP_400_BAD_REQUEST: None,
             c.HTTP_403_FORBIDDEN: None,
             c.HTTP_404_NOT_FOUND: None
@@ -561,22 +567,15 @@ class RSFormViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPIV
                 data={'file': msg.exteorFileCorrupted()}
             )
         data['id'] = item.pk
-        if Inheritance.objects.filter(child__schema_id=item.pk).exists():
-            raise ValidationError({
-                'data': msg.importIntoInherited()
-            })
-
-        serializer = s.RSFormTRSSerializer(data=data, context={'load_meta': load_metadata})
-        serializer.is_valid(raise_exception=True)
-
-        with transaction.atomic():
-            PropagationFacade().before_delete_schema(item.pk)
-            result: m.RSFormCached = serializer.save()
-            PropagationFacade().after_create_cst(list(result.constituentsQ().order_by('order')))
+        jobs.validate_load(item)
+        params = {'data': data, 'load_metadata': load_metadata}
+        job = defer(jobs.LOAD_TRS, params, request.user, jobs.estimate_load(data))
+        if job is not None:
+            return respond_accepted(job)
 
         return Response(
             status=c.HTTP_200_OK,
-            data=s.RSFormParseSerializer(LibraryItem.objects.get(pk=result.pk)).data
+            data=run_inline(jobs.LOAD_TRS, params)
         )
 
     @extend_schema(
@@ -609,10 +608,9 @@ class RSFormViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPIV
     @action(detail=True, methods=['get'], url_path='details')
     def details(self, request: Request, pk) -> HttpResponse:
         ''' Endpoint: Detailed schema view including statuses and parse. '''
-        serializer = s.RSFormParseSerializer(self.get_object(), context={'request': request})
-        return Response(
-            status=c.HTTP_200_OK,
-            data=serializer.data
+        item = self._get_item()
+        return ItemValidator(request, item, s.RSFormSerializer.conditional_rows(item)).respond(
+            lambda: s.RSFormParseSerializer(item, context={'request': request}).data
         )
 
     @extend_schema(
@@ -671,7 +669,10 @@ def create_rsform_from_sandbox(request: Request) -> HttpResponse:
     summary='Inline synthesis: merge one schema into another',
     tags=['Operations'],
     request=s.InlineSynthesisSerializer,
-    responses={c.HTTP_200_OK: s.RSFormParseSerializer}
+    responses={
+        c.HTTP_200_OK: s.RSFormParseSerializer,
+        c.HTTP_202_ACCEPTED: JobSerializer
+    }
 )
 @api_view(['PATCH'])
 @permission_classes([permissions.GlobalUser])
@@ -686,31 +687,20 @@ def inline_synthesis(request: Request) -> HttpResponse:
     if not permissions.can_read_library_item(request.user, source):
         raise PermissionDenied()
     target_ids = [item.pk for item in target_cst] if target_cst else None
-
-    with transaction.atomic():
-        propagation = PropagationFacade()
-        receiver = propagation.get_schema(item.pk)
-        new_items = receiver.insert_from(source.pk, target_ids)
-        target_ids = [item[0].pk for item in new_items]
-        mapping_ids = {cst.pk: new_cst for (cst, new_cst) in new_items}
-        propagation.after_create_cst([item[1] for item in new_items])
-
-        substitutions: list[tuple[m.Constituenta, m.Constituenta]] = []
-        for substitution in serializer.validated_data['substitutions']:
-            original = cast(m.Constituenta, substitution['original'])
-            replacement = cast(m.Constituenta, substitution['substitution'])
-            if original.pk in target_ids:
-                original = mapping_ids[original.pk]
-            else:
-                replacement = mapping_ids[replacement.pk]
-            substitutions.append((original, replacement))
-
-        propagation.before_substitute(receiver.pk, substitutions)
-        receiver.substitute(substitutions)
-        receiver.resolve_all_text()
-        item.save(update_fields=['time_update'])
+    params = {
+        'receiver': item.pk,
+        'source': source.pk,
+        'items': target_ids,
+        'substitutions': [
+            [substitution['original'].pk, substitution['substitution'].pk]
+            for substitution in serializer.validated_data['substitutions']
+        ]
+    }
+    job = defer(jobs.INLINE_SYNTHESIS, params, request.user, jobs.estimate_inline(source, target_ids))
+    if job is not None:
+        return respond_accepted(job)
 
     return Response(
         status=c.HTTP_200_OK,
-        data=s.RSFormParseSerializer(item).data
+        data=run_inline(jobs.INLINE_SYNTHESIS, params)
     )
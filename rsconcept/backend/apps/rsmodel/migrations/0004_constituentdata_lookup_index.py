@@ -0,0 +1,19 @@
+# Generated by Django 6.0.4 on 2026-10-18 15:43
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('library', '0015_lookup_indexes'),
+        ('rsform', '0011_constituenta_lookup_indexes'),
+        ('rsmodel', '0003_constituentdata_type'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='constituentdata',
+            index=models.Index(fields=['model', 'constituent'], name='rsmodel_con_model_i_4cf787_idx'),
+        ),
+    ]
@@ -1,5 +1,5 @@
 ''' Models: RSModel constituent binding. '''
-from django.db.models import CASCADE, ForeignKey, JSONField, Model, TextField
+from django.db.models import CASCADE, ForeignKey, Index, JSONField, Model, TextField
 
 
 class ConstituentData(Model):
@@ -29,6 +29,7 @@ class ConstituentData(Model):
         ''' Model metadata. '''
         verbose_name = 'Конституента модели'
         verbose_name_plural = 'Конституенты модели'
+        indexes = [Index(fields=['model', 'constituent'])]
 
     def __str__(self) -> str:
         return f'Model {self.model_id} / Cst {self.constituent_id}'
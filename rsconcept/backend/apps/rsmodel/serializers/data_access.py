@@ -2,6 +2,7 @@
 from typing import cast
 
 from django.db import transaction
+from django.db.models import QuerySet
 from rest_framework import serializers
 from rest_framework.serializers import PrimaryKeyRelatedField as PKField
 
@@ -14,6 +15,7 @@ from apps.rsform.serializers.io_files import (
     create_rsform_from_sandbox_data
 )
 from shared import messages as msg
+from shared.conditional import validator_rows
 from shared.serializers import (
     PortalImportJsonMetadataSerializer,
     StrictModelSerializer,
@@ -47,6 +49,11 @@ class RSModelSerializer(StrictModelSerializer):
         model = LibraryItem
         fields = '__all__'
 
+    @staticmethod
+    def conditional_rows(instance: LibraryItem) -> list[QuerySet]:
+        ''' Validator rows for bound schema which constituents determine model items. '''
+        return [validator_rows(LibraryItem.objects.filter(base_schema__model=instance), 'schema', stamp='time_update')]
+
     def get_schema(self, instance: LibraryItem) -> int | None:
         model = RSModel.objects.get(model=instance)
         return model.schema_id
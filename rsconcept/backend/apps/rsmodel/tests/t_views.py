@@ -1,6 +1,9 @@
 ''' Testing API: RSModels. '''
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+
 from apps.library.models import AccessPolicy, LibraryItem, LocationHead
-from apps.rsform.models import CstType, RSForm
+from apps.rsform.models import Constituenta, CstType, RSForm
 from apps.rsmodel.models import ConstituentData, RSModel
 from shared.EndpointTester import EndpointTester, decl_endpoint
 from shared.portal_json import PORTAL_JSON_CONTRACT_VERSION
@@ -41,6 +44,22 @@ class TestRSModelViewset(EndpointTester):
         self.assertEqual(items[0]['id'], x1.pk)
         self.assertEqual(items[0]['value'], cst_data)
 
+    @decl_endpoint('/api/models/{item}/details', method='get')
+    def test_details_not_modified(self):
+        x1 = self.schema.insert_last(alias='X1')
+        ConstituentData.objects.create(model=self.rsmodel.model, constituent=x1, type='basic', data={'1': 'Петя'})
+        response = self.executeOK(item=self.model_id)
+        etag = response.headers['ETag']
+
+        with CaptureQueriesContext(connection) as queries:
+            self.executeNotModified(item=self.model_id, headers={'If-None-Match': etag})
+        tables = [Constituenta._meta.db_table, ConstituentData._meta.db_table]
+        self.assertFalse([query for query in queries.captured_queries if any(name in query['sql'] for name in tables)])
+
+        self.schema.model.save(update_fields=['time_update'])
+        self.executeOK(item=self.model_id, headers={'If-None-Match': etag})
+
+
     @decl_endpoint('/api/models/{item}/set-value', method='post')
     def test_set_value(self):
         x1 = self.schema.insert_last(alias='X1')
@@ -2,6 +2,7 @@
 from typing import cast
 
 from django.db import transaction
+from django.http import HttpResponse
 from drf_spectacular.utils import extend_schema, extend_schema_view
 from rest_framework import generics
 from rest_framework import status as c
@@ -11,7 +12,7 @@ from rest_framework.request import Request
 from rest_framework.response import Response
 from rest_framework.serializers import ValidationError
 
-from apps.library.models import LibraryItem, LibraryItemType
+from apps.library.models import LibraryItem, LibraryItemType, SearchIndexState
 from apps.library.serializers import LibraryItemBaseNonStrictSerializer, LibraryItemSerializer
 from apps.library.services.context_search import get_accessible_items_queryset
 from apps.rsform.models import Constituenta
@@ -19,6 +20,7 @@ from apps.rsform.serializers import CstListSerializer
 from apps.users.models import User
 from shared import permissions
 from shared.concurrency import ConcurrencyMixin
+from shared.conditional import ItemValidator
 
 from .. import models as m
 from .. import serializers as s
@@ -75,12 +77,11 @@ class RSModelViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPI
         }
     )
     @action(detail=True, methods=['get'], url_path='details')
-    def details(self, request: Request, pk) -> Response:
+    def details(self, request: Request, pk) -> HttpResponse:
         ''' Endpoint: Detailed model view. '''
-        serializer = s.RSModelSerializer(self._get_item(), context={'request': request})
-        return Response(
-            status=c.HTTP_200_OK,
-            data=serializer.data
+        model = self._get_item()
+        return ItemValidator(request, model, s.RSModelSerializer.conditional_rows(model)).respond(
+            lambda: s.RSModelSerializer(model, context={'request': request}).data
         )
 
     @extend_schema(
@@ -144,6 +145,7 @@ class RSModelViewSet(ConcurrencyMixin, viewsets.GenericViewSet, generics.ListAPI
             m.ConstituentData.objects.filter(model=item).delete()
             if bindings:
                 m.ConstituentData.objects.bulk_create(bindings)
+            SearchIndexState.invalidate([item.pk])
             item.save(update_fields=['time_update'])
 
         return Response(
@@ -14,6 +14,7 @@ import logging
 import os
 import sys
 import tomllib
+import warnings
 from pathlib import Path
 
 import sentry_sdk
@@ -41,6 +42,21 @@ def _get_float(key: str, default: float) -> float:
     return float(os.environ.get(key, default))
 
 
+def _get_thresholds(key: str) -> dict[str, float]:
+    result: dict[str, float] = {}
+    for entry in _get_list(key, ''):
+        name, _, threshold = entry.rpartition(':')
+        try:
+            value = float(threshold)
+        except ValueError:
+            value = None
+        if not name or value is None:
+            warnings.warn(f'{key}: ignored malformed entry "{entry}", expected "view:ms"')
+            continue
+        result[name] = value
+    return result
+
+
 def _get_sentry_release() -> str | None:
     env_release = os.environ.get('SENTRY_RELEASE')
     if env_release:
@@ -167,6 +183,7 @@ INSTALLED_APPS = [
     'apps.oss',
     'apps.rsmodel',
     'apps.prompt',
+    'apps.jobs',
 
     'drf_spectacular',
     'drf_spectacular_sidecar',
@@ -228,6 +245,7 @@ if _domain != '':
 
 
 MIDDLEWARE = [
+    'shared.instrumentation.RequestInstrumentationMiddleware',
     'django.middleware.gzip.GZipMiddleware',
     'django.middleware.security.SecurityMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
@@ -346,6 +364,36 @@ USE_TZ = True
 
 DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
+# Shared RSForm snapshots: backend is a Django cache alias for sharing between processes, '' - process memory only
+RSFORM_SNAPSHOT_BACKEND = os.environ.get('RSFORM_SNAPSHOT_BACKEND', '')
+RSFORM_SNAPSHOT_MAX_MEMORY = int(os.environ.get('RSFORM_SNAPSHOT_MAX_MEMORY', str(64 * 1024 * 1024)))
+RSFORM_SNAPSHOT_TIMEOUT = 24 * 60 * 60
+
+# Library context search: use trigram index to select candidates before scanning texts.
+# Off by default for databases with native search backend (pg_trgm, FTS5), index only adds write overhead there
+_NATIVE_SEARCH_ENGINES = {'django.db.backends.postgresql', 'django.db.backends.sqlite3'}
+LIBRARY_SEARCH_INDEX = _get_bool('LIBRARY_SEARCH_INDEX', DATABASES['default']['ENGINE'] not in _NATIVE_SEARCH_ENGINES)
+
+# Background jobs: requests with work estimate (constituents) at threshold or above are queued, 0 - always inline
+# Queue is processed by `manage.py run_jobs`
+JOBS_ASYNC_THRESHOLD = int(os.environ.get('JOBS_ASYNC_THRESHOLD', '0'))
+JOBS_WORKERS = int(os.environ.get('JOBS_WORKERS', '2'))
+JOBS_POLL_INTERVAL = _get_float('JOBS_POLL_INTERVAL', 1.0)
+# Seconds after which running job is considered abandoned by crashed worker and failed on start of worker on same host
+JOBS_STALE_TIMEOUT = _get_float('JOBS_STALE_TIMEOUT', 3600.0)
+
+# File export: zip deflate level 1-9, 0 - store without compression; compact JSON omits indentation
+# Defaults produce files in format written by Exteor
+EXPORT_ZIP_LEVEL = int(os.environ.get('EXPORT_ZIP_LEVEL', '0'))
+EXPORT_JSON_COMPACT = _get_bool('EXPORT_JSON_COMPACT', False)
+
+# Request instrumentation: query count, DB time and Server-Timing header per request.
+# Slow request thresholds in ms: default and per view name, e.g. 'rsform-detail:200;oss-detail:300'
+REQUEST_INSTRUMENTATION = _get_bool('REQUEST_INSTRUMENTATION', False)
+REQUEST_INSTRUMENTATION_REPEAT_THRESHOLD = int(os.environ.get('REQUEST_INSTRUMENTATION_REPEAT_THRESHOLD', '10'))
+REQUEST_INSTRUMENTATION_SLOW_MS = _get_float('REQUEST_INSTRUMENTATION_SLOW_MS', 500.0)
+REQUEST_INSTRUMENTATION_SLOW_VIEWS = _get_thresholds('REQUEST_INSTRUMENTATION_SLOW_VIEWS')
+
 
 # Graph model settings for visualization
 # https://django-extensions.readthedocs.io/en/latest/graph_models.html
@@ -358,10 +406,28 @@ GRAPH_MODELS = {
 LOGGING = {
     'version': 1,
     'disable_existing_loggers': False,
+    'filters': {
+        'slow_requests': {
+            '()': 'shared.instrumentation.SlowRequestFilter',
+            'threshold_ms': REQUEST_INSTRUMENTATION_SLOW_MS,
+            'views': REQUEST_INSTRUMENTATION_SLOW_VIEWS,
+        },
+    },
     'handlers': {
         'console': {
             'class': 'logging.StreamHandler',
         },
+        'instrumentation': {
+            'class': 'logging.StreamHandler',
+            'filters': ['slow_requests'],
+        },
+    },
+    'loggers': {
+        'shared.instrumentation': {
+            'handlers': ['instrumentation'],
+            'level': 'INFO',
+            'propagate': False,
+        },
     },
     'root': {
         'handlers': ['console'],
@@ -83,11 +83,13 @@ class EndpointTester(DBTester):
             self.endpoint = _resolve_url(self.endpoint_mask, **kwargs)
 
     def get(self, endpoint: str = '', **kwargs):
+        headers = kwargs.pop('headers', None)
+        options = {'headers': headers} if headers else {}
         if endpoint != '':
-            return self.client.get(endpoint)
+            return self.client.get(endpoint, **options)
         else:
             self.set_params(**kwargs)
-            return self.client.get(self.endpoint)
+            return self.client.get(self.endpoint, **options)
 
     def patch(self, data=None, **kwargs):
         headers = kwargs.pop('headers', None)
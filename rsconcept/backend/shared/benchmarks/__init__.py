@@ -0,0 +1,9 @@
+''' Performance benchmarks.
+
+Benchmarks are not part of the regular test suite. Run them explicitly, e.g.:
+    python manage.py test shared.benchmarks.bench_graph
+
+Endpoint scenarios are timed against a generated library in the configured database (DEBUG or --force required):
+    python manage.py generate_library --scale medium
+    python manage.py run_benchmarks --output results.json --baseline baseline.json
+'''
@@ -0,0 +1,67 @@
+''' Benchmark: OSS clone. '''
+# pylint: disable=duplicate-code
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.library.services import clone_oss
+from apps.oss.models import Inheritance, OperationSchema, OperationType
+from apps.rsform.models import Constituenta, CstType, RSForm
+
+from .utils import report
+
+# (input operations, constituents per input schema)
+SIZES = [(4, 100), (16, 100), (16, 500), (64, 500)]
+
+
+def _create_oss(inputs: int, size: int, owner: User) -> OperationSchema:
+    ''' Pairs of input schemas joined by synthesis operations inside blocks. '''
+    oss = OperationSchema.create(title=f'Bench {inputs}x{size}', alias='BOSS', owner=owner, location='/U/bench')
+    operations = []
+    for index in range(inputs):
+        schema = RSForm.create(title=f'Input {index}', alias=f'I{index}', owner=owner)
+        Constituenta.objects.bulk_create([
+            Constituenta(
+                schema=schema.model,
+                order=order,
+                alias=f'X{order + 1}' if order == 0 else f'D{order + 1}',
+                cst_type=CstType.BASE if order == 0 else CstType.TERM,
+                definition_formal='' if order == 0 else f'ℬ(X1) ∪ D{order}',
+                term_raw=f'термин {order}'
+            )
+            for order in range(size)
+        ])
+        operations.append(oss.create_operation(
+            alias=f'I{index}',
+            operation_type=OperationType.INPUT,
+            result=schema.model
+        ))
+    for index in range(0, inputs, 2):
+        block = oss.create_block(title=f'Block {index}')
+        synthesis = oss.create_operation(alias=f'S{index}', operation_type=OperationType.SYNTHESIS, parent=block)
+        oss.set_arguments(synthesis.pk, operations[index:index + 2])
+        oss.execute_operation(synthesis)
+    return oss
+
+
+class BenchClone(TestCase):
+    ''' Clone time and query count versus OSS size. '''
+
+    def test_clone_oss(self):
+        owner = User.objects.create(username='bench')
+        rows = []
+        for inputs, size in SIZES:
+            oss = _create_oss(inputs, size, owner)
+            oss.refresh_from_db()
+            item_data = {'title': 'Clone', 'location': f'/U/clone-{inputs}-{size}'}
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                clone = clone_oss(oss.model, owner, item_data)
+            elapsed = time.perf_counter() - start
+            constituents = Constituenta.objects.filter(schema__producer__oss=clone).distinct().count()
+            inheritance = Inheritance.objects.filter(operation__oss=clone).count()
+            rows.append([inputs * 3 // 2, constituents, inheritance, elapsed, len(queries)])
+        report('OSS clone', ['operations', 'csts', 'inheritance', 'time', 'queries'], rows)
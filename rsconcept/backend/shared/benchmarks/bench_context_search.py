@@ -0,0 +1,95 @@
+''' Benchmark: Library context search. '''
+# pylint: disable=duplicate-code
+import random
+import time
+from unittest import mock
+
+from django.test import TestCase, override_settings
+
+from apps.library.models import LibraryItem, LibraryItemType, LocationHead
+from apps.library.services.context_search import rank_library_context, search_library_context
+from apps.library.services.search_backends import ScanBackend
+from apps.library.services.search_index import refresh_index
+from apps.rsform.models import Constituenta, CstType
+from apps.users.models import User
+
+from .utils import measure, report
+
+SCHEMAS = 200
+CST_PER_SCHEMA = 500
+
+VOCABULARY = [
+    'множество', 'отношение', 'функция', 'элемент', 'подмножество', 'декартово', 'произведение',
+    'булеан', 'проекция', 'операция', 'терм', 'аксиома', 'объединение', 'пересечение', 'вид',
+    'структура', 'ступень', 'родовая', 'конституента', 'понятие', 'определение', 'система',
+]
+QUERIES = [
+    ('rare', 'редкийтермин'),
+    ('common', 'множество'),
+    ('phrase', 'декартово произведение'),
+    ('absent', 'отсутствующее'),
+]
+
+
+def _phrase(generator: random.Random, words: int) -> str:
+    return ' '.join(generator.choice(VOCABULARY) for _ in range(words))
+
+
+def _create_corpus(owner: User) -> None:
+    ''' Schemas with vocabulary based texts and one rare term in a few schemas. '''
+    generator = random.Random(42)
+    for index in range(SCHEMAS):
+        schema = LibraryItem.objects.create(
+            item_type=LibraryItemType.RSFORM,
+            title=f'Schema {index}',
+            alias=f'S{index}',
+            owner=owner,
+            location=LocationHead.USER
+        )
+        Constituenta.objects.bulk_create([
+            Constituenta(
+                schema=schema,
+                order=order,
+                alias=f'D{order + 1}',
+                cst_type=CstType.TERM,
+                definition_formal=f'ℬ(X1) ∪ D{order}',
+                term_resolved='редкийтермин' if index % 50 == 0 and order == 0 else _phrase(generator, 2),
+                definition_resolved=_phrase(generator, 8),
+                convention=_phrase(generator, 3) if order % 10 == 0 else ''
+            )
+            for order in range(CST_PER_SCHEMA)
+        ], batch_size=5000)
+
+
+@override_settings(LIBRARY_SEARCH_INDEX=True)
+class BenchContextSearch(TestCase):
+    ''' Search time of reference scan, database backend, trigram index and ranked hits. '''
+
+    def test_context_search(self):
+        owner = User.objects.create(username='bench')
+        _create_corpus(owner)
+
+        start = time.perf_counter()
+        refresh_index(LibraryItem.objects.all())
+        build_time = time.perf_counter() - start
+
+        rows = []
+        for name, query in QUERIES:
+            with override_settings(LIBRARY_SEARCH_INDEX=False):
+                with mock.patch(
+                    'apps.library.services.context_search.get_search_backend',
+                    return_value=ScanBackend()
+                ):
+                    expected = search_library_context(owner, query)
+                    scan = measure(lambda query=query: search_library_context(owner, query))
+                self.assertEqual(search_library_context(owner, query), expected)
+                native = measure(lambda query=query: search_library_context(owner, query))
+            self.assertEqual(search_library_context(owner, query), expected)
+            indexed = measure(lambda query=query: search_library_context(owner, query))
+            ranked = measure(lambda query=query: rank_library_context(owner, query))
+            rows.append([name, len(expected), scan, native, indexed, ranked])
+        report(
+            f'Context search: {SCHEMAS * CST_PER_SCHEMA} csts, index build {build_time:.1f}s',
+            ['query', 'items', 'scan', 'database', 'index + database', 'ranked'],
+            rows
+        )
@@ -0,0 +1,157 @@
+''' Benchmark: dependency graph engine. '''
+# pylint: disable=duplicate-code
+import copy
+import random
+import unittest
+
+from apps.rsform.graph import Graph
+
+from .utils import measure, report, synthetic_dependencies
+
+SIZES = [1000, 5000, 10000]
+SORT_SIZES = [250, 500, 1000]
+
+
+class _ListGraph:
+    ''' Reference dict-of-lists implementation replaced by Graph, kept for comparison. '''
+
+    def __init__(self, graph: dict[int, list[int]]) -> None:
+        self.outputs: dict[int, list[int]] = {node: [] for node in graph}
+        self.inputs: dict[int, list[int]] = {node: [] for node in graph}
+        for parent, children in graph.items():
+            for child in children:
+                self.add_edge(parent, child)
+
+    def add_edge(self, src: int, dest: int) -> None:
+        if dest not in self.outputs[src]:
+            self.outputs[src].append(dest)
+        if src not in self.inputs[dest]:
+            self.inputs[dest].append(src)
+
+    def remove_node(self, target: int) -> None:
+        del self.outputs[target]
+        del self.inputs[target]
+        for list_out in self.outputs.values():
+            if target in list_out:
+                list_out.remove(target)
+        for list_in in self.inputs.values():
+            if target in list_in:
+                list_in.remove(target)
+
+    def expand_outputs(self, origin: list[int]) -> list[int]:
+        result: list[int] = []
+        marked: set[int] = set(origin)
+        for node_id in origin:
+            for child_id in self.outputs[node_id]:
+                if child_id not in marked and child_id not in result:
+                    result.append(child_id)
+        position: int = 0
+        while position < len(result):
+            node_id = result[position]
+            position += 1
+            if node_id not in marked:
+                marked.add(node_id)
+                for child_id in self.outputs[node_id]:
+                    if child_id not in marked and child_id not in result:
+                        result.append(child_id)
+        return result
+
+    def topological_order(self) -> list[int]:
+        result: list[int] = []
+        marked: set[int] = set()
+        for node_id in self.outputs.keys():
+            if node_id in marked:
+                continue
+            to_visit: list[int] = [node_id]
+            while to_visit:
+                node = to_visit[-1]
+                if node in marked:
+                    if node not in result:
+                        result.append(node)
+                    to_visit.remove(node)
+                else:
+                    marked.add(node)
+                    for child_id in self.outputs[node]:
+                        if child_id not in marked:
+                            to_visit.append(child_id)
+        result.reverse()
+        return result
+
+    def transitive_closure(self) -> dict[int, list[int]]:
+        result = copy.deepcopy(self.outputs)
+        order = self.topological_order()
+        order.reverse()
+        for node_id in order:
+            for parent in self.inputs[node_id]:
+                result[parent] = result[parent] + [id for id in result[node_id] if id not in result[parent]]
+        return result
+
+    def sort_stable(self, target: list[int]) -> list[int]:
+        reachable = self.transitive_closure()
+        test_set: set[int] = set()
+        result: list[int] = []
+        for node_id in reversed(target):
+            need_move = node_id in test_set
+            test_set = test_set.union(reachable[node_id])
+            if not need_move:
+                result.append(node_id)
+                continue
+            for (index, parent) in enumerate(result):
+                if node_id in reachable[parent]:
+                    if parent in reachable[node_id]:
+                        result.append(node_id)
+                    else:
+                        result.insert(index, node_id)
+                    break
+        result.reverse()
+        return result
+
+
+class BenchGraph(unittest.TestCase):
+    ''' Compare Graph with the reference list-based implementation on synthetic schemas. '''
+
+    def test_graph_operations(self):
+        rows = []
+        for size in SIZES:
+            rows.extend(self._bench_size(size))
+        report('Graph engine', ['nodes', 'operation', 'list-based', 'Graph', 'speedup'], rows)
+
+    def _bench_size(self, size: int) -> list[list]:
+        data = synthetic_dependencies(size)
+        origin = list(range(0, size, max(1, size // 20)))
+        removed = list(range(0, size, max(1, size // 100)))
+        old = _ListGraph(data)
+        new = Graph(data)
+        self.assertEqual(old.topological_order(), new.topological_order())
+        self.assertEqual(old.expand_outputs(origin), new.expand_outputs(origin))
+
+        def remove_nodes(graph) -> None:
+            for node in removed:
+                graph.remove_node(node)
+
+        scenarios = [
+            ('build', lambda: _ListGraph(data), lambda: Graph(data)),
+            ('expand_outputs', lambda: old.expand_outputs(origin), lambda: new.expand_outputs(origin)),
+            ('topological_order', old.topological_order, new.topological_order),
+            ('remove_node x100', lambda: remove_nodes(_ListGraph(data)), lambda: remove_nodes(Graph(data))),
+        ]
+        rows = []
+        for title, action_old, action_new in scenarios:
+            time_old = measure(action_old, repeat=1)
+            time_new = measure(action_new)
+            rows.append([size, title, time_old, time_new, f'{time_old / max(time_new, 1e-9):.1f}x'])
+        return rows
+
+    def test_sort_stable(self):
+        rows = [self._bench_sort(size) for size in SORT_SIZES]
+        report('Graph.sort_stable (shuffled, includes index build)', ['nodes', 'list-based', 'Graph', 'speedup'], rows)
+
+    def _bench_sort(self, size: int) -> list:
+        data = synthetic_dependencies(size)
+        target = list(range(size))
+        random.Random(size).shuffle(target)
+        old = _ListGraph(data)
+        self.assertEqual(old.sort_stable(target), Graph(data).sort_stable(target))
+        time_old = measure(lambda: old.sort_stable(target), repeat=1)
+        time_new = measure(lambda: Graph(data).sort_stable(target))
+        return [size, time_old, time_new, f'{time_old / max(time_new, 1e-9):.1f}x']
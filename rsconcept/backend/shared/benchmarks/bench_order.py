@@ -0,0 +1,139 @@
+''' Benchmark: constituents order maintenance. '''
+# pylint: disable=duplicate-code
+import time
+
+from django.contrib.auth.models import User
+from django.test import TestCase
+
+from apps.rsform.models import ORDER_GAP, Constituenta, CstType, OrderManager, RSForm, RSFormCached
+from apps.rsform.models.SemanticInfo import SemanticInfo
+
+from .utils import measure, report, synthetic_dependencies
+
+SIZES = [100, 1000, 5000]
+RESTORE_SIZES = [1000, 5000, 10000]
+
+# Consecutive inserts at the same position
+INSERTS = 50
+
+
+def _create_schema(size: int, owner: User) -> RSForm:
+    schema = RSForm.create(title=f'Bench {size}', alias='BO', owner=owner)
+    Constituenta.objects.bulk_create([
+        Constituenta(
+            schema=schema.model,
+            order=ORDER_GAP * (order + 1),
+            alias=f'X{order + 1}',
+            cst_type=CstType.BASE
+        )
+        for order in range(size)
+    ])
+    return schema
+
+
+def _touched(schema_id: int, action) -> tuple[float, int]:
+    ''' Run *action* and count constituents with changed order keys. '''
+    before = dict(Constituenta.objects.filter(schema_id=schema_id).values_list('pk', 'order'))
+    start = time.perf_counter()
+    action()
+    elapsed = time.perf_counter() - start
+    after = dict(Constituenta.objects.filter(schema_id=schema_id).values_list('pk', 'order'))
+    return elapsed, sum(1 for pk, order in before.items() if after.get(pk, order) != order)
+
+
+def _measure(size: int, owner: User) -> list:
+    schema = _create_schema(size, owner)
+    csts = list(schema.constituentsQ().order_by('order'))
+    move_time, moved = _touched(schema.model.pk, lambda: schema.move_cst(csts[-3:], 1))
+
+    cached = RSFormCached(schema.model.pk)
+    anchor = csts[size // 2]
+
+    def insert_many():
+        for index in range(INSERTS):
+            cached.create_cst({'alias': f'D{index + 1}', 'cst_type': CstType.TERM}, insert_after=anchor)
+
+    insert_time, inserted = _touched(schema.model.pk, insert_many)
+    return [size, move_time, moved, insert_time / INSERTS, inserted]
+
+
+class BenchOrder(TestCase):
+    ''' Rows rewritten by insert and move versus schema size. '''
+
+    def test_order_updates(self):
+        owner = User.objects.create(username='bench')
+        report(
+            'Order maintenance',
+            ['csts', 'move 3', 'rows', 'insert', f'rows per {INSERTS}'],
+            [_measure(size, owner) for size in SIZES]
+        )
+
+
+def _create_dependent_schema(size: int, owner: User) -> RSForm:
+    schema = RSForm.create(title=f'Bench deps {size}', alias='BD', owner=owner)
+    inputs: dict[int, list[int]] = {node: [] for node in range(size)}
+    for parent, children in synthetic_dependencies(size).items():
+        for child in children:
+            inputs[child].append(parent)
+    Constituenta.objects.bulk_create([
+        Constituenta(
+            schema=schema.model,
+            order=ORDER_GAP * (node + 1),
+            alias=_alias(node, inputs[node]),
+            cst_type=CstType.TERM if inputs[node] else CstType.BASE,
+            definition_formal=' ∪ '.join(_alias(parent, inputs[parent]) for parent in inputs[node])
+        )
+        for node in range(size)
+    ])
+    return schema
+
+
+def _alias(node: int, parents: list[int]) -> str:
+    return f'D{node + 1}' if parents else f'X{node + 1}'
+
+
+def _old_kernel_priority(manager: OrderManager) -> list[Constituenta]:
+    ''' Previous list based priority computation. '''
+    # pylint: disable=protected-access
+    items = manager._items
+    semantic = SemanticInfo(manager._schema)
+    result = [cst for cst in items if cst.cst_type == CstType.BASE]
+    result = result + [cst for cst in items if cst.cst_type == CstType.CONSTANT]
+    result = result + [cst for cst in items if result.count(cst) == 0 and len(semantic.graph.inputs[cst.pk]) == 0]
+    kernel = [
+        cst.pk for cst in items if
+        cst.cst_type in [CstType.STRUCTURED, CstType.AXIOM] or
+        manager._cst_by_ID[semantic.parent(cst.pk)].cst_type == CstType.STRUCTURED
+    ]
+    kernel = kernel + semantic.graph.expand_inputs(kernel)
+    result = result + [cst for cst in items if result.count(cst) == 0 and cst.pk in kernel]
+    result = result + [cst for cst in items if result.count(cst) == 0]
+    return result
+
+
+def _restore(size: int, owner: User) -> list:
+    schema = _create_dependent_schema(size, owner)
+    cached = RSFormCached(schema.model.pk)
+    old_priority = measure(lambda: _old_kernel_priority(OrderManager(cached)), repeat=1)
+    full = measure(lambda: OrderManager(cached).restore_order(), repeat=1)
+
+    csts = list(schema.constituentsQ().order_by('order'))
+    graph = cached.cache.graph_formal
+    target = next(cst for cst in csts[size // 2:] if graph.outputs[cst.pk])
+    schema.move_cst([target], size - 1)
+    cached = RSFormCached(schema.model.pk)
+    cached.cache.ensure_loaded()
+    place_time, placed = _touched(schema.model.pk, lambda: OrderManager(cached).place([target.pk]))
+    return [size, old_priority, full, place_time, placed]
+
+
+class BenchRestoreOrder(TestCase):
+    ''' Full and incremental order restoration versus schema size. '''
+
+    def test_restore_order(self):
+        owner = User.objects.create(username='bench')
+        report(
+            'Restore order',
+            ['csts', 'old priority', 'full restore', 'place 1', 'rows'],
+            [_restore(size, owner) for size in RESTORE_SIZES]
+        )
@@ -0,0 +1,139 @@
+''' Benchmark: OSS cache lookups. '''
+# pylint: disable=duplicate-code
+from functools import partial
+from typing import Optional
+
+from django.test import TestCase
+
+from apps.oss.models import Inheritance, Operation, OperationSchema, OperationType, PropagationContext, Substitution
+from apps.oss.models.OssCache import OssCache
+from apps.rsform.models import RSForm
+
+from .utils import measure, report
+
+OPERATIONS = 100
+SIZES = [100, 1000]
+SUBSTITUTION_STEP = 10
+
+
+class _ListCache:
+    ''' Reference list scanning lookups replaced by OssCache indexes, kept for comparison. '''
+
+    def __init__(self, operations: list[Operation]) -> None:
+        self.operations = operations
+        self.inheritance: dict[int, list[Inheritance]] = {operation.pk: [] for operation in operations}
+        self.substitutions: dict[int, list[Substitution]] = {operation.pk: [] for operation in operations}
+
+    def get_operation(self, schemaID: int) -> Operation:
+        for operation in self.operations:
+            if operation.result_id == schemaID and operation.operation_type != OperationType.REPLICA:
+                return operation
+        raise ValueError(f'Operation for schema {schemaID} not found')
+
+    def get_inheritor(self, parent_cst: int, operation: int) -> Optional[int]:
+        for item in self.inheritance[operation]:
+            if item.parent_id == parent_cst:
+                return item.child_id
+        return None
+
+    def get_successor(self, parent_cst: int, operation: int) -> Optional[int]:
+        for sub in self.substitutions[operation]:
+            if sub.original_id == parent_cst:
+                return self.get_inheritor(sub.substitution_id, operation)
+        return self.get_inheritor(parent_cst, operation)
+
+    def get_substitution_partners(self, cst: int, operation: int) -> list[int]:
+        result = []
+        for sub in self.substitutions[operation]:
+            if sub.original_id == cst:
+                result.append(sub.substitution_id)
+            elif sub.substitution_id == cst:
+                result.append(sub.original_id)
+        return result
+
+
+def _create_operations() -> list[Operation]:
+    oss = OperationSchema.create(title='Bench OSS', alias='BOSS')
+    return Operation.objects.bulk_create([
+        Operation(
+            oss=oss.model,
+            alias=str(index),
+            operation_type=OperationType.SYNTHESIS,
+            result=RSForm.create(alias=f'S{index}', title=f'Schema {index}').model
+        )
+        for index in range(OPERATIONS)
+    ])
+
+
+def _links(operations: list[Operation], size: int) -> tuple[list[Inheritance], list[Substitution]]:
+    ''' Chain of syntheses: constituents of each operation are inherited from the previous one. '''
+    inheritance: list[Inheritance] = []
+    substitutions: list[Substitution] = []
+    for index, operation in enumerate(operations):
+        parents = range(index * size, (index + 1) * size)
+        for parent in parents:
+            inheritance.append(Inheritance(operation_id=operation.pk, parent_id=parent, child_id=parent + size))
+        for parent in parents[:-1:SUBSTITUTION_STEP]:
+            substitutions.append(Substitution(
+                pk=len(substitutions) + 1,
+                operation_id=operation.pk,
+                original_id=parent,
+                substitution_id=parent + 1
+            ))
+    return inheritance, substitutions
+
+
+class BenchOssCache(TestCase):
+    ''' Compare indexed OssCache lookups with list scanning. '''
+
+    def test_oss_cache_lookups(self):
+        operations = _create_operations()
+        rows = []
+        for size in SIZES:
+            rows.extend(self._bench_size(operations, size))
+        report(
+            f'OssCache lookups ({OPERATIONS} operations)',
+            ['csts', 'operation', 'list-based', 'indexed', 'speedup'],
+            rows
+        )
+
+    def _bench_size(self, operations: list[Operation], size: int) -> list[list]:
+        inheritance, substitutions = _links(operations, size)
+        old = _ListCache(operations)
+        cache = OssCache(operations[0].oss_id, PropagationContext())
+        cache.ensure_loaded_subs()
+        for item in inheritance:
+            old.inheritance[item.operation_id].append(item)
+            cache.insert_inheritance(item)
+        for sub in substitutions:
+            old.substitutions[sub.operation_id].append(sub)
+            cache.insert_substitution(sub)
+
+        queries = [
+            (operation.pk, parent)
+            for index, operation in enumerate(operations)
+            for parent in range(index * size, (index + 1) * size)
+        ]
+        schemas = [operation.result_id for operation in operations]
+        for operation_id, parent in queries[::SUBSTITUTION_STEP - 1]:
+            self.assertEqual(old.get_successor(parent, operation_id), cache.get_successor(parent, operation_id))
+            self.assertEqual(
+                sorted(old.get_substitution_partners(parent, operation_id)),
+                sorted(cache.get_substitution_partners(parent, operation_id))
+            )
+
+        cases = [
+            ('get_operation', lambda target: [target.get_operation(schema) for schema in schemas]),
+            ('get_inheritor', lambda target: [target.get_inheritor(parent, op) for op, parent in queries]),
+            ('get_successor', lambda target: [target.get_successor(parent, op) for op, parent in queries]),
+            (
+                'get_substitution_partners',
+                lambda target: [target.get_substitution_partners(parent, op) for op, parent in queries]
+            )
+        ]
+        rows = []
+        for name, action in cases:
+            time_old = measure(partial(action, old), repeat=1)
+            time_new = measure(partial(action, cache))
+            rows.append([size, name, time_old, time_new, f'{time_old / max(time_new, 1e-9):.1f}x'])
+        return rows
@@ -0,0 +1,171 @@
+''' Benchmark: reference scanning and replacement. '''
+# pylint: disable=duplicate-code
+import json
+import re
+import unittest
+from pathlib import Path
+
+from django.conf import settings
+
+from apps.rsform import utils
+from apps.rsform.graph import Graph
+from apps.rsform.models import Constituenta, RSForm
+
+from .utils import measure, report
+
+SIZES = [117, 1000, 5000]
+_FIXTURE = Path(settings.BASE_DIR) / 'fixtures' / 'InitialData.json'
+_ALIAS_PATTERN = re.compile(r'([XCSADFPTN])([0-9]+)')  # cspell:disable-line
+_FIELDS = ['definition_formal', 'typification_manual', 'term_raw', 'definition_raw']
+
+_OLD_RE_GLOBALS = r'[XCSADFPTN]\d+'  # cspell:disable-line
+
+
+def _old_apply_pattern(text: str, mapping: dict[str, str], pattern: re.Pattern[str]) -> str:
+    if text == '':
+        return text
+    pos_input: int = 0
+    output: str = ''
+    for segment in re.finditer(pattern, text):
+        entity = segment.group(1)
+        if entity in mapping:
+            output += text[pos_input: segment.start(1)]
+            output += mapping[entity]
+            output += text[segment.end(1): segment.end(0)]
+            pos_input = segment.end(0)
+    output += text[pos_input: len(text)]
+    return output
+
+
+def _old_extract_globals(expression: str) -> set[str]:
+    return set(re.findall(_OLD_RE_GLOBALS, expression))
+
+
+def _old_extract_entities(text: str) -> list[str]:
+    result: list[str] = []
+    for segment in re.finditer(utils._REF_ENTITY_PATTERN, text):  # pylint: disable=protected-access
+        entity = segment.group(1)
+        if entity not in result:
+            result.append(entity)
+    return result
+
+
+def _old_extract_references(cst: Constituenta) -> set[str]:
+    result = _old_extract_globals(cst.definition_formal)
+    result.update(_old_extract_globals(cst.typification_manual))
+    result.update(_old_extract_entities(cst.term_raw))
+    result.update(_old_extract_entities(cst.definition_raw))
+    return result
+
+
+def _old_apply_mapping(cst: Constituenta, mapping: dict[str, str]) -> None:
+    # pylint: disable=protected-access
+    cst.definition_formal = _old_apply_pattern(cst.definition_formal, mapping, utils._GLOBAL_ID_PATTERN)
+    cst.typification_manual = _old_apply_pattern(cst.typification_manual, mapping, utils._GLOBAL_ID_PATTERN)
+    cst.term_raw = _old_apply_pattern(cst.term_raw, mapping, utils._REF_ENTITY_PATTERN)
+    cst.definition_raw = _old_apply_pattern(cst.definition_raw, mapping, utils._REF_ENTITY_PATTERN)
+
+
+def _load_schema(size: int) -> list[Constituenta]:
+    ''' Largest schema from fixtures, replicated with shifted aliases up to size. '''
+    with open(_FIXTURE, 'r', encoding='utf-8') as file:
+        data = json.load(file)
+    items = [entry['fields'] for entry in data if entry['model'] == 'rsform.constituenta']
+    schema_sizes: dict[int, int] = {}
+    for fields in items:
+        schema_sizes[fields['schema']] = schema_sizes.get(fields['schema'], 0) + 1
+    largest = max(schema_sizes, key=lambda schema: schema_sizes[schema])
+    source = sorted((fields for fields in items if fields['schema'] == largest), key=lambda fields: fields['order'])
+    result: list[Constituenta] = []
+    copy_index = 0
+    while len(result) < size:
+        shift = copy_index * 1000
+        for fields in source[:size - len(result)]:
+            def _shift(segment: re.Match[str]) -> str:
+                return f'{segment.group(1)}{int(segment.group(2)) + shift}'  # pylint: disable=cell-var-from-loop
+            result.append(Constituenta(
+                pk=len(result) + 1,
+                alias=_ALIAS_PATTERN.sub(_shift, fields['alias']),
+                cst_type=fields['cst_type'],
+                **{field: _ALIAS_PATTERN.sub(_shift, fields.get(field, '')) for field in _FIELDS}
+            ))
+        copy_index += 1
+    return result
+
+
+class BenchReferences(unittest.TestCase):
+    ''' Compare memoized compiled scanners with the previous uncached implementation. '''
+
+    def test_references(self):
+        rows = []
+        for size in SIZES:
+            rows.extend(self._bench_size(size))
+        report('Reference scanning', ['csts', 'operation', 'previous', 'current', 'speedup'], rows)
+
+    def _bench_size(self, size: int) -> list[list]:
+        schema = _load_schema(size)
+        for cst in schema:
+            self.assertEqual(_old_extract_references(cst), cst.extract_references())
+        rename = {schema[0].alias: 'X9999'}
+        for cst in schema:
+            old = Constituenta(**{field: getattr(cst, field) for field in _FIELDS})
+            new = Constituenta(**{field: getattr(cst, field) for field in _FIELDS})
+            _old_apply_mapping(old, rename)
+            new.apply_mapping(rename)
+            self.assertEqual([getattr(old, field) for field in _FIELDS], [getattr(new, field) for field in _FIELDS])
+
+        def extract_old() -> None:
+            for cst in schema:
+                _old_extract_references(cst)
+
+        def extract_cold() -> None:
+            utils.scan_globals.cache_clear()
+            utils.scan_entities.cache_clear()
+            extract_warm()
+
+        def extract_warm() -> None:
+            for cst in schema:
+                cst.extract_references()
+
+        def mapping_old() -> None:
+            for cst in schema:
+                _old_apply_mapping(cst, {'X9999': 'X9999'})
+
+        def mapping_new() -> None:
+            for cst in schema:
+                cst.apply_mapping({'X9999': 'X9999'})
+
+        def graphs_old() -> None:
+            by_alias = {cst.alias: cst for cst in schema}
+            for field, extract in [
+                ('definition_formal', _old_extract_globals),
+                ('term_raw', _old_extract_entities),
+                ('definition_raw', _old_extract_entities)
+            ]:
+                graph: Graph[int] = Graph()
+                for cst in schema:
+                    graph.add_node(cst.pk)
+                for cst in schema:
+                    for alias in extract(getattr(cst, field)):
+                        child = by_alias.get(alias)
+                        if child is not None:
+                            graph.add_edge(src=child.pk, dest=cst.pk)
+
+        def graphs_new() -> None:
+            by_alias = {cst.alias: cst for cst in schema}
+            RSForm.graph_formal(schema, by_alias)
+            RSForm.graph_term(schema, by_alias)
+            RSForm.graph_text(schema, by_alias)
+
+        scenarios = [
+            ('extract (cold cache)', extract_old, extract_cold),
+            ('extract (warm cache)', extract_old, extract_warm),
+            ('apply_mapping miss', mapping_old, mapping_new),
+            ('build 3 graphs', graphs_old, graphs_new),
+        ]
+        rows = []
+        for title, action_old, action_new in scenarios:
+            time_old = measure(action_old)
+            time_new = measure(action_new)
+            rows.append([size, title, time_old, time_new, f'{time_old / max(time_new, 1e-9):.1f}x'])
+        return rows
@@ -0,0 +1,51 @@
+''' Benchmark: restore schema from version. '''
+# pylint: disable=duplicate-code
+import time
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.rsform.models import Constituenta, CstType, RSForm
+from apps.rsform.serializers import RSFormSerializer
+
+from .utils import report
+
+SIZES = [100, 1000, 3000]
+
+
+def _create_schema(size: int, owner: User) -> RSForm:
+    schema = RSForm.create(title=f'Bench {size}', alias='BR', owner=owner)
+    Constituenta.objects.bulk_create([
+        Constituenta(
+            schema=schema.model,
+            order=order,
+            alias=f'X{order + 1}' if order == 0 else f'D{order + 1}',
+            cst_type=CstType.BASE if order == 0 else CstType.TERM,
+            definition_formal='' if order == 0 else f'ℬ(X1) ∪ D{order}',
+            term_raw='база' if order == 0 else f'@{{{"X" if order == 1 else "D"}{order}|nomn}}'
+        )
+        for order in range(size)
+    ])
+    return schema
+
+
+class BenchRestore(TestCase):
+    ''' Restore time and query count versus schema size. '''
+
+    def test_restore_version(self):
+        owner = User.objects.create(username='bench')
+        rows = []
+        for size in SIZES:
+            schema = _create_schema(size, owner)
+            data = RSFormSerializer(schema.model).to_versioned_data()
+            csts = list(schema.constituentsQ().order_by('order'))
+            Constituenta.objects.filter(pk__in=[cst.pk for cst in csts[size // 2:]]).delete()
+            Constituenta.objects.filter(pk__in=[cst.pk for cst in csts[:size // 4]]).update(convention='changed')
+            start = time.perf_counter()
+            with CaptureQueriesContext(connection) as queries:
+                RSFormSerializer(schema.model).restore_from_version(data)
+            elapsed = time.perf_counter() - start
+            rows.append([size, size - size // 2, elapsed, len(queries)])
+        report('Restore from version', ['csts', 'recreated', 'time', 'queries'], rows)
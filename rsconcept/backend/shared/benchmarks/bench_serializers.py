@@ -0,0 +1,110 @@
+''' Benchmark: RSForm serialization. '''
+# pylint: disable=duplicate-code
+from django.db import connection
+from django.db.models import Q
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from rest_framework.renderers import JSONRenderer
+
+from apps.library.models import LibraryItem
+from apps.library.serializers import LibraryItemDetailsSerializer
+from apps.oss.models import Inheritance, Operation, OperationType
+from apps.rsform.models import Attribution, Constituenta, CstType, RSForm
+from apps.rsform.serializers import CstInfoSerializer, RSFormSerializer
+
+from .utils import measure, report, synthetic_dependencies
+
+SIZES = [500, 2000, 10000]
+
+
+def _legacy_representation(item: LibraryItem) -> dict:
+    ''' Field-by-field serialization replaced by bulk path, kept for comparison. '''
+    result = LibraryItemDetailsSerializer(item).data
+    result['items'] = []
+    result['oss'] = []
+    result['models'] = []
+    result['inheritance'] = []
+    result['attribution'] = []
+    for cst in Constituenta.objects.filter(schema=item).defer('order').order_by('order'):
+        result['items'].append(CstInfoSerializer(cst).data)
+    for oss in LibraryItem.objects.filter(operations__result=item).only('alias'):
+        result['oss'].append({'id': oss.pk, 'alias': oss.alias})
+    result['is_produced'] = Operation.objects \
+        .filter(result=item) \
+        .exclude(operation_type=OperationType.INPUT) \
+        .exists()
+    for model in LibraryItem.objects.filter(rsmodels__schema=item).only('alias'):
+        result['models'].append({'id': model.pk, 'alias': model.alias})
+    for attrib in Attribution.objects.filter(container__schema=item).only('container_id', 'attribute_id'):
+        result['attribution'].append({'container': attrib.container_id, 'attribute': attrib.attribute_id})
+    inheritances = Inheritance.objects \
+        .filter(Q(child__schema=item) | Q(parent__schema=item)) \
+        .select_related('parent__schema', 'child__schema') \
+        .only('parent__id', 'parent__schema__id', 'child__id', 'child__schema__id')
+    for link in inheritances:
+        result['inheritance'].append({
+            'child': link.child_id,
+            'child_source': link.child.schema_id,
+            'parent': link.parent_id,
+            'parent_source': link.parent.schema_id
+        })
+    return result
+
+
+def _create_schema(size: int) -> LibraryItem:
+    schema = RSForm.create(title=f'Bench {size}', alias=f'B{size}')
+    dependencies = synthetic_dependencies(size)
+    parents: dict[int, list[int]] = {node: [] for node in dependencies}
+    for parent, children in dependencies.items():
+        for child in children:
+            parents[child].append(parent)
+    items = Constituenta.objects.bulk_create([
+        Constituenta(
+            schema=schema.model,
+            order=index,
+            alias=f'D{index + 1}',
+            cst_type=CstType.TERM,
+            definition_formal=' ∪ '.join(f'D{parent + 1}' for parent in parents[index]) or 'ℬ(X1)',
+            term_raw=f'термин {index + 1}',
+            term_resolved=f'термин {index + 1}',
+            term_forms=[{'text': f'термины {index + 1}', 'tags': 'nomn,plur'}] if index % 10 == 0 else [],
+            definition_raw=' и '.join(f'@{{D{parent + 1}|nomn,sing}}' for parent in parents[index]),
+            definition_resolved=' и '.join(f'термин {parent + 1}' for parent in parents[index]),
+            convention='конвенция' if index % 7 == 0 else ''
+        )
+        for index in range(size)
+    ])
+    Attribution.objects.bulk_create([
+        Attribution(container=items[index], attribute=items[index - 1])
+        for index in range(1, size, 5)
+    ])
+    return schema.model
+
+
+class BenchSerializers(TestCase):
+    ''' Compare bulk RSFormSerializer with the field-by-field implementation. '''
+
+    def test_rsform_serializer(self):
+        rows = []
+        for size in SIZES:
+            rows.append(self._bench_size(size))
+        report(
+            'RSFormSerializer',
+            ['csts', 'legacy', 'bulk', 'speedup', 'queries legacy', 'queries bulk'],
+            rows
+        )
+
+    def _bench_size(self, size: int) -> list:
+        item = _create_schema(size)
+        renderer = JSONRenderer()
+        with CaptureQueriesContext(connection) as legacy_queries:
+            legacy = renderer.render(_legacy_representation(item))
+        with CaptureQueriesContext(connection) as bulk_queries:
+            bulk = renderer.render(RSFormSerializer(item).data)
+        self.assertEqual(legacy, bulk)
+        time_legacy = measure(lambda: _legacy_representation(item), repeat=1)
+        time_bulk = measure(lambda: RSFormSerializer(item).data)
+        return [
+            size, time_legacy, time_bulk, f'{time_legacy / max(time_bulk, 1e-9):.1f}x',
+            len(legacy_queries), len(bulk_queries)
+        ]
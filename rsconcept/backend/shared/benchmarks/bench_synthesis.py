@@ -0,0 +1,132 @@
+''' Benchmark: synthesis operation execution. '''
+# pylint: disable=duplicate-code
+import time
+
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+
+from apps.oss.models import Argument, Inheritance, Operation, OperationSchema, OperationType, Substitution
+from apps.oss.models.SynthesisBuilder import SynthesisBuilder
+from apps.rsform.models import Attribution, Constituenta, CstType, OrderManager, RSForm, RSFormCached
+
+from .utils import report, synthetic_dependencies
+
+SIZES = [100, 500, 2000]
+SUBSTITUTION_STEP = 20
+
+
+def _legacy_execute(oss: OperationSchema, operation: Operation, schemas: list[int]) -> RSFormCached:
+    ''' Step by step execution replaced by SynthesisBuilder, kept for comparison. '''
+    receiver = RSFormCached(OperationSchema.create_input(oss.model.pk, operation).pk)
+    parents: dict = {}
+    children: dict = {}
+    for operand in schemas:
+        for (old_cst, new_cst) in receiver.insert_from(operand):
+            parents[new_cst.pk] = old_cst
+            children[old_cst.pk] = new_cst
+    receiver.substitute([
+        (children[sub.original.pk], children[sub.substitution.pk])
+        for sub in operation.getQ_substitutions()
+    ])
+    for cst in Constituenta.objects.filter(schema_id=receiver.pk).order_by('order'):
+        Inheritance.objects.create(operation_id=operation.pk, child=cst, parent=parents[cst.pk])
+    OrderManager(receiver).restore_order()
+    receiver.reset_aliases()
+    receiver.resolve_all_text()
+    return receiver
+
+
+def _staged_execute(oss: OperationSchema, operation: Operation, schemas: list[int]) -> RSFormCached:
+    receiver = RSFormCached(OperationSchema.create_input(oss.model.pk, operation).pk)
+    builder = SynthesisBuilder(receiver)
+    builder.insert_operands(schemas)
+    builder.substitute([(sub.original_id, sub.substitution_id) for sub in operation.getQ_substitutions()])
+    builder.arrange()
+    builder.save(operation.pk)
+    return receiver
+
+
+def _create_operand(size: int, seed: int) -> list[Constituenta]:
+    schema = RSForm.create(title=f'Operand {seed}', alias=f'O{seed}')
+    dependencies = synthetic_dependencies(size, seed=seed)
+    parents: dict[int, list[int]] = {node: [] for node in dependencies}
+    for parent, children in dependencies.items():
+        for child in children:
+            parents[child].append(parent)
+    basics = max(1, size // 10)
+    items = Constituenta.objects.bulk_create([
+        Constituenta(
+            schema=schema.model,
+            order=index,
+            alias=f'X{index + 1}' if index < basics else f'D{index + 1}',
+            cst_type=CstType.BASE if index < basics else CstType.TERM,
+            definition_formal='' if index < basics else (
+                ' ∪ '.join(f'D{parent + 1}' for parent in parents[index] if parent >= basics)
+                or f'ℬ(X{index % basics + 1})'
+            ),
+            term_raw=f'термин {index + 1}' if not parents[index] else f'@{{{_alias(parents[index][0], basics)}|plur}}',
+            definition_raw=' и '.join(f'@{{{_alias(parent, basics)}|nomn,sing}}' for parent in parents[index])
+        )
+        for index in range(size)
+    ])
+    Attribution.objects.bulk_create([
+        Attribution(container=items[index], attribute=items[index - 1])
+        for index in range(basics + 1, size, 5)
+    ])
+    return items
+
+
+def _alias(index: int, basics: int) -> str:
+    return f'X{index + 1}' if index < basics else f'D{index + 1}'
+
+
+class BenchSynthesis(TestCase):
+    ''' Compare staged synthesis build with step by step execution. '''
+
+    def test_execute_operation(self):
+        rows = []
+        for size in SIZES:
+            rows.append(self._bench_size(size))
+        report(
+            'Synthesis execution (2 operands)',
+            ['csts', 'legacy', 'staged', 'speedup', 'queries legacy', 'queries staged'],
+            rows
+        )
+
+    def _bench_size(self, size: int) -> list:
+        oss = OperationSchema.create(title='Bench OSS', alias='BOSS')
+        operands = [_create_operand(size, 1), _create_operand(size, 2)]
+        schemas = [items[0].schema_id for items in operands]
+        operation = oss.create_operation(alias='S', operation_type=OperationType.SYNTHESIS)
+        for order, schema in enumerate(schemas):
+            argument = oss.create_operation(
+                alias=f'A{order}',
+                operation_type=OperationType.INPUT,
+                result_id=schema
+            )
+            Argument.objects.create(operation=operation, argument=argument, order=order)
+        basics = max(1, size // 10)
+        Substitution.objects.bulk_create([
+            Substitution(operation=operation, original=operands[1][index], substitution=operands[0][index])
+            for index in range(0, basics, SUBSTITUTION_STEP // 10)
+        ])
+
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as legacy_queries:
+            legacy = _legacy_execute(oss, operation, schemas)
+        time_legacy = time.perf_counter() - start
+        start = time.perf_counter()
+        with CaptureQueriesContext(connection) as staged_queries:
+            staged = _staged_execute(oss, operation, schemas)
+        time_staged = time.perf_counter() - start
+
+        fields = ['order', 'alias', 'definition_formal', 'term_resolved', 'definition_resolved']
+        self.assertEqual(
+            list(legacy.constituentsQ().order_by('order').values_list(*fields)),
+            list(staged.constituentsQ().order_by('order').values_list(*fields))
+        )
+        return [
+            size * 2, time_legacy, time_staged, f'{time_legacy / max(time_staged, 1e-9):.1f}x',
+            len(legacy_queries), len(staged_queries)
+        ]
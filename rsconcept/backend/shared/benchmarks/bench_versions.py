@@ -0,0 +1,88 @@
+''' Benchmark: version storage. '''
+# pylint: disable=duplicate-code
+import copy
+import json
+
+from django.contrib.auth.models import User
+from django.db.models import Sum
+from django.db.models.functions import Length
+from django.test import TestCase
+
+from apps.library.models import LibraryItem, Version
+from apps.rsform.models import Constituenta, CstType, RSForm
+from apps.rsform.serializers import RSFormSerializer
+
+from .utils import measure, report
+
+# (constituents, versions, edited constituents per version)
+SIZES = [(100, 30, 2), (1000, 30, 10), (1000, 30, 100)]
+
+
+def _create_schema(size: int, owner: User) -> RSForm:
+    schema = RSForm.create(title=f'Bench {size}', alias='BV', owner=owner)
+    Constituenta.objects.bulk_create([
+        Constituenta(
+            schema=schema.model,
+            order=order,
+            alias=f'X{order + 1}' if order == 0 else f'D{order + 1}',
+            cst_type=CstType.BASE if order == 0 else CstType.TERM,
+            definition_formal='' if order == 0 else f'ℬ(X1) ∪ D{order}',
+            term_raw=f'термин {order}',
+            definition_raw=f'Определение конституенты номер {order}'
+        )
+        for order in range(size)
+    ])
+    return schema
+
+
+def _timings(item: LibraryItem, keyframe: int, delta: int) -> list[float]:
+    ''' Content reconstruction and listing with or without payload column. '''
+    return [
+        measure(lambda: Version.objects.get(pk=keyframe).load_data(), repeat=5),
+        measure(lambda: Version.objects.get(pk=delta).load_data(), repeat=5),
+        measure(lambda: list(item.getQ_versions()), repeat=5),
+        measure(lambda: list(Version.objects.filter(item=item)), repeat=5)
+    ]
+
+
+class BenchVersions(TestCase):
+    ''' Stored bytes and access latency for version history. '''
+
+    def test_version_storage(self):
+        owner = User.objects.create(username='bench')
+        rows = []
+        for size, count, edits in SIZES:
+            schema = _create_schema(size, owner)
+            content = RSFormSerializer(schema.model).to_versioned_data()
+            full_bytes = 0
+            for index in range(count):
+                content = copy.deepcopy(content)
+                for offset in range(edits):
+                    cst = content['items'][(index * edits + offset) % size]
+                    cst['convention'] = f'Правка {index}'
+                full_bytes += len(json.dumps(content))
+                schema.create_version(f'1.{index}', '', content)
+            versions = Version.objects.filter(item=schema.model)
+            stored = versions.aggregate(total=Sum(Length('data')))['total']
+            keyframes = versions.filter(base__isnull=True).count()
+            first = versions.order_by('pk').first()
+            latest = versions.order_by('-pk').first()
+            assert first is not None and latest is not None
+            rows.append([
+                size,
+                count,
+                edits,
+                keyframes,
+                full_bytes // 1024,
+                stored // 1024,
+                f'{full_bytes / stored:.1f}x',
+                *_timings(schema.model, first.pk, latest.pk)
+            ])
+        report(
+            'Version storage',
+            [
+                'csts', 'versions', 'edits', 'keyframes', 'full KB', 'stored KB', 'ratio',
+                'load keyframe', 'load delta', 'list', 'list+data'
+            ],
+            rows
+        )
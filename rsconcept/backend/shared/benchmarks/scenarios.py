@@ -0,0 +1,158 @@
+''' Endpoint benchmark scenarios over synthetic library.
+
+Every run is executed inside a transaction rolled back afterwards, so scenarios leave the library
+unchanged and can be repeated. Jobs are not deferred: long operations are timed inline.
+'''
+import statistics
+import time
+from typing import Any, Callable
+
+from django.db import connection, transaction
+from django.db.models import QuerySet
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
+from rest_framework.test import APIClient
+
+from apps.library.models import LibraryItem, LibraryItemType, Version
+from apps.oss.models import Layout, Operation, OperationSchema, OperationType
+from apps.rsform.models import Constituenta, CstType
+from shared.throttling import OssCloneRateThrottle
+
+from .synthetic import USER_PREFIX
+
+# Relative change of median time reported as regression or improvement
+DEFAULT_TOLERANCE = 0.2
+
+# Address of test client used to identify throttled requests
+CLIENT_ADDRESS = '127.0.0.1'
+
+Request = Callable[[], Any]
+
+
+def _generated_items() -> QuerySet[LibraryItem]:
+    return LibraryItem.objects.filter(owner__username__startswith=USER_PREFIX).order_by('pk')
+
+
+def _oss() -> LibraryItem:
+    oss = _generated_items().filter(item_type=LibraryItemType.OPERATION_SCHEMA).first()
+    if oss is None:
+        raise ValueError('Synthetic library not found, run generate_library first')
+    return oss
+
+
+def _deepest_synthesis(oss: LibraryItem) -> Operation:
+    return Operation.objects.filter(oss=oss, operation_type=OperationType.SYNTHESIS).latest('pk')
+
+
+def _first_input(oss: LibraryItem) -> Operation:
+    return Operation.objects.filter(oss=oss, operation_type=OperationType.INPUT).earliest('pk')
+
+
+def _details(client: APIClient) -> Request:
+    oss = _oss()
+    client.force_authenticate(oss.owner)
+    schema = _deepest_synthesis(oss).result_id
+    return lambda: client.get(f'/api/rsforms/{schema}/details')
+
+
+def _update_cst(client: APIClient) -> Request:
+    ''' Change term of base constituent in first input schema, propagating through all syntheses. '''
+    oss = _oss()
+    client.force_authenticate(oss.owner)
+    schema = _first_input(oss).result_id
+    cst = Constituenta.objects.filter(schema_id=schema, cst_type=CstType.BASE).earliest('order')
+    data = {'target': cst.pk, 'item_data': {'term_raw': f'{cst.term_raw} изменённый'}}
+    return lambda: client.patch(f'/api/rsforms/{schema}/update-cst', data, format='json')
+
+
+def _execute_operation(client: APIClient) -> Request:
+    ''' Synthesis of deepest result with first input schema. '''
+    oss = _oss()
+    client.force_authenticate(oss.owner)
+    schema = OperationSchema(oss)
+    target = schema.create_operation(alias='BENCH', operation_type=OperationType.SYNTHESIS)
+    schema.set_arguments(target.pk, [_deepest_synthesis(oss), _first_input(oss)])
+    data = {'target': target.pk, 'layout': Layout.objects.get(oss=oss).data}
+    return lambda: client.post(f'/api/oss/{oss.pk}/execute-operation', data, format='json')
+
+
+def _clone(client: APIClient) -> Request:
+    oss = _oss()
+    client.force_authenticate(oss.owner)
+    # Repeated runs must not hit OSS clone rate limit
+    throttle = OssCloneRateThrottle()
+    throttle.cache.delete(throttle.cache_format % {'scope': throttle.scope, 'ident': CLIENT_ADDRESS})
+    data = {'item_data': {'title': 'Clone', 'alias': 'CLONE', 'location': '/U/bench-clone'}, 'items': []}
+    return lambda: client.post(f'/api/library/{oss.pk}/clone', data, format='json')
+
+
+def _context_search(client: APIClient) -> Request:
+    client.force_authenticate(_oss().owner)
+    return lambda: client.get('/api/library/context-search', {'q': 'декартово произведение', 'limit': '20'})
+
+
+def _version_restore(client: APIClient) -> Request:
+    version = Version.objects.filter(item__owner__username__startswith=USER_PREFIX).order_by('-pk').first()
+    if version is None:
+        raise ValueError('Synthetic library has no versions')
+    client.force_authenticate(version.item.owner)
+    return lambda: client.patch(f'/api/versions/{version.pk}/restore')
+
+
+SCENARIOS: dict[str, Callable[[APIClient], Request]] = {
+    'details': _details,
+    'update-cst': _update_cst,
+    'execute-operation': _execute_operation,
+    'clone': _clone,
+    'context-search': _context_search,
+    'version-restore': _version_restore,
+}
+
+
+def run_scenarios(names: list[str], repeat: int = 5) -> dict[str, dict[str, float]]:
+    ''' Time scenarios: best and median of *repeat* runs in milliseconds and queries per run. '''
+    with override_settings(JOBS_ASYNC_THRESHOLD=0, ALLOWED_HOSTS=['testserver']):
+        return {name: _run(name, repeat) for name in names}
+
+
+def _run(name: str, repeat: int) -> dict[str, float]:
+    timings = []
+    queries = 0
+    for _ in range(repeat):
+        with transaction.atomic():
+            request = SCENARIOS[name](APIClient(REMOTE_ADDR=CLIENT_ADDRESS))
+            with CaptureQueriesContext(connection) as captured:
+                start = time.perf_counter()
+                response = request()
+                timings.append(time.perf_counter() - start)
+            transaction.set_rollback(True)
+        if response.status_code >= 300:
+            raise ValueError(f'Scenario {name} failed with status {response.status_code}')
+        queries = len(captured)
+    return {
+        'best_ms': round(min(timings) * 1000, 2),
+        'median_ms': round(statistics.median(timings) * 1000, 2),
+        'queries': queries
+    }
+
+
+def compare(results: dict, baseline: dict, tolerance: float = DEFAULT_TOLERANCE) -> list[list[Any]]:
+    ''' Rows: scenario, baseline median, current median, ratio, queries change, verdict. '''
+    rows: list[list[Any]] = []
+    for name, current in results.items():
+        if name not in baseline:
+            rows.append([name, '-', current['median_ms'], '-', '-', 'new'])
+            continue
+        base = baseline[name]
+        ratio = current['median_ms'] / max(base['median_ms'], 1e-6)
+        if ratio > 1 + tolerance:
+            verdict = 'slower'
+        elif ratio < 1 - tolerance:
+            verdict = 'faster'
+        else:
+            verdict = 'same'
+        rows.append([
+            name, base['median_ms'], current['median_ms'], f'{ratio:.2f}x',
+            f'{current["queries"] - base["queries"]:+d}', verdict
+        ])
+    return rows
@@ -0,0 +1,238 @@
+''' Synthetic library generator.
+
+Library content depends only on scale and seed: schemas with references between constituents,
+operation schemas built as chains of syntheses with substitutions, models bound to schemas and
+version histories. All items belong to users with USER_PREFIX names, so they can be removed together.
+'''
+# pylint: disable=duplicate-code
+import random
+from dataclasses import dataclass
+
+from django.db import transaction
+
+from apps.library.models import Editor, LibraryItem, Version
+from apps.library.services.search_index import reindex_items
+from apps.oss.models import Operation, OperationSchema, OperationType
+from apps.rsform.models import ORDER_GAP, Constituenta, CstType, RSForm, RSFormCached
+from apps.rsform.serializers import RSFormSerializer
+from apps.rsmodel.models import ConstituentData, RSModel
+from apps.users.models import User
+
+from .utils import synthetic_dependencies
+
+USER_PREFIX = 'bench-'
+LOCATION = '/S/bench'
+
+# Fraction of base constituents substituted by each synthesis
+SUBSTITUTION_RATIO = 0.5
+
+VOCABULARY = [
+    'множество', 'отношение', 'функция', 'элемент', 'подмножество', 'декартово', 'произведение',
+    'булеан', 'проекция', 'операция', 'терм', 'аксиома', 'объединение', 'пересечение', 'вид',
+    'структура', 'ступень', 'родовая', 'конституента', 'понятие', 'определение', 'система',
+]
+
+
+@dataclass(frozen=True)
+class LibraryScale:
+    ''' Size of generated library. '''
+    users: int
+    schemas: int
+    constituents: int
+    density: float
+    oss: int
+    depth: int
+    models: int
+    model_elements: int
+    versions: int
+
+
+SCALES = {
+    'small': LibraryScale(
+        users=3, schemas=10, constituents=100, density=2.0, oss=1, depth=3,
+        models=3, model_elements=10, versions=3
+    ),
+    'medium': LibraryScale(
+        users=10, schemas=50, constituents=300, density=3.0, oss=3, depth=5,
+        models=10, model_elements=50, versions=5
+    ),
+    'large': LibraryScale(
+        users=30, schemas=200, constituents=1000, density=3.0, oss=5, depth=8,
+        models=30, model_elements=200, versions=10
+    ),
+}
+
+
+class _Generator:
+    ''' Stateful generation steps sharing random source and created users. '''
+
+    def __init__(self, scale: LibraryScale, seed: int) -> None:
+        self.scale = scale
+        self.random = random.Random(seed)
+        self.users: list[User] = []
+        self.schemas: list[RSForm] = []
+        self.counter = 0
+
+    def run(self) -> dict[str, int]:
+        self.users = [User.objects.create(username=f'{USER_PREFIX}{index}') for index in range(self.scale.users)]
+        for _ in range(self.scale.schemas):
+            self.schemas.append(self._schema(self.scale.constituents))
+        for index in range(self.scale.oss):
+            self._oss(index)
+        for index in range(self.scale.models):
+            self._model(self.schemas[index % len(self.schemas)])
+        for schema in self.schemas[:max(1, self.scale.schemas // 5)]:
+            self._versions(schema)
+        items = LibraryItem.objects.filter(owner__in=self.users)
+        reindex_items(items.values_list('pk', flat=True))
+        return {
+            'users': len(self.users),
+            'items': items.count(),
+            'constituents': Constituenta.objects.filter(schema__owner__in=self.users).count(),
+            'versions': Version.objects.filter(item__owner__in=self.users).count()
+        }
+
+    def _owner(self) -> User:
+        return self.users[self.random.randrange(len(self.users))]
+
+    def _next_alias(self, prefix: str) -> str:
+        self.counter += 1
+        return f'{prefix}{self.counter}'
+
+    def _schema(self, size: int) -> RSForm:
+        owner = self._owner()
+        schema = RSForm.create(
+            title=' '.join(self.random.sample(VOCABULARY, 3)),
+            alias=self._next_alias('KS'),
+            owner=owner,
+            location=LOCATION
+        )
+        for editor in self.random.sample(self.users, min(2, len(self.users))):
+            if editor != owner:
+                Editor.objects.create(item=schema.model, editor=editor)
+        self._fill(schema, size)
+        return schema
+
+    def _fill(self, schema: RSForm, size: int) -> None:
+        ''' Constituents referencing earlier ones in expressions and texts. '''
+        dependencies = synthetic_dependencies(size, density=self.scale.density, seed=self.random.randrange(2**31))
+        parents: dict[int, list[int]] = {node: [] for node in dependencies}
+        for parent, children in dependencies.items():
+            for child in children:
+                parents[child].append(parent)
+        basics = max(1, size // 10)
+        Constituenta.objects.bulk_create([
+            Constituenta(
+                schema=schema.model,
+                order=(index + 1) * ORDER_GAP,
+                alias=_alias(index, basics),
+                cst_type=CstType.BASE if index < basics else CstType.TERM,
+                definition_formal='' if index < basics else (
+                    ' ∪ '.join(f'D{parent + 1}' for parent in parents[index] if parent >= basics)
+                    or f'ℬ(X{index % basics + 1})'
+                ),
+                term_raw=(
+                    ' '.join(self.random.sample(VOCABULARY, 2)) if not parents[index]
+                    else f'@{{{_alias(parents[index][0], basics)}|plur}}'
+                ),
+                definition_raw=' и '.join(f'@{{{_alias(parent, basics)}|nomn,sing}}' for parent in parents[index]),
+                convention=' '.join(self.random.sample(VOCABULARY, 4)) if index < basics else ''
+            )
+            for index in range(size)
+        ])
+        RSFormCached(schema.model.pk).resolve_all_text()
+
+    def _oss(self, index: int) -> None:
+        ''' Chain of syntheses, each joining previous result with new input schema. '''
+        oss = OperationSchema.create(
+            title=f'ОСС {index}',
+            alias=self._next_alias('OSS'),
+            owner=self._owner(),
+            location=f'{LOCATION}/oss-{index}'
+        )
+        size = max(10, self.scale.constituents // 2)
+        current = self._input(oss, size)
+        for level in range(self.scale.depth):
+            operand = self._input(oss, size)
+            synthesis = oss.create_operation(alias=f'S{level + 1}', operation_type=OperationType.SYNTHESIS)
+            oss.set_arguments(synthesis.pk, [current, operand])
+            oss.set_substitutions(synthesis.pk, _substitutions(operand, current))
+            oss.execute_operation(synthesis)
+            synthesis.refresh_from_db()
+            current = synthesis
+
+    def _input(self, oss: OperationSchema, size: int) -> Operation:
+        schema = RSForm.create(
+            title=' '.join(self.random.sample(VOCABULARY, 3)),
+            alias=self._next_alias('KS'),
+            owner=oss.model.owner,
+            location=oss.model.location
+        )
+        self._fill(schema, size)
+        return oss.create_operation(
+            alias=schema.model.alias,
+            operation_type=OperationType.INPUT,
+            result=schema.model
+        )
+
+    def _model(self, schema: RSForm) -> None:
+        model = RSModel.create(
+            schema=schema.model,
+            title=f'Модель {schema.model.title}',
+            alias=self._next_alias('M'),
+            owner=self._owner(),
+            location=LOCATION
+        )
+        basics = schema.constituentsQ().filter(cst_type=CstType.BASE).order_by('order')
+        ConstituentData.objects.bulk_create([
+            ConstituentData(
+                model=model.model,
+                constituent=cst,
+                type='basic',
+                data={
+                    str(element + 1): f'{self.random.choice(VOCABULARY)} {element + 1}'
+                    for element in range(self.scale.model_elements)
+                }
+            )
+            for cst in basics
+        ])
+
+    def _versions(self, schema: RSForm) -> None:
+        ''' Version history with a few edited constituents between versions. '''
+        csts = list(schema.constituentsQ().order_by('order'))
+        for number in range(self.scale.versions):
+            edited = self.random.sample(csts, max(1, len(csts) // 20))
+            for cst in edited:
+                cst.convention = f'{self.random.choice(VOCABULARY)} {number}'
+            Constituenta.objects.bulk_update(edited, ['convention'])
+            data = RSFormSerializer(schema.model).to_versioned_data()
+            Version.store(schema.model.pk, f'1.{number}', f'Версия {number}', data)
+
+
+def _alias(index: int, basics: int) -> str:
+    return f'X{index + 1}' if index < basics else f'D{index + 1}'
+
+
+def _substitutions(operand: Operation, current: Operation) -> list[dict]:
+    originals = Constituenta.objects.filter(schema_id=operand.result_id, cst_type=CstType.BASE).order_by('order')
+    targets = Constituenta.objects.filter(schema_id=current.result_id, cst_type=CstType.BASE).order_by('order')
+    pairs = list(zip(originals, targets))
+    count = max(1, int(len(pairs) * SUBSTITUTION_RATIO))
+    return [{'original': original, 'substitution': target} for original, target in pairs[:count]]
+
+
+def generate_library(scale: LibraryScale, seed: int = 42) -> dict[str, int]:
+    ''' Create synthetic library. Return numbers of created objects. '''
+    with transaction.atomic():
+        return _Generator(scale, seed).run()
+
+
+def clear_library() -> int:
+    ''' Delete generated users and their items. Return number of deleted items. '''
+    with transaction.atomic():
+        users = User.objects.filter(username__startswith=USER_PREFIX)
+        items = LibraryItem.objects.filter(owner__in=users)
+        count = items.count()
+        items.delete()
+        users.delete()
+    return count
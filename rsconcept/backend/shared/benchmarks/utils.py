@@ -0,0 +1,43 @@
+''' Utils: benchmark helpers. '''
+import random
+import time
+from typing import Any, Callable
+
+
+def measure(action: Callable[[], Any], repeat: int = 3) -> float:
+    ''' Best wall time of several runs in seconds. '''
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        action()
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def report(title: str, header: list[str], rows: list[list[Any]], write: Callable[[str], Any] = print) -> None:
+    ''' Print benchmark results as a plain text table. '''
+    cells = [header] + [[_format_cell(value) for value in row] for row in rows]
+    widths = [max(len(row[column]) for row in cells) for column in range(len(header))]
+    write(f'\n{title}')
+    for index, row in enumerate(cells):
+        write('  '.join(value.rjust(widths[column]) for column, value in enumerate(row)))
+        if index == 0:
+            write('  '.join('-' * width for width in widths))
+
+
+def synthetic_dependencies(size: int, density: float = 3.0, seed: int = 42) -> dict[int, list[int]]:
+    ''' Acyclic dependency graph shaped like a schema: each node references a few earlier nodes. '''
+    generator = random.Random(seed)
+    result: dict[int, list[int]] = {node: [] for node in range(size)}
+    for node in range(1, size):
+        window = range(max(0, node - 200), node)
+        count = min(len(window), round(generator.expovariate(1.0 / density)))
+        for parent in generator.sample(window, count):
+            result[parent].append(node)
+    return result
+
+
+def _format_cell(value: Any) -> str:
+    if isinstance(value, float):
+        return f'{value * 1000:.1f}ms'
+    return str(value)
@@ -0,0 +1,103 @@
+''' Conditional GET helpers for LibraryItem detail endpoints. '''
+import hashlib
+from datetime import datetime
+from typing import Any, Callable, Iterable, Optional, TypeVar, cast
+
+from django.db.models import CharField, DateTimeField, F, QuerySet, Value
+from django.db.models.functions import Cast
+from django.http import HttpRequest, HttpResponse, HttpResponseBase
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date, quote_etag
+from rest_framework import status as c
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+from apps.library.models import Editor, LibraryItem, Version
+
+ResponseType = TypeVar('ResponseType', bound=HttpResponseBase)
+
+_ROW_FIELDS = ('validator_kind', 'validator_key', 'validator_label', 'validator_detail', 'validator_stamp')
+
+
+def validator_rows(
+    queryset: QuerySet,
+    kind: str,
+    key: str = 'pk',
+    label: Optional[str] = None,
+    detail: Optional[str] = None,
+    stamp: Optional[str] = None
+) -> QuerySet:
+    ''' Reduce queryset to uniform validator rows (kind, key, label, detail, stamp) suitable for UNION. '''
+    # pylint: disable=too-many-arguments, too-many-positional-arguments
+    return cast(QuerySet, queryset.annotate(
+        validator_kind=Value(kind, output_field=CharField()),
+        validator_key=F(key),
+        validator_label=_text(label),
+        validator_detail=_text(detail),
+        validator_stamp=F(stamp) if stamp else Value(None, output_field=DateTimeField())
+    ).values_list(*_ROW_FIELDS))
+
+
+def _text(field: Optional[str]):
+    if field is None:
+        return Value('', output_field=CharField())
+    return Cast(field, output_field=CharField())
+
+
+class ItemValidator:
+    ''' ETag and Last-Modified of LibraryItem detail response.
+
+    Validator covers item row, editors, versions and dependent rows supplied by caller.
+    All dependent data is fetched in a single query which never touches constituents.
+    '''
+
+    def __init__(
+        self,
+        request: Request,
+        item: LibraryItem,
+        dependents: Iterable[QuerySet] = (),
+        variant: str = ''
+    ) -> None:
+        self.request = request
+        rows = list(validator_rows(Editor.objects.filter(item=item), 'editor', key='editor_id').union(
+            validator_rows(
+                Version.objects.filter(item=item), 'version',
+                label='version', detail='description', stamp='time_create'
+            ),
+            *dependents,
+            all=True
+        ))
+        rows.sort(key=repr)
+        anonymous = getattr(request.user, 'is_anonymous', True)
+        fields = [getattr(item, field.attname) for field in LibraryItem._meta.concrete_fields]
+        digest = hashlib.sha1(repr((variant, anonymous, fields, rows)).encode('utf-8'), usedforsecurity=False)
+        self.etag = quote_etag(digest.hexdigest())
+        stamps: list[datetime] = [row[4] for row in rows if row[4] is not None]
+        self.last_modified: datetime = max([item.time_update, *stamps])
+
+    def not_modified(self) -> Optional[HttpResponse]:
+        ''' Response for satisfied preconditions (304 or 412) or None if full response is required. '''
+        response = get_conditional_response(
+            cast(HttpRequest, self.request),
+            etag=self.etag,
+            last_modified=int(self.last_modified.timestamp())
+        )
+        if response is not None:
+            self.apply(response)
+        return response
+
+    def apply(self, response: ResponseType) -> ResponseType:
+        ''' Set validator headers on response. '''
+        response.headers['ETag'] = self.etag
+        response.headers['Last-Modified'] = http_date(self.last_modified.timestamp())
+        return response
+
+    def respond(self, render: Callable[[], Any]) -> HttpResponse:
+        ''' Short-circuit satisfied preconditions, otherwise respond with rendered data and validators. '''
+        not_modified = self.not_modified()
+        if not_modified is not None:
+            return not_modified
+        return self.apply(Response(
+            status=c.HTTP_200_OK,
+            data=render()
+        ))
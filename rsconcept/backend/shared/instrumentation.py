@@ -0,0 +1,117 @@
+''' Per-request SQL and timing instrumentation.
+
+Enabled by REQUEST_INSTRUMENTATION setting. When disabled the middleware removes itself
+from the chain at startup, so requests pay nothing. Log records go to this module logger:
+every request is logged at INFO and requests with repeated statements at WARNING.
+Slow request thresholds are applied by SlowRequestFilter configured in LOGGING.
+'''
+import json
+import logging
+import time
+from collections import Counter
+from typing import Any, Callable, Optional
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.http import HttpRequest
+from django.http.response import HttpResponseBase
+
+logger = logging.getLogger(__name__)
+
+SERVER_TIMING_HEADER = 'Server-Timing'
+
+# Maximum length of SQL text reported for repeated statements
+SQL_PREVIEW_LENGTH = 200
+
+
+class QueryStats:
+    ''' Execute wrapper collecting count, time and repetitions of SQL statements. '''
+
+    def __init__(self) -> None:
+        self.count = 0
+        self.duration = 0.0
+        self.statements: Counter[str] = Counter()
+
+    def __call__(self, execute, sql, params, many, context):  # pylint: disable=too-many-arguments,too-many-positional-arguments
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            self.statements[sql] += 1
+
+    def repeated(self, threshold: int) -> list[tuple[str, int]]:
+        ''' Statements executed at least *threshold* times, most frequent first. '''
+        return [(sql, count) for sql, count in self.statements.most_common() if count >= threshold]
+
+
+class SlowRequestFilter(logging.Filter):
+    ''' Pass request records slower than threshold of their view and all warnings. '''
+
+    def __init__(self, threshold_ms: float = 0, views: Optional[dict[str, float]] = None) -> None:
+        super().__init__()
+        self.threshold_ms = threshold_ms
+        self.views = views or {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        duration = getattr(record, 'duration_ms', None)
+        if duration is None:
+            return True
+        return bool(duration >= self.views.get(getattr(record, 'view', ''), self.threshold_ms))
+
+
+class RequestInstrumentationMiddleware:
+    ''' Count queries and database time per request, report via Server-Timing header and log.
+
+    Streaming response body is produced after the middleware returns, so for streaming responses
+    (e.g. file export) timings and queries cover only the view building the response.
+    '''
+
+    def __init__(self, get_response: Callable[[HttpRequest], HttpResponseBase]) -> None:
+        if not settings.REQUEST_INSTRUMENTATION:
+            raise MiddlewareNotUsed()
+        self.get_response = get_response
+        self.repeat_threshold = settings.REQUEST_INSTRUMENTATION_REPEAT_THRESHOLD
+
+    def __call__(self, request: HttpRequest) -> HttpResponseBase:
+        stats = QueryStats()
+        start = time.perf_counter()
+        with connection.execute_wrapper(stats):
+            response = self.get_response(request)
+        total = time.perf_counter() - start
+        response[SERVER_TIMING_HEADER] = _server_timing(stats, total)
+        self._log(request, response, stats, total)
+        return response
+
+    def _log(self, request: HttpRequest, response: HttpResponseBase, stats: QueryStats, total: float) -> None:
+        repeated = stats.repeated(self.repeat_threshold)
+        level = logging.WARNING if repeated else logging.INFO
+        if not logger.isEnabledFor(level):
+            return
+        match = request.resolver_match
+        data: dict[str, Any] = {
+            'method': request.method,
+            'path': request.path,
+            'view': match.view_name if match is not None else '',
+            'status': response.status_code,
+            'duration_ms': round(total * 1000, 1),
+            'db_ms': round(stats.duration * 1000, 1),
+            'queries': stats.count
+        }
+        if repeated:
+            data['repeated'] = [{'sql': sql[:SQL_PREVIEW_LENGTH], 'count': count} for sql, count in repeated]
+        logger.log(level, json.dumps(data, ensure_ascii=False), extra={
+            'view': data['view'],
+            'duration_ms': data['duration_ms']
+        })
+
+
+def _server_timing(stats: QueryStats, total: float) -> str:
+    return (
+        f'db;dur={stats.duration * 1000:.1f};desc="{stats.count} queries", '
+        f'total;dur={total * 1000:.1f}'
+    )
@@ -268,3 +268,8 @@ def importTooManyItems(limit: int) -> str:
 def trsItemInvalid(detail: str) -> str:
     ''' User-facing message for a malformed TRS constituent entry. '''
     return f'Некорректные данные конституенты в TRS: {detail}'
+
+
+def jobAlreadyFinished() -> str:
+    ''' User-facing message when cancelling a job that has already finished. '''
+    return 'Задача уже завершена'
@@ -0,0 +1,98 @@
+''' Keyset pagination for listings ordered by modification time. '''
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from datetime import datetime
+from typing import Any, Optional
+
+from django.db.models import Model, Q, QuerySet
+from rest_framework.exceptions import ValidationError
+from rest_framework.pagination import BasePagination
+from rest_framework.request import Request
+from rest_framework.response import Response
+
+
+class KeysetPagination(BasePagination):
+    ''' Pages ordered by (key_field, id) descending, position is passed as opaque cursor.
+
+    Unlike offset pagination page cost does not grow with depth and concurrent inserts do not shift pages.
+    Pagination is enabled only when limit is given, otherwise full ordered list is returned.
+    '''
+    key_field = 'time_update'
+    limit_query_param = 'limit'
+    cursor_query_param = 'cursor'
+    max_limit = 500
+
+    def __init__(self) -> None:
+        self.next_cursor: Optional[str] = None
+
+    def paginate_queryset(self, queryset: QuerySet, request: Request, view: Any = None) -> Optional[list]:
+        limit = self._parse_limit(request)
+        if limit is None:
+            return None
+        queryset = queryset.order_by(f'-{self.key_field}', '-pk')
+        position = self._parse_cursor(request)
+        if position is not None:
+            key, pk = position
+            # Redundant range bound lets database seek index instead of filtering from the start
+            queryset = queryset.filter(**{f'{self.key_field}__lte': key}).filter(
+                Q(**{f'{self.key_field}__lt': key}) | Q(**{self.key_field: key, 'pk__lt': pk})
+            )
+        page = list(queryset[:limit + 1])
+        self.next_cursor = self._encode(page[limit - 1]) if len(page) > limit else None
+        return page[:limit]
+
+    def get_paginated_response(self, data: Any) -> Response:
+        return Response({'results': data, 'next': self.next_cursor})
+
+    def get_paginated_response_schema(self, schema: dict) -> dict:
+        return {
+            'type': 'object',
+            'required': ['results', 'next'],
+            'properties': {
+                'results': schema,
+                'next': {'type': 'string', 'nullable': True},
+            },
+        }
+
+    def get_schema_operation_parameters(self, view: Any) -> list[dict]:
+        return [
+            {
+                'name': self.limit_query_param,
+                'required': False,
+                'in': 'query',
+                'description': f'Page size up to {self.max_limit}, enables pagination',
+                'schema': {'type': 'integer'},
+            },
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Position returned as next by previous page',
+                'schema': {'type': 'string'},
+            },
+        ]
+
+    def _parse_limit(self, request: Request) -> Optional[int]:
+        value = request.query_params.get(self.limit_query_param)
+        if value is None:
+            return None
+        try:
+            limit = int(value)
+        except ValueError as exc:
+            raise ValidationError({self.limit_query_param: f'Invalid limit: {value}'}) from exc
+        if limit < 1 or limit > self.max_limit:
+            raise ValidationError({self.limit_query_param: f'Limit must be between 1 and {self.max_limit}'})
+        return limit
+
+    def _parse_cursor(self, request: Request) -> Optional[tuple[datetime, int]]:
+        value = request.query_params.get(self.cursor_query_param, '').strip()
+        if not value:
+            return None
+        try:
+            key, pk = urlsafe_b64decode(value.encode()).decode().split('|')
+            return datetime.fromisoformat(key), int(pk)
+        except ValueError as exc:
+            raise ValidationError({self.cursor_query_param: f'Invalid cursor: {value}'}) from exc
+
+    def _encode(self, instance: Model) -> str:
+        key = getattr(instance, self.key_field)
+        return urlsafe_b64encode(f'{key.isoformat()}|{instance.pk}'.encode()).decode()
@@ -1,8 +1,15 @@
 ''' Utilities for testing. '''
 
 from apps.library.models import LibraryItem
+from apps.rsform.models import Constituenta
 
 
 def response_contains(response, item: LibraryItem) -> bool:
     ''' Check if response contains specific item. '''
     return any(x for x in response.data if x['id'] == item.pk)
+
+
+def cst_position(cst: Constituenta) -> int:
+    ''' Position of constituenta in its schema as seen by clients. '''
+    order = Constituenta.objects.filter(pk=cst.pk).values_list('order', flat=True).get()
+    return Constituenta.objects.filter(schema_id=cst.schema_id, order__lt=order).count()
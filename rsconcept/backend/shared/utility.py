@@ -1,12 +1,29 @@
 ''' Utility functions. '''
 import json
-from io import BytesIO
-from typing import Optional
-from zipfile import BadZipFile, ZipFile
+import struct
+import time
+import zlib
+from io import StringIO
+from typing import Iterator, Optional
+from zipfile import (
+    ZIP64_LIMIT,
+    ZIP_DEFLATED,
+    ZIP_STORED,
+    BadZipFile,
+    ZipFile,
+    ZipInfo,
+    stringCentralDir,
+    stringEndArchive,
+    structCentralDir,
+    structEndArchive
+)
 
 # Hard cap on a single zip member used for TRS/document imports.
 MAX_ZIP_MEMBER_BYTES = 5 * 1024 * 1024
 
+# Size of encoded text passed to compressor and of chunks yielded by streaming writer.
+STREAM_CHUNK_BYTES = 64 * 1024
+
 
 class ZipMemberTooLarge(ValueError):
     ''' Raised when a zip member exceeds ``MAX_ZIP_MEMBER_BYTES``. '''
@@ -40,10 +57,100 @@ def read_zipped_json(
     return result
 
 
-def write_zipped_json(json_data: dict, json_filename: str) -> bytes:
-    ''' Write json JSON to bytes buffer '''
-    content = BytesIO()
-    data = json.dumps(json_data, indent=4, ensure_ascii=False)
-    with ZipFile(content, 'w') as archive:
-        archive.writestr(json_filename, data)
-    return content.getvalue()
+class _ChunkSink:
+    ''' Write-only file collecting zip output until it is drained. Not seekable, so zip uses data descriptors. '''
+
+    def __init__(self) -> None:
+        self.chunks: list[bytes] = []
+        self.size = 0
+
+    def write(self, data: bytes) -> int:
+        self.chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def close(self) -> None:
+        pass
+
+    def drain(self) -> Iterator[bytes]:
+        ''' Take collected output. '''
+        if self.chunks:
+            yield b''.join(self.chunks)
+            self.chunks = []
+            self.size = 0
+
+
+def _encode_json(json_data: dict, compact: bool) -> Iterator[bytes]:
+    encoder = json.JSONEncoder(
+        ensure_ascii=False,
+        indent=None if compact else 4,
+        separators=(',', ':') if compact else None
+    )
+    buffer = StringIO()
+    for text in encoder.iterencode(json_data):
+        buffer.write(text)
+        if buffer.tell() >= STREAM_CHUNK_BYTES:
+            yield buffer.getvalue().encode('utf-8')
+            buffer = StringIO()
+    yield buffer.getvalue().encode('utf-8')
+
+
+def _stream_stored(json_data: dict, json_filename: str, compact: bool, crc: int, size: int) -> Iterator[bytes]:
+    ''' Archive laid out as by ZipFile.writestr: member checksum and size precede data. '''
+    info = ZipInfo(json_filename, date_time=time.localtime(time.time())[:6])
+    info.external_attr = 0o600 << 16
+    info.CRC = crc
+    info.file_size = info.compress_size = size
+    header = info.FileHeader()
+    yield header
+    yield from _encode_json(json_data, compact)
+
+    name = json_filename.encode('utf-8')
+    year, month, day, hour, minute, second = info.date_time
+    directory = struct.pack(
+        structCentralDir, stringCentralDir,
+        info.create_version, info.create_system, info.extract_version, info.reserved,
+        info.flag_bits if name.isascii() else info.flag_bits | 0x800, info.compress_type,
+        hour << 11 | minute << 5 | second // 2, (year - 1980) << 9 | month << 5 | day,
+        crc, size, size, len(name), 0, 0, 0, info.internal_attr, info.external_attr, 0
+    ) + name
+    yield directory + struct.pack(
+        structEndArchive, stringEndArchive,
+        0, 0, 1, 1, len(directory), len(header) + size, 0
+    )
+
+
+def stream_zipped_json(
+    json_data: dict,
+    json_filename: str,
+    *,
+    compress_level: int = 0,
+    compact: bool = False
+) -> Iterator[bytes]:
+    ''' Zip archive with single JSON member produced in chunks.
+
+    JSON text is encoded incrementally, so memory use does not depend on size of output. Level 0 stores
+    member in layout of Exteor files, JSON is encoded twice to write checksum and size ahead of data.
+    Compressed member is followed by data descriptor instead.
+    '''
+    if compress_level <= 0:
+        crc = 0
+        size = 0
+        for chunk in _encode_json(json_data, compact):
+            crc = zlib.crc32(chunk, crc)
+            size += len(chunk)
+        if size <= ZIP64_LIMIT:
+            yield from _stream_stored(json_data, json_filename, compact, crc, size)
+            return
+    sink = _ChunkSink()
+    compression = ZIP_DEFLATED if compress_level > 0 else ZIP_STORED
+    with ZipFile(sink, 'w', compression=compression, compresslevel=compress_level or None) as archive:
+        with archive.open(json_filename, 'w', force_zip64=compress_level <= 0) as member:
+            for chunk in _encode_json(json_data, compact):
+                member.write(chunk)
+                if sink.size >= STREAM_CHUNK_BYTES:
+                    yield from sink.drain()
+    yield from sink.drain()